@@ -0,0 +1,110 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Benchmark comparing building contexts for many entities with
+Sgtk.contexts_from_entities and with a loop over Sgtk.context_from_entity.
+
+The contexts are built for entities of a real Shotgun site, so that the
+measure includes the latency of the Shotgun queries. The context cache is
+cleared before each run.
+
+Usage: python benchmark_contexts_from_entities.py project_path entity_type [max number of entities]
+"""
+
+# system imports
+from __future__ import with_statement
+import os
+import sys
+import time
+
+# add sgtk API
+this_folder = os.path.abspath(os.path.dirname(__file__))
+python_folder = os.path.abspath(os.path.join(this_folder, "..", "python"))
+sys.path.append(python_folder)
+
+# sgtk imports
+import sgtk
+from tank.authentication import ShotgunAuthenticator
+
+
+def _count_queries(sg):
+    """
+    Counts the queries made with a Shotgun connection. find_one calls find,
+    so counting find calls is enough.
+
+    :param sg: Shotgun API instance.
+    :returns: List holding the number of queries, updated as queries are made.
+    """
+    count = [0]
+    find = sg.find
+
+    def counted_find(*args, **kwargs):
+        count[0] += 1
+        return find(*args, **kwargs)
+
+    sg.find = counted_find
+    return count
+
+
+def _run(tk, count, description, build_contexts):
+    """
+    Builds the contexts and prints the time it took and the number of queries made.
+    """
+    tk.context_cache.clear()
+    count[0] = 0
+    start_time = time.time()
+    contexts = build_contexts()
+    duration = time.time() - start_time
+    print("  %-24s %8.3f s %6d queries" % (description, duration, count[0]))
+    return contexts
+
+
+def main():
+    """
+    Runs the benchmark and prints the time taken by each way of building the contexts.
+    """
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    project_path = sys.argv[1]
+    entity_type = sys.argv[2]
+    max_entities = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    sgtk.set_authenticated_user(ShotgunAuthenticator().get_user())
+    tk = sgtk.sgtk_from_path(project_path)
+
+    entity_ids = [
+        entity["id"] for entity in tk.shotgun.find(
+            entity_type,
+            [["project", "is", {"type": "Project", "id": tk.pipeline_configuration.get_project_id()}]],
+            limit=max_entities
+        )
+    ]
+    count = _count_queries(tk.shotgun)
+
+    print("Building contexts for %d %s entities:" % (len(entity_ids), entity_type))
+    loop_contexts = _run(
+        tk, count, "context_from_entity loop",
+        lambda: [tk.context_from_entity(entity_type, entity_id) for entity_id in entity_ids]
+    )
+    batch_contexts = _run(
+        tk, count, "contexts_from_entities",
+        lambda: tk.contexts_from_entities(entity_type, entity_ids)
+    )
+
+    if loop_contexts != batch_contexts:
+        print("The contexts built in a loop and in batch differ!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Micro-benchmark measuring the cost of validating values with each type of
+template key.
+
+Validation runs for every key of every template parsed or applied, so this
+gives an idea of how changes to the template keys affect the whole API.
+
+Usage: python benchmark_template_keys.py [number of iterations]
+"""
+
+# system imports
+from __future__ import with_statement
+import os
+import sys
+import timeit
+
+# add sgtk API
+this_folder = os.path.abspath(os.path.dirname(__file__))
+python_folder = os.path.abspath(os.path.join(this_folder, "..", "python"))
+sys.path.append(python_folder)
+
+# sgtk imports
+from tank.templatekey import StringKey, IntegerKey, SequenceKey, TimestampKey
+
+
+def _get_benchmarks():
+    """
+    Returns the keys and values to benchmark.
+
+    Values include invalid ones, since most values tested while parsing
+    paths are rejected.
+
+    :returns: List of (description, key, values) tuples.
+    """
+    return [
+        ("StringKey", StringKey("name"), ["main", "main_scene"]),
+        ("StringKey alphanumeric", StringKey("name", filter_by="alphanumeric"), ["main", "mainScene"]),
+        ("StringKey regex", StringKey("name", filter_by="^[a-z]+$"), ["main", "scene"]),
+        ("StringKey choices", StringKey("Step", choices=["anm", "comp", "lgt", "fx"]), ["comp", "FX"]),
+        (
+            "StringKey exclusions",
+            StringKey("name", exclusions=["tmp", "test", "scratch"]),
+            ["main", "Test"]
+        ),
+        (
+            "StringKey subset",
+            StringKey("initials", subset="([A-Z])[a-z]* ([A-Z])[a-z]*", subset_format="{1}{0}"),
+            ["John Smith", "Jane Doe"]
+        ),
+        ("IntegerKey", IntegerKey("version"), [3, "12"]),
+        ("IntegerKey strict", IntegerKey("version", format_spec="03"), [3, "003", "1003", "3"]),
+        ("IntegerKey loose", IntegerKey("version", format_spec="03", strict_matching=False), ["3", "003"]),
+        (
+            "SequenceKey",
+            SequenceKey("frame", format_spec="04"),
+            [1001, "1001", "%04d", "FORMAT: #", "%d", "[1001-1010]"]
+        ),
+        ("TimestampKey", TimestampKey("time"), ["2017-06-24-21-20-30", "main"]),
+    ]
+
+
+def main():
+    """
+    Runs the benchmark and prints the cost of validating a value for each key type.
+    """
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print("Validation cost per value, %d iterations:" % iterations)
+    for description, key, values in _get_benchmarks():
+        def run():
+            for value in values:
+                key.validate(value)
+
+        duration = timeit.Timer(run).timeit(number=iterations)
+        print("  %-24s %.2f us" % (description, duration * 1e6 / (iterations * len(values))))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,13 +14,15 @@ I/O Hook which creates folders on disk.
 """
 
 from tank import Hook
+from tank.folder import FolderIOExecutor
+from tank.util import filesystem
 import os
 import sys
 import shutil
 
 class ProcessFolderCreation(Hook):
     
-    def execute(self, items, preview_mode, **kwargs):
+    def execute(self, items, preview_mode, max_workers=1, **kwargs):
         """
         The default implementation creates folders recursively using open permissions.
         
@@ -93,99 +95,122 @@ class ProcessFolderCreation(Hook):
         * "metadata": The raw configuration yaml data associated with symlink yml config file.
         * "path": the path to the symbolic link
         * "target": the target to which the symbolic link should point
+
+        Items are processed with a :class:`~tank.folder.FolderIOExecutor`, which
+        processes an item once the item for its parent folder has been processed.
+        When ``max_workers`` is greater than 1, independent folders are processed
+        concurrently. An item failing doesn't stop the other items from being
+        processed, a :class:`~tank.errors.TankFolderIOError` listing all the failures
+        is raised once every item has been processed.
+
+        :param items: List of item dictionaries, see above.
+        :param preview_mode: True if no I/O should be carried out.
+        :param int max_workers: Number of threads processing the items.
         """
         
         # set the umask so that we get true permissions
         old_umask = os.umask(0)
-        folders = []
         try:
-
-            # loop through our list of items
-            for i in items:
-                
-                action = i.get("action")
-                
-                if action in ["entity_folder", "folder"]:
-                    # folder creation
-                    path = i.get("path")    
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the folder using open permissions
-                            os.makedirs(path, 0777)
-                        folders.append(path)
-                        
-                elif action == "remote_entity_folder":
-                    # Remote folder creation
-                    #
-                    # NOTE! This action happens when another user has created
-                    # a folder on their machine and we are syncing our local path 
-                    # cache to be aware of this folder's existance.
-                    # 
-                    # For a traditional setup, where the project storage is shared,
-                    # there is no need to do I/O for remote folders - these folders
-                    # have already been created on the remote storage so you have access
-                    # to them already. 
-                    # 
-                    # On a setup where each user or group of users is attached to
-                    # different, independendent file storages, which are synced, 
-                    # it may be meaningful to "replay" the remote folder creation
-                    # on the local system. This would result in the same folder
-                    # scaffold on each disk which is storing project data.
-                    # 
-                    # path = i.get("path")    
-                    # if not os.path.exists(path):
-                    #     if not preview_mode:
-                    #         # create the folder using open permissions
-                    #         os.makedirs(path, 0777)
-                    #     folders.append(path)
-                    pass
-                
-                elif action == "symlink":
-                    # symbolic link
-                    if sys.platform == "win32":
-                        # no windows support
-                        continue
-                    path = i.get("path")
-                    target = i.get("target")
-                    # note use of lexists to check existance of symlink
-                    # rather than what symlink is pointing at
-                    if not os.path.lexists(path):
-                        if not preview_mode:
-                            os.symlink(target, path)
-                        folders.append(path)
-
-                elif action == "copy":
-                    # a file copy
-                    source_path = i.get("source_path")
-                    target_path = i.get("target_path")
-                    if not os.path.exists(target_path):
-                        if not preview_mode:
-                            # do a standard file copy
-                            shutil.copy(source_path, target_path)
-                            # set permissions to open
-                            os.chmod(target_path, 0666)
-                        folders.append(target_path)
-    
-                elif action == "create_file":
-                    # create a new file based on content
-                    path = i.get("path")
-                    parent_folder = os.path.dirname(path)
-                    content = i.get("content")
-                    if not os.path.exists(parent_folder) and not preview_mode:
-                        os.makedirs(parent_folder, 0777)
-                    if not os.path.exists(path):
-                        if not preview_mode:
-                            # create the file
-                            fp = open(path, "wb")
-                            fp.write(content)
-                            fp.close()
-                            # and set permissions to open
-                            os.chmod(path, 0666)
-                        folders.append(path)
-                    
-        
+            # folders are created before their content, independent folders are
+            # created concurrently when more than one worker is requested.
+            executor = FolderIOExecutor(max_workers)
+            created_paths = executor.execute(
+                items,
+                lambda item: self._process_item(item, preview_mode)
+            )
         finally:
             # reset umask
             os.umask(old_umask)
 
-        return folders
+        return [path for path in created_paths if path]
+
+    def _process_item(self, item, preview_mode):
+        """
+        Carries out the I/O for a single item. This may be called from several
+        threads at once.
+
+        :param item: Item dictionary, see :meth:`execute`.
+        :param preview_mode: True if no I/O should be carried out.
+        :returns: The path which was created, or None.
+        """
+        action = item.get("action")
+
+        if action in ["entity_folder", "folder"]:
+            # folder creation
+            path = item.get("path")
+            if not os.path.exists(path):
+                if not preview_mode:
+                    # create the folder using open permissions
+                    filesystem.ensure_folder_exists(path, 0777)
+                return path
+
+        elif action == "remote_entity_folder":
+            # Remote folder creation
+            #
+            # NOTE! This action happens when another user has created
+            # a folder on their machine and we are syncing our local path 
+            # cache to be aware of this folder's existance.
+            # 
+            # For a traditional setup, where the project storage is shared,
+            # there is no need to do I/O for remote folders - these folders
+            # have already been created on the remote storage so you have access
+            # to them already. 
+            # 
+            # On a setup where each user or group of users is attached to
+            # different, independendent file storages, which are synced, 
+            # it may be meaningful to "replay" the remote folder creation
+            # on the local system. This would result in the same folder
+            # scaffold on each disk which is storing project data.
+            # 
+            # path = item.get("path")
+            # if not os.path.exists(path):
+            #     if not preview_mode:
+            #         # create the folder using open permissions
+            #         filesystem.ensure_folder_exists(path, 0777)
+            #     return path
+            pass
+
+        elif action == "symlink":
+            # symbolic link
+            if sys.platform == "win32":
+                # no windows support
+                return None
+            path = item.get("path")
+            target = item.get("target")
+            # note use of lexists to check existance of symlink
+            # rather than what symlink is pointing at
+            if not os.path.lexists(path):
+                if not preview_mode:
+                    os.symlink(target, path)
+                return path
+
+        elif action == "copy":
+            # a file copy
+            source_path = item.get("source_path")
+            target_path = item.get("target_path")
+            if not os.path.exists(target_path):
+                if not preview_mode:
+                    # do a standard file copy
+                    shutil.copy(source_path, target_path)
+                    # set permissions to open
+                    os.chmod(target_path, 0666)
+                return target_path
+
+        elif action == "create_file":
+            # create a new file based on content
+            path = item.get("path")
+            parent_folder = os.path.dirname(path)
+            content = item.get("content")
+            if not os.path.exists(parent_folder) and not preview_mode:
+                filesystem.ensure_folder_exists(parent_folder, 0777)
+            if not os.path.exists(path):
+                if not preview_mode:
+                    # create the file
+                    fp = open(path, "wb")
+                    fp.write(content)
+                    fp.close()
+                    # and set permissions to open
+                    os.chmod(path, 0666)
+                return path
+
+        return None
@@ -13,14 +13,17 @@ Classes for the main Sgtk API.
 """
 
 import os
-import glob
 
 from . import folder
 from . import context
+from .context_cache import ContextCache
 from .util import shotgun, yaml_cache
 from .errors import TankError, TankMultipleMatchingTemplatesError
 from .path_cache import PathCache
-from .template import read_templates
+from .template import Template
+from .template_index import TemplateIndex
+from .template_cache import read_templates_and_index
+from .template_walker import TemplateGlobWalker
 from . import constants
 from . import pipelineconfig
 from . import pipelineconfig_utils
@@ -56,7 +59,8 @@ class Sgtk(object):
             self.__pipeline_config = pipelineconfig_factory.from_path(project_path)
             
         try:
-            self.templates = read_templates(self.__pipeline_config)
+            # the index used to speed up template_from_path is cached along with the templates.
+            self.templates, self.__template_index = read_templates_and_index(self.__pipeline_config)
         except TankError as e:
             raise TankError("Could not read templates configuration: %s" % e)
 
@@ -66,6 +70,9 @@ class Sgtk(object):
         # cache of local storages
         self.__cache = {}
 
+        # data resolved when building contexts from entities and paths
+        self.__context_cache = ContextCache(constants.CONTEXT_CACHE_SIZE, constants.CONTEXT_CACHE_TTL)
+
     def __repr__(self):
         return "<Sgtk Core %s@0x%08x Config %s>" % (self.version, id(self), self.__pipeline_config.get_path())
 
@@ -84,6 +91,18 @@ class Sgtk(object):
         """
         return self.__pipeline_config
 
+    @property
+    def context_cache(self):
+        """
+        Cache of the data resolved when building contexts from entities and paths.
+
+        Internal Use Only - We provide no guarantees that this method
+        will be backwards compatible.
+
+        :returns: :class:`~tank.context_cache.ContextCache`
+        """
+        return self.__context_cache
+
     def execute_core_hook(self, hook_name, **kwargs):
         """
         Executes a core level hook, passing it any keyword arguments supplied.
@@ -154,6 +173,20 @@ class Sgtk(object):
         """
         self.__cache[cache_key] = value
 
+    def _get_template_index(self):
+        """
+        Returns the index of the current templates, rebuilding it if the templates
+        have changed since it was last built.
+
+        Internal Use Only - We provide no guarantees that this method
+        will be backwards compatible.
+
+        :returns: :class:`~tank.template_index.TemplateIndex` instance.
+        """
+        if self.__template_index is None or not self.__template_index.is_current(self.templates):
+            self.__template_index = TemplateIndex(self.templates)
+        return self.__template_index
+
     ################################################################################################
     # properties
 
@@ -299,9 +332,11 @@ class Sgtk(object):
         :raises: :class:`TankError`
         """
         try:
-            self.templates = read_templates(self.__pipeline_config)
+            self.templates, self.__template_index = read_templates_and_index(self.__pipeline_config)
         except TankError as e:
             raise TankError("Templates could not be reloaded: %s" % e)
+        Template.clear_apply_fields_cache()
+        self.__context_cache.clear()
 
     def list_commands(self):
         """
@@ -356,8 +391,9 @@ class Sgtk(object):
         :param path: Path to match against a template
         :returns: :class:`TemplatePath` or None if no match could be found.
         """
+        # only run a full parse for the templates which can possibly match the path.
         matched_templates = []
-        for key, template in self.templates.items():
+        for template in self._get_template_index().get_candidates(path):
             if template.validate(path):
                 matched_templates.append(template)
 
@@ -372,13 +408,67 @@ class Sgtk(object):
             for template in matched_templates:
                 matched_fields.append(template.get_fields(path))
 
-            msg = "%d templates are matching the path '%s'.\n" % (len(matched_templates), path)
-            msg += "The overlapping templates are:\n"
-            for fields, template in zip(matched_fields, matched_templates):
-                msg += "%s\n%s\n" % (template, fields)
-            raise TankMultipleMatchingTemplatesError(msg)
+            raise TankMultipleMatchingTemplatesError(
+                _get_multiple_matches_message(path, matched_templates, matched_fields)
+            )
+
+    def templates_and_fields_from_paths(self, paths):
+        """
+        Finds the templates matching a list of paths and extracts their fields.
+
+        This is equivalent to calling :meth:`template_from_path` followed by
+        :meth:`Template.get_fields` for each path, but is optimized for large
+        numbers of paths, for example when scanning render outputs::
+
+            >>> import sgtk
+            >>> tk = sgtk.sgtk_from_path("/studio/project_root")
+            >>> tk.templates_and_fields_from_paths(["/studio/my_proj/assets/Car/Anim/work"])
+            [(<Sgtk TemplatePath maya_asset_project: assets/%(Asset)s/%(Step)s/work>,
+              {'Asset': 'Car', 'Step': 'Anim'},
+              None)]
+
+        Paths are grouped by folder so that candidate templates are only looked up
+        once per folder and each path is only parsed once per candidate template.
+        Rather than raising on the first path matching several templates, the
+        error is returned alongside the results for that path.
+
+        :param paths: List of paths to match against templates.
+        :returns: List of (template, fields, error) tuples in the same order as the
+                  paths. The template and fields are None if no template matches
+                  the path or if several templates match it, in which case the error
+                  contains a message describing the overlapping templates. Otherwise
+                  the error is None.
+        """
+        candidates = self._get_template_index().get_candidates_for_paths(paths)
+
+        results = {}
+        for path in paths:
+            if path in results:
+                continue
 
-    def paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False):
+            matched_templates = []
+            matched_fields = []
+            for template in candidates[path]:
+                fields = template.validate_and_get_fields(path)
+                if fields is not None:
+                    matched_templates.append(template)
+                    matched_fields.append(fields)
+
+            if len(matched_templates) == 0:
+                results[path] = (None, None, None)
+            elif len(matched_templates) == 1:
+                results[path] = (matched_templates[0], matched_fields[0], None)
+            else:
+                results[path] = (
+                    None,
+                    None,
+                    _get_multiple_matches_message(path, matched_templates, matched_fields)
+                )
+
+        return [results[path] for path in paths]
+
+    def paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False,
+                            max_workers=1):
         """
         Finds paths that match a template using field values passed.
 
@@ -424,9 +514,58 @@ class Sgtk(object):
         :type  skip_keys: List of key names
         :param skip_missing_optional_keys: Specify if optional keys should be skipped if they 
                                         aren't found in the fields collection
+        :param int max_workers: Number of threads used to list the folders of each level of
+                                the template. Folders are listed sequentially if this is 1.
         :returns: Matching file paths
         :rtype: List of strings.
         """
+        return list(
+            self.iter_paths_from_template(
+                template, fields, skip_keys, skip_missing_optional_keys, max_workers
+            )
+        )
+
+    def iter_paths_from_template(self, template, fields, skip_keys=None, skip_missing_optional_keys=False,
+                                 max_workers=1):
+        """
+        Finds paths that match a template using field values passed.
+
+        This works exactly like :meth:`paths_from_template` but returns a generator
+        yielding paths as they are found, so that results can be displayed
+        incrementally. The file system is searched one level of the template at a
+        time and folders whose name isn't valid for the template are not searched.
+
+        :param template: Template against whom to match.
+        :type  template: :class:`TemplatePath`
+        :param fields: Fields and values to use.
+        :type  fields: Dictionary
+        :param skip_keys: Keys whose values should be ignored from the fields parameter.
+        :type  skip_keys: List of key names
+        :param skip_missing_optional_keys: Specify if optional keys should be skipped if they
+                                        aren't found in the fields collection
+        :param int max_workers: Number of threads used to list the folders of each level of
+                                the template. Folders are listed sequentially if this is 1.
+        :returns: Generator yielding each matching file path once.
+        """
+        return self._iter_paths_from_template(
+            template, fields, skip_keys, skip_missing_optional_keys, max_workers, unique=True
+        )
+
+    def _iter_paths_from_template(self, template, fields, skip_keys, skip_missing_optional_keys,
+                                  max_workers, unique):
+        """
+        Finds paths that match a template using field values passed, see
+        :meth:`iter_paths_from_template`.
+
+        Internal Use Only - We provide no guarantees that this method
+        will be backwards compatible.
+
+        :param bool unique: If True, paths which match several key sets of the
+                            template are only yielded once. The paths found are
+                            only kept in memory for this when the template has
+                            several key sets to search.
+        :returns: Generator yielding matching file paths.
+        """
         skip_keys = skip_keys or []
         if isinstance(skip_keys, basestring):
             skip_keys = [skip_keys]
@@ -441,10 +580,10 @@ class Sgtk(object):
                 skip_keys.append(key)
             local_fields[key] = "*"
             
-        # iterate for each set of keys in the template:
-        found_files = set()
+        # build the search string for each set of keys in the template:
+        searches = []
         globs_searched = set()
-        for keys in template._keys:
+        for index, keys in enumerate(template._keys):
             # create fields and skip keys with those that 
             # are relevant for this key set:
             current_local_fields = local_fields.copy()
@@ -475,10 +614,25 @@ class Sgtk(object):
                 continue
             globs_searched.add(glob_str)
             
-            # Find all files which are valid for this key set
-            found_files.update([found_file for found_file in glob.iglob(glob_str) if template.validate(found_file)])
-                    
-        return list(found_files) 
+            searches.append((glob_str, template._definitions[index], keys))
+
+        # a single search never returns the same file twice, the files found
+        # only need to be remembered when several searches can return them.
+        found_files = set() if unique and len(searches) > 1 else None
+        walker = TemplateGlobWalker(template, max_workers)
+        try:
+            for glob_str, definition, keys in searches:
+                # Find all files which are valid for this key set
+                for found_file in walker.iter_paths(glob_str, definition, keys):
+                    if not template.validate(found_file):
+                        continue
+                    if found_files is not None:
+                        if found_file in found_files:
+                            continue
+                        found_files.add(found_file)
+                    yield found_file
+        finally:
+            walker.close()
 
 
     def abstract_paths_from_template(self, template, fields):
@@ -537,6 +691,27 @@ class Sgtk(object):
         :returns: A list of paths whose abstract keys use their abstract(default) value unless
                   a value is specified for them in the fields parameter.
         """
+        return list(self.iter_abstract_paths_from_template(template, fields))
+
+    def iter_abstract_paths_from_template(self, template, fields, max_workers=1):
+        """
+        Returns abstract paths based on a template.
+
+        This works exactly like :meth:`abstract_paths_from_template` but returns a
+        generator yielding each abstract path as soon as a file matching it is found.
+        Only the abstract paths already yielded are kept in memory, so memory usage
+        depends on the number of distinct sequences rather than on the number of
+        files matching them.
+
+        :param template: Template with which to search
+        :type  template: :class:`TemplatePath`
+        :param fields: Mapping of keys to values with which to assemble the abstract path.
+        :type fields: dictionary
+        :param int max_workers: Number of threads used to list the folders of each level of
+                                the template. Folders are listed sequentially if this is 1.
+
+        :returns: Generator yielding each abstract path once.
+        """
         search_template = template
 
         # the logic is as follows:
@@ -565,8 +740,12 @@ class Sgtk(object):
         if skip_leaf_level:
             search_template = template.parent
 
-        # now carry out a regular search based on the template
-        found_files = self.paths_from_template(search_template, fields)
+        # now carry out a regular search based on the template. Files found by several
+        # key sets collapse to the same abstract path, so they don't need to be
+        # deduplicated here.
+        found_files = self._iter_paths_from_template(
+            search_template, fields, None, False, max_workers, unique=False
+        )
 
         st_abstract_key_names = [k.name for k in search_template.keys.values() if k.is_abstract]
 
@@ -599,9 +778,9 @@ class Sgtk(object):
 
             # now we have all the fields we need to compose the full template
             abstract_path = template.apply_fields(cur_fields)
-            abstract_paths.add(abstract_path)
-
-        return list(abstract_paths)
+            if abstract_path not in abstract_paths:
+                abstract_paths.add(abstract_path)
+                yield abstract_path
 
 
     def paths_from_entity(self, entity_type, entity_id):
@@ -670,17 +849,49 @@ class Sgtk(object):
         """
         return context.from_path(self, path, previous_context)
 
-    def context_from_entity(self, entity_type, entity_id):
+    def context_from_entity(self, entity_type, entity_id, lazy=False):
         """
         Factory method that constructs a context object from a Shotgun entity.
 
+        .. note:: The data resolved for an entity is cached by this instance for a
+                  few minutes, so that building the same context repeatedly doesn't
+                  query Shotgun each time. The cache is cleared by
+                  :meth:`synchronize_filesystem_structure` and :meth:`reload_templates`.
+
+        In lazy mode, the context is returned straight away and the entities are
+        only retrieved the first time one of its fields is accessed. The entities
+        of all the lazy contexts which were not accessed yet are then retrieved
+        together, so that building many contexts, e.g. for the rows of a view,
+        and only accessing some of them doesn't query Shotgun for each context.
+
         :param entity_type: The name of the entity type.
         :param entity_id: Shotgun id of the entity upon which to base the context.
+        :param bool lazy: If True, the entities are only retrieved when needed.
         :returns: :class:`Context`
         """
-        return context.from_entity(self, entity_type, entity_id)
+        return context.from_entity(self, entity_type, entity_id, lazy=lazy)
+
+    def contexts_from_entities(self, entity_type, entity_ids):
+        """
+        Factory method that constructs context objects for several Shotgun entities
+        of the same type.
+
+        This returns the same contexts as calling :meth:`context_from_entity` for each
+        entity, but the entities are retrieved from Shotgun with a handful of queries
+        rather than with queries for each entity, which is much faster when building
+        contexts for many entities, e.g. for a farm submission::
+
+            >>> contexts = tk.contexts_from_entities("Task", [1234, 1235, 1236])
+            >>> [str(ctx) for ctx in contexts]
+            ['Anm, Shot ABC_001', 'Lgt, Shot ABC_001', 'Anm, Shot ABC_002']
+
+        :param entity_type: The name of the entity type.
+        :param entity_ids: List of Shotgun ids of the entities upon which to base the contexts.
+        :returns: List of :class:`Context`, in the order of the entity ids.
+        """
+        return context.from_entities(self, entity_type, entity_ids)
 
-    def context_from_entity_dictionary(self, entity_dictionary):
+    def context_from_entity_dictionary(self, entity_dictionary, lazy=False):
         """
         Derives a context from a shotgun entity dictionary. This will try to use any
         linked information available in the dictionary where possible but if it can't 
@@ -721,11 +932,25 @@ class Sgtk(object):
              "entity": {"type": "Shot", "id": 456, "name": "Shot 001"}
             }
 
+        In lazy mode, the entities which are missing from the dictionary are only
+        retrieved from Shotgun the first time they are accessed, the way it is done
+        by :meth:`context_from_entity`. Accessing the entities found in the dictionary
+        never results in a Shotgun query::
+
+            >>> ctx = tk.context_from_entity_dictionary(
+            ...     {"type": "Shot", "id": 456, "code": "Shot 001"}, lazy=True
+            ... )
+            >>> ctx.entity  # no query
+            {'type': 'Shot', 'id': 456, 'name': 'Shot 001'}
+            >>> ctx.project  # the project is retrieved
+            {'type': 'Project', 'id': 123, 'name': 'My Project'}
+
         :param entity_dictionary:   A Shotgun entity dictionary containing at least 'type'
                                     and 'id'. See examples above.
+        :param bool lazy: If True, the missing entities are only retrieved when needed.
         :returns: :class:`Context`
         """
-        return context.from_entity_dictionary(self, entity_dictionary)
+        return context.from_entity_dictionary(self, entity_dictionary, lazy=lazy)
 
     def synchronize_filesystem_structure(self, full_sync=False):
         """
@@ -740,9 +965,12 @@ class Sgtk(object):
                           By default, the sync is incremental.
         :returns: List of folders that were synchronized.
         """
-        return folder.synchronize_folders(self, full_sync)
+        folders = folder.synchronize_folders(self, full_sync)
+        # contexts are resolved from the path cache which was just updated.
+        self.__context_cache.clear()
+        return folders
 
-    def create_filesystem_structure(self, entity_type, entity_id, engine=None):
+    def create_filesystem_structure(self, entity_type, entity_id, engine=None, max_workers=1, batched=False):
         """
         Create folders and associated data on disk to reflect branches in the project
         tree related to a specific entity.
@@ -767,26 +995,58 @@ class Sgtk(object):
         :param entity_id: Shotgun id
         :param engine: Optional engine name to indicate that a second, engine specific
                        folder creation pass should be executed for a particular engine.
+        :param int max_workers: Number of threads the folder creation hook may use to
+                                create independent folders concurrently, which helps
+                                on high latency storage.
+        :param bool batched: If True, Shotgun is queried once for each level of the folder
+                             configuration rather than once for each entity, which speeds
+                             up creating folders for many entities at once.
         :returns: The number of folders processed
         """
         folders = folder.process_filesystem_structure(self,
                                                       entity_type,
                                                       entity_id,
                                                       False,
-                                                      engine)
+                                                      engine,
+                                                      max_workers,
+                                                      batched)
         return len(folders)
 
-    def preview_filesystem_structure(self, entity_type, entity_id, engine=None):
+    def preview_filesystem_structure(self, entity_type, entity_id, engine=None, diff=False, max_workers=1):
         """
         Previews folders that would be created by :meth:`create_filesystem_structure`.
 
+        By default, all the paths computed for the entities are returned, including
+        the ones which already exist. In diff mode, the paths are checked against
+        the file system and the path cache, and only the changes the folder creation
+        would make are returned::
+
+            >>> tk.preview_filesystem_structure("Shot", shot_ids, diff=True, max_workers=8)
+            {'create': ['/mnt/projects/chasing_the_light/sequences/AA/AA001/comp'],
+             'register': [],
+             'counts': {'create': 1, 'register': 0, 'unchanged': 1203, 'total': 1204}}
+
         :param entity_type: Shotgun entity type
         :param entity_id: Shotgun id
         :param engine: Optional engine name to indicate that a second, engine specific
                        folder creation pass should be executed for a particular engine.
         :type engine: String.
-        :returns: List of paths that would be created
+        :param bool diff: If True, return only the changes the folder creation would make.
+        :param int max_workers: Number of threads checking whether the paths exist on
+                                disk in diff mode.
+        :returns: List of paths that would be created or, in diff mode, a dictionary
+                  with the list of paths which don't exist on disk under the "create"
+                  key, the list of paths missing from the path cache under the
+                  "register" key and the number of paths of each kind under the
+                  "counts" key.
         """
+        if diff:
+            return folder.preview_filesystem_structure_diff(self,
+                                                           entity_type,
+                                                           entity_id,
+                                                           engine,
+                                                           max_workers)
+
         folders = folder.process_filesystem_structure(self,
                                                       entity_type,
                                                       entity_id,
@@ -798,6 +1058,22 @@ class Sgtk(object):
 ##########################################################################################
 # module methods
 
+def _get_multiple_matches_message(path, matched_templates, matched_fields):
+    """
+    Builds the message reported when several templates are matching a path.
+
+    :param path: Path matched by the templates.
+    :param matched_templates: List of templates matching the path.
+    :param matched_fields: List of fields found by each template.
+    :returns: Error message.
+    """
+    msg = "%d templates are matching the path '%s'.\n" % (len(matched_templates), path)
+    msg += "The overlapping templates are:\n"
+    for fields, template in zip(matched_fields, matched_templates):
+        msg += "%s\n%s\n" % (template, fields)
+    return msg
+
+
 def sgtk_from_path(path):
     """
     Creates a Toolkit Core API instance based on a path to a configuration
@@ -282,15 +282,17 @@ class ShotgunSamlUser(ShotgunUser):
             return False
 
 
-def serialize_user(user):
+def serialize_user(user, use_json=False):
     """
     Serializes a user. Meant to be consumed by deserialize.
 
     :param user: User object that needs to be serialized.
+    :param bool use_json: If True, the user is serialized to JSON rather than pickled.
+        JSON payloads can be deserialized without unpickling untrusted data.
 
     :returns: The payload representing the user.
     """
-    return user_impl.serialize_user(user.impl)
+    return user_impl.serialize_user(user.impl, use_json)
 
 
 def deserialize_user(payload):
@@ -298,7 +300,7 @@ def deserialize_user(payload):
     Converts a payload produced by serialize into any of the ShotgunUser
     derived instance.
 
-    :param payload: Pickled dictionary of values
+    :param payload: JSON or pickled dictionary of values
 
     :returns: A ShotgunUser derived instance.
     """
@@ -19,6 +19,7 @@ at any point.
 --------------------------------------------------------------------------------
 """
 
+import json
 import cPickle
 import httplib
 from .shotgun_wrapper import ShotgunWrapper
@@ -523,20 +524,23 @@ __factories = {
 }
 
 
-def serialize_user(user):
+def serialize_user(user, use_json=False):
     """
     Serializes a user. Meant to be consumed by deserialize.
 
     :param user: User object that needs to be serialized.
+    :param bool use_json: If True, the user is serialized to JSON rather than pickled.
 
     :returns: The payload representing the user.
     """
-    # Pickle the dictionary and inject the user type in the payload so we know
-    # how to unpickle the user.
-    return cPickle.dumps({
+    # Inject the user type in the payload so we know how to restore the user.
+    user_dict = {
         "type": user.__class__.__name__,
         "data": user.to_dict()
-    })
+    }
+    if use_json:
+        return json.dumps(user_dict, separators=(",", ":"))
+    return cPickle.dumps(user_dict)
 
 
 def deserialize_user(payload):
@@ -544,12 +548,20 @@ def deserialize_user(payload):
     Converts a payload produced by serialize into any of the ShotgunUser
     derived instance.
 
-    :params payload: Pickled dictionary of values
+    :params payload: JSON or pickled dictionary of values
 
     :returns: A ShotgunUser derived instance.
     """
-    # Unpickle the dictionary
-    user_dict = cPickle.loads(payload)
+    if is_json_payload(payload):
+        user_dict = json.loads(payload)
+        # the user classes expect utf-8 encoded strings.
+        user_dict["data"] = dict(
+            (str(key), value.encode("utf-8") if isinstance(value, unicode) else value)
+            for key, value in user_dict.get("data", {}).iteritems()
+        )
+    else:
+        # Unpickle the dictionary
+        user_dict = cPickle.loads(payload)
 
     # Find which user type we have
     global __factories
@@ -559,3 +571,14 @@ def deserialize_user(payload):
         raise Exception("Could not deserialize Shotgun user. Invalid user type: %s" % user_dict)
     # Instantiate the user object.
     return factory(user_dict["data"])
+
+
+def is_json_payload(payload):
+    """
+    Tells if a payload produced by serialize_user is JSON rather than pickled.
+
+    :param payload: Payload representing a user.
+
+    :returns: True if the payload is JSON.
+    """
+    return payload.startswith("{")
@@ -1029,7 +1029,12 @@ class ToolkitManager(object):
         if entity is None:
             ctx = tk.context_empty()
         else:
-            ctx = tk.context_from_entity_dictionary(entity)
+            # only retrieve what the engine startup needs from the entity,
+            # if the core supports it.
+            if "lazy" in inspect.getargspec(tk.context_from_entity_dictionary).args:
+                ctx = tk.context_from_entity_dictionary(entity, lazy=True)
+            else:
+                ctx = tk.context_from_entity_dictionary(entity)
 
         self._report_progress(progress_callback, self._LAUNCHING_ENGINE_RATE, "Launching Engine...")
         log.debug("Attempting to start engine %s for context %r" % (engine_name, ctx))
@@ -8,6 +8,8 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights 
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import json
+
 from .. import folder
 from ..errors import TankError
 from .action_base import Action
@@ -98,6 +100,169 @@ class PreviewFoldersAction(Action):
             log.info(" - %s" % x)
         log.info("")
         log.info("In total, %s folders were processed." % len(f))
-        log.info("Note - this was a preview and no actual folders were created.")            
+        log.info("Note - this was a preview and no actual folders were created.")
+
+
+class BulkCreateFoldersAction(Action):
+    """
+    Action for creating folders for a large number of entities, in chunks which
+    are processed concurrently, with the possibility to resume an interrupted run.
+    """
+    def __init__(self):
+        Action.__init__(self,
+                        "bulk_folders",
+                        Action.TK_INSTANCE,
+                        ("Creates folders on disk for many entities of a project at once, "
+                         "for example 'tank bulk_folders Shot --max_workers=4' to create "
+                         "folders for all the shots of the project."),
+                        "Production")
+
+        # this method can be executed via the API
+        self.supports_api = True
+        self.parameters = {}
+        self.parameters["entity_type"] = {
+            "description": "Shotgun entity type to create folders for.",
+            "type": "str"
+        }
+        self.parameters["entity_ids"] = {
+            "description": "Ids of the entities to create folders for. Defaults to the entities matching the filters.",
+            "default": None,
+            "type": "list"
+        }
+        self.parameters["filters"] = {
+            "description": "Shotgun filters selecting the entities of the project to create folders for.",
+            "default": None,
+            "type": "list"
+        }
+        self.parameters["chunk_size"] = {
+            "description": "Number of entities processed by each folder creation request.",
+            "default": 100,
+            "type": "int"
+        }
+        self.parameters["max_workers"] = {
+            "description": "Number of folder creation requests processed concurrently.",
+            "default": 1,
+            "type": "int"
+        }
+        self.parameters["checkpoint"] = {
+            "description": ("Path to a file recording the progress of the folder creation. If the file "
+                            "exists, the folder creation it was written for is resumed."),
+            "default": None,
+            "type": "str"
+        }
+        self.parameters["return_value"] = {
+            "description": ("Dictionary with the number of entities and folders processed, the failures "
+                            "and the throughput of the folder creation."),
+            "type": "dict"
+        }
+
+    def run_noninteractive(self, log, parameters):
+        """
+        Tank command API accessor.
+
+        :param log: std python logger
+        :param parameters: dictionary with tank command parameters
+        """
+        computed_params = self._validate_parameters(parameters)
+        return self._run(
+            log,
+            computed_params["entity_type"],
+            computed_params["entity_ids"],
+            computed_params["filters"],
+            computed_params["chunk_size"],
+            computed_params["max_workers"],
+            computed_params["checkpoint"]
+        )
+
+    def run_interactive(self, log, args):
+        """
+        Tank command accessor
 
+        :param log: std python logger
+        :param args: command line args
+        """
+        syntax = ("Syntax: bulk_folders entity_type [id id ...] [--filters=json_filters] "
+                  "[--chunk_size=100] [--max_workers=1] [--checkpoint=path]")
+        if not args or args[0].startswith("--"):
+            raise TankError(syntax)
+
+        entity_type = args[0]
+        entity_ids = []
+        options = {"filters": None, "chunk_size": "100", "max_workers": "1", "checkpoint": None}
+        for arg in args[1:]:
+            if arg.startswith("--"):
+                name, _, value = arg[2:].partition("=")
+                if name not in options or not value:
+                    raise TankError(syntax)
+                options[name] = value
+            elif arg.isdigit():
+                entity_ids.append(int(arg))
+            else:
+                raise TankError(syntax)
+
+        filters = None
+        if options["filters"]:
+            try:
+                filters = json.loads(options["filters"])
+            except ValueError as e:
+                raise TankError("Invalid filters %s: %s" % (options["filters"], e))
+
+        try:
+            chunk_size = int(options["chunk_size"])
+            max_workers = int(options["max_workers"])
+        except ValueError:
+            raise TankError(syntax)
+
+        return self._run(
+            log,
+            entity_type,
+            entity_ids or None,
+            filters,
+            chunk_size,
+            max_workers,
+            options["checkpoint"]
+        )
+
+    def _run(self, log, entity_type, entity_ids, filters, chunk_size, max_workers, checkpoint):
+        """
+        Actual business logic for command
+
+        :param log: logger
+        :param entity_type: Shotgun entity type to create folders for.
+        :param entity_ids: List of entity ids or None to use the filters.
+        :param filters: Shotgun filters or None.
+        :param chunk_size: Number of entities processed by each folder creation request.
+        :param max_workers: Number of folder creation requests processed concurrently.
+        :param checkpoint: Path to the checkpoint file or None.
+        :returns: Dictionary returned by :meth:`~tank.folder.process_filesystem_structure_bulk`.
+        """
+        log.info("Creating folders, stand by...")
+        result = folder.process_filesystem_structure_bulk(
+            self.tk,
+            entity_type,
+            entity_ids=entity_ids,
+            filters=filters,
+            chunk_size=chunk_size,
+            max_workers=max_workers,
+            checkpoint_path=checkpoint
+        )
+
+        log.info("")
+        if result["skipped_entities"]:
+            log.info("%d entities were processed before the folder creation was resumed."
+                     % result["skipped_entities"])
+        log.info("In total, folders were processed for %d entities and %d folders were processed."
+                 % (result["entities"], result["folders"]))
+        log.info("Throughput: %.1f entities/s, %.1f folders/s (%.1f seconds)."
+                 % (result["entities_per_second"], result["folders_per_second"], result["duration"]))
+
+        if result["failures"]:
+            log.info("")
+            for failure in result["failures"]:
+                log.error("Could not create folders for %s ids %s: %s"
+                          % (entity_type, failure["entity_ids"], failure["error"]))
+            if checkpoint:
+                log.info("Run the command again with --checkpoint=%s to retry the failed entities." % checkpoint)
+        log.info("")
 
+        return result
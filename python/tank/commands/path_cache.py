@@ -12,7 +12,10 @@
 Methods relating to the path cache
 """
 
+import os
+
 from ..errors import TankError
+from .. import constants
 from .. import path_cache
 from .. import folder
 
@@ -101,6 +104,113 @@ class SynchronizePathCache(Action):
                       "the 'upgrade_folders' tank command.")
 
 
+class PathCacheSnapshotAction(Action):
+    """
+    Tank command to export the path cache to a snapshot file, or to replace
+    the path cache with a snapshot. Snapshots are used to populate the path
+    cache of new machines without doing a full sync with Shotgun.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        Action.__init__(self,
+                        "path_cache",
+                        Action.TK_INSTANCE,
+                        ("Exports the local path cache to a snapshot folder, or imports it from one. "
+                         "New path caches are populated from the folder pointed at by the %s "
+                         "environment variable." % constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER),
+                        "Admin")
+
+        # this method can be executed via the API
+        self.supports_api = True
+        self.parameters = {}
+        self.parameters["mode"] = {
+            "description": "Either 'export' or 'import'.",
+            "type": "str"
+        }
+        self.parameters["snapshot_folder"] = {
+            "description": ("Folder holding the snapshots. Defaults to the folder pointed "
+                            "at by the %s environment variable." % constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER),
+            "default": None,
+            "type": "str"
+        }
+        self.parameters["return_value"] = {
+            "description": "Path to the snapshot file.",
+            "type": "str"
+        }
+
+    def run_noninteractive(self, log, parameters):
+        """
+        Tank command API accessor.
+        Called when someone runs a tank command through the core API.
+
+        :param log: std python logger
+        :param parameters: dictionary with tank command parameters
+        """
+        # validate params and seed default values
+        computed_params = self._validate_parameters(parameters)
+        return self._run(log, computed_params["mode"], computed_params["snapshot_folder"])
+
+    def run_interactive(self, log, args):
+        """
+        Tank command accessor
+
+        :param log: std python logger
+        :param args: command line args
+        """
+        if len(args) not in (1, 2) or args[0] not in ("export", "import"):
+            raise TankError("Syntax: path_cache export|import [snapshot_folder]")
+
+        snapshot_folder = args[1] if len(args) == 2 else None
+        return self._run(log, args[0], snapshot_folder)
+
+    def _run(self, log, mode, snapshot_folder):
+        """
+        Actual business logic for command
+
+        :param log: logger
+        :param mode: 'export' or 'import'
+        :param snapshot_folder: Folder holding the snapshots or None to use the default one.
+        :returns: Path to the snapshot file.
+        """
+        if mode not in ("export", "import"):
+            raise TankError("Invalid mode '%s', expected 'export' or 'import'." % mode)
+
+        if not self.tk.pipeline_configuration.get_shotgun_path_cache_enabled():
+            raise TankError("Looks like this project doesn't synchronize its folders with Shotgun! "
+                            "Path cache snapshots are only supported for projects synchronizing "
+                            "their folders. If you want to turn on synchronization for this project, "
+                            "run the 'upgrade_folders' tank command.")
+
+        snapshot_folder = snapshot_folder or os.environ.get(constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER)
+        if not snapshot_folder:
+            raise TankError("No snapshot folder specified and the %s environment variable is not set."
+                            % constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER)
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            snapshot_path = pc.get_snapshot_path(snapshot_folder)
+            if mode == "export":
+                # make sure the snapshot is as recent as possible.
+                log.info("Ensuring that the local folder representation is up to date...")
+                pc.synchronize()
+                log.info("Exporting the path cache to %s..." % snapshot_path)
+                pc.export_snapshot(snapshot_path)
+            else:
+                log.info("Importing the path cache from %s..." % snapshot_path)
+                pc.import_snapshot(snapshot_path)
+                # catch up with the changes made since the snapshot was taken.
+                log.info("Synchronizing with the changes made since the snapshot was taken...")
+                pc.synchronize()
+        finally:
+            pc.close()
+
+        log.info("All done!")
+        return snapshot_path
+
+
 class PathCacheMigrationAction(Action):
     """
     Tank command for migrating an existing project to use the new FilesystemLocation
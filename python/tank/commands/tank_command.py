@@ -72,11 +72,13 @@ BUILT_IN_ACTIONS = [setup_project.SetupProjectAction,
                     update.AppUpdatesAction,
                     folders.CreateFoldersAction,
                     folders.PreviewFoldersAction,
+                    folders.BulkCreateFoldersAction,
                     move_pc.MovePCAction,
                     pc_overview.PCBreakdownAction,
                     migrate_entities.MigratePublishedFileEntitiesAction,
                     path_cache.SynchronizePathCache,
                     path_cache.PathCacheMigrationAction,
+                    path_cache.PathCacheSnapshotAction,
                     unregister_folders.UnregisterFoldersAction,
                     clone_configuration.CloneConfigAction,
                     copy_apps.CopyAppsAction,
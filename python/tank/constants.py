@@ -67,6 +67,22 @@ TEMPLATE_PATH_SECTION = "paths"
 # the string section in a templates file
 TEMPLATE_STRING_SECTION = "strings"
 
+# maximum number of paths resolved by Template.apply_fields kept in memory
+TEMPLATE_APPLY_FIELDS_CACHE_SIZE = 1024
+
+# maximum number of path cache lookup results kept in memory
+PATH_CACHE_LOOKUP_CACHE_SIZE = 2048
+
+# number of seconds between checks for path cache changes made by other processes
+# before path cache lookup results kept in memory are used
+PATH_CACHE_LOOKUP_VALIDATION_INTERVAL = 2
+
+# maximum number of contexts resolved from entities and paths kept in memory by a tk instance
+CONTEXT_CACHE_SIZE = 1024
+
+# number of seconds a context resolved from an entity or a path is kept in memory
+CONTEXT_CACHE_TTL = 300
+
 # a human readable explanation of the above. For error messages.
 VALID_TEMPLATE_KEY_NAME_DESC = "letters, numbers, underscore, space and period"
 
@@ -87,3 +103,12 @@ SUPPORT_EMAIL = "support@shotgunsoftware.com"
 
 # environment variable to hold external pipeline config data
 ENV_VAR_EXTERNAL_PIPELINE_CONFIG_DATA = "SGTK_EXT_CONFIG_DATA"
+
+# environment variable pointing at a folder holding path cache snapshots. New
+# path cache databases are seeded from these instead of doing a full sync.
+ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER = "SGTK_PATH_CACHE_SNAPSHOT_FOLDER"
+
+# environment variable that if set to 1, switches path cache databases stored on local
+# file systems to write-ahead logging, so that lookups don't wait for writes. If set
+# to 0, switches them back to the default journal mode.
+ENV_VAR_PATH_CACHE_WAL = "SGTK_PATH_CACHE_WAL"
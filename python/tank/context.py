@@ -14,8 +14,11 @@ Management of the current context, e.g. the current shotgun entity/step/task.
 """
 
 import os
+import json
 import pickle
 import copy
+import threading
+import functools
 
 from tank_vendor import yaml
 from . import authentication
@@ -27,6 +30,27 @@ from . import constants
 from .errors import TankError, TankContextDeserializationError
 from .path_cache import PathCache
 from .template import TemplatePath
+from . import LogManager
+
+log = LogManager.get_logger(__name__)
+
+# name of the tk instance cache item holding the entities of the contexts created
+# in lazy mode which were not resolved yet.
+LAZY_CONTEXT_BATCH_CACHE_KEY = "lazy_context_batch"
+
+# version of the JSON serialization format, bump it when the format changes.
+JSON_SERIALIZATION_FORMAT_VERSION = 1
+
+# protects the creation of the batches of lazy contexts
+_g_lazy_batch_lock = threading.Lock()
+
+# protects the retrieval of the fields of lazy contexts, which can be read from
+# several threads at once.
+_g_lazy_fields_lock = threading.RLock()
+
+# maximum number of ids passed to a single Shotgun query when building
+# contexts for many entities.
+SHOTGUN_QUERY_BATCH_SIZE = 500
 
 
 class Context(object):
@@ -78,18 +102,33 @@ class Context(object):
         self.__additional_entities = additional_entities or []
         self.__source_entity = source_entity
         self._entity_fields_cache = {}
+        # contexts created in lazy mode retrieve the fields which were not known
+        # when they were created the first time one of these fields is accessed.
+        self.__pending_fields = set()
+        self.__load_fields = None
+        # canonical key used to compare contexts, computed when first needed.
+        self.__identity_key = None
 
     def __repr__(self):
         # multi line repr
+        # fields which are not loaded yet are not retrieved just to be displayed.
+        def field_repr(field, value):
+            if field in self.__pending_fields:
+                return "<not loaded>"
+            return str(value)
+
         msg = []
-        msg.append("  Project: %s" % str(self.__project))
-        msg.append("  Entity: %s" % str(self.__entity))
-        msg.append("  Step: %s" % str(self.__step))
-        msg.append("  Task: %s" % str(self.__task))
+        msg.append("  Project: %s" % field_repr("project", self.__project))
+        msg.append("  Entity: %s" % field_repr("entity", self.__entity))
+        msg.append("  Step: %s" % field_repr("step", self.__step))
+        msg.append("  Task: %s" % field_repr("task", self.__task))
         msg.append("  User: %s" % str(self.__user))
-        msg.append("  Shotgun URL: %s" % self.shotgun_url)
-        msg.append("  Additional Entities: %s" % str(self.__additional_entities))
-        msg.append("  Source Entity: %s" % str(self.__source_entity))
+        if self.__pending_fields:
+            msg.append("  Shotgun URL: <not loaded>")
+        else:
+            msg.append("  Shotgun URL: %s" % self.shotgun_url)
+        msg.append("  Additional Entities: %s" % field_repr("additional_entities", self.__additional_entities))
+        msg.append("  Source Entity: %s" % field_repr("source_entity", self.__source_entity))
         
         return "<Sgtk Context: %s>" % ("\n".join(msg))
 
@@ -147,69 +186,23 @@ class Context(object):
 
     def __eq__(self, other):
         """
-        Test if this Context instance is equal to the other Context instance
-                        
+        Test if this Context instance is equal to the other Context instance.
+
+        Two contexts are considered equal if their project, entity, step, task,
+        user and additional entities have the same types and ids, see
+        :meth:`__get_identity_key`.
+
         :param other:   The other Context instance to compare with
         :returns:       True if self represents the same context as other, 
                         otherwise False
         """
-        def _entity_dicts_eq(d1, d2):
-            """
-            Test to see if two entity dictionaries are equal.  They are considered
-            equal if both are dictionaries containing 'type' and 'id' with the same
-            values for both keys, For example:
-            
-            Comparing these two dictionaries would return True:
-            - {"type":"Shot", "id":123, "foo":"foo"}
-            - {"type":"Shot", "id":123, "foo":"bar", "bar":"foo"}
-            
-            But comparing these two dictionaries would return False:
-            - {"type":"Shot", "id":123, "foo":"foo"}
-            - {"type":"Shot", "id":567, "foo":"foo"} 
-    
-            :param d1:  First entity dictionary
-            :param d2:  Second entity dictionary
-            :returns:   True if d1 and d2 are considered equal, otherwise False.
-            """
-            if d1 == d2 == None:
-                return True
-            if d1 == None or d2 == None:
-                return False
-            return d1["type"] == d2["type"] and d1["id"] == d2["id"]        
-        
         if not isinstance(other, Context):
             return NotImplemented
 
-        if not _entity_dicts_eq(self.project, other.project):
-            return False
-        
-        if not _entity_dicts_eq(self.entity, other.entity):
-            return False
-        
-        if not _entity_dicts_eq(self.step, other.step):
-            return False
-        
-        if not _entity_dicts_eq(self.task, other.task):
-            return False
-        
-        # compare additional entities
-        if self.additional_entities and other.additional_entities:
-            # compare type, id tuples of all additional entities to ensure they are exactly the same.
-            # this compare ignores duplicates in either list and just ensures that the intersection
-            # of both lists contains all unique elements from both lists. 
-            types_and_ids = set([(e["type"], e["id"]) for e in self.additional_entities if e])
-            other_types_and_ids = set([(e["type"], e["id"]) for e in other.additional_entities if e])
-            if types_and_ids != other_types_and_ids:
-                return False
-        elif self.additional_entities or other.additional_entities:
-            return False
+        if self is other:
+            return True
 
-        # finally compare the user - this may result in a Shotgun look-up 
-        # so do this last!
-        if not _entity_dicts_eq(self.user, other.user):
-            return False
-        
-        return True 
+        return self.__get_identity_key() == other.__get_identity_key()
 
     def __ne__(self, other):
         """
@@ -223,6 +216,15 @@ class Context(object):
             return NotImplemented
         return not is_equal
 
+    def __hash__(self):
+        """
+        Allows contexts to be used in sets and as dictionary keys. Contexts
+        which are equal have the same hash.
+
+        :returns: Hash of the identity key of this context.
+        """
+        return hash(self.__get_identity_key())
+
     def __deepcopy__(self, memo):
         """
         Allow Context objects to be deepcopied - Note that the tk
@@ -239,6 +241,9 @@ class Context(object):
         ctx_copy.__user = copy.deepcopy(self.__user, memo)        
         ctx_copy.__additional_entities = copy.deepcopy(self.__additional_entities, memo)
         ctx_copy.__source_entity = copy.deepcopy(self.__source_entity, memo)
+        ctx_copy.__pending_fields = set(self.__pending_fields)
+        ctx_copy.__load_fields = self.__load_fields
+        ctx_copy.__identity_key = self.__identity_key
         
         # except:
         # ctx_copy._entity_fields_cache
@@ -263,6 +268,8 @@ class Context(object):
 
         :returns: A std shotgun link dictionary with keys id, type and name, or None if not defined
         """
+        if "project" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__project
 
 
@@ -281,6 +288,8 @@ class Context(object):
 
         :returns: A std shotgun link dictionary with keys id, type and name, or None if not defined
         """
+        if "entity" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__entity
 
     @property
@@ -303,6 +312,8 @@ class Context(object):
         :returns: A Shotgun entity dictionary.
         :rtype: dict or None
         """
+        if "source_entity" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__source_entity
 
     @property
@@ -320,6 +331,8 @@ class Context(object):
 
         :returns: A std shotgun link dictionary with keys id, type and name, or None if not defined
         """
+        if "step" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__step
 
     @property
@@ -337,6 +350,8 @@ class Context(object):
 
         :returns: A std shotgun link dictionary with keys id, type and name, or None if not defined
         """
+        if "task" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__task
 
     @property
@@ -380,6 +395,8 @@ class Context(object):
         :returns: A list of std shotgun link dictionaries.
                   Will be an empty list in most cases.
         """
+        if "additional_entities" in self.__pending_fields:
+            self.__load_pending_fields()
         return self.__additional_entities
 
     @property
@@ -667,12 +684,14 @@ class Context(object):
         """
         ctx_copy = copy.deepcopy(self)
         ctx_copy.__user = user
+        # the user is part of the identity of the context.
+        ctx_copy.__identity_key = None
         return ctx_copy
 
     ################################################################################################
     # serialization
 
-    def serialize(self, with_user_credentials=True):
+    def serialize(self, with_user_credentials=True, use_json=False):
         """
         Serializes the context into a string.
 
@@ -688,19 +707,36 @@ class Context(object):
             >>> context_str = ctx.serialize(ctx)
             >>> new_ctx = sgtk.Context.deserialize(context_str)
 
+        By default, the context is pickled. With ``use_json=True``, it is serialized
+        to a compact, versioned, JSON document holding only the type, id and name of
+        each entity, which is quicker to produce and to load, small enough to be
+        passed through environment variables and safe to load from untrusted
+        sources, see :meth:`Context.deserialize`::
+
+            >>> ctx.serialize(with_user_credentials=False, use_json=True)
+            '{"v":1,"pc":"/studio.08/demo_project/config","project":["Project",4,"demo_project"],...}'
+
         :param with_user_credentials: If ``True``, the currently authenticated user's credentials, as
             returned by :meth:`sgtk.get_authenticated_user`, will also be serialized with the context.
+        :param bool use_json: If ``True``, serialize to JSON rather than pickle the context.
 
         .. note:: For example, credentials should be omitted (``with_user_credentials=False``) when
             serializing the context from a user's current session to send it to a render farm. By doing
             so, invoking :meth:`sgtk.Context.deserialize` on the render farm will only restore the
             context and not the authenticated user.
 
+        .. note:: In JSON, entity dictionaries only keep their ``type``, ``id`` and ``name``
+            keys. This only makes a difference for the :attr:`source_entity` which may
+            hold other fields.
+
         :returns: String representation
         """
         # Avoids cyclic imports
         from .api import get_authenticated_user
 
+        if use_json:
+            return self._serialize_json(with_user_credentials)
+
         data = {
             "project": self.project,
             "entity": self.entity,
@@ -722,24 +758,43 @@ class Context(object):
         return pickle.dumps(data)
 
     @classmethod
-    def deserialize(cls, context_str):
+    def deserialize(cls, context_str, allow_pickle=True, tk=None, restore_user=None):
         """
         The inverse of :meth:`Context.serialize`.
 
+        Both the pickled and the JSON representations are supported. Unpickling data
+        can execute arbitrary code, so strings coming from untrusted sources, e.g. job
+        payloads, should be deserialized with ``allow_pickle=False``, which only accepts
+        JSON, and with the ``tk`` instance to use, since creating it from the pipeline
+        configuration path stored in the string runs the hooks of that configuration.
+        The user credentials stored in such strings are ignored unless ``restore_user``
+        is ``True``, so that they can't replace the user this process is authenticated as.
+
         :param context_str: String representation of context, created with :meth:`Context.serialize`
+        :param bool allow_pickle: If ``False``, refuse to deserialize pickled contexts.
+        :param tk: :class:`~sgtk.Sgtk` instance the context is created for. If ``None``,
+            one is created for the pipeline configuration the context was serialized from.
+        :param restore_user: If ``True``, authenticate as the user the context was serialized
+            with. If ``None``, the user is restored unless ``allow_pickle`` is ``False``.
 
-        .. note:: If the context was serialized with the user credentials, the currently authenticated
-            user will be updated with these credentials.
+        .. note:: If the context was serialized with the user credentials and they are restored,
+            the currently authenticated user will be updated with these credentials.
 
         :returns: :class:`Context`
+        :raises: :class:`~sgtk.TankContextDeserializationError` if the string can't be deserialized.
         """
         # lazy load this to avoid cyclic dependencies
         from .api import Tank, set_authenticated_user
 
-        try:
-            data = pickle.loads(context_str)
-        except Exception as e:
-            raise TankContextDeserializationError(str(e))
+        if _is_json_context(context_str):
+            data = _deserialize_json(context_str)
+        elif not allow_pickle:
+            raise TankContextDeserializationError("Pickled contexts are not allowed.")
+        else:
+            try:
+                data = pickle.loads(context_str)
+            except Exception as e:
+                raise TankContextDeserializationError(str(e))
 
         # first get the pipeline config path out of the dict
         pipeline_config_path = data["_pc_path"]
@@ -751,16 +806,19 @@ class Context(object):
         # context because multiple DCCs can run at the same time under different
         # users, e.g. launching Maya from the site as user A and Nuke from the tank
         # command as user B.
-        user_string = data.get("_current_user")
-        if user_string:
-            # Remove it from the data
-            del data["_current_user"]
-            # and set the authenticated user user.
+        if restore_user is None:
+            restore_user = allow_pickle
+        user_string = data.pop("_current_user", None)
+        if user_string and not restore_user:
+            log.debug("Ignoring the user credentials stored in the context.")
+        elif user_string:
+            # set the authenticated user user.
             user = authentication.deserialize_user(user_string)
             set_authenticated_user(user)
 
         # create a Sgtk API instance.
-        tk = Tank(pipeline_config_path)
+        if tk is None:
+            tk = Tank(pipeline_config_path)
 
         # add it to the constructor instance
         data["tk"] = tk
@@ -768,9 +826,138 @@ class Context(object):
         # and lastly make the obejct
         return cls(**data)
 
+    def _serialize_json(self, with_user_credentials):
+        """
+        Serializes the context into a compact JSON document.
+
+        :param with_user_credentials: If ``True``, the credentials of the currently
+            authenticated user are serialized with the context.
+        :returns: JSON string.
+        """
+        # Avoids cyclic imports
+        from .api import get_authenticated_user
+
+        data = {
+            "v": JSON_SERIALIZATION_FORMAT_VERSION,
+            "pc": self.tank.pipeline_configuration.get_path(),
+        }
+
+        # only store the entities which are set, as lists rather than dictionaries.
+        for key in ["project", "entity", "user", "step", "task", "source_entity"]:
+            entity = getattr(self, key)
+            if entity:
+                data[key] = _entity_to_stub(entity)
+        if self.additional_entities:
+            data["additional_entities"] = [_entity_to_stub(e) for e in self.additional_entities]
+
+        if with_user_credentials:
+            user = get_authenticated_user()
+            if user:
+                data["current_user"] = authentication.serialize_user(user, use_json=True)
+
+        return json.dumps(data, separators=(",", ":"))
+
     ################################################################################################
     # private methods
 
+    def _is_same_context(self, other):
+        """
+        Tests if a context is the same as this one, including its source entity,
+        which can be used to pick a different environment, without retrieving the
+        fields of contexts created in lazy mode which were not retrieved yet.
+
+        Internal Use Only - We provide no guarantees that this method
+        will be backwards compatible.
+
+        :param other: :class:`Context` to compare with.
+        :returns: True if both contexts are the same, False if they are different
+                  or if telling would require retrieving their fields.
+        """
+        if other is self:
+            return True
+        if self.__pending_fields or other.__pending_fields:
+            return False
+        if self != other:
+            return False
+
+        return _get_entity_key(self.__source_entity) == _get_entity_key(other.__source_entity)
+
+    def _defer_fields(self, load_fields, fields):
+        """
+        Marks fields of a context created in lazy mode as not known yet.
+
+        :param load_fields: Callable returning a dictionary of :class:`Context`
+            constructor parameters with the values of the fields.
+        :param fields: Names of the fields which are not known yet, among ``project``,
+            ``entity``, ``step``, ``task``, ``additional_entities`` and ``source_entity``.
+        """
+        self.__pending_fields = set(fields)
+        self.__load_fields = load_fields
+
+    def __get_identity_key(self):
+        """
+        Returns the key identifying this context, made of the types and ids of
+        its entities. Entities are only compared by type and id, e.g. these two
+        dictionaries represent the same entity:
+
+        - {"type":"Shot", "id":123, "foo":"foo"}
+        - {"type":"Shot", "id":123, "foo":"bar", "bar":"foo"}
+
+        Additional entities are compared regardless of their order and duplicates.
+
+        The key is computed the first time it is needed, which retrieves the fields
+        of contexts created in lazy mode and the current user if needed.
+
+        :returns: Tuple of (type, id) tuples or None for each field.
+        """
+        if self.__identity_key is not None:
+            return self.__identity_key
+
+        additional_entities_key = None
+        if self.additional_entities:
+            additional_entities_key = frozenset(
+                (e["type"], e["id"]) for e in self.additional_entities if e
+            )
+
+        identity_key = (
+            _get_entity_key(self.project),
+            _get_entity_key(self.entity),
+            _get_entity_key(self.step),
+            _get_entity_key(self.task),
+            additional_entities_key,
+            # this may result in a Shotgun look-up.
+            _get_entity_key(self.user),
+        )
+        if self.__user is not None:
+            # the current user may not be known yet, in which case the key is
+            # computed again next time.
+            self.__identity_key = identity_key
+        return identity_key
+
+    def __load_pending_fields(self):
+        """
+        Retrieves the fields which were not known when this context was created.
+        """
+        with _g_lazy_fields_lock:
+            if not self.__pending_fields:
+                # another thread retrieved them while this one was waiting.
+                return
+            data = self.__load_fields()
+            if "project" in self.__pending_fields:
+                self.__project = data["project"]
+            if "entity" in self.__pending_fields:
+                self.__entity = data["entity"]
+            if "step" in self.__pending_fields:
+                self.__step = data["step"]
+            if "task" in self.__pending_fields:
+                self.__task = data["task"]
+            if "additional_entities" in self.__pending_fields:
+                self.__additional_entities = data["additional_entities"] or []
+            if "source_entity" in self.__pending_fields:
+                self.__source_entity = data["source_entity"] or data["entity"]
+            self.__pending_fields = set()
+            self.__load_fields = None
+
     def _fields_from_shotgun(self, template, entities, validate):
         """
         Query Shotgun server for keys used by this template whose values come directly
@@ -786,75 +973,73 @@ class Context(object):
         :raises TankError: Raised if a key is missing from the entities list when ``validate`` is ``True``.
         """
         fields = {}
-        # for any sg query field
-        for key in template.keys.values():
+        # for any sg query field. The keys with shotgun query information are
+        # computed once per template.
+        for key, shotgun_entity_type, shotgun_field_name in template._get_shotgun_keys():
+            # this key is a shotgun value that needs fetching! 
             
-            # check each key to see if it has shotgun query information that we should resolve
-            if key.shotgun_field_name:
-                # this key is a shotgun value that needs fetching! 
-                
-                # ensure that the context actually provides the desired entities
-                if not key.shotgun_entity_type in entities:
-                    if validate:
-                        raise TankError("Key '%s' in template '%s' could not be populated by "
-                                        "context '%s' because the context does not contain a "
-                                        "shotgun entity of type '%s'!" % (key, template, self, key.shotgun_entity_type))
-                    else:
-                        continue
-                    
-                entity = entities[key.shotgun_entity_type]
+            # ensure that the context actually provides the desired entities
+            if not shotgun_entity_type in entities:
+                if validate:
+                    raise TankError("Key '%s' in template '%s' could not be populated by "
+                                    "context '%s' because the context does not contain a "
+                                    "shotgun entity of type '%s'!" % (key, template, self, shotgun_entity_type))
+                else:
+                    continue
                 
-                # check the context cache 
-                cache_key = (entity["type"], entity["id"], key.shotgun_field_name)
-                if cache_key in self._entity_fields_cache:
-                    # already have the value cached - no need to fetch from shotgun
-                    fields[key.name] = self._entity_fields_cache[cache_key]
+            entity = entities[shotgun_entity_type]
+            
+            # check the context cache 
+            cache_key = (entity["type"], entity["id"], shotgun_field_name)
+            if cache_key in self._entity_fields_cache:
+                # already have the value cached - no need to fetch from shotgun
+                fields[key.name] = self._entity_fields_cache[cache_key]
+            
+            else:
+                # get the value from shotgun
+                filters = [["id", "is", entity["id"]]]
+                query_fields = [shotgun_field_name]
+                result = self.__tk.shotgun.find_one(shotgun_entity_type, filters, query_fields)
+                if not result:
+                    # no record with that id in shotgun!
+                    raise TankError("Could not retrieve Shotgun data for key '%s' in "
+                                    "template '%s'. No records in Shotgun are matching "
+                                    "entity '%s' (Which is part of the current "
+                                    "context '%s')" % (key, template, entity, self))                        
+
+                value = result.get(shotgun_field_name)
+
+                # note! It is perfectly possible (and may be valid) to return None values from 
+                # shotgun at this point. In these cases, a None field will be returned in the 
+                # fields dictionary from as_template_fields, and this may be injected into
+                # a template with optional fields.
+
+                if value is None:
+                    processed_val = None
                 
                 else:
-                    # get the value from shotgun
-                    filters = [["id", "is", entity["id"]]]
-                    query_fields = [key.shotgun_field_name]
-                    result = self.__tk.shotgun.find_one(key.shotgun_entity_type, filters, query_fields)
-                    if not result:
-                        # no record with that id in shotgun!
-                        raise TankError("Could not retrieve Shotgun data for key '%s' in "
-                                        "template '%s'. No records in Shotgun are matching "
-                                        "entity '%s' (Which is part of the current "
-                                        "context '%s')" % (key, template, entity, self))                        
-
-                    value = result.get(key.shotgun_field_name)
-
-                    # note! It is perfectly possible (and may be valid) to return None values from 
-                    # shotgun at this point. In these cases, a None field will be returned in the 
-                    # fields dictionary from as_template_fields, and this may be injected into
-                    # a template with optional fields.
-    
-                    if value is None:
-                        processed_val = None
-                    
-                    else:
-
-                        # now convert the shotgun value to a string.
-                        # note! This means that there is no way currently to create an int key
-                        # in a tank template which matches an int field in shotgun, since we are
-                        # force converting everything into strings...
-                                 
-                        processed_val = shotgun_entity.sg_entity_to_string(self.__tk,
-                                                                           key.shotgun_entity_type,
-                                                                           entity.get("id"),
-                                                                           key.shotgun_field_name, 
-                                                                           value)
-                    
-                        if not key.validate(processed_val):                    
-                            raise TankError("Template validation failed for value '%s'. This "
-                                            "value was retrieved from entity %s in Shotgun to "
-                                            "represent key '%s' in "
-                                            "template '%s'." % (processed_val, entity, key, template))
-                            
-                    # all good!
-                    # populate dictionary and cache
-                    fields[key.name] = processed_val
-                    self._entity_fields_cache[cache_key] = processed_val
+
+                    # now convert the shotgun value to a string.
+                    # note! This means that there is no way currently to create an int key
+                    # in a tank template which matches an int field in shotgun, since we are
+                    # force converting everything into strings...
+                             
+                    processed_val = shotgun_entity.sg_entity_to_string(self.__tk,
+                                                                       shotgun_entity_type,
+                                                                       entity.get("id"),
+                                                                       shotgun_field_name, 
+                                                                       value)
+                
+                    if not key.validate(processed_val):                    
+                        raise TankError("Template validation failed for value '%s'. This "
+                                        "value was retrieved from entity %s in Shotgun to "
+                                        "represent key '%s' in "
+                                        "template '%s'." % (processed_val, entity, key, template))
+                        
+                # all good!
+                # populate dictionary and cache
+                fields[key.name] = processed_val
+                self._entity_fields_cache[cache_key] = processed_val
 
 
         return fields
@@ -1046,7 +1231,7 @@ def create_empty(tk):
     """
     return Context(tk)
 
-def from_entity(tk, entity_type, entity_id):
+def from_entity(tk, entity_type, entity_id, lazy=False):
     """
     Constructs a context from a shotgun entity.
 
@@ -1055,11 +1240,43 @@ def from_entity(tk, entity_type, entity_id):
     :param tk:           Sgtk API handle
     :param entity_type:  The shotgun entity type to produce a context for
     :param entity_id:    The shotgun entity id to produce a context for
+    :param bool lazy:    If True, the context is only resolved when it is first accessed.
 
     :returns: :class:`Context`
     """
+    if lazy:
+        return _lazy_from_entity_type_and_id(tk, dict(type=entity_type, id=entity_id))
     return _from_entity_type_and_id(tk, dict(type=entity_type, id=entity_id))
 
+def from_entities(tk, entity_type, entity_ids):
+    """
+    Constructs contexts from shotgun entities of the same type.
+
+    For more information, see :meth:`Sgtk.contexts_from_entities`.
+
+    :param tk:           Sgtk API handle
+    :param entity_type:  The shotgun entity type to produce contexts for
+    :param entity_ids:   The shotgun entity ids to produce contexts for
+
+    :returns: List of :class:`Context`, in the order of the entity ids.
+    """
+    if entity_type is None:
+        raise TankError("Cannot create a context from an entity type 'None'!")
+
+    if None in entity_ids:
+        raise TankError("Cannot create a context from an entity id set to 'None'!")
+
+    entity_contexts = _context_data_from_entities(tk, entity_type, entity_ids)
+
+    contexts = []
+    for entity_id in entity_ids:
+        # the same id may be passed more than once, so never share the data.
+        context = copy.deepcopy(entity_contexts[entity_id])
+        context["tk"] = tk
+        context["source_entity"] = context["source_entity"] or context["entity"]
+        contexts.append(Context(**context))
+    return contexts
+
 def _from_entity_type_and_id(tk, entity, source_entity=None):
     """
     Constructs a context from the entity type and id as stored in the given
@@ -1093,68 +1310,143 @@ def _from_entity_type_and_id(tk, entity, source_entity=None):
     
     if entity_id is None:
         raise TankError("Cannot create a context from an entity id set to 'None'!")
-    
-    # prep our return data structure
-    context = {
-        "tk": tk,
-        "project": None,
-        "entity": None,
-        "step": None,
-        "user": None,
-        "task": None,
-        "additional_entities": [],
-        "source_entity": source_entity,
-    }
+
+    context = _context_data_from_entity(tk, entity_type, entity_id)
+    context["tk"] = tk
+
+    # If there isn't an explicit source_entity, we use the one the entity
+    # resolved to, for published files, or the entity property.
+    context["source_entity"] = source_entity or context["source_entity"] or context["entity"]
+
+    return Context(**context)
+
+def _context_data_from_entity(tk, entity_type, entity_id):
+    """
+    Resolves the data of the context of an entity, querying Shotgun or the
+    path cache unless the data is in the context cache of the tk instance.
+
+    :param tk: Sgtk API handle
+    :param entity_type: The shotgun entity type to produce a context for
+    :param entity_id: The shotgun entity id to produce a context for
+    :returns: Dictionary of :class:`Context` constructor parameters, without the
+              tk instance. The source entity is only set for published files.
+    """
+    return _context_data_from_entities(tk, entity_type, [entity_id])[entity_id]
+
+def _context_data_from_entities(tk, entity_type, entity_ids):
+    """
+    Resolves the data of the contexts of entities of the same type, using the
+    context cache of the tk instance. The entities which are not cached are
+    retrieved from Shotgun with one query for all of them, rather than one
+    query per entity.
+
+    :param tk: Sgtk API handle
+    :param entity_type: The shotgun entity type to produce contexts for
+    :param entity_ids: The shotgun entity ids to produce contexts for
+    :returns: Dictionary of context data, as returned by :meth:`_context_data_from_entity`,
+              keyed by entity id.
+    """
+    contexts = {}
+    missing_ids = []
+    seen_ids = set()
+    for entity_id in entity_ids:
+        if entity_id in seen_ids:
+            continue
+        seen_ids.add(entity_id)
+        context = tk.context_cache.get_entity(entity_type, entity_id)
+        if context is None:
+            missing_ids.append(entity_id)
+        else:
+            contexts[entity_id] = context
+
+    if not missing_ids:
+        return contexts
+
+    def new_context():
+        # prep our return data structure
+        return {
+            "project": None,
+            "entity": None,
+            "step": None,
+            "user": None,
+            "task": None,
+            "additional_entities": [],
+            "source_entity": None,
+        }
+
+    resolved_contexts = {}
 
     if entity_type == "Task":
         # For tasks get data from shotgun query
-        task_context = _task_from_sg(tk, entity_id)
-        context.update(task_context)
+        for entity_id, task_context in _tasks_from_sg(tk, missing_ids).iteritems():
+            resolved_contexts[entity_id] = new_context()
+            resolved_contexts[entity_id].update(task_context)
 
     elif entity_type in ["PublishedFile", "TankPublishedFile"]:
-        
-        sg_entity = tk.shotgun.find_one(entity_type, 
-                                        [["id", "is", entity_id]], 
-                                        ["project", "entity", "task"])
-        
-        if sg_entity is None:
-            raise TankError("Entity %s with id %s not found in Shotgun!" % (entity_type, entity_id))
-        
-        if sg_entity.get("task"):
-            # base the context on the task for the published file
-            return _from_entity_type_and_id(tk, sg_entity["task"], sg_entity)
-        
-        elif sg_entity.get("entity"):
-            # base the context on the entity that the published is linked with
-            return _from_entity_type_and_id(tk, sg_entity["entity"], sg_entity)
-        
-        elif sg_entity.get("project"):
-            # base the context on the project that the published is linked with
-            return _from_entity_type_and_id(tk, sg_entity["project"], sg_entity)
-    
+
+        sg_entities = _find_by_ids(tk, entity_type, missing_ids, ["project", "entity", "task"])
+
+        # base the context on the task for the published file, or the entity
+        # or project that the published is linked with
+        linked_entities = {}
+        linked_ids = {}
+        for entity_id in missing_ids:
+            sg_entity = sg_entities.get(entity_id)
+            if sg_entity is None:
+                raise TankError("Entity %s with id %s not found in Shotgun!" % (entity_type, entity_id))
+            linked_entity = sg_entity.get("task") or sg_entity.get("entity") or sg_entity.get("project")
+            if linked_entity:
+                linked_entities[entity_id] = linked_entity
+                linked_ids.setdefault(linked_entity["type"], []).append(linked_entity["id"])
+
+        # resolve the linked entities of each type in one go
+        linked_contexts = {}
+        for linked_type, ids in linked_ids.iteritems():
+            linked_contexts[linked_type] = _context_data_from_entities(tk, linked_type, ids)
+
+        for entity_id in missing_ids:
+            linked_entity = linked_entities.get(entity_id)
+            if linked_entity:
+                context = copy.deepcopy(linked_contexts[linked_entity["type"]][linked_entity["id"]])
+                context["source_entity"] = sg_entities[entity_id]
+            else:
+                context = new_context()
+            resolved_contexts[entity_id] = context
+
     else:
         # Get data from path cache
-        entity_context = _context_data_from_cache(tk, entity_type, entity_id)
-                    
-        # make sure this was actually found in the cache
-        # fall back on a shotgun lookup if not found
-        if entity_context["project"] is None:
-            entity_context = _entity_from_sg(tk, entity_type, entity_id)
-        
-        context.update(entity_context)
+        entity_contexts = {}
+        sg_ids = []
+        for entity_id in missing_ids:
+            entity_context = _context_data_from_cache(tk, entity_type, entity_id)
+
+            # make sure this was actually found in the cache
+            # fall back on a shotgun lookup if not found
+            if entity_context["project"] is None:
+                sg_ids.append(entity_id)
+            else:
+                entity_contexts[entity_id] = entity_context
 
-        if entity_type == "Project":
-            # no need to set entity to point at project in this case
-            # that only produces double entries.
-            context["entity"] = None
+        if sg_ids:
+            entity_contexts.update(_entities_from_sg(tk, entity_type, sg_ids))
 
-    # If there isn't an explicit source_entity, we set it to be
-    # the same as the entity property.
-    context["source_entity"] = context["source_entity"] or context["entity"]
+        for entity_id in missing_ids:
+            context = new_context()
+            context.update(entity_contexts[entity_id])
 
-    return Context(**context)
+            if entity_type == "Project":
+                # no need to set entity to point at project in this case
+                # that only produces double entries.
+                context["entity"] = None
 
-def from_entity_dictionary(tk, entity_dictionary):
+            resolved_contexts[entity_id] = context
+
+    for entity_id, context in resolved_contexts.iteritems():
+        tk.context_cache.set_entity(entity_type, entity_id, context)
+    contexts.update(resolved_contexts)
+    return contexts
+
+def from_entity_dictionary(tk, entity_dictionary, lazy=False):
     """
     Constructs a context from a shotgun entity dictionary.
 
@@ -1163,12 +1455,14 @@ def from_entity_dictionary(tk, entity_dictionary):
     :param tk: :class:`Sgtk`
     :param dict entity_dictionary: The entity dictionary to create the context from
         containing at least: {"type":entity_type, "id":entity_id}
+    :param bool lazy: If True, the entities missing from the dictionary are only
+        retrieved when they are first accessed.
 
     :returns: :class:`Context`
     """
-    return _from_entity_dictionary(tk, entity_dictionary)
+    return _from_entity_dictionary(tk, entity_dictionary, lazy=lazy)
 
-def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
+def _from_entity_dictionary(tk, entity_dictionary, source_entity=None, lazy=False):
     """
     Constructs a context from a Shotgun entity dictionary.
 
@@ -1187,6 +1481,8 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
         linked to. In that situation, we store the original PublishedFile entity
         as the source entity, which can then be used in a pick_environment hook
         to return a specific environment for PublishedFiles.
+    :param bool lazy: If True, the entities missing from the dictionary are only
+        retrieved when they are first accessed.
 
     :returns: :class:`Context`
     """
@@ -1213,6 +1509,9 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
     entity_type = entity_dictionary["type"]
     entity_id = entity_dictionary["id"]
 
+    if lazy and entity_type not in ["PublishedFile", "TankPublishedFile"]:
+        return _lazy_from_entity_dictionary(tk, entity_dictionary, context["source_entity"])
+
     # try to determine the various entities from the entity dictionary:
     project = None
     entity = None
@@ -1239,6 +1538,7 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
                 tk,
                 entity_dictionary["task"],
                 source_entity=context["source_entity"],
+                lazy=lazy,
             )
         elif entity_dictionary.get("entity"):
             # construct an entity context
@@ -1246,6 +1546,7 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
                 tk,
                 entity_dictionary["entity"],
                 source_entity=context["source_entity"],
+                lazy=lazy,
             )
         elif entity_dictionary.get("project"):
             # construct project context
@@ -1253,6 +1554,7 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
                 tk,
                 entity_dictionary["project"],
                 source_entity=context["source_entity"],
+                lazy=lazy,
             )
         else:
             # fall back on from_entity:
@@ -1266,27 +1568,6 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
             project = entity["project"]
 
     if not fallback_to_ctx_from_entity:
-        # clean up entities and populate context structure:
-        def _build_clean_entity(ent):
-            """
-            Ensure entity has id, type and name fields and build a clean
-            entity dictionary containing just those fields to return, stripping
-            out all other fields.
-
-            :param ent: The entity dictionary to build a clean dictionary from
-            :returns:   A clean entity dictionary containing just 'type', 'id' 
-                        and 'name' if all three exist in the input dictionary
-                        or None if they don't.
-            """
-            # make sure we have id, type and name:
-            if "id" not in ent or "type" not in ent:
-                return None
-            ent_name = _get_entity_name(ent)
-            if ent_name == None:
-                return None
-            # return a clean dictionary:
-            return {"type":ent["type"], "id":ent["id"], "name":ent_name}
-        
         if project:
             context["project"] = _build_clean_entity(project)
             if not context["project"]:
@@ -1308,6 +1589,10 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
                 fallback_to_ctx_from_entity = True
 
     if fallback_to_ctx_from_entity:
+        if lazy:
+            # only published files without links get there in lazy mode.
+            return _lazy_from_entity_type_and_id(tk, entity_dictionary, context["source_entity"])
+
         # entity dict doesn't contain enough information to build a 
         # safe, valid context so fall back on 'from_entity':
         return _from_entity_type_and_id(
@@ -1321,11 +1606,225 @@ def _from_entity_dictionary(tk, entity_dictionary, source_entity=None):
         additional_fields = tk.execute_core_hook("context_additional_entities").get("entity_fields_on_task", [])
         if additional_fields:
             # unfortunately we have to fall back to an sg query to get the additional entities :(
-            task_context = _task_from_sg(tk, task["id"], additional_fields)
-            context.update(task_context)
+            task_context = _context_data_from_entity(tk, "Task", task["id"])
+            for key in ["project", "entity", "step", "task", "additional_entities"]:
+                context[key] = task_context[key]
 
     return Context(**context)
 
+def _get_entity_key(entity):
+    """
+    :param entity: Entity dictionary or None.
+    :returns: Tuple of the entity type and id, or None.
+    """
+    if entity is None:
+        return None
+    return (entity["type"], entity["id"])
+
+def _build_clean_entity(ent):
+    """
+    Ensure entity has id, type and name fields and build a clean
+    entity dictionary containing just those fields to return, stripping
+    out all other fields.
+
+    :param ent: The entity dictionary to build a clean dictionary from
+    :returns:   A clean entity dictionary containing just 'type', 'id' 
+                and 'name' if all three exist in the input dictionary
+                or None if they don't.
+    """
+    # make sure we have id, type and name:
+    if "id" not in ent or "type" not in ent:
+        return None
+    ent_name = _get_entity_name(ent)
+    if ent_name == None:
+        return None
+    # return a clean dictionary:
+    return {"type":ent["type"], "id":ent["id"], "name":ent_name}
+
+def _lazy_from_entity_dictionary(tk, entity_dictionary, source_entity):
+    """
+    Constructs a context from a Shotgun entity dictionary in lazy mode.
+
+    The entities found in the dictionary are used as they are, the ones which
+    are missing or don't have a name are only retrieved from Shotgun the first
+    time they are accessed. Published files are handled by the caller.
+
+    :param tk: :class:`Sgtk`
+    :param dict entity_dictionary: The entity dictionary to create the context from.
+    :param dict source_entity: The source entity of the context.
+    :returns: :class:`Context`
+    """
+    entity_type = entity_dictionary["type"]
+    context = {
+        "tk": tk,
+        "project": None,
+        "entity": None,
+        "step": None,
+        "user": None,
+        "task": None,
+        "additional_entities": [],
+        "source_entity": source_entity,
+    }
+
+    # the entities the dictionary should provide, as with the non lazy mode.
+    if entity_type == "Project":
+        fields = {"project": entity_dictionary}
+    elif entity_type == "Task":
+        fields = {"task": entity_dictionary}
+        for field in ["project", "entity", "step"]:
+            if field in entity_dictionary:
+                fields[field] = entity_dictionary[field]
+    else:
+        fields = {"entity": entity_dictionary}
+        if "project" in entity_dictionary:
+            fields["project"] = entity_dictionary["project"]
+
+    # fields which are missing, or which don't have enough information
+    # to build a clean entity, are retrieved when needed. Fields set to None
+    # are known to be empty.
+    pending_fields = set(["project", "entity", "step", "task"])
+    if entity_type != "Task":
+        pending_fields.difference_update(["step", "task"])
+    if entity_type == "Project":
+        pending_fields.discard("entity")
+    for field, value in fields.iteritems():
+        if value is None:
+            pending_fields.discard(field)
+        else:
+            context[field] = _build_clean_entity(value)
+            if context[field] is not None:
+                pending_fields.discard(field)
+
+    if pending_fields:
+        # the non lazy mode builds the whole context from the entity in this
+        # case, which can find a step and a task for any entity type.
+        pending_fields.update(
+            field for field in ["step", "task", "additional_entities"] if field not in fields
+        )
+    elif entity_type == "Task":
+        additional_fields = tk.execute_core_hook("context_additional_entities").get("entity_fields_on_task", [])
+        if additional_fields:
+            pending_fields.add("additional_entities")
+
+    ctx = Context(**context)
+    if pending_fields:
+        ctx._defer_fields(
+            _get_lazy_loader(tk, entity_type, entity_dictionary["id"]), pending_fields
+        )
+    return ctx
+
+def _lazy_from_entity_type_and_id(tk, entity, source_entity=None):
+    """
+    Constructs a context from the entity type and id as stored in the given
+    entity in lazy mode: all the fields of the context are retrieved the first
+    time one of them is accessed, unless they are in the context cache.
+
+    :param tk: Sgtk API handle
+    :param dict entity: The entity to construct the context from, containing
+        a minimum of type and id keys.
+    :param dict source_entity: The entity dictionary to add to the context
+        as its source_entity, see :meth:`_from_entity_type_and_id`.
+    :returns: :class:`Context`
+    """
+    entity_type = entity.get("type")
+    entity_id = entity.get("id")
+
+    if entity_type is None:
+        raise TankError("Cannot create a context from an entity type 'None'!")
+
+    if entity_id is None:
+        raise TankError("Cannot create a context from an entity id set to 'None'!")
+
+    if tk.context_cache.get_entity(entity_type, entity_id) is not None:
+        # nothing to retrieve.
+        return _from_entity_type_and_id(tk, entity, source_entity)
+
+    pending_fields = set(["project", "entity", "step", "task", "additional_entities"])
+    if source_entity is None:
+        pending_fields.add("source_entity")
+
+    ctx = Context(tk, source_entity=source_entity)
+    ctx._defer_fields(_get_lazy_loader(tk, entity_type, entity_id), pending_fields)
+    return ctx
+
+def _get_lazy_loader(tk, entity_type, entity_id):
+    """
+    Adds an entity to the batch of entities resolved together for the contexts
+    created in lazy mode.
+
+    :param tk: Sgtk API handle
+    :param entity_type: The shotgun entity type of the context
+    :param entity_id: The shotgun entity id of the context
+    :returns: Callable returning the data of the context of the entity, see
+              :meth:`_context_data_from_entity`.
+    """
+    with _g_lazy_batch_lock:
+        batch = tk.get_cache_item(LAZY_CONTEXT_BATCH_CACHE_KEY)
+        if batch is None or not batch.add(entity_type, entity_id):
+            # the batch was resolved, start a new one.
+            batch = _LazyContextBatch(tk)
+            batch.add(entity_type, entity_id)
+            tk.set_cache_item(LAZY_CONTEXT_BATCH_CACHE_KEY, batch)
+    return functools.partial(batch.get, entity_type, entity_id)
+
+
+class _LazyContextBatch(object):
+    """
+    Entities of contexts created in lazy mode. The data of all the contexts is
+    resolved in one go the first time one of them needs it, so that Shotgun is
+    queried once for all the entities of a type rather than once per context.
+    """
+
+    def __init__(self, tk):
+        """
+        :param tk: Sgtk API handle
+        """
+        self._tk = tk
+        self._lock = threading.Lock()
+        # entity ids keyed by entity type
+        self._entity_ids = {}
+        # data of the contexts keyed by entity type and id once resolved
+        self._contexts = None
+
+    def add(self, entity_type, entity_id):
+        """
+        Adds an entity to the batch.
+
+        :param entity_type: The shotgun entity type of the context
+        :param entity_id: The shotgun entity id of the context
+        :returns: False if the batch was already resolved and can't be added to.
+        """
+        with self._lock:
+            if self._contexts is not None:
+                return False
+            self._entity_ids.setdefault(entity_type, []).append(entity_id)
+            return True
+
+    def get(self, entity_type, entity_id):
+        """
+        Returns the data of the context of an entity, resolving the whole batch
+        the first time it is called.
+
+        :param entity_type: The shotgun entity type of the context
+        :param entity_id: The shotgun entity id of the context
+        :returns: Dictionary of context data, see :meth:`_context_data_from_entity`.
+        """
+        with self._lock:
+            if self._contexts is None:
+                self._contexts = {}
+                for batch_type, batch_ids in self._entity_ids.iteritems():
+                    try:
+                        self._contexts[batch_type] = _context_data_from_entities(self._tk, batch_type, batch_ids)
+                    except TankError:
+                        # some entities can't be resolved, resolve the entities of this
+                        # type one by one so that only their contexts fail.
+                        pass
+            context = self._contexts.get(entity_type, {}).get(entity_id)
+
+        if context is None:
+            context = _context_data_from_entity(self._tk, entity_type, entity_id)
+        return copy.deepcopy(context)
+
 def from_path(tk, path, previous_context=None):
     """
     Factory method that constructs a context object from a path on disk.
@@ -1342,10 +1841,46 @@ def from_path(tk, path, previous_context=None):
     :type previous_context: :class:`Context`
     :returns: :class:`Context`
     """
+    context = tk.context_cache.get_path(path)
+    if context is None:
+        context = _context_data_from_path(tk, path)
+        tk.context_cache.set_path(path, context)
+    context["tk"] = tk
+
+    # see if we can populate it based on the previous context
+    if previous_context and \
+       context.get("entity") == previous_context.entity and \
+       context.get("additional_entities") == previous_context.additional_entities:
 
+        # cool, everything is matching down to the step/task level.
+        # if context is missing a step and a task, we try to auto populate it.
+        # (note: weird edge that a context can have a task but no step)
+        if context.get("task") is None and context.get("step") is None:
+            context["step"] = previous_context.step
+
+        # now try to assign previous task but only if the step matches!
+        if context.get("task") is None and context.get("step") == previous_context.step:
+            context["task"] = previous_context.task
+
+    # ensure that we don't have a Project as the entity. Projects should only 
+    # appear on the projects level, despite being entities.
+    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
+        # remove double entry!
+        context["entity"] = None
+
+    return Context(**context)
+
+def _context_data_from_path(tk, path):
+    """
+    Resolves the data of the context of a path from the path cache.
+
+    :param tk: Sgtk API handle
+    :param path: a file system path
+    :returns: Dictionary of :class:`Context` constructor parameters, without the
+              tk instance.
+    """
     # prep our return data structure
     context = {
-        "tk": tk,
         "project": None,
         "entity": None,
         "step": None,
@@ -1363,19 +1898,11 @@ def from_path(tk, path, previous_context=None):
     # gather all roots as lower case
     project_roots = [x.lower() for x in tk.pipeline_configuration.get_data_roots().values()]
 
-    # first gather entities
-    entities = []
-    secondary_entities = []
+    # first gather the path and all its parents up to the project root
+    paths = []
     curr_path = path
     while True:
-        curr_entity = path_cache.get_entity(curr_path)
-        if curr_entity:
-            # Don't worry about entity types we've already got in the context. In the future
-            # we should look for entity ids that conflict in order to flag a degenerate schema.
-            entities.append(curr_entity)
-        
-        # add secondary entities
-        secondary_entities.extend( path_cache.get_secondary_entities(curr_path) )
+        paths.append(curr_path)
 
         if curr_path.lower() in project_roots:
             #TODO this could fail with windows path variations
@@ -1391,7 +1918,20 @@ def from_path(tk, path, previous_context=None):
         else:
             curr_path = parent_path
 
-    path_cache.close()
+    # then gather entities for all these paths in one go
+    entities = []
+    secondary_entities = []
+    try:
+        for curr_entity, curr_secondary_entities in path_cache.get_entities_for_paths(paths):
+            if curr_entity:
+                # Don't worry about entity types we've already got in the context. In the future
+                # we should look for entity ids that conflict in order to flag a degenerate schema.
+                entities.append(curr_entity)
+
+            # add secondary entities
+            secondary_entities.extend(curr_secondary_entities)
+    finally:
+        path_cache.close()
 
     # now populate the context
     # go from the root down, so that in the case there are a path with
@@ -1441,28 +1981,7 @@ def from_path(tk, path, previous_context=None):
             if context["entity"] is None:
                 context["entity"] = curr_entity
 
-    # see if we can populate it based on the previous context
-    if previous_context and \
-       context.get("entity") == previous_context.entity and \
-       context.get("additional_entities") == previous_context.additional_entities:
-
-        # cool, everything is matching down to the step/task level.
-        # if context is missing a step and a task, we try to auto populate it.
-        # (note: weird edge that a context can have a task but no step)
-        if context.get("task") is None and context.get("step") is None:
-            context["step"] = previous_context.step
-
-        # now try to assign previous task but only if the step matches!
-        if context.get("task") is None and context.get("step") == previous_context.step:
-            context["task"] = previous_context.task
-
-    # ensure that we don't have a Project as the entity. Projects should only 
-    # appear on the projects level, despite being entities.
-    if context["project"] and context["entity"] and context["entity"]["type"] == "Project":
-        # remove double entry!
-        context["entity"] = None
-
-    return Context(**context)
+    return context
 
 
 ################################################################################################
@@ -1487,6 +2006,112 @@ def deserialize(context_str):
     """
     return Context.deserialize(context_str)
 
+def _is_json_context(context_str):
+    """
+    Tells if a serialized context was serialized to JSON rather than pickled.
+
+    :param context_str: String representation of context, created with :meth:`Context.serialize`
+    :returns: True if the context was serialized to JSON.
+    """
+    return isinstance(context_str, basestring) and context_str.startswith("{")
+
+def _deserialize_json(context_str):
+    """
+    Deserializes a context serialized to JSON, validating every value so that
+    malformed or malicious strings are rejected.
+
+    :param context_str: JSON string created by :meth:`Context.serialize`
+    :returns: Dictionary of :class:`Context` constructor parameters, along with the
+              ``_pc_path`` and, if the credentials were serialized, ``_current_user`` keys.
+    :raises: :class:`~sgtk.TankContextDeserializationError` if the string is invalid.
+    """
+    try:
+        data = json.loads(context_str)
+    except ValueError as e:
+        raise TankContextDeserializationError(str(e))
+
+    if not isinstance(data, dict):
+        raise TankContextDeserializationError("Invalid serialized context: %r" % context_str)
+
+    if data.get("v") != JSON_SERIALIZATION_FORMAT_VERSION:
+        raise TankContextDeserializationError(
+            "Unsupported serialized context version %r, expected version %s."
+            % (data.get("v"), JSON_SERIALIZATION_FORMAT_VERSION)
+        )
+
+    unknown_keys = set(data) - set(
+        ["v", "pc", "project", "entity", "user", "step", "task", "source_entity",
+         "additional_entities", "current_user"]
+    )
+    if unknown_keys:
+        raise TankContextDeserializationError(
+            "Unexpected values in serialized context: %s" % ", ".join(sorted(unknown_keys))
+        )
+
+    context = {
+        "_pc_path": _json_str(data.get("pc"), "pipeline configuration path"),
+    }
+    for key in ["project", "entity", "user", "step", "task", "source_entity"]:
+        if data.get(key) is not None:
+            context[key] = _entity_from_stub(data[key])
+
+    additional_entities = data.get("additional_entities") or []
+    if not isinstance(additional_entities, list):
+        raise TankContextDeserializationError("Invalid additional entities: %r" % additional_entities)
+    context["additional_entities"] = [_entity_from_stub(stub) for stub in additional_entities]
+
+    if data.get("current_user") is not None:
+        current_user = _json_str(data["current_user"], "user credentials")
+        # credentials are serialized to JSON as well, never let them be unpickled.
+        if not current_user.startswith("{"):
+            raise TankContextDeserializationError("Invalid user credentials in serialized context.")
+        context["_current_user"] = current_user
+
+    return context
+
+def _entity_to_stub(entity):
+    """
+    Converts an entity dictionary into its serialized form.
+
+    :param dict entity: Entity dictionary.
+    :returns: List with the type, id and name of the entity.
+    """
+    return [entity["type"], entity["id"], _get_entity_name(entity)]
+
+def _entity_from_stub(stub):
+    """
+    Converts a serialized entity back to an entity dictionary.
+
+    :param stub: List with the type, id and name of the entity.
+    :returns: Entity dictionary with the type, id and name keys.
+    :raises: :class:`~sgtk.TankContextDeserializationError` if the stub is invalid.
+    """
+    if (
+        not isinstance(stub, list) or len(stub) != 3 or
+        not isinstance(stub[1], (int, long)) or isinstance(stub[1], bool)
+    ):
+        raise TankContextDeserializationError("Invalid entity in serialized context: %r" % (stub,))
+    return {
+        "type": _json_str(stub[0], "entity type"),
+        "id": stub[1],
+        "name": _json_str(stub[2], "entity name") if stub[2] is not None else None,
+    }
+
+def _json_str(value, description):
+    """
+    Validates a string loaded from JSON and converts it into a utf-8 encoded string.
+
+    :param value: Value loaded from JSON.
+    :param str description: Description of the value for error messages.
+    :returns: utf-8 encoded string.
+    :raises: :class:`~sgtk.TankContextDeserializationError` if the value is not a string.
+    """
+    if not isinstance(value, basestring):
+        raise TankContextDeserializationError("Invalid %s in serialized context: %r" % (description, value))
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    return value
+
 ################################################################################################
 # YAML representer/constructor
 
@@ -1571,23 +2196,22 @@ def _get_entity_name(entity_dictionary):
             entity_name = entity_dictionary.get("name")
     return entity_name
 
-def _task_from_sg(tk, task_id, additional_fields = None):
+def _tasks_from_sg(tk, task_ids, additional_fields=None):
     """
-    Constructs a context from a shotgun task.
-    Because we are constructing the context from a task, we will get a context
-    which has both a project, an entity a step and a task associated with it.
+    Constructs contexts from shotgun tasks.
+    Because we are constructing the contexts from tasks, we will get contexts
+    which have a project, an entity a step and a task associated with them.
 
     Manne 9 April 2013: could we use the path cache primarily and fall back onto
                         a shotgun lookup? 
 
     :param tk:                   An Sgtk API instance
-    :param task_id:              The shotgun task id to produce a context for.
+    :param task_ids:             The shotgun task ids to produce contexts for.
     :param additional_fields:    List of additional fields to query for additional entities.  If this is
                                 'None' then the function will execute the hook to determine them. 
+    :returns:                    Dictionary of context data keyed by task id.
     """
-    context = {}
-
-    # Look up task's step and entity. This information should be static in practice, so we could
+    # Look up tasks' step and entity. This information should be static in practice, so we could
     # likely cache it in the future.
 
     standard_fields = ["content", "entity", "step", "project"]
@@ -1598,55 +2222,66 @@ def _task_from_sg(tk, task_id, additional_fields = None):
         # ask hook for extra Task entity fields we should query and insert into the additional_entities list.
         additional_fields = tk.execute_core_hook("context_additional_entities").get("entity_fields_on_task", [])
 
-    task = tk.shotgun.find_one("Task", [["id","is",task_id]], standard_fields + additional_fields)
-    if not task:
-        raise TankError("Unable to locate Task with id %s in Shotgun" % task_id)
+    tasks = _find_by_ids(tk, "Task", task_ids, standard_fields + additional_fields)
 
-    # add task so it can be processed with other shotgun entities
-    task["task"] = {"type": "Task", "id": task_id, "name": task["content"]}
+    contexts = {}
+    for task_id in task_ids:
+        task = tasks.get(task_id)
+        if not task:
+            raise TankError("Unable to locate Task with id %s in Shotgun" % task_id)
 
-    for key in context_keys + additional_fields:
-        data = task.get(key)
-        if data is None:
-            # gracefully skip stuff we don't have
-            # for example tasks may not have a step
-            continue
+        context = {}
 
-        # be explicit about what we pull in - make no assumptions about what is
-        # being returned from sg (the unit tests mocker doesn't return the same as the API)
-        value = {
-            "name": data.get("name"),
-            "id": data.get("id"),
-            "type": data.get("type")
-        }
+        # add task so it can be processed with other shotgun entities
+        task["task"] = {"type": "Task", "id": task_id, "name": task["content"]}
 
-        if key in context_keys:
-            context[key] = value
-        elif key in additional_fields:
-            additional_entities = context.get("additional_entities", [])
-            additional_entities.append(value)
-            context["additional_entities"] = additional_entities
+        for key in context_keys + additional_fields:
+            data = task.get(key)
+            if data is None:
+                # gracefully skip stuff we don't have
+                # for example tasks may not have a step
+                continue
 
-    return context
+            # be explicit about what we pull in - make no assumptions about what is
+            # being returned from sg (the unit tests mocker doesn't return the same as the API)
+            value = {
+                "name": data.get("name"),
+                "id": data.get("id"),
+                "type": data.get("type")
+            }
+
+            if key in context_keys:
+                context[key] = value
+            elif key in additional_fields:
+                additional_entities = context.get("additional_entities", [])
+                additional_entities.append(value)
+                context["additional_entities"] = additional_entities
 
+        contexts[task_id] = context
 
-def _entity_from_sg(tk, entity_type, entity_id):
+    return contexts
+
+
+def _entities_from_sg(tk, entity_type, entity_ids):
     """
-    Determines the entity details for the specified entity type and id by querying Shotgun.
+    Determines the entity details for the specified entity type and ids by querying Shotgun.
                         
-    If entity_type is 'Project' then this will return a single dictionary for the project.  For all
+    If entity_type is 'Project' then this will return a single dictionary for each project.  For all
     other entity types, this will return dictionaries for both the entity and the project the entity 
     exists under.
                         
     :param tk:          The sgtk api instance
-    :param entity_type: The entity type to build a context for
-    :param entity_id:   The entity id to build a context for
-    :returns:           Dictionary containing either a project entity-dictionary or both
-                        project and entity entity-dictionaries depending on the input entity type.
+    :param entity_type: The entity type to build contexts for
+    :param entity_ids:  The entity ids to build contexts for
+    :returns:           Dictionary keyed by entity id of dictionaries containing either a project
+                        entity-dictionary or both project and entity entity-dictionaries depending
+                        on the input entity type.
                         e.g. 
                         {
-                            "project":{"type":"Project", "id":123, "name":"My Project"},
-                            "entity":{"type":"Shot", "id":456, "name":"My Shot"}
+                            456: {
+                                "project":{"type":"Project", "id":123, "name":"My Project"},
+                                "entity":{"type":"Shot", "id":456, "name":"My Shot"}
+                            }
                         }
                             
     """
@@ -1654,22 +2289,46 @@ def _entity_from_sg(tk, entity_type, entity_id):
     name_field = shotgun_entity.get_sg_entity_name_field(entity_type)
     
     # get the entity data from Shotgun
-    data = tk.shotgun.find_one(entity_type, [["id", "is", entity_id]], ["project", name_field])
+    entities = _find_by_ids(tk, entity_type, entity_ids, ["project", name_field])
 
-    if not data:
-        raise TankError("Unable to locate %s with id %s in Shotgun" % (entity_type, entity_id))
+    contexts = {}
+    for entity_id in entity_ids:
+        data = entities.get(entity_id)
+        if not data:
+            raise TankError("Unable to locate %s with id %s in Shotgun" % (entity_type, entity_id))
 
-    # create context
-    context = {}
+        # create context
+        context = {}
     
-    if entity_type == "Project":
-        context["project"] = {"type":"Project", "id": entity_id, "name": data.get(name_field) }
+        if entity_type == "Project":
+            context["project"] = {"type":"Project", "id": entity_id, "name": data.get(name_field) }
     
-    else:
-        context["entity"] = {"type": entity_type, "id": entity_id, "name": data.get(name_field) }
-        context["project"] = data.get("project")     
+        else:
+            context["entity"] = {"type": entity_type, "id": entity_id, "name": data.get(name_field) }
+            context["project"] = data.get("project")     
 
-    return context
+        contexts[entity_id] = context
+
+    return contexts
+
+
+def _find_by_ids(tk, entity_type, entity_ids, fields):
+    """
+    Retrieves entities from Shotgun with an ``in`` filter on their ids. Large
+    lists of ids are split across several queries.
+
+    :param tk:          The sgtk api instance
+    :param entity_type: The shotgun entity type to retrieve
+    :param entity_ids:  The ids of the entities to retrieve
+    :param fields:      The fields to retrieve
+    :returns:           Dictionary of the entities found, keyed by id.
+    """
+    entities = {}
+    for i in range(0, len(entity_ids), SHOTGUN_QUERY_BATCH_SIZE):
+        batch_ids = entity_ids[i:i + SHOTGUN_QUERY_BATCH_SIZE]
+        for entity in tk.shotgun.find(entity_type, [["id", "in", batch_ids]], fields):
+            entities[entity["id"]] = entity
+    return entities
 
 
 def _context_data_from_cache(tk, entity_type, entity_id):
@@ -1802,11 +2461,6 @@ def _get_template_ancestors(template):
     """Return templates branch of the template tree, ordered from first template
     below the project root down to and including the input template.
     """
-    # TODO this would probably be better as the Template's responsibility
-    templates = [template]
-    cur_template = template
-    while cur_template.parent is not None and len(cur_template.parent.keys) > 0:
-        next_template = cur_template.parent
-        templates.insert(0, next_template)
-        cur_template = next_template
-    return templates
+    # the branch is computed once per template, so the parent templates and
+    # their compiled path matchers are reused between calls.
+    return list(template._get_ancestors())
@@ -0,0 +1,142 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache of the data resolved when building contexts.
+
+Building a context from an entity queries Shotgun or the path cache, and
+building a context from a path queries the path cache. Each :class:`Sgtk`
+instance holds a cache of the resulting data, keyed by entity type and id and
+by normalized path, so that asking for the same context repeatedly, for example
+for every row of a view, doesn't hit Shotgun each time.
+
+Cached data expires after a time to live, and is discarded when this process
+writes to a path cache database since new folders change the context of paths
+and entities.
+"""
+
+import os
+import copy
+import time
+
+from .util.lru_cache import LRUCache
+from .path_cache import PathCache
+
+
+class ContextCache(object):
+    """
+    Bounded cache of the constructor parameters of :class:`~tank.Context` objects.
+
+    The cached data is copied in and out of the cache so that contexts never
+    share their entity dictionaries.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        :param int max_size: Maximum number of items held by the cache. A size of
+                             0 disables the cache.
+        :param ttl: Number of seconds the items are kept for, or None to keep
+                    them until they are discarded to make room for new items.
+        """
+        self._items = LRUCache(max_size)
+        self.ttl = ttl
+
+    @property
+    def max_size(self):
+        """
+        Maximum number of items held by the cache.
+        """
+        return self._items.max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        self._items.max_size = max_size
+
+    @property
+    def stats(self):
+        """
+        Statistics about the cache usage, see :attr:`~tank.util.lru_cache.LRUCache.stats`.
+        """
+        return self._items.stats
+
+    def get_entity(self, entity_type, entity_id):
+        """
+        :param str entity_type: Shotgun entity type.
+        :param int entity_id: Shotgun entity id.
+        :returns: The context data cached for the entity or None.
+        """
+        return self._get(("entity", entity_type, entity_id))
+
+    def set_entity(self, entity_type, entity_id, data):
+        """
+        Caches the context data of an entity.
+
+        :param str entity_type: Shotgun entity type.
+        :param int entity_id: Shotgun entity id.
+        :param dict data: Context constructor parameters, without the tk instance.
+        """
+        self._set(("entity", entity_type, entity_id), data)
+
+    def get_path(self, path):
+        """
+        :param str path: Path on disk.
+        :returns: The context data cached for the path or None.
+        """
+        return self._get(("path", self._normalize_path(path)))
+
+    def set_path(self, path, data):
+        """
+        Caches the context data of a path.
+
+        :param str path: Path on disk.
+        :param dict data: Context constructor parameters, without the tk instance.
+        """
+        self._set(("path", self._normalize_path(path)), data)
+
+    def clear(self):
+        """
+        Discards all the cached data, for example when the folders on disk or
+        the templates changed.
+        """
+        self._items.clear(reset_stats=False)
+
+    def _get(self, key):
+        """
+        :param key: Key of the item.
+        :returns: A copy of the cached data or None if it isn't cached or expired.
+        """
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expiry_time, generation, data = item
+        if generation != PathCache.get_lookup_cache_generation() or (
+            expiry_time is not None and expiry_time < time.time()
+        ):
+            return None
+        return copy.deepcopy(data)
+
+    def _set(self, key, data):
+        """
+        :param key: Key of the item.
+        :param dict data: Data to cache a copy of.
+        """
+        if self._items.max_size <= 0:
+            return
+        expiry_time = time.time() + self.ttl if self.ttl is not None else None
+        self._items.set(
+            key, (expiry_time, PathCache.get_lookup_cache_generation(), copy.deepcopy(data))
+        )
+
+    def _normalize_path(self, path):
+        """
+        :param str path: Path on disk.
+        :returns: The path in a form shared by all the ways of writing it.
+        """
+        return os.path.normcase(os.path.abspath(path))
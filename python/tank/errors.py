@@ -86,3 +86,23 @@ class TankMultipleMatchingTemplatesError(TankError):
     """
     Exception that indicates that a path matches multiple templates.
     """
+
+
+class TankFolderIOError(TankError):
+    """
+    Exception that indicates that some folder creation items could not be processed.
+    """
+
+    def __init__(self, errors, results):
+        """
+        :param errors: List of (item, error message) tuples for each item which
+                       could not be processed.
+        :param results: List of the values returned for each item, None for the
+                        items which could not be processed.
+        """
+        message = "%d folder creation items could not be processed:\n%s" % (
+            len(errors), "\n".join(" - %s" % error for _, error in errors)
+        )
+        super(TankFolderIOError, self).__init__(message)
+        self.errors = errors
+        self.results = results
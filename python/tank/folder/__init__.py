@@ -13,5 +13,7 @@ This module contains functionality relating to folder creation.
 
 """
 
-from .operations import process_filesystem_structure, synchronize_folders
+from .operations import process_filesystem_structure, preview_filesystem_structure_diff, synchronize_folders
+from .bulk import process_filesystem_structure_bulk
 from .configuration import read_ignore_files
+from .folder_io import FolderIOExecutor
@@ -0,0 +1,219 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Folder creation for large numbers of entities.
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import json
+import time
+import threading
+from multiprocessing.pool import ThreadPool
+
+from .operations import process_filesystem_structure
+from ..errors import TankError
+from .. import LogManager
+from ..util import filesystem
+
+log = LogManager.get_logger(__name__)
+
+# version of the data stored in checkpoint files, bump it when the format changes
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+def process_filesystem_structure_bulk(
+    tk, entity_type, entity_ids=None, filters=None, engine=None,
+    chunk_size=100, max_workers=1, checkpoint_path=None
+):
+    """
+    Creates folders for a large number of entities.
+
+    The entities are split into chunks of ``chunk_size`` entities, each chunk
+    being a regular, batched, folder creation request. Up to ``max_workers``
+    chunks are processed concurrently.
+
+    When a checkpoint path is given, the entities to process and the chunks
+    which were processed are recorded in that file as the creation progresses.
+    Running the creation again with the same checkpoint file resumes it where it
+    stopped, skipping the chunks which were processed and ignoring the entity ids
+    and filters passed in. The file is deleted once all the chunks are processed.
+
+    A chunk failing doesn't stop the other chunks from being processed, the
+    failures are reported in the returned dictionary.
+
+    :param tk: A tk instance
+    :param entity_type: A shotgun entity type to create folders for
+    :param entity_ids: List of entity ids to process. If None, the entities are
+                       found with the ``filters``.
+    :param filters: Shotgun filters selecting the entities of the current project
+                    to process, used when no entity ids are given.
+    :param engine: Engine name for deferred folder creation, see
+                   :meth:`~tank.folder.process_filesystem_structure`.
+    :param int chunk_size: Number of entities processed by a folder creation request.
+    :param int max_workers: Number of chunks processed concurrently.
+    :param checkpoint_path: Path to the checkpoint file or None.
+    :returns: Dictionary with the following keys:
+
+        - "entities": Number of entities processed.
+        - "folders": Number of distinct folders processed.
+        - "skipped_entities": Number of entities skipped because they were
+          processed before the creation was resumed.
+        - "failures": List of dictionaries with the keys entity_ids and error
+          for each chunk which failed.
+        - "duration": Duration of the creation, in seconds.
+        - "entities_per_second" and "folders_per_second": Throughput of the creation.
+    :raises: :class:`TankError` if the entities can't be determined.
+    """
+    if chunk_size < 1:
+        raise TankError("The chunk size must be at least 1, got %s." % chunk_size)
+
+    checkpoint = None
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        checkpoint = _read_checkpoint(checkpoint_path, entity_type)
+        log.debug("Resuming folder creation from checkpoint %s" % checkpoint_path)
+    else:
+        if entity_ids is None:
+            entity_ids = _find_entity_ids(tk, entity_type, filters)
+        checkpoint = {
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "entity_type": entity_type,
+            "entity_ids": sorted(set(entity_ids)),
+            "chunk_size": chunk_size,
+            "completed_chunks": [],
+        }
+
+    entity_ids = checkpoint["entity_ids"]
+    chunk_size = checkpoint["chunk_size"]
+    chunks = [entity_ids[i:i + chunk_size] for i in range(0, len(entity_ids), chunk_size)]
+    completed_chunks = set(checkpoint["completed_chunks"])
+    pending_chunks = [index for index in range(len(chunks)) if index not in completed_chunks]
+
+    if checkpoint_path:
+        _write_checkpoint(checkpoint_path, checkpoint)
+
+    lock = threading.Lock()
+    folders = set()
+    failures = []
+
+    def process_chunk(index):
+        try:
+            chunk_folders = process_filesystem_structure(
+                tk, entity_type, chunks[index], False, engine, batched=True
+            )
+        except Exception as e:
+            log.debug("Could not create folders for %s ids %s" % (entity_type, chunks[index]), exc_info=True)
+            with lock:
+                failures.append({"entity_ids": chunks[index], "error": str(e)})
+            return
+
+        with lock:
+            folders.update(chunk_folders or [])
+            checkpoint["completed_chunks"].append(index)
+            if checkpoint_path:
+                _write_checkpoint(checkpoint_path, checkpoint)
+            log.debug(
+                "Created folders for %d of %d chunks." % (len(checkpoint["completed_chunks"]), len(chunks))
+            )
+
+    start_time = time.time()
+    if max_workers <= 1 or len(pending_chunks) <= 1:
+        for index in pending_chunks:
+            process_chunk(index)
+    else:
+        pool = ThreadPool(min(max_workers, len(pending_chunks)))
+        try:
+            pool.map(process_chunk, pending_chunks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    duration = time.time() - start_time
+
+    if checkpoint_path and not failures:
+        # all done, nothing to resume.
+        filesystem.safe_delete_file(checkpoint_path)
+
+    failed_entities = sum(len(failure["entity_ids"]) for failure in failures)
+    processed_entities = sum(len(chunks[index]) for index in pending_chunks) - failed_entities
+
+    return {
+        "entities": processed_entities,
+        "folders": len(folders),
+        "skipped_entities": sum(len(chunks[index]) for index in completed_chunks),
+        "failures": failures,
+        "duration": duration,
+        "entities_per_second": processed_entities / duration if duration else 0.0,
+        "folders_per_second": len(folders) / duration if duration else 0.0,
+    }
+
+
+def _find_entity_ids(tk, entity_type, filters):
+    """
+    Finds the ids of the entities of the current project matching some filters.
+
+    :param tk: A tk instance
+    :param entity_type: Shotgun entity type.
+    :param filters: List of Shotgun filters or None.
+    :returns: List of entity ids.
+    """
+    filters = list(filters or [])
+    project_id = tk.pipeline_configuration.get_project_id()
+    if project_id is not None and entity_type != "Project":
+        filters.append(["project", "is", {"type": "Project", "id": project_id}])
+    return [entity["id"] for entity in tk.shotgun.find(entity_type, filters)]
+
+
+def _read_checkpoint(checkpoint_path, entity_type):
+    """
+    Reads a checkpoint file.
+
+    :param checkpoint_path: Path to the checkpoint file.
+    :param entity_type: Entity type of the folder creation being resumed.
+    :returns: Checkpoint dictionary.
+    :raises: :class:`TankError` if the file can't be used to resume the creation.
+    """
+    try:
+        with open(checkpoint_path, "rb") as fh:
+            checkpoint = json.load(fh)
+    except Exception as e:
+        raise TankError("Could not read folder creation checkpoint %s: %s" % (checkpoint_path, e))
+
+    if checkpoint.get("version") != CHECKPOINT_FORMAT_VERSION:
+        raise TankError("Unsupported folder creation checkpoint %s." % checkpoint_path)
+
+    if checkpoint["entity_type"] != entity_type:
+        raise TankError(
+            "Folder creation checkpoint %s was written for %s entities, not %s entities."
+            % (checkpoint_path, checkpoint["entity_type"], entity_type)
+        )
+
+    return checkpoint
+
+
+def _write_checkpoint(checkpoint_path, checkpoint):
+    """
+    Writes a checkpoint file.
+
+    The file is written to a temporary location first and then moved in place
+    so that an interrupted creation never leaves a partially written file.
+
+    :param checkpoint_path: Path to the checkpoint file.
+    :param checkpoint: Checkpoint dictionary.
+    """
+    temp_path = "%s.tmp" % checkpoint_path
+    with open(temp_path, "wb") as fh:
+        json.dump(checkpoint, fh)
+    if sys.platform == "win32" and os.path.exists(checkpoint_path):
+        # rename doesn't overwrite existing files on windows.
+        os.remove(checkpoint_path)
+    os.rename(temp_path, checkpoint_path)
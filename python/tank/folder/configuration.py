@@ -20,6 +20,7 @@ from .folder_types import Static, ListField, Entity, Project, UserWorkspace, Sho
 
 from ..errors import TankError, TankUnreadableFileError
 from . import constants
+from .schema_cache import read_compiled_schema
 from ..util import yaml_cache
 
 
@@ -61,11 +62,16 @@ class FolderConfiguration(object):
         # maintain a list of all Step nodes for special introspection
         self._step_fields = []
         
-        # read skip files config
-        self._ignore_files = read_ignore_files(schema_config_path)
-        
-        # load schema
-        self._load_schema(schema_config_path)
+        # patterns of the files to skip, read when the schema is compiled
+        self._ignore_files = []
+
+        # load schema, compiling it unless it is cached
+        compiled_schema = read_compiled_schema(
+            tk.pipeline_configuration,
+            schema_config_path,
+            self._compile_schema
+        )
+        self._load_schema(schema_config_path, compiled_schema)
 
 
     ##########################################################################################
@@ -202,21 +208,62 @@ class FolderConfiguration(object):
     ##########################################################################################
     # internal stuff
 
+    def _compile_schema(self, schema_config_path):
+        """
+        Scans the schema on disk and compiles it into a tree of plain data which
+        doesn't depend on the toolkit instance and can be cached.
 
-    def _load_schema(self, schema_config_path):
+        :param schema_config_path: Path to the schema folder.
+        :returns: List of compiled project folders, see :meth:`_compile_folder_r`.
         """
-        Scan the config and build objects structure
+        # read skip files config
+        self._ignore_files = read_ignore_files(schema_config_path)
+
+        compiled_schema = []
+        for project_folder in self._get_sub_directories(schema_config_path):
+            compiled_schema.append(self._compile_folder_r(schema_config_path, project_folder))
+        return compiled_schema
+
+    def _compile_folder_r(self, schema_config_path, full_path):
         """
+        Recursively compiles a folder of the schema.
 
-        project_folders = self._get_sub_directories(schema_config_path)
+        :param schema_config_path: Path to the schema folder.
+        :param full_path: Path to the folder to compile.
+        :returns: Dictionary with the keys path, metadata, children, symlinks and files.
+                  Paths are relative to the schema folder and metadata is None if the
+                  folder has no metadata file.
+        """
+        return {
+            "path": os.path.relpath(full_path, schema_config_path),
+            "metadata": self._read_metadata(full_path),
+            "children": [
+                self._compile_folder_r(schema_config_path, sub_directory)
+                for sub_directory in self._get_sub_directories(full_path)
+            ],
+            "symlinks": self._get_symlinks_in_folder(full_path),
+            "files": [
+                os.path.relpath(file_path, schema_config_path)
+                for file_path in self._get_files_in_folder(full_path)
+            ],
+        }
+
+    def _load_schema(self, schema_config_path, compiled_schema):
+        """
+        Build objects structure from the compiled schema
 
+        :param schema_config_path: Path to the schema folder.
+        :param compiled_schema: Compiled schema, see :meth:`_compile_schema`.
+        """
         # make some space in our obj/entity type mapping
         self._entity_nodes_by_type["Project"] = []
 
-        for project_folder in project_folders:
+        for compiled_folder in compiled_schema:
+
+            project_folder = os.path.join(schema_config_path, compiled_folder["path"])
 
             # read metadata to determine root path
-            metadata = self._read_metadata(project_folder)
+            metadata = compiled_folder["metadata"]
 
             if metadata is None:
                 if os.path.basename(project_folder) == "project":
@@ -245,19 +292,20 @@ class FolderConfiguration(object):
             self._entity_nodes_by_type["Project"].append(project_obj)
 
             # recursively process the rest
-            self._process_config_r(project_obj, project_folder)
+            self._process_config_r(project_obj, schema_config_path, compiled_folder)
 
 
-    def _process_config_r(self, parent_node, parent_path):
+    def _process_config_r(self, parent_node, schema_config_path, compiled_parent):
         """
-        Recursively scan the file system and construct an object
+        Recursively walk the compiled schema and construct an object
         hierarchy.
 
         Factory method for Folder objects.
         """
-        for full_path in self._get_sub_directories(parent_path):
+        for compiled_folder in compiled_parent["children"]:
+            full_path = os.path.join(schema_config_path, compiled_folder["path"])
             # check for metadata (non-static folder)
-            metadata = self._read_metadata(full_path)
+            metadata = compiled_folder["metadata"]
             if metadata:
                 node_type = metadata.get("type", "undefined")
 
@@ -296,25 +344,13 @@ class FolderConfiguration(object):
                 cur_node = Static.create(self._tk, parent_node, full_path, {"type": "static"})
 
             # and process children
-            self._process_config_r(cur_node, full_path)
+            self._process_config_r(cur_node, schema_config_path, compiled_folder)
 
         # process symlinks
-        for (path, target, metadata) in self._get_symlinks_in_folder(parent_path):
+        for (path, target, metadata) in compiled_parent["symlinks"]:
             parent_node.add_symlink(path, target, metadata)
         
 
         # now process all files and add them to the parent_node token
-        for f in self._get_files_in_folder(parent_path):
-            parent_node.add_file(f)
-
-
-
-
-
-
-
-
-
-
-
-
+        for f in compiled_parent["files"]:
+            parent_node.add_file(os.path.join(schema_config_path, f))
@@ -16,17 +16,275 @@ Known constraints:
 
 """
 
+import os
+import sys
+import Queue
+from multiprocessing.pool import ThreadPool
+
 from . import constants
-from ..errors import TankError
+from ..errors import TankError, TankFolderIOError
+from .. import LogManager
 
 from ..path_cache import PathCache
-    
+
+log = LogManager.get_logger(__name__)
+
+
+class FolderIOExecutor(object):
+    """
+    Processes folder creation items, running the I/O of independent subtrees
+    concurrently.
+
+    An item is only processed once the earlier item with the closest parent
+    path has been processed, so that folders are always created before their
+    content. Items below a path which could not be processed are skipped.
+    Failures don't stop the processing of the other items, they are all reported
+    once every item has been processed.
+
+    This is meant to be used by the ``process_folder_creation`` core hook::
+
+        executor = FolderIOExecutor(max_workers)
+        created_paths = executor.execute(items, self._process_item)
+    """
+
+    def __init__(self, max_workers=1):
+        """
+        :param int max_workers: Number of threads processing items. Items are
+                                processed in order in the calling thread if this is 1.
+        """
+        self._max_workers = max_workers
+
+    def execute(self, items, process_item):
+        """
+        Processes folder creation items.
+
+        :param items: List of folder creation item dictionaries, as passed to the
+                      ``process_folder_creation`` core hook.
+        :param process_item: Callable processing a single item. It is called from
+                             several threads at once when there is more than one worker.
+        :returns: List of the values returned by ``process_item``, in the order of the items.
+        :raises: :class:`~tank.errors.TankFolderIOError` if some items could not be processed.
+        """
+        parents = self._get_parents(items)
+        results = [None] * len(items)
+        # error messages keyed by item index
+        errors = {}
+
+        if self._max_workers > 1 and len(items) > 1:
+            self._execute_concurrently(items, parents, process_item, results, errors)
+        else:
+            for index, item in enumerate(items):
+                if parents[index] in errors:
+                    errors[index] = self._get_skipped_message(items[parents[index]])
+                    continue
+                _, results[index], error = _process_folder_item(process_item, index, item)
+                if error:
+                    errors[index] = error
+
+        if errors:
+            raise TankFolderIOError(
+                [(items[index], errors[index]) for index in sorted(errors)],
+                results
+            )
+        return results
+
+    def _execute_concurrently(self, items, parents, process_item, results, errors):
+        """
+        Processes the items on a pool of threads, starting with the items without
+        a parent and submitting the children of each item once it is processed.
+
+        :param items: List of folder creation items.
+        :param parents: List with the index of the parent of each item, or None.
+        :param process_item: Callable processing a single item.
+        :param results: List the values returned by ``process_item`` are stored in.
+        :param errors: Dictionary the error messages are stored in, keyed by item index.
+        """
+        children = [[] for _ in items]
+        for index, parent in enumerate(parents):
+            if parent is not None:
+                children[parent].append(index)
+
+        pool = ThreadPool(min(self._max_workers, len(items)))
+        processed_items = Queue.Queue()
+        try:
+            def submit(index):
+                pool.apply_async(
+                    _process_folder_item_in_thread,
+                    (process_item, index, items[index]),
+                    callback=processed_items.put
+                )
+
+            pending = 0
+            for index, parent in enumerate(parents):
+                if parent is None:
+                    submit(index)
+                    pending += 1
+
+            while pending:
+                index, result, error, exc_info = processed_items.get()
+                pending -= 1
+                if exc_info:
+                    # e.g. SystemExit or KeyboardInterrupt raised by a hook.
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                if error:
+                    errors[index] = error
+                    self._skip_descendants(items, children, index, errors)
+                else:
+                    results[index] = result
+                    for child in children[index]:
+                        submit(child)
+                        pending += 1
+        finally:
+            pool.close()
+            pool.join()
+
+    def _skip_descendants(self, items, children, index, errors):
+        """
+        Records an error for the items below an item which could not be processed.
+
+        :param items: List of folder creation items.
+        :param children: List with the indices of the children of each item.
+        :param index: Index of the item which could not be processed.
+        :param errors: Dictionary the error messages are stored in, keyed by item index.
+        """
+        message = self._get_skipped_message(items[index])
+        descendants = list(children[index])
+        while descendants:
+            descendant = descendants.pop()
+            errors[descendant] = message
+            descendants.extend(children[descendant])
+
+    def _get_skipped_message(self, failed_item):
+        """
+        :param failed_item: Folder creation item which could not be processed.
+        :returns: Error message for the items skipped because of a failed item.
+        """
+        return "Skipped, %s could not be processed." % _get_folder_item_path(failed_item)
+
+    @staticmethod
+    def _get_parents(items):
+        """
+        Finds the item each item depends on, which is the closest earlier item
+        with the same path or a parent path.
+
+        :param items: List of folder creation items.
+        :returns: List with the index of the parent of each item, or None.
+        """
+        # index of the last item found for each path
+        indices_by_path = {}
+        parents = []
+        for index, item in enumerate(items):
+            parent = None
+            path = _get_folder_item_path(item)
+            if path is not None:
+                path = os.path.normcase(os.path.normpath(path))
+                parent = indices_by_path.get(path)
+                folder = path
+                while parent is None:
+                    parent_folder = os.path.dirname(folder)
+                    if parent_folder == folder:
+                        break
+                    folder = parent_folder
+                    parent = indices_by_path.get(folder)
+                indices_by_path[path] = index
+            parents.append(parent)
+        return parents
+
+
+def _get_folder_item_path(item):
+    """
+    :param item: Folder creation item.
+    :returns: The path created by the item, or None.
+    """
+    return item.get("path") or item.get("target_path")
+
+
+def _get_distinct(values):
+    """
+    :param values: List of hashable values.
+    :returns: List of the distinct values, in the order they first appear.
+    """
+    seen = set()
+    distinct = []
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            distinct.append(value)
+    return distinct
+
+
+def _check_paths_exist(paths, symlink_paths, max_workers):
+    """
+    Checks whether paths exist on disk, on a pool of threads if more than one
+    worker is requested.
+
+    :param paths: List of paths.
+    :param symlink_paths: Set of the paths which are symbolic links. Links are
+                          checked rather than what they point at.
+    :param int max_workers: Number of threads checking the paths.
+    :returns: List with a boolean for each path.
+    """
+    def path_exists(path):
+        if path in symlink_paths:
+            return os.path.lexists(path)
+        return os.path.exists(path)
+
+    if max_workers <= 1 or len(paths) <= 1:
+        return [path_exists(path) for path in paths]
+
+    pool = ThreadPool(min(max_workers, len(paths)))
+    try:
+        # hand the paths to the threads in chunks, checking a path is too quick
+        # to be worth a round trip to the pool on its own.
+        return pool.map(path_exists, paths, chunksize=max(1, len(paths) // (max_workers * 4)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _process_folder_item(process_item, index, item):
+    """
+    Processes a folder creation item, catching any error.
+
+    :param process_item: Callable processing the item.
+    :param index: Index of the item.
+    :param item: Folder creation item.
+    :returns: Tuple with the index of the item, the value returned by ``process_item``
+              and an error message, which is None if the item was processed.
+    """
+    try:
+        return index, process_item(item), None
+    except Exception as e:
+        log.debug("Could not process folder creation item %s" % item, exc_info=True)
+        return index, None, "%s: %s" % (_get_folder_item_path(item), e)
+
+
+def _process_folder_item_in_thread(process_item, index, item):
+    """
+    Processes a folder creation item on a pool thread.
+
+    Exceptions which are not caught by :meth:`_process_folder_item`, like
+    ``SystemExit``, would end the pool thread without reporting the item as
+    processed, so they are returned to be raised again on the calling thread.
+
+    :param process_item: Callable processing the item.
+    :param index: Index of the item.
+    :param item: Folder creation item.
+    :returns: The tuple returned by :meth:`_process_folder_item` followed by
+              the ``sys.exc_info()`` of the exception to raise again, or None.
+    """
+    try:
+        return _process_folder_item(process_item, index, item) + (None,)
+    except BaseException:
+        return index, None, None, sys.exc_info()
+
+
 class FolderIOReceiver(object):
     """
     Class that encapsulates all the IO operations from the various folder classes.
     """
     
-    def __init__(self, tk, preview, entity_type, entity_ids):
+    def __init__(self, tk, preview, entity_type, entity_ids, max_workers=1, shotgun=None):
         """
         Constructor.
         
@@ -34,9 +292,16 @@ class FolderIOReceiver(object):
         :param preview: boolean set to true if run in preview mode
         :param entity_type: string with the sg entity type from the main folder creation request
         :param entity_ids: list of ids of the sg object for which folder creation was requested.
+        :param int max_workers: Number of threads the folder creation hook may use
+                                to process independent folders concurrently.
+        :param shotgun: Object the folder objects query Shotgun with, for example a
+                        :class:`~tank.folder.query_cache.ShotgunQueryCache`.
+                        Defaults to the Shotgun API instance of the tk instance.
         
         """
         self._tk = tk
+        self._max_workers = max_workers
+        self._shotgun = shotgun or tk.shotgun
         self._preview_mode = preview
         self._items = list()
         self._secondary_cache_entries = list() 
@@ -161,7 +426,8 @@ class FolderIOReceiver(object):
                 if len(remote_items) > 0:
                     self._tk.execute_core_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
                                                items=remote_items, 
-                                               preview_mode=self._preview_mode)
+                                               preview_mode=self._preview_mode,
+                                               max_workers=self._max_workers)
                 
                 # ok folders created for synced stuff. Now re-raise validation error
                 raise TankError("Folder creation aborted: %s" % e) 
@@ -176,7 +442,8 @@ class FolderIOReceiver(object):
             
             self._tk.execute_core_hook(constants.PROCESS_FOLDER_CREATION_HOOK_NAME, 
                                        items=folder_creation_items, 
-                                       preview_mode=self._preview_mode)
+                                       preview_mode=self._preview_mode,
+                                       max_workers=self._max_workers)
             
             # database data was validated, folders on disk created
             # finally store all our new data in the path cache and in shotgun
@@ -198,8 +465,88 @@ class FolderIOReceiver(object):
         return folders
             
         
+    def get_folder_creation_diff(self):
+        """
+        Compares the folder creation items with the file system and the path cache,
+        to find the changes running the folder creation would actually make.
+
+        Whether the paths exist on disk is checked on a pool of ``max_workers``
+        threads and the path cache entries of all the paths are looked up at once.
+
+        :returns: Dictionary with the following keys:
+
+            - "create": List of the paths which don't exist on disk.
+            - "register": List of the paths which are not registered in the path
+              cache with the entities they would be registered with.
+            - "counts": Dictionary with the number of paths to create and to register,
+              the number of paths which are already on disk and registered, under the
+              "unchanged" key, and the total number of paths.
+        """
+        # distinct paths, in the order they are created
+        paths = []
+        symlink_paths = set()
+        for item in self._items:
+            path = _get_folder_item_path(item)
+            if path is None:
+                continue
+            if item.get("action") == "symlink":
+                # check the link rather than what it points at.
+                symlink_paths.add(path)
+            paths.append(path)
+        paths = _get_distinct(paths)
+
+        # path cache entries the folder creation would add
+        registrations = [(i["path"], i["entity"], True) for i in self._items if i.get("action") == "entity_folder"]
+        registrations.extend((i["path"], i["entity"], False) for i in self._secondary_cache_entries)
+        registered_paths = _get_distinct([registered_path for registered_path, _, _ in registrations])
+
+        path_exists = _check_paths_exist(paths, symlink_paths, self._max_workers)
+
+        registered_entities = {}
+        if registered_paths:
+            path_cache = PathCache(self._tk)
+            try:
+                registered_entities = dict(
+                    zip(registered_paths, path_cache.get_entities_for_paths(registered_paths))
+                )
+            finally:
+                path_cache.close()
+
+        paths_to_register = set()
+        for path, entity, primary in registrations:
+            primary_entity, secondary_entities = registered_entities[path]
+            candidates = [primary_entity] if primary else secondary_entities
+            if not any(
+                candidate and (candidate["type"], candidate["id"]) == (entity["type"], entity["id"])
+                for candidate in candidates
+            ):
+                paths_to_register.add(path)
+
+        create = [path for path, exists in zip(paths, path_exists) if not exists]
+        register = [path for path in registered_paths if path in paths_to_register]
+        unchanged = set(paths).difference(create, register)
+
+        return {
+            "create": create,
+            "register": register,
+            "counts": {
+                "create": len(create),
+                "register": len(register),
+                "unchanged": len(unchanged),
+                "total": len(set(paths).union(registered_paths)),
+            },
+        }
+
     ####################################################################################
     # methods called by the folder classes
+
+    @property
+    def shotgun(self):
+        """
+        Object providing the ``find`` and ``find_one`` methods of the Shotgun API
+        which the folder classes query Shotgun with.
+        """
+        return self._shotgun
             
     def register_secondary_entity(self, path, entity, config_metadata):
         """
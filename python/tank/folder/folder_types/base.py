@@ -82,6 +82,33 @@ class Folder(object):
             return shotgun_data
         else:
             return self._parent.extract_shotgun_data_upwards(sg, shotgun_data)
+
+    def prefetch_shotgun_data_upwards(self, sg, shotgun_data_list):
+        """
+        Retrieves the Shotgun data needed to run :meth:`extract_shotgun_data_upwards`
+        for several Shotgun data dictionaries at once.
+
+        This is subclassed by deriving classes which process Shotgun data.
+        For more information, see the Entity implementation.
+
+        :param sg: :class:`~tank.folder.query_cache.ShotgunQueryCache` instance.
+        :param shotgun_data_list: List of Shotgun data dictionaries.
+        """
+        if self._parent is not None:
+            self._parent.prefetch_shotgun_data_upwards(sg, shotgun_data_list)
+
+    def prefetch_entities(self, sg, shotgun_data_list):
+        """
+        Retrieves the Shotgun data needed to create this folder for several Shotgun
+        data dictionaries at once.
+
+        This is subclassed by deriving classes which process Shotgun data.
+        For more information, see the Entity implementation.
+
+        :param sg: :class:`~tank.folder.query_cache.ShotgunQueryCache` instance.
+        :param shotgun_data_list: List of Shotgun data dictionaries, as returned by
+                                  :meth:`extract_shotgun_data_upwards`.
+        """
             
     def get_parents(self):
         """
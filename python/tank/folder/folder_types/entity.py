@@ -18,6 +18,7 @@ from .errors import EntityLinkTypeMismatch
 from .base import Folder
 from .expression_tokens import FilterExpressionToken
 from .util import translate_filter_tokens, resolve_shotgun_filters
+from ..query_cache import get_query_key
 
 
 class Entity(Folder):
@@ -130,7 +131,7 @@ class Entity(Folder):
         """
         items_created = []
         
-        for entity in self.__get_entities(sg_data):
+        for entity in self.__get_entities(io_receiver.shotgun, sg_data):
 
             # generate the field name            
             folder_name = self._entity_expression.generate_name(entity)
@@ -178,10 +179,31 @@ class Entity(Folder):
             entity_link = entity[lf]
             io_receiver.register_secondary_entity(path, entity_link, self._config_metadata)
 
-    def __get_entities(self, sg_data):
+    def __get_entities(self, sg, sg_data):
         """
         Returns shotgun data for folder creation
         """
+        resolved_filters, entity_id, fields_list = self.__get_entities_query(sg_data)
+        if entity_id is not None:
+            # add the id constraint to the filters
+            resolved_filters["conditions"].append(
+                {"path": "id", "relation": "is", "values": [entity_id]}
+            )
+            # get data - can be None depending on external filters
+
+        # now find all the items (e.g. shots) matching this query
+        entities = sg.find(self._entity_type, resolved_filters, fields_list)
+        
+        return entities
+
+    def __get_entities_query(self, sg_data):
+        """
+        Builds the query retrieving the shotgun data for folder creation.
+
+        :param sg_data: Shotgun data dictionary.
+        :returns: Tuple with the resolved filter dictionary, the id of the entity the
+                  query is constrained to or None, and the list of fields to retrieve.
+        """
         # first check the constraints: if tokens contains a type/id pair our our type,
         # we should only process this single entity. If not, then use the query filter
         
@@ -189,15 +211,11 @@ class Entity(Folder):
         resolved_filters = resolve_shotgun_filters(self._filters, sg_data)
         
         # see if the sg_data dictionary has a "seed" entity type matching our entity type
+        entity_id = None
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
         if my_sg_data_key in sg_data:
             # we have a constraint!
             entity_id = sg_data[my_sg_data_key]["id"]
-            # add the id constraint to the filters
-            resolved_filters["conditions"].append(
-                {"path": "id", "relation": "is", "values": [entity_id]}
-            )
-            # get data - can be None depending on external filters
 
         # figure out which fields to retrieve
         fields = self._entity_expression.get_shotgun_fields()
@@ -214,11 +232,33 @@ class Entity(Folder):
 
         # convert to a list - sets wont work with the SG API
         fields_list = list(fields)
-        
-        # now find all the items (e.g. shots) matching this query
-        entities = self._tk.shotgun.find(self._entity_type, resolved_filters, fields_list)
-        
-        return entities
+
+        return resolved_filters, entity_id, fields_list
+
+    def prefetch_entities(self, sg, shotgun_data_list):
+        """
+        Retrieves the entities this folder is created for when processing several
+        Shotgun data dictionaries, with a query for all the entities whose folders
+        are created in the same parent folder.
+
+        :param sg: :class:`~tank.folder.query_cache.ShotgunQueryCache` instance.
+        :param shotgun_data_list: List of Shotgun data dictionaries, as returned by
+                                  :meth:`extract_shotgun_data_upwards`.
+        """
+        queries = {}
+        for sg_data in shotgun_data_list:
+            try:
+                resolved_filters, entity_id, fields_list = self.__get_entities_query(sg_data)
+            except TankError:
+                # the error is reported when the folders are created.
+                continue
+            if entity_id is None:
+                continue
+            query_key = get_query_key(self._entity_type, resolved_filters, fields_list)
+            queries.setdefault(query_key, (resolved_filters, fields_list, []))[2].append(entity_id)
+
+        for resolved_filters, fields_list, entity_ids in queries.values():
+            sg.prefetch(self._entity_type, resolved_filters, fields_list, entity_ids)
 
     def extract_shotgun_data_upwards(self, sg, shotgun_data):
         """
@@ -265,136 +305,193 @@ class Entity(Folder):
         # by its children as we move upwards - for example a step.
         my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
         if my_sg_data_key in tokens:
+            self.__extract_shotgun_data(sg, tokens)
 
+        # now keep recursing upwards
+        if self._parent is None:
+            return tokens
+        
+        else:
+            return self._parent.extract_shotgun_data_upwards(sg, tokens)
+
+    def prefetch_shotgun_data_upwards(self, sg, shotgun_data_list):
+        """
+        Retrieves the Shotgun data extracted by :meth:`extract_shotgun_data_upwards`
+        for several Shotgun data dictionaries, with a single query for each level
+        of the folder configuration.
+
+        :param sg: :class:`~tank.folder.query_cache.ShotgunQueryCache` instance.
+        :param shotgun_data_list: List of Shotgun data dictionaries, each containing
+                                  a "seed".
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+        entity_ids = [
+            shotgun_data[my_sg_data_key]["id"]
+            for shotgun_data in shotgun_data_list if my_sg_data_key in shotgun_data
+        ]
+
+        if entity_ids:
+            (_, fields_to_retrieve, additional_filters) = self.__get_shotgun_data_query()
+            filter_dict = {"logical_operator": "and", "conditions": additional_filters}
+            sg.prefetch(self._entity_type, filter_dict, fields_to_retrieve, entity_ids)
+
+        # extract the data for this level, which is now cached, to find
+        # the ids needed by the parent level.
+        parent_shotgun_data_list = []
+        for shotgun_data in shotgun_data_list:
+            tokens = copy.deepcopy(shotgun_data)
+            if my_sg_data_key in tokens:
+                try:
+                    self.__extract_shotgun_data(sg, tokens)
+                except (TankError, EntityLinkTypeMismatch):
+                    # the error is reported when the data is extracted for folder creation.
+                    continue
+            parent_shotgun_data_list.append(tokens)
+
+        if self._parent and parent_shotgun_data_list:
+            self._parent.prefetch_shotgun_data_upwards(sg, parent_shotgun_data_list)
+
+    def __get_shotgun_data_query(self):
+        """
+        Builds the query retrieving the Shotgun data for this level in
+        :meth:`extract_shotgun_data_upwards`, without the condition on the id.
+
+        :returns: Tuple with a dictionary of the link fields to retrieve, keyed
+                  by field, the list of fields to retrieve and the list of
+                  conditions to filter on.
+        """
+        link_map = {}
+        fields_to_retrieve = []
+        additional_filters = []
+        
+        # TODO: Support nested conditions
+        for condition in self._filters["conditions"]:
+            vals = condition["values"]
             
-            link_map = {}
-            fields_to_retrieve = []
-            additional_filters = []
-            
-            # TODO: Support nested conditions
-            for condition in self._filters["conditions"]:
-                vals = condition["values"]
-                
-                # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
-                # the special $FROM$ step based culling filter that is commonly used. Because steps are 
-                # sort of free floating and not associated with an entity, removing them from the 
-                # resolve should be fine in most cases.
-                
-                # so - if at the shot level, we have defined the following filter:
-                # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
-                # the $sequence will be represented by a Token object and we need to get a value for 
-                # this token. We fetch the id for this token and then, as we recurse upwards, and process
-                # the parent folder level (the sequence), this id will be the "seed" when we populate that
-                # level. 
-                
-                if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
-                    expr_token = vals[0]
-                    # we should get this field (eg. 'sg_sequence')
-                    fields_to_retrieve.append(condition["path"])
-                    # add to our map for later processing map['sg_sequence'] = 'Sequence'
-                    # note that for List fields, the key is EntityType.field
-                    link_map[ condition["path"] ] = expr_token 
-                
-                elif not condition["path"].startswith('$FROM$'):
-                    # this is a normal filter (we exclude the $FROM$ stuff since it is weird
-                    # and specific to steps.) So for example 'name must begin with X' - we want 
-                    # to include these in the query where we are looking for the object, to
-                    # ensure that assets with names starting with X are not created for an 
-                    # asset folder node which explicitly excludes these via its filters. 
-                    additional_filters.append(condition)
-            
-            # add some extra fields apart from the stuff in the config
-            if self._entity_type == "Project":
-                fields_to_retrieve.append("name")
-            elif self._entity_type == "Task":
-                fields_to_retrieve.append("content")
-            elif self._entity_type == "HumanUser":
-                fields_to_retrieve.append("login")
-            else:
-                fields_to_retrieve.append("code")
-            
-            # TODO: AND the id query with this folder's query to make sure this path is
-            # valid for the current entity. Throw error if not so driver code knows to 
-            # stop processing. This would be needed in a setup where (for example) Asset
-            # appears in several locations in the filesystem and that the filters are responsible
-            # for determining which location to use for a particular asset.
-            my_id = tokens[ my_sg_data_key ]["id"]
-            additional_filters.append( {"path": "id", "relation": "is", "values": [my_id]})
-            
-            # append additional filter cruft
-            filter_dict = { "logical_operator": "and", "conditions": additional_filters }
+            # note the $FROM$ condition below - this is a bit of a hack to make sure we exclude
+            # the special $FROM$ step based culling filter that is commonly used. Because steps are 
+            # sort of free floating and not associated with an entity, removing them from the 
+            # resolve should be fine in most cases.
             
-            # carry out find
-            rec = sg.find_one(self._entity_type, filter_dict, fields_to_retrieve)
+            # so - if at the shot level, we have defined the following filter:
+            # filters: [ { "path": "sg_sequence", "relation": "is", "values": [ "$sequence" ] } ]
+            # the $sequence will be represented by a Token object and we need to get a value for 
+            # this token. We fetch the id for this token and then, as we recurse upwards, and process
+            # the parent folder level (the sequence), this id will be the "seed" when we populate that
+            # level. 
             
-            # there are now two reasons why find_one did not return:
-            # - the specified entity id does not exist or has been deleted
-            # - there are filters which has filtered it out. For example imagine that you 
-            #   have one folder structure for all assets starting with A and a second structure
-            #   for the rest. This would be a filter condition (code does not start with A, and
-            #   code starts with A respectively). In these cases, the object does exist but has been
-            #   explicitly filtered out - which is not an error!
+            if vals[0] and isinstance(vals[0], FilterExpressionToken) and not condition["path"].startswith('$FROM$'):
+                expr_token = vals[0]
+                # we should get this field (eg. 'sg_sequence')
+                fields_to_retrieve.append(condition["path"])
+                # add to our map for later processing map['sg_sequence'] = 'Sequence'
+                # note that for List fields, the key is EntityType.field
+                link_map[ condition["path"] ] = expr_token 
             
-            if not rec:
-                
-                # check if it is a missing id or just a filtered out thing
-                if sg.find_one(self._entity_type, [["id", "is", my_id]]) is None:                
-                    raise TankError("Could not find Shotgun %s with id %s as required by "
-                                    "the folder creation setup." % (self._entity_type, my_id))
-                else:
-                    raise EntityLinkTypeMismatch()
+            elif not condition["path"].startswith('$FROM$'):
+                # this is a normal filter (we exclude the $FROM$ stuff since it is weird
+                # and specific to steps.) So for example 'name must begin with X' - we want 
+                # to include these in the query where we are looking for the object, to
+                # ensure that assets with names starting with X are not created for an 
+                # asset folder node which explicitly excludes these via its filters. 
+                additional_filters.append(condition)
+        
+        # add some extra fields apart from the stuff in the config
+        if self._entity_type == "Project":
+            fields_to_retrieve.append("name")
+        elif self._entity_type == "Task":
+            fields_to_retrieve.append("content")
+        elif self._entity_type == "HumanUser":
+            fields_to_retrieve.append("login")
+        else:
+            fields_to_retrieve.append("code")
+        
+        return link_map, fields_to_retrieve, additional_filters
+
+    def __extract_shotgun_data(self, sg, tokens):
+        """
+        Extracts the Shotgun data for this level, see :meth:`extract_shotgun_data_upwards`.
+
+        :param sg: Shotgun API instance.
+        :param tokens: Shotgun data dictionary containing an entry for this
+                       folder, which is updated in place.
+        """
+        my_sg_data_key = FilterExpressionToken.sg_data_key_for_folder_obj(self)
+        (link_map, fields_to_retrieve, additional_filters) = self.__get_shotgun_data_query()
+
+        # TODO: AND the id query with this folder's query to make sure this path is
+        # valid for the current entity. Throw error if not so driver code knows to 
+        # stop processing. This would be needed in a setup where (for example) Asset
+        # appears in several locations in the filesystem and that the filters are responsible
+        # for determining which location to use for a particular asset.
+        my_id = tokens[ my_sg_data_key ]["id"]
+        additional_filters.append( {"path": "id", "relation": "is", "values": [my_id]})
+        
+        # append additional filter cruft
+        filter_dict = { "logical_operator": "and", "conditions": additional_filters }
+        
+        # carry out find
+        rec = sg.find_one(self._entity_type, filter_dict, fields_to_retrieve)
+        
+        # there are now two reasons why find_one did not return:
+        # - the specified entity id does not exist or has been deleted
+        # - there are filters which has filtered it out. For example imagine that you 
+        #   have one folder structure for all assets starting with A and a second structure
+        #   for the rest. This would be a filter condition (code does not start with A, and
+        #   code starts with A respectively). In these cases, the object does exist but has been
+        #   explicitly filtered out - which is not an error!
+        
+        if not rec:
             
-            # and append the 'name field' which is always needed.
-            name = None # used for error reporting
-            if self._entity_type == "Project":
-                name = rec["name"]
-                tokens[ my_sg_data_key ]["name"] = rec["name"]
-            elif self._entity_type == "Task":
-                name = rec["content"]
-                tokens[ my_sg_data_key ]["content"] = rec["content"]
-            elif self._entity_type == "HumanUser":
-                name = rec["login"]
-                tokens[ my_sg_data_key ]["login"] = rec["login"]
+            # check if it is a missing id or just a filtered out thing
+            if sg.find_one(self._entity_type, [["id", "is", my_id]]) is None:                
+                raise TankError("Could not find Shotgun %s with id %s as required by "
+                                "the folder creation setup." % (self._entity_type, my_id))
             else:
-                name = rec["code"]
-                tokens[ my_sg_data_key ]["code"] = rec["code"]
-
-            # Step through our token key map and process
-            #
-            # This is on the form
-            # link_map['sg_sequence'] = link_obj
-            #
-            for field in link_map:
-                
-                # do some juggling to make sure we don't double process the 
-                # name fields.
-                value = rec[field]
-                link_obj = link_map[field]
-                
-                if value is None:
-                    # field was none! - cannot handle that!
-                    raise TankError("The %s %s has a required field %s that \ndoes not have a value "
-                                    "set in Shotgun. \nDouble check the values and try "
-                                    "again!\n" % (self._entity_type, name, field))
-    
-                if isinstance(value, dict):
-                    # If the value is a dict, assume it comes from a entity link.
-                    
-                    # now make sure that this link is actually relevant for us,
-                    # e.g. that it points to an entity of the right type.
-                    # this may be a problem whenever a link can link to more
-                    # than one type. See the EntityLinkTypeMismatch docs for example.
-                    if value["type"] != link_obj.get_entity_type():
-                        raise EntityLinkTypeMismatch()
-
-                # store it in our sg_data prefetch chunk
-                tokens[ link_obj.get_sg_data_key() ] = value
-                
-        # now keep recursing upwards
-        if self._parent is None:
-            return tokens
+                raise EntityLinkTypeMismatch()
         
+        # and append the 'name field' which is always needed.
+        name = None # used for error reporting
+        if self._entity_type == "Project":
+            name = rec["name"]
+            tokens[ my_sg_data_key ]["name"] = rec["name"]
+        elif self._entity_type == "Task":
+            name = rec["content"]
+            tokens[ my_sg_data_key ]["content"] = rec["content"]
+        elif self._entity_type == "HumanUser":
+            name = rec["login"]
+            tokens[ my_sg_data_key ]["login"] = rec["login"]
         else:
-            return self._parent.extract_shotgun_data_upwards(sg, tokens)
+            name = rec["code"]
+            tokens[ my_sg_data_key ]["code"] = rec["code"]
 
+        # Step through our token key map and process
+        #
+        # This is on the form
+        # link_map['sg_sequence'] = link_obj
+        #
+        for field in link_map:
+            
+            # do some juggling to make sure we don't double process the 
+            # name fields.
+            value = rec[field]
+            link_obj = link_map[field]
+            
+            if value is None:
+                # field was none! - cannot handle that!
+                raise TankError("The %s %s has a required field %s that \ndoes not have a value "
+                                "set in Shotgun. \nDouble check the values and try "
+                                "again!\n" % (self._entity_type, name, field))
+
+            if isinstance(value, dict):
+                # If the value is a dict, assume it comes from a entity link.
+                
+                # now make sure that this link is actually relevant for us,
+                # e.g. that it points to an entity of the right type.
+                # this may be a problem whenever a link can link to more
+                # than one type. See the EntityLinkTypeMismatch docs for example.
+                if value["type"] != link_obj.get_entity_type():
+                    raise EntityLinkTypeMismatch()
 
+            # store it in our sg_data prefetch chunk
+            tokens[ link_obj.get_sg_data_key() ] = value
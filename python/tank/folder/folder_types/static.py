@@ -170,7 +170,7 @@ class Static(Folder):
             
             else:
                 # call out to shotgun
-                data = self._tk.shotgun.find_one(self._constrain_node.get_entity_type(), resolved_filters)
+                data = io_receiver.shotgun.find_one(self._constrain_node.get_entity_type(), resolved_filters)
                 # and cache it
                 self._cached_sg_data[hash_key] = data
                         
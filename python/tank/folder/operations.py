@@ -16,6 +16,7 @@ Main entry points for folder creation.
 from .configuration import FolderConfiguration
 from .folder_io import FolderIOReceiver
 from .folder_types import EntityLinkTypeMismatch
+from .query_cache import ShotgunQueryCache
 from ..errors import TankError
 
 
@@ -51,7 +52,7 @@ def create_single_folder_item(tk, config_obj, io_receiver, entity_type, entity_i
         # up the tree and resolve all the entity ids that are required 
         # in order to create folders.
         try:
-            shotgun_entity_data = folder_obj.extract_shotgun_data_upwards(tk.shotgun, entity_id_seed)
+            shotgun_entity_data = folder_obj.extract_shotgun_data_upwards(io_receiver.shotgun, entity_id_seed)
         except EntityLinkTypeMismatch:
             # the seed entity id object does not satisfy the link
             # path from folder_obj up to the root. 
@@ -87,7 +88,49 @@ def create_single_folder_item(tk, config_obj, io_receiver, entity_type, entity_i
                                       True,
                                       folder_objects_to_recurse,
                                       engine)
-        
+
+
+def prefetch_shotgun_data(config_obj, sg, items):
+    """
+    Retrieves the Shotgun data needed to create folders for several entities
+    with a query for each level of the folder configuration, rather than
+    queries for each entity.
+
+    :param config_obj: a FolderConfiguration object representing the folder configuration
+    :param sg: :class:`~tank.folder.query_cache.ShotgunQueryCache` the data is cached in.
+    :param items: List of dictionaries with the type, id and sg_task_data keys for
+                  each entity folders will be created for.
+    """
+    items_by_entity_type = {}
+    for item in items:
+        items_by_entity_type.setdefault(item["type"], []).append(item)
+
+    for entity_type, entity_items in items_by_entity_type.iteritems():
+        entity_id_seeds = [
+            {
+                entity_type: {"type": entity_type, "id": item["id"]},
+                "current_task_data": item["sg_task_data"]
+            } for item in entity_items
+        ]
+
+        for folder_obj in config_obj.get_folder_objs_for_entity_type(entity_type):
+            # walk up the configuration, retrieving the entities of each level
+            # with a single query.
+            folder_obj.prefetch_shotgun_data_upwards(sg, entity_id_seeds)
+
+            shotgun_data_list = []
+            for entity_id_seed in entity_id_seeds:
+                try:
+                    shotgun_data_list.append(folder_obj.extract_shotgun_data_upwards(sg, entity_id_seed))
+                except (TankError, EntityLinkTypeMismatch):
+                    # errors are handled when the folders are created.
+                    continue
+
+            # and retrieve the entities the folders are then created for when walking
+            # down the configuration.
+            for parent_obj in [folder_obj] + folder_obj.get_parents():
+                parent_obj.prefetch_entities(sg, shotgun_data_list)
+
 
 
 def synchronize_folders(tk, full_sync):
@@ -102,7 +145,7 @@ def synchronize_folders(tk, full_sync):
     return FolderIOReceiver.sync_path_cache(tk, full_sync)
 
     
-def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):    
+def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine, max_workers=1, batched=False):
     """
     Creates filesystem structure in Tank based on Shotgun and a schema config.
     Internal implementation.
@@ -115,10 +158,59 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
                    option indicates to the system that a second pass should be executed and all
                    which are marked as deferred are processed. Pass None for non-deferred mode.
                    The convention is to pass the name of the current engine, e.g 'tk-maya'.
+    :param int max_workers: Number of threads the folder creation hook may use to
+                            create independent folders concurrently.
+    :param bool batched: If True, the entities the folders are created for are retrieved
+                         with a Shotgun query for each level of the folder configuration,
+                         rather than queries for each entity, and the results of all the
+                         Shotgun queries are reused for the whole folder creation.
     
     :returns: list of items processed
     
     """
+    io_receiver = _compute_folders(tk, entity_type, entity_ids, preview, engine, max_workers, batched)
+    if io_receiver is None:
+        return
+
+    folders_created = io_receiver.execute_folder_creation()
+    
+    return folders_created
+
+
+def preview_filesystem_structure_diff(tk, entity_type, entity_ids, engine, max_workers=1, batched=False):
+    """
+    Computes the folders which would be created for some entities and compares
+    them with the file system and the path cache, so that only the changes the
+    folder creation would make are reported. Internal implementation.
+
+    :param tk: A tk instance
+    :param entity_type: A shotgun entity type to preview folders for
+    :param entity_ids: list of entity ids to process or a single entity id
+    :param engine: A string representation matching a level in the schema, see
+                   :meth:`process_filesystem_structure`.
+    :param int max_workers: Number of threads checking whether the folders exist on disk.
+    :param bool batched: If True, Shotgun queries are batched, see
+                         :meth:`process_filesystem_structure`.
+
+    :returns: Dictionary of changes, see :meth:`FolderIOReceiver.get_folder_creation_diff`.
+    """
+    io_receiver = _compute_folders(tk, entity_type, entity_ids, True, engine, max_workers, batched)
+    if io_receiver is None:
+        # nothing to create.
+        io_receiver = FolderIOReceiver(tk, True, entity_type, [], max_workers)
+
+    return io_receiver.get_folder_creation_diff()
+
+
+def _compute_folders(tk, entity_type, entity_ids, preview, engine, max_workers, batched):
+    """
+    Computes the folders to create for some entities.
+
+    See :meth:`process_filesystem_structure` for a description of the parameters.
+
+    :returns: :class:`FolderIOReceiver` holding the folder creation items or None
+              if no entity ids were given.
+    """
 
     # check that engine is either a string or None
     if not (isinstance(engine, basestring) or engine is None):
@@ -193,7 +285,17 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
         
     
     # create an object to receive all IO requests
-    io_receiver = FolderIOReceiver(tk, preview, entity_type, entity_ids)
+    io_receiver = FolderIOReceiver(
+        tk,
+        preview,
+        entity_type,
+        entity_ids,
+        max_workers,
+        ShotgunQueryCache(tk.shotgun) if batched else None
+    )
+
+    if batched:
+        prefetch_shotgun_data(config, io_receiver.shotgun, items)
 
     # now loop over all individual objects and create folders
     for i in items:        
@@ -205,6 +307,4 @@ def process_filesystem_structure(tk, entity_type, entity_ids, preview, engine):
                                   i["sg_task_data"],
                                   engine)
 
-    folders_created = io_receiver.execute_folder_creation()
-    
-    return folders_created
+    return io_receiver
@@ -0,0 +1,153 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache of the Shotgun queries made while creating folders.
+"""
+
+import copy
+
+
+class ShotgunQueryCache(object):
+    """
+    Caches the results of the Shotgun queries made during a folder creation request.
+
+    Folder objects use this in place of a Shotgun API handle. Identical queries
+    are only sent to Shotgun once, and the entities needed to create folders for
+    many entity ids can be retrieved beforehand with a single query for all the
+    ids using :meth:`prefetch`.
+
+    The results are never refreshed, so a cache should only be used for the
+    duration of a single request.
+    """
+
+    # maximum number of ids passed to a single query by prefetch.
+    PREFETCH_BATCH_SIZE = 500
+
+    def __init__(self, sg):
+        """
+        :param sg: Shotgun API instance.
+        """
+        self._sg = sg
+        # query results keyed by query
+        self._results = {}
+
+    def find(self, entity_type, filters, fields=None):
+        """
+        Finds entities, like :meth:`shotgun_api3.Shotgun.find`.
+
+        :param entity_type: Shotgun entity type.
+        :param filters: List of filters or filter dictionary.
+        :param fields: List of fields to retrieve.
+        :returns: List of entity dictionaries.
+        """
+        key = get_query_key(entity_type, filters, fields)
+        if key not in self._results:
+            self._results[key] = self._sg.find(entity_type, filters, fields)
+        return copy.deepcopy(self._results[key])
+
+    def find_one(self, entity_type, filters, fields=None):
+        """
+        Finds a single entity, like :meth:`shotgun_api3.Shotgun.find_one`.
+
+        :param entity_type: Shotgun entity type.
+        :param filters: List of filters or filter dictionary.
+        :param fields: List of fields to retrieve.
+        :returns: Entity dictionary or None.
+        """
+        key = get_query_key(entity_type, filters, fields)
+        if key in self._results:
+            # the entities were prefetched or found by an identical query.
+            results = self._results[key]
+            return copy.deepcopy(results[0]) if results else None
+
+        key = ("find_one",) + key
+        if key not in self._results:
+            self._results[key] = self._sg.find_one(entity_type, filters, fields)
+        return copy.deepcopy(self._results[key])
+
+    def prefetch(self, entity_type, filters, fields, entity_ids):
+        """
+        Retrieves several entities with a single query, and caches each of them as
+        the result of the query made of the filters and a condition on its id.
+
+        For example, prefetching shots 1 and 2 with filters ``sg_sequence is 3``
+        caches the results of queries for ``sg_sequence is 3 and id is 1`` and
+        ``sg_sequence is 3 and id is 2``.
+
+        :param entity_type: Shotgun entity type.
+        :param filters: Filter dictionary using the ``and`` operator.
+        :param fields: List of fields to retrieve.
+        :param entity_ids: List of ids of the entities to retrieve.
+        """
+        keys_by_id = {}
+        for entity_id in set(entity_ids):
+            key = get_query_key(entity_type, _add_id_condition(filters, "is", [entity_id]), fields)
+            if key not in self._results:
+                keys_by_id[entity_id] = key
+
+        entity_ids = sorted(keys_by_id)
+        for i in range(0, len(entity_ids), self.PREFETCH_BATCH_SIZE):
+            batch_ids = entity_ids[i:i + self.PREFETCH_BATCH_SIZE]
+            entities = self._sg.find(
+                entity_type,
+                _add_id_condition(filters, "in", batch_ids),
+                fields
+            )
+            entities_by_id = dict((entity["id"], entity) for entity in entities)
+            for entity_id in batch_ids:
+                entity = entities_by_id.get(entity_id)
+                self._results[keys_by_id[entity_id]] = [entity] if entity else []
+
+
+def _add_id_condition(filters, relation, values):
+    """
+    :param filters: Filter dictionary using the ``and`` operator.
+    :param relation: Relation of the condition on the id.
+    :param values: Values of the condition on the id.
+    :returns: Copy of the filter dictionary with a condition on the id appended.
+    """
+    return {
+        "logical_operator": "and",
+        "conditions": filters["conditions"] + [{"path": "id", "relation": relation, "values": values}],
+    }
+
+
+def get_query_key(entity_type, filters, fields):
+    """
+    Returns a key identifying a query. Queries which only differ by the
+    fields of the entity links they filter on share the same key.
+
+    :param entity_type: Shotgun entity type.
+    :param filters: List of filters or filter dictionary.
+    :param fields: List of fields to retrieve.
+    :returns: Hashable key.
+    """
+    return (entity_type, _make_hashable(filters), tuple(sorted(fields or [])))
+
+
+def _make_hashable(value):
+    """
+    Converts filters into a hashable value.
+
+    Entity links are reduced to their type and id, which are the only keys
+    Shotgun uses in filters, so that links retrieved by different queries
+    compare equal.
+
+    :param value: Filter value.
+    :returns: Hashable value.
+    """
+    if isinstance(value, dict):
+        if "type" in value and "id" in value:
+            return ("entity", value["type"], value["id"])
+        return tuple(sorted((key, _make_hashable(item)) for key, item in value.iteritems()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_hashable(item) for item in value)
+    return value
@@ -0,0 +1,212 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Cache of the compiled folder schema of a pipeline configuration.
+
+Compiling the schema requires listing every folder of the schema, checking
+every file against the ignore patterns and parsing every metadata file. The
+result, a tree of plain dictionaries describing the folders, their metadata,
+files and symlinks, is kept in memory for the session and stored in the cache
+area of the pipeline configuration so it can be restored in later sessions.
+
+Both caches are keyed on a digest of the schema: the names of all the files
+and folders it contains and the modification time and size of its metadata and
+ignore files. Computing the digest doesn't require reading any file.
+
+Each caller gets its own copy of the compiled schema, since the folder objects
+built from it hold on to its metadata dictionaries and can modify them.
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import copy
+import hashlib
+import tempfile
+import threading
+import cPickle as pickle
+
+from .. import LogManager
+from ..util import filesystem, LocalFileStorageManager
+from ..util.shotgun import get_associated_sg_base_url
+
+log = LogManager.get_logger(__name__)
+
+# name of the cache file in the pipeline configuration cache folder
+SCHEMA_CACHE_FILE = "folder_schema.cache"
+
+# version of the data stored in the cache file, bump it when the format changes
+SCHEMA_CACHE_FORMAT_VERSION = 1
+
+# compiled schemas of this session, keyed by schema location.
+_g_compiled_schemas = {}
+_g_compiled_schemas_lock = threading.Lock()
+
+
+def read_compiled_schema(pipeline_configuration, schema_config_path, compile_schema):
+    """
+    Returns the compiled schema of a pipeline configuration, using the in memory
+    or on disk cache if they are up to date and updating them otherwise.
+
+    :param pipeline_configuration: :class:`~tank.pipelineconfig.PipelineConfiguration` object.
+    :param schema_config_path: Path to the schema folder.
+    :param compile_schema: Callable taking the schema path and returning the
+                           compiled schema when it isn't cached.
+    :returns: Compiled schema.
+    """
+    try:
+        digest = get_schema_digest(schema_config_path)
+    except (IOError, OSError) as e:
+        log.debug("Folder schema can't be cached: %s" % e)
+        return compile_schema(schema_config_path)
+
+    with _g_compiled_schemas_lock:
+        cached = _g_compiled_schemas.get(schema_config_path)
+    if cached and cached[0] == digest:
+        return copy.deepcopy(cached[1])
+
+    header = {
+        "version": SCHEMA_CACHE_FORMAT_VERSION,
+        "platform": sys.platform,
+        "path": schema_config_path,
+        "digest": digest,
+    }
+
+    cache_path = _get_cache_path(pipeline_configuration)
+    compiled_schema = _load(cache_path, header) if cache_path else None
+    if compiled_schema is not None:
+        log.debug("Restored folder schema from cache %s" % cache_path)
+    else:
+        compiled_schema = compile_schema(schema_config_path)
+        if cache_path:
+            _save(cache_path, header, compiled_schema)
+
+    with _g_compiled_schemas_lock:
+        _g_compiled_schemas[schema_config_path] = (digest, compiled_schema)
+
+    return copy.deepcopy(compiled_schema)
+
+
+def clear_compiled_schemas():
+    """
+    Clears the compiled schemas cached in memory.
+    """
+    with _g_compiled_schemas_lock:
+        _g_compiled_schemas.clear()
+
+
+def get_schema_digest(schema_config_path):
+    """
+    Computes the digest identifying the content of a schema folder.
+
+    Metadata files and the ignore file are identified by their name, modification
+    time and size, the same way the yaml cache identifies them. The other files
+    are only identified by their name since the schema only references them.
+
+    :param schema_config_path: Path to the schema folder.
+    :returns: Hexadecimal digest string.
+    :raises: IOError or OSError if the schema can't be read.
+    """
+    def raise_error(error):
+        raise error
+
+    digest = hashlib.sha1()
+    for folder_path, folder_names, file_names in os.walk(schema_config_path, onerror=raise_error):
+        # walk the schema in a stable order.
+        folder_names.sort()
+        relative_path = os.path.relpath(folder_path, schema_config_path)
+        digest.update("d:%s\0" % relative_path)
+        for file_name in sorted(file_names):
+            digest.update("f:%s\0" % file_name)
+            if file_name.endswith(".yml") or (relative_path == os.curdir and file_name == "ignore_files"):
+                stat = os.stat(os.path.join(folder_path, file_name))
+                digest.update("%r:%d\0" % (stat.st_mtime, stat.st_size))
+    return digest.hexdigest()
+
+
+def _get_cache_path(pipeline_configuration):
+    """
+    Returns the path to the schema cache file of a pipeline configuration.
+
+    :param pipeline_configuration: :class:`~tank.pipelineconfig.PipelineConfiguration` object.
+    :returns: Path to the cache file or None if the cache location can't be determined.
+    """
+    try:
+        cache_root = LocalFileStorageManager.get_configuration_root(
+            get_associated_sg_base_url(),
+            pipeline_configuration.get_project_id(),
+            pipeline_configuration.get_plugin_id(),
+            pipeline_configuration.get_shotgun_id(),
+            LocalFileStorageManager.CACHE
+        )
+    except Exception as e:
+        log.debug("Folder schema cache disabled, cache location could not be determined: %s" % e)
+        return None
+
+    return os.path.join(cache_root, SCHEMA_CACHE_FILE)
+
+
+def _load(cache_path, header):
+    """
+    Loads the compiled schema from a cache file if it is up to date.
+
+    :param cache_path: Path to the cache file.
+    :param dict header: Data identifying the current schema.
+    :returns: Compiled schema or None.
+    """
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "rb") as fh:
+            # the header is stored first so that the schema is only
+            # unpickled if it is up to date.
+            if pickle.load(fh) != header:
+                log.debug("Folder schema cache %s is out of date." % cache_path)
+                return None
+            return pickle.load(fh)
+    except Exception as e:
+        log.warning("Could not read folder schema cache %s: %s" % (cache_path, e))
+        return None
+
+
+def _save(cache_path, header, compiled_schema):
+    """
+    Writes the compiled schema to a cache file.
+
+    The file is written to a temporary location first and then moved in place
+    so that concurrent sessions never read a partially written file.
+
+    :param cache_path: Path to the cache file.
+    :param dict header: Data identifying the schema.
+    :param compiled_schema: Compiled schema.
+    """
+    cache_folder = os.path.dirname(cache_path)
+    try:
+        filesystem.ensure_folder_exists(cache_folder)
+        fd, temp_path = tempfile.mkstemp(prefix=SCHEMA_CACHE_FILE, dir=cache_folder)
+    except Exception as e:
+        log.debug("Could not write folder schema cache %s: %s" % (cache_path, e))
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(header, fh, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(compiled_schema, fh, pickle.HIGHEST_PROTOCOL)
+        if sys.platform == "win32" and os.path.exists(cache_path):
+            # rename doesn't overwrite existing files on windows.
+            os.remove(cache_path)
+        os.rename(temp_path, cache_path)
+        log.debug("Wrote folder schema cache %s" % cache_path)
+    except Exception as e:
+        log.warning("Could not write folder schema cache %s: %s" % (cache_path, e))
+        filesystem.safe_delete_file(temp_path)
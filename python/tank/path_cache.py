@@ -14,11 +14,20 @@ all Tank items in the file system are kept.
 
 """
 
+from __future__ import with_statement
+
+import re
 import collections
 import sqlite3
+import subprocess
 import sys
 import os
 import itertools
+import functools
+import tempfile
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
 # use api json to cover py 2.5
 # todo - replace with proper external library  
@@ -30,6 +39,8 @@ from . import constants
 from .errors import TankError
 from . import LogManager
 from .util.login import get_current_user
+from .util import filesystem
+from .util.lru_cache import LRUCache
 
 # Shotgun field definitions to store the path cache data
 SHOTGUN_ENTITY = "FilesystemLocation"
@@ -44,6 +55,312 @@ SG_PIPELINE_CONFIG_FIELD = "pipeline_configuration"
 
 log = LogManager.get_logger(__name__)
 
+
+class _ConnectionPool(object):
+    """
+    Idle connections to path cache databases, shared by all the :class:`PathCache`
+    instances of a process.
+
+    Opening a connection and checking the database schema is costly when the
+    database is hosted on network storage, and a new :class:`PathCache` is created
+    for most path cache lookups. Connections are therefore handed back to the pool
+    when a path cache is closed and reused by the next path cache using the same
+    database file.
+    """
+
+    # maximum number of idle connections kept for each database file
+    MAX_IDLE_CONNECTIONS = 4
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # idle (connection, file identity) tuples keyed by database path and read only flag
+        self._idle_connections = {}
+
+    def acquire(self, path, read_only=False):
+        """
+        Retrieves an idle connection to a database.
+
+        :param path: Path to the database file.
+        :param bool read_only: True to retrieve a connection used for lookups only.
+        :returns: Tuple with the connection and the identity of the database file
+                  it was opened on, or (None, None) if there are no idle connections
+                  to the current database file.
+        """
+        identity = _get_file_identity(path)
+        with self._lock:
+            self._check_process()
+            idle_connections = self._idle_connections.get((path, read_only), [])
+            while idle_connections:
+                connection, connection_identity = idle_connections.pop()
+                if identity is not None and connection_identity == identity:
+                    return connection, connection_identity
+                # the database file was removed or replaced since the
+                # connection was opened.
+                connection.close()
+        return None, None
+
+    def release(self, path, connection, identity, read_only=False):
+        """
+        Hands a connection back to the pool.
+
+        Any pending transaction is rolled back, like it would be when closing
+        the connection.
+
+        :param path: Path to the database file.
+        :param connection: :class:`sqlite3.Connection` to the database.
+        :param identity: Identity of the database file the connection was opened on.
+        :param bool read_only: True if the connection is used for lookups only.
+        """
+        try:
+            connection.rollback()
+        except sqlite3.Error:
+            connection.close()
+            return
+
+        with self._lock:
+            self._check_process()
+            idle_connections = self._idle_connections.setdefault((path, read_only), [])
+            if identity is None or len(idle_connections) >= self.MAX_IDLE_CONNECTIONS:
+                connection.close()
+            else:
+                idle_connections.append((connection, identity))
+
+    def clear(self):
+        """
+        Closes all the idle connections.
+        """
+        with self._lock:
+            self._check_process()
+            for idle_connections in self._idle_connections.values():
+                for connection, _ in idle_connections:
+                    connection.close()
+            self._idle_connections = {}
+
+    def _check_process(self):
+        """
+        Discards the connections inherited from a parent process, since sqlite
+        connections can't be used across a fork.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle_connections = {}
+
+
+def _get_file_identity(path):
+    """
+    Returns a value identifying a file, which changes if the file is replaced.
+
+    :param path: Path to the file.
+    :returns: Tuple of device and inode numbers or None if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+# file system types on which sqlite can't use shared memory between processes
+_NETWORK_FILESYSTEMS = set([
+    "nfs", "nfs4", "cifs", "smbfs", "smb3", "afs", "ncpfs", "coda", "9p", "gpfs", "lustre",
+    "ceph", "glusterfs", "beegfs", "fuse.sshfs", "fuse.glusterfs", "fuse.cephfs", "fuse.beegfs"
+])
+
+
+def _is_on_network_filesystem(path):
+    """
+    Checks if a file is stored on a network file system.
+
+    :param path: Path to the file.
+    :returns: True if the file is on a network file system or if this can't be
+              determined, False otherwise.
+    """
+    path = os.path.realpath(path)
+
+    if sys.platform == "win32":
+        if path.startswith("\\\\"):
+            # UNC path
+            return True
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + "\\"
+            # DRIVE_REMOTE, see the GetDriveType documentation.
+            return ctypes.windll.kernel32.GetDriveTypeW(unicode(drive)) == 4
+        except Exception:
+            return True
+
+    # find the file system type of the closest mount point above the path
+    try:
+        mount_points = _get_mount_points()
+    except Exception as e:
+        log.debug("Could not list mount points: %s" % e)
+        return True
+
+    fs_type = None
+    for mount_point in sorted(mount_points, key=len):
+        if path == mount_point or path.startswith(mount_point.rstrip("/") + "/"):
+            fs_type = mount_points[mount_point]
+    return fs_type is None or fs_type == "remote" or fs_type in _NETWORK_FILESYSTEMS
+
+
+def _get_mount_points():
+    """
+    Lists the mount points of the file systems on Linux and macOS.
+
+    :returns: Dictionary of file system types keyed by mount point. File system
+              types are either "local" or "remote" on macOS.
+    """
+    mount_points = {}
+    if sys.platform == "darwin":
+        # lines look like "/dev/disk1s1 on / (apfs, local, journaled)"
+        process = subprocess.Popen(["/sbin/mount"], stdout=subprocess.PIPE)
+        for line in process.communicate()[0].splitlines():
+            match = re.match(r"^.+ on (.+) \((.*)\)$", line)
+            if match:
+                options = [x.strip() for x in match.group(2).split(",")]
+                mount_points[match.group(1)] = "local" if "local" in options else "remote"
+    else:
+        # lines look like "server:/export /mnt/projects nfs4 rw,relatime 0 0"
+        with open("/proc/mounts") as fh:
+            for line in fh:
+                fields = line.split()
+                if len(fields) >= 3:
+                    mount_points[fields[1].replace("\\040", " ")] = fields[2]
+    return mount_points
+
+
+class _Connection(sqlite3.Connection):
+    """
+    Connection to a path cache database.
+    """
+
+    # path to the database file the connection was opened for
+    path_cache_file = None
+
+    # value of the data_version pragma when the lookup cache was last validated
+    # with this connection and time of that validation, see :meth:`_LookupCache.validate`.
+    lookup_cache_data_version = None
+    lookup_cache_validation_time = None
+
+
+class _LookupCache(object):
+    """
+    Process wide cache of the results of path cache lookups.
+
+    Results are keyed by database file so path caches for different projects
+    can share the cache: keys are tuples whose second item is the path to the
+    database file. All results are discarded whenever this process writes to a
+    path cache database, or when a connection used for lookups detects that its
+    database was modified by another connection. The results of a database are
+    also discarded when a new connection to it is used for lookups, since there
+    is no way to tell what changed before it was opened. Checking for modifications
+    requires a database query, so connections only check at most once per
+    validation interval and changes made by other processes can go unnoticed
+    for that long.
+    """
+
+    def __init__(self, max_size, validation_interval):
+        """
+        :param int max_size: Maximum number of results held by the cache.
+        :param validation_interval: Number of seconds between checks for
+                                    modifications made by other connections.
+        """
+        self._lock = threading.Lock()
+        self._generation = 0
+        # number incremented each time the results of a database are discarded,
+        # keyed by database file.
+        self._file_generations = {}
+        self.results = LRUCache(max_size)
+        self.validation_interval = validation_interval
+
+    def validate(self, connection):
+        """
+        Discards the cached results if the database was modified by another
+        connection since the last time the connection checked.
+
+        :param connection: :class:`_Connection` about to be used for a lookup.
+        :returns: Generation of the cache to pass to :meth:`set`, or None if the
+                  cache is disabled.
+        """
+        if self.results.max_size <= 0:
+            return None
+
+        now = time.time()
+        if (
+            connection.lookup_cache_validation_time is not None and
+            now - connection.lookup_cache_validation_time < self.validation_interval
+        ):
+            return self._generation
+
+        # the data version changes when other connections, from this process
+        # or another one, commit changes to the database.
+        data_version = list(connection.execute("PRAGMA data_version"))[0][0]
+        if connection.lookup_cache_data_version is None:
+            # this connection was never used for lookups and there is no way to tell
+            # if its database changed, the results of other databases are still valid.
+            self.invalidate(connection.path_cache_file)
+        elif data_version != connection.lookup_cache_data_version:
+            self.invalidate()
+        connection.lookup_cache_data_version = data_version
+        connection.lookup_cache_validation_time = now
+        return self._generation
+
+    def get(self, key):
+        """
+        :param key: Key of the lookup result.
+        :returns: The cached result or ``_NOT_CACHED``.
+        """
+        item = self.results.get(key)
+        if item is None or item[0] != self._file_generations.get(key[1], 0):
+            # the results of the database were discarded since it was cached.
+            return _NOT_CACHED
+        return item[1]
+
+    def set(self, key, value, generation):
+        """
+        Caches a lookup result, unless the cache was invalidated since the lookup
+        started, in which case the result may already be outdated.
+
+        :param key: Key of the lookup result.
+        :param value: Result of the lookup.
+        :param generation: Generation returned by :meth:`validate` before the lookup.
+        """
+        with self._lock:
+            if generation is not None and generation == self._generation:
+                self.results.set(key, (self._file_generations.get(key[1], 0), value))
+
+    @property
+    def generation(self):
+        """
+        Number incremented each time the cached results are discarded.
+        """
+        return self._generation
+
+    def invalidate(self, path_cache_file=None):
+        """
+        Discards cached results.
+
+        :param path_cache_file: Path to the database file to discard the results
+                                of, or None to discard all the results.
+        """
+        with self._lock:
+            self._generation += 1
+            if path_cache_file is None:
+                self.results.clear(reset_stats=False)
+            else:
+                self._file_generations[path_cache_file] = self._file_generations.get(path_cache_file, 0) + 1
+
+
+# marks lookup results missing from the lookup cache, None being a valid result.
+_NOT_CACHED = object()
+
+_g_connection_pool = _ConnectionPool()
+_g_lookup_cache = _LookupCache(
+    constants.PATH_CACHE_LOOKUP_CACHE_SIZE, constants.PATH_CACHE_LOOKUP_VALIDATION_INTERVAL
+)
+
+
 class PathCache(object):
     """
     A global cache which holds the mapping between a shotgun entity and a location on disk.
@@ -65,6 +382,15 @@ class PathCache(object):
     # to do so.
     SHOTGUN_ENTITY_QUERY_BATCH_SIZE = 500
 
+    # FilesystemLocation entities are created in Shotgun with batch
+    # requests of this size, so that creating folders for thousands of
+    # entities doesn't result in a single huge request.
+    SHOTGUN_ENTITY_CREATE_BATCH_SIZE = 500
+
+    # number of seconds to wait for other processes to release the database
+    # lock before failing.
+    SQLITE_BUSY_TIMEOUT = 30.0
+
     def __init__(self, tk):
         """
         Constructor.
@@ -72,6 +398,11 @@ class PathCache(object):
         :param tk: Toolkit API instance
         """
         self._connection = None
+        self._path_cache_file = None
+        self._connection_identity = None
+        self._read_connection = None
+        self._read_connection_identity = None
+        self._wal_enabled = False
         self._tk = tk
         self._sync_with_sg = tk.pipeline_configuration.get_shotgun_path_cache_enabled()
 
@@ -92,17 +423,15 @@ class PathCache(object):
         # will ensure that there is a valid folder and file on
         # disk, created with all the right permissions etc.
         path_cache_file = self._get_path_cache_location()
-        
-        self._connection = sqlite3.connect(path_cache_file)
-        
-        # this is to handle unicode properly - make sure that sqlite returns 
-        # str objects for TEXT fields rather than unicode. Note that any unicode
-        # objects that are passed into the database will be automatically
-        # converted to UTF-8 strs, so this text_factory guarantees that any character
-        # representation will work for any language, as long as data is either input
-        # as UTF-8 (byte string) or unicode. And in the latter case, the returned data
-        # will always be unicode.
-        self._connection.text_factory = str
+        self._path_cache_file = path_cache_file
+
+        # reuse a connection which has already been set up if possible.
+        self._connection, self._connection_identity = _g_connection_pool.acquire(path_cache_file)
+        if self._connection is not None:
+            self._wal_enabled = self._get_journal_mode(self._connection) == "wal"
+            return
+
+        self._connection = self._connect(path_cache_file)
         
         c = self._connection.cursor()
         try:
@@ -111,34 +440,11 @@ class PathCache(object):
             ret = c.execute("SELECT name FROM main.sqlite_master WHERE type='table';")
             table_names = [x[0] for x in ret.fetchall()]
             
-            if len(table_names) == 0:
+            new_database = len(table_names) == 0
+            if new_database:
                 # we have a brand new database. Create all tables and indices
+                self._create_tables(self._connection)
 
-                # note that because some clients are writing to NFS storage, we
-                # up the default page size somewhat (from 4k -> 8k) to improve
-                # performance. See https://sqlite.org/pragma.html#pragma_page_size
-
-                c.executescript("""
-                    PRAGMA page_size=8192;
-
-                    CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
-                
-                    CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
-                
-                    CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
-                
-                    CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
-                    
-                    CREATE TABLE event_log_sync (last_id integer);
-                    
-                    CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
-                    
-                    CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
-
-                    CREATE INDEX shotgun_status_shotgun_id ON shotgun_status(shotgun_id);
-                    """)
-                self._connection.commit()
-                
             else:
                 
                 # we have an existing database! Ensure it is up to date
@@ -176,6 +482,137 @@ class PathCache(object):
         finally:
             c.close()
 
+        self._init_journal_mode()
+        self._connection_identity = _get_file_identity(path_cache_file)
+
+        if new_database and self._sync_with_sg:
+            self._seed_from_snapshot()
+
+    def _connect(self, path_cache_file):
+        """
+        Opens a connection to the path cache database.
+
+        :param path_cache_file: Path to the database file.
+        :returns: :class:`sqlite3.Connection` object.
+        """
+        # connections are handed over to other path cache instances when closed,
+        # which may be used from another thread.
+        connection = sqlite3.connect(
+            path_cache_file, timeout=self.SQLITE_BUSY_TIMEOUT, check_same_thread=False, factory=_Connection
+        )
+        connection.path_cache_file = path_cache_file
+
+        # this is to handle unicode properly - make sure that sqlite returns 
+        # str objects for TEXT fields rather than unicode. Note that any unicode
+        # objects that are passed into the database will be automatically
+        # converted to UTF-8 strs, so this text_factory guarantees that any character
+        # representation will work for any language, as long as data is either input
+        # as UTF-8 (byte string) or unicode. And in the latter case, the returned data
+        # will always be unicode.
+        connection.text_factory = str
+
+        # transactions read the database before writing to it. Take the write lock
+        # when they start, otherwise two processes holding read locks could both
+        # wait for each other to release them in order to write.
+        connection.isolation_level = "IMMEDIATE"
+        return connection
+
+    def _get_journal_mode(self, connection):
+        """
+        :param connection: :class:`sqlite3.Connection` to the path cache database.
+        :returns: The journal mode of the database, e.g. "delete" or "wal".
+        """
+        return list(connection.execute("PRAGMA journal_mode"))[0][0].lower()
+
+    def _init_journal_mode(self):
+        """
+        Switches the database to write-ahead logging if the ``SGTK_PATH_CACHE_WAL``
+        environment variable is set to 1, and back to the default journal mode if it
+        is set to 0. The journal mode is left as it is when the variable isn't set, so
+        that processes which don't set it don't undo the choice of the ones which do.
+
+        In WAL mode, lookups don't wait for other processes writing to the database
+        and vice versa, so lookups use a separate connection from the one used to
+        write. WAL relies on shared memory which doesn't work across machines, so it
+        is never used for databases stored on network file systems.
+        """
+        journal_mode = self._get_journal_mode(self._connection)
+        wal_setting = os.environ.get(constants.ENV_VAR_PATH_CACHE_WAL)
+        use_wal = journal_mode == "wal" if wal_setting is None else wal_setting != "0"
+        if use_wal and wal_setting is not None and _is_on_network_filesystem(self._path_cache_file):
+            log.debug(
+                "Path cache %s is on a network file system, not using WAL mode." % self._path_cache_file
+            )
+            use_wal = False
+
+        try:
+            if use_wal and journal_mode != "wal":
+                journal_mode = list(self._connection.execute("PRAGMA journal_mode = WAL"))[0][0].lower()
+            elif not use_wal and journal_mode == "wal":
+                journal_mode = list(self._connection.execute("PRAGMA journal_mode = DELETE"))[0][0].lower()
+        except sqlite3.OperationalError as e:
+            # switching out of WAL mode requires exclusive access to the database
+            log.debug("Could not change the journal mode of path cache %s: %s" % (self._path_cache_file, e))
+
+        self._wal_enabled = journal_mode == "wal"
+        if self._wal_enabled:
+            # transactions are durable once checkpointed, which is enough for a cache.
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+
+    def _get_read_connection(self):
+        """
+        Returns the connection to use for lookups.
+
+        This is a separate, read only, connection when the database is in WAL mode
+        and the connection used to write otherwise.
+
+        :returns: :class:`sqlite3.Connection` object.
+        """
+        if not self._wal_enabled:
+            return self._connection
+
+        if self._read_connection is None:
+            self._read_connection, self._read_connection_identity = _g_connection_pool.acquire(
+                self._path_cache_file, read_only=True
+            )
+            if self._read_connection is None:
+                self._read_connection = self._connect(self._path_cache_file)
+                self._read_connection.execute("PRAGMA query_only = ON")
+                self._read_connection_identity = self._connection_identity
+
+        return self._read_connection
+
+    @staticmethod
+    def _create_tables(connection):
+        """
+        Creates the tables and indices of a path cache database.
+
+        :param connection: Connection to an empty sqlite database.
+        """
+        # note that because some clients are writing to NFS storage, we
+        # up the default page size somewhat (from 4k -> 8k) to improve
+        # performance. See https://sqlite.org/pragma.html#pragma_page_size
+        connection.executescript("""
+            PRAGMA page_size=8192;
+
+            CREATE TABLE path_cache (entity_type text, entity_id integer, entity_name text, root text, path text, primary_entity integer);
+            
+            CREATE INDEX path_cache_entity ON path_cache(entity_type, entity_id);
+            
+            CREATE INDEX path_cache_path ON path_cache(root, path, primary_entity);
+            
+            CREATE UNIQUE INDEX path_cache_all ON path_cache(entity_type, entity_id, root, path, primary_entity);
+            
+            CREATE TABLE event_log_sync (last_id integer);
+            
+            CREATE TABLE shotgun_status (path_cache_id integer, shotgun_id integer);
+            
+            CREATE UNIQUE INDEX shotgun_status_id ON shotgun_status(path_cache_id);
+
+            CREATE INDEX shotgun_status_shotgun_id ON shotgun_status(shotgun_id);
+            """)
+        connection.commit()
+
     def _get_path_cache_location(self):
         """
         Creates the path cache file and returns its location on disk.
@@ -291,15 +728,246 @@ class PathCache(object):
     def close(self):
         """
         Close the database connection.
+
+        The connection is handed back to a pool of connections so that it can
+        be reused by the next path cache using the same database.
         """
         if self._connection is not None:
-            self._connection.close()
+            _g_connection_pool.release(self._path_cache_file, self._connection, self._connection_identity)
             self._connection = None
+        if self._read_connection is not None:
+            _g_connection_pool.release(
+                self._path_cache_file, self._read_connection, self._read_connection_identity, read_only=True
+            )
+            self._read_connection = None
+
+    @classmethod
+    def close_pooled_connections(cls):
+        """
+        Closes the idle connections to path cache databases kept by this process.
+
+        This needs to be called before removing or replacing a path cache database
+        file on platforms which don't allow removing files opened by a process.
+        """
+        _g_connection_pool.clear()
+
+    @classmethod
+    def set_lookup_cache_size(cls, max_size):
+        """
+        Sets the maximum number of results of :meth:`get_entity`, :meth:`get_paths`,
+        :meth:`get_secondary_entities` and :meth:`get_shotgun_id_from_path` which
+        are kept in memory by this process. A size of 0 disables the cache.
+
+        :param int max_size: Maximum number of cached results.
+        """
+        _g_lookup_cache.results.max_size = max_size
+
+    @classmethod
+    def get_lookup_cache_stats(cls):
+        """
+        Returns statistics about the cache of lookup results. Example::
+
+            >>> sgtk.path_cache.PathCache.get_lookup_cache_stats()
+            {'hits': 950, 'max_size': 2048, 'misses': 80, 'size': 42}
+
+        :returns: Dictionary with the ``size``, ``max_size``, ``hits`` and ``misses`` keys.
+        """
+        return _g_lookup_cache.results.stats
+
+    @classmethod
+    def clear_lookup_cache(cls):
+        """
+        Clears the cached lookup results and resets the statistics.
+        """
+        _g_lookup_cache.invalidate()
+        _g_lookup_cache.results.clear()
+
+    @classmethod
+    def get_lookup_cache_generation(cls):
+        """
+        Returns a number which changes whenever the cached lookup results are
+        discarded, that is whenever this process writes to a path cache or finds
+        out that another process did. Data derived from lookup results can be
+        cached along with this number and discarded when it changes.
+
+        :returns: Generation number.
+        """
+        return _g_lookup_cache.generation
+
+    ############################################################################################
+    # path cache snapshots
+
+    def get_snapshot_path(self, snapshot_folder):
+        """
+        Returns the location of the snapshot of this path cache in a snapshot folder.
+
+        Snapshots are named after the project, so that a single snapshot folder can
+        be shared by all the projects of a site.
+
+        :param snapshot_folder: Folder holding path cache snapshots.
+        :returns: Path to the snapshot file.
+        """
+        project_id = self._tk.pipeline_configuration.get_project_id()
+        if project_id is None:
+            file_name = "path_cache_site.db"
+        else:
+            file_name = "path_cache_project_%d.db" % project_id
+        return os.path.join(snapshot_folder, file_name)
+
+    def export_snapshot(self, snapshot_path):
+        """
+        Writes a copy of the path cache to a snapshot file.
+
+        The content of the path cache, including the id of the last event log entry
+        it was synchronized with, is read in a single transaction so the snapshot
+        is consistent even if other processes update the path cache at the same time.
+        The snapshot is written to a temporary file first and then moved in place,
+        so that processes reading it never see a partially written file.
+
+        :param snapshot_path: Path to the snapshot file to write.
+        :raises: :class:`TankError` if the snapshot can't be written.
+        """
+        if self._path_cache_disabled:
+            raise TankError("This project does not have a path cache.")
+
+        snapshot_folder = os.path.dirname(snapshot_path)
+        try:
+            filesystem.ensure_folder_exists(snapshot_folder, permissions=0o777)
+            fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(snapshot_path), dir=snapshot_folder)
+            os.close(fd)
+        except (IOError, OSError) as e:
+            raise TankError("Could not write path cache snapshot %s: %s" % (snapshot_path, e))
+
+        try:
+            # snapshots are shared by all the users of the site.
+            os.chmod(temp_path, 0o666)
+            connection = sqlite3.connect(temp_path)
+            try:
+                self._create_tables(connection)
+            finally:
+                connection.close()
+
+            self._copy_database(temp_path, to_snapshot=True)
+
+            if sys.platform == "win32" and os.path.exists(snapshot_path):
+                # rename doesn't overwrite existing files on windows.
+                os.remove(snapshot_path)
+            os.rename(temp_path, snapshot_path)
+        except (IOError, OSError, sqlite3.Error) as e:
+            filesystem.safe_delete_file(temp_path)
+            raise TankError("Could not write path cache snapshot %s: %s" % (snapshot_path, e))
+        except:
+            filesystem.safe_delete_file(temp_path)
+            raise
+
+        log.debug("Wrote path cache snapshot %s" % snapshot_path)
+
+    def import_snapshot(self, snapshot_path):
+        """
+        Replaces the content of the path cache with a snapshot written by
+        :meth:`export_snapshot`.
+
+        The next synchronization with Shotgun is then incremental, starting from
+        the last event log entry the snapshot was synchronized with.
+
+        :param snapshot_path: Path to the snapshot file.
+        :raises: :class:`TankError` if the snapshot can't be read or was never
+                 synchronized with Shotgun.
+        """
+        if self._path_cache_disabled:
+            raise TankError("This project does not have a path cache.")
+
+        # attaching a missing database would create an empty one.
+        if not os.path.exists(snapshot_path):
+            raise TankError("Path cache snapshot %s does not exist." % snapshot_path)
+
+        try:
+            self._copy_database(snapshot_path, to_snapshot=False)
+        except sqlite3.Error as e:
+            raise TankError("Could not read path cache snapshot %s: %s" % (snapshot_path, e))
+
+        log.debug("Imported path cache snapshot %s" % snapshot_path)
+
+    def _copy_database(self, snapshot_path, to_snapshot):
+        """
+        Copies the content of the path cache database to or from a snapshot database.
+
+        The content of the destination database is replaced in a single transaction.
+
+        :param snapshot_path: Path to the snapshot database.
+        :param bool to_snapshot: True to copy the path cache to the snapshot,
+                                 False to copy the snapshot to the path cache.
+        :raises: :class:`TankError` if copying a snapshot which was never
+                 synchronized with Shotgun.
+        """
+        if to_snapshot:
+            source, destination = "main", "snapshot"
+        else:
+            source, destination = "snapshot", "main"
+
+        # the sqlite module opens transactions implicitly before modifying data only,
+        # handle the transaction manually so the data is read in the same transaction.
+        isolation_level = self._connection.isolation_level
+        self._connection.isolation_level = None
+        c = self._connection.cursor()
+        try:
+            c.execute("ATTACH DATABASE ? AS snapshot", (snapshot_path,))
+            try:
+                c.execute("BEGIN IMMEDIATE")
+                try:
+                    ret = c.execute("SELECT max(last_id) FROM %s.event_log_sync" % source)
+                    if ret.fetchone()[0] is None:
+                        raise TankError("The path cache was never synchronized with Shotgun.")
+
+                    for table, columns in [
+                        ("path_cache", "rowid, entity_type, entity_id, entity_name, root, path, primary_entity"),
+                        ("shotgun_status", "path_cache_id, shotgun_id"),
+                        ("event_log_sync", "last_id"),
+                    ]:
+                        c.execute("DELETE FROM %s.%s" % (destination, table))
+                        c.execute(
+                            "INSERT INTO %s.%s(%s) SELECT %s FROM %s.%s" % (
+                                destination, table, columns, columns, source, table
+                            )
+                        )
+                    self._connection.commit()
+                except:
+                    self._connection.rollback()
+                    raise
+            finally:
+                c.execute("DETACH DATABASE snapshot")
+        finally:
+            c.close()
+            self._connection.isolation_level = isolation_level
+            if not to_snapshot:
+                _g_lookup_cache.invalidate()
+
+    def _seed_from_snapshot(self):
+        """
+        Populates a new path cache database from the snapshot folder pointed at by
+        the ``SGTK_PATH_CACHE_SNAPSHOT_FOLDER`` environment variable, if any.
+
+        Failures are logged and ignored, the path cache then gets populated by a
+        full synchronization with Shotgun as usual.
+        """
+        snapshot_folder = os.environ.get(constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER)
+        if not snapshot_folder:
+            return
+
+        snapshot_path = self.get_snapshot_path(snapshot_folder)
+        if not os.path.exists(snapshot_path):
+            log.debug("No path cache snapshot found in %s." % snapshot_folder)
+            return
+
+        try:
+            self.import_snapshot(snapshot_path)
+        except TankError as e:
+            log.warning("Could not seed the path cache from snapshot %s: %s" % (snapshot_path, e))
                 
     ############################################################################################
     # shotgun synchronization (SG data pushed into path cache database)
 
-    def synchronize(self, full_sync=False):
+    def synchronize(self, full_sync=False, max_workers=1):
         """
         Ensure the local path cache is in sync with Shotgun. 
         
@@ -307,6 +975,8 @@ class PathCache(object):
         launch the busy overlay window.
 
         :param full_sync: Boolean to indicate that a full sync should be carried out. 
+        :param int max_workers: Number of pages of folders retrieved concurrently
+                                from Shotgun if a full sync is carried out.
         
         :returns: A list of remote items which were detected, created remotely
                   and not existing in this path cache. These are returned as a list of 
@@ -330,7 +1000,7 @@ class PathCache(object):
 
             # check if we should do a full sync
             if full_sync:
-                return self._do_full_sync(c)
+                return self._do_full_sync(c, max_workers)
             
             # first get the last synchronized event log event.        
             res = c.execute("SELECT max(last_id) FROM event_log_sync")
@@ -342,7 +1012,7 @@ class PathCache(object):
             # expect back something like [(249660,)] for a running cache and [(None,)] for a clear
             if len(data) != 1 or data[0] is None:
                 # we should do a full sync
-                return self._do_full_sync(c)
+                return self._do_full_sync(c, max_workers)
     
             # we have an event log id - so check if there are any more recent events
             event_log_id = data[0]
@@ -390,7 +1060,7 @@ class PathCache(object):
             if len(response) == 0:
                 # nothing in event log. Probably a truncated setup.
                 log.debug("No sync information in the event log. Falling back on a full sync.")
-                return self._do_full_sync(c)
+                return self._do_full_sync(c, max_workers)
                 
             elif response[0]["id"] != event_log_id:
                 # there is either no event log data at all or a gap
@@ -402,7 +1072,7 @@ class PathCache(object):
                     "like the event log has been truncated, so falling back "
                     "on a full sync." % (event_log_id, response[0]["id"])
                 )
-                return self._do_full_sync(c)
+                return self._do_full_sync(c, max_workers)
             
             elif len(response) == 1 and response[0]["id"] == event_log_id:
                 # nothing has changed since the last sync
@@ -424,8 +1094,9 @@ class PathCache(object):
     def _upload_cache_data_to_shotgun(self, data, event_log_desc):
         """
         Takes a standard chunk of Shotgun data and uploads it to Shotgun
-        using a single batch statement. Then writes a single event log entry record
-        which binds the created path records. Returns the id of this event log record.
+        using batch statements of :attr:`SHOTGUN_ENTITY_CREATE_BATCH_SIZE` entities.
+        Then writes a single event log entry record which binds the created path
+        records. Returns the id of this event log record.
         
         data needs to be a list of dicts with the following keys:
         - entity - std sg entity dict with name, id and type
@@ -477,29 +1148,37 @@ class PathCache(object):
             
             sg_batch_data.append(req)
         
-        # push to shotgun in a single xact
+        # push to shotgun, each batch is a single xact
         log.debug("Uploading %s path entries to Shotgun..." % len(sg_batch_data))
         
-        try:    
-            response = self._tk.shotgun.batch(sg_batch_data)
+        response = []
+        try:
+            for offset in xrange(0, len(sg_batch_data), self.SHOTGUN_ENTITY_CREATE_BATCH_SIZE):
+                response.extend(
+                    self._tk.shotgun.batch(sg_batch_data[offset:offset + self.SHOTGUN_ENTITY_CREATE_BATCH_SIZE])
+                )
         except Exception as e:
+            # the entries created by the previous batches won't be recorded in the
+            # event log nor in the path cache, so remove them.
+            if response:
+                try:
+                    self._tk.shotgun.batch([
+                        {"request_type": "delete", "entity_type": SHOTGUN_ENTITY, "entity_id": x["id"]}
+                        for x in response
+                    ])
+                except Exception as delete_error:
+                    log.warning("Could not remove the %d path entries already uploaded to Shotgun: %s" % (
+                        len(response), delete_error
+                    ))
             raise TankError("Critical! Could not update Shotgun with folder "
                             "data. Please contact support. Error details: %s" % e)
         
         # now create a dictionary where input path cache rowid (path_cache_row_id)
-        # is mapped to the shotgun ids that were just created
-        def _rowid_from_path(path):
-            for d in data:
-                if d["path"] == path:
-                    return d["path_cache_row_id"] 
-            raise TankError("Could not resolve row id for path! Please contact support! "
-                            "trying to resolve path '%s'. Source data set: %s" % (path, data))
-        
+        # is mapped to the shotgun ids that were just created. Batch requests
+        # return the entities in the same order as the requests.
         rowid_sgid_lookup = {}
-        for sg_obj in response:
-            sg_id = sg_obj["id"]
-            pc_row_id = _rowid_from_path( sg_obj[SG_PATH_FIELD]["local_path"] )
-            rowid_sgid_lookup[pc_row_id] = sg_id
+        for d, sg_obj in zip(data, response):
+            rowid_sgid_lookup[d["path_cache_row_id"]] = sg_obj["id"]
         
         # now register the created ids in the event log
         # this will later on be read by the synchronization            
@@ -544,7 +1223,7 @@ class PathCache(object):
                 "id": self._tk.pipeline_configuration.get_project_id()
             }
 
-    def _do_full_sync(self, cursor):
+    def _do_full_sync(self, cursor, max_workers=1):
         """
         Ensure the local path cache is in sync with Shotgun.
         
@@ -556,6 +1235,7 @@ class PathCache(object):
             - path
             
         :param cursor: Sqlite database cursor
+        :param int max_workers: Number of pages of folders retrieved concurrently.
         """
         
         show_global_busy("Hang on, Toolkit is preparing folders...", 
@@ -580,9 +1260,10 @@ class PathCache(object):
             else:
                 max_event_log_id = sg_data["id"]
             
-            data = self._replay_folder_entities(cursor, max_event_log_id)
+            data = self._replay_folder_entities(cursor, max_event_log_id, max_workers)
 
         finally:
+            _g_lookup_cache.invalidate()
             clear_global_busy()
         
         return data
@@ -608,6 +1289,9 @@ class PathCache(object):
             raise TankError("Shotgun reported an error while attempting to delete FilesystemLocation entities. "
                             "Please contact support. Details: %s Data: %s" % (e, sg_batch_data))
 
+        # lookup results which include the unregistered folders are outdated.
+        _g_lookup_cache.invalidate()
+
         # now register the deleted ids in the event log
         # this will later on be read by the synchronization
         # now, based on the entities we just deleted, assemble a metadata chunk that
@@ -725,6 +1409,7 @@ class PathCache(object):
         self._update_last_event_log_synced(cursor, max_event_log_id)
 
         self._connection.commit()
+        _g_lookup_cache.invalidate()
 
         # run the actual sync - and at the end, inser the event_log_sync data marker
         # into the database to show where to start syncing from next time.
@@ -811,17 +1496,23 @@ class PathCache(object):
 
         return sg_data
 
-    def _replay_folder_entities(self, cursor, max_event_log_id):
+    def _replay_folder_entities(self, cursor, max_event_log_id, max_workers=1):
         """
         Downloads all the filesystem location entities from Shotgun and repopulates the
         path cache with them.
 
+        The entities are downloaded and inserted one page at a time, so that the whole
+        data set is never held in memory. All the changes are done in a single
+        transaction and the indices are rebuilt once all the data is loaded, which is
+        a lot faster than updating them for every row.
+
         Lastly, this method updates the event_log_sync marker in the sqlite database
         that tracks what the most recent event log id was being synced.
 
         :param cursor: Sqlite database cursor
         :param max_event_log_id: max event log marker to write to the path
                                  cache database after a full operation.
+        :param int max_workers: Number of pages retrieved concurrently.
         :returns: A list of remote items which were detected, created remotely
                   and not existing in this path cache. These are returned as a list of
                   dictionaries, each containing keys:
@@ -832,28 +1523,218 @@ class PathCache(object):
         """
         log.debug("Fetching already registered folders from Shotgun...")
 
-        sg_data = self._get_filesystem_location_entities(folder_ids=None)
+        # the sqlite module commits the current transaction before any change to the
+        # schema, so handle the transaction manually in order to rebuild the indices
+        # as part of it.
+        isolation_level = self._connection.isolation_level
+        self._connection.isolation_level = None
+        # the data is about to be rewritten in full, so don't wait for every write
+        # to reach the disk.
+        synchronous = list(cursor.execute("PRAGMA synchronous"))[0][0]
+        cursor.execute("PRAGMA synchronous = OFF")
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                return_data = self._bulk_import_filesystem_location_entities(
+                    cursor,
+                    self._iter_filesystem_location_pages(max_workers)
+                )
+
+                # lastly, save the id of this event log entry for purpose of future syncing
+                # note - we don't maintain a list of event log entries but just a single
+                # value in the db, so start by clearing the table.
+                self._update_last_event_log_synced(cursor, max_event_log_id)
+
+                self._connection.commit()
+            except:
+                self._connection.rollback()
+                raise
+        finally:
+            cursor.execute("PRAGMA synchronous = %d" % synchronous)
+            self._connection.isolation_level = isolation_level
+
+        return return_data
+
+    def _iter_filesystem_location_pages(self, max_workers=1):
+        """
+        Retrieves all the project's FilesystemLocation entities from Shotgun,
+        one page at a time, in ascending id order.
+
+        :param int max_workers: Number of pages retrieved concurrently. If this is 1,
+                                each page starts after the last entity of the previous
+                                page. Otherwise, the pages are retrieved by page number,
+                                ``max_workers`` pages at a time, until a page isn't full.
+        :returns: Iterator over lists of FilesystemLocation entity dictionaries. See
+                  :meth:`_get_filesystem_location_entities` for their content.
+        """
+        project_entity = self._get_project_link()
+        log.debug("Getting all the project's FilesystemLocation entries one page at a time. "
+                  "Project id: %s" % project_entity["id"])
+
+        page_size = self.SHOTGUN_ENTITY_QUERY_BATCH_SIZE
+        project_filter = ["project", "is", project_entity]
+
+        if max_workers <= 1:
+            last_id = None
+            while True:
+                filters = [project_filter]
+                if last_id is not None:
+                    filters.append(["id", "greater_than", last_id])
+                page = self._find_filesystem_location_entities(filters, limit=page_size)
+                if not page:
+                    return
+                yield page
+                if len(page) < page_size:
+                    return
+                last_id = page[-1]["id"]
+
+        # pages are numbered from 1. Only retrieve as many pages as there are
+        # workers ahead of the consumer so that pages don't pile up in memory.
+        find_page = functools.partial(self._find_filesystem_location_entities, [project_filter], page_size)
+        pool = ThreadPool(max_workers)
+        try:
+            first_page = 1
+            while True:
+                for page in pool.map(find_page, range(first_page, first_page + max_workers)):
+                    if page:
+                        yield page
+                    if len(page) < page_size:
+                        return
+                first_page += max_workers
+        finally:
+            pool.close()
+            pool.join()
+
+    def _find_filesystem_location_entities(self, filters, limit=0, page=0):
+        """
+        Retrieves FilesystemLocation entities from Shotgun in ascending id order.
+
+        :param list filters: Shotgun filters for the entities.
+        :param int limit: Maximum number of entities to retrieve, 0 retrieves all the matching entities.
+        :param int page: Page of ``limit`` entities to retrieve, starting at 1. 0 retrieves the
+                         first ``limit`` entities.
+        :returns: List of FilesystemLocation entity dictionaries. See
+                  :meth:`_get_filesystem_location_entities` for their content.
+        """
+        return self._tk.shotgun.find(
+            SHOTGUN_ENTITY,
+            filters,
+            [
+                "id",
+                SG_METADATA_FIELD,
+                SG_IS_PRIMARY_FIELD,
+                SG_ENTITY_ID_FIELD,
+                SG_PATH_FIELD,
+                SG_ENTITY_TYPE_FIELD,
+                SG_ENTITY_NAME_FIELD
+            ],
+            [{"field_name": "id", "direction": "asc"}],
+            limit=limit,
+            page=page
+        )
 
+    def _bulk_import_filesystem_location_entities(self, cursor, pages):
+        """
+        Replaces the content of the path cache with FilesystemLocation entities.
+
+        This produces the same result as clearing the path cache and calling
+        :meth:`_import_filesystem_location_entry` for each entity, but entries are
+        validated in memory and each page is inserted with a single statement.
+
+        :param cursor: Database cursor, in a transaction started by the caller.
+        :type cursor: :class:`sqlite3.Cursor`
+        :param pages: Iterable over lists of FilesystemLocation entity dictionaries,
+                      in ascending id order.
+        :returns: A list of remote items which were imported. See :meth:`_replay_folder_entities`.
+        """
         # complete sync - clear our tables first
         log.debug("Full sync - clearing local sqlite path cache tables...")
         cursor.execute("DELETE FROM event_log_sync")
         cursor.execute("DELETE FROM shotgun_status")
         cursor.execute("DELETE FROM path_cache")
 
-        return_data = []
+        # drop the indices, they are created again once the data is loaded.
+        indices = list(cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name IN ('path_cache', 'shotgun_status') AND sql IS NOT NULL"
+        ))
+        for index_name, _ in indices:
+            cursor.execute("DROP INDEX %s" % index_name)
 
-        for x in sg_data:
-            imported_data = self._import_filesystem_location_entry(cursor, x)
-            if imported_data:
-                return_data.append(imported_data)
-
-        # lastly, save the id of this event log entry for purpose of future syncing
-        # note - we don't maintain a list of event log entries but just a single
-        # value in the db, so start by clearing the table.
-
-        self._update_last_event_log_synced(cursor, max_event_log_id)
+        return_data = []
+        # primary entities keyed by (root name, db path)
+        primary_entities = {}
+        # (entity type, entity id, root name, db path) of all the imported entries
+        imported_entries = set()
+        # the tables are empty, so row ids can be allocated up front.
+        rowid = 0
+
+        for page in pages:
+            path_cache_rows = []
+            shotgun_status_rows = []
+
+            for fsl_entity in page:
+                # get entity data from our entry
+                entity = {"id": fsl_entity[SG_ENTITY_ID_FIELD],
+                          "name": fsl_entity[SG_ENTITY_NAME_FIELD],
+                          "type": fsl_entity[SG_ENTITY_TYPE_FIELD]}
+                is_primary = fsl_entity[SG_IS_PRIMARY_FIELD]
+
+                local_path = self._get_filesystem_location_local_path(fsl_entity, entity)
+                if local_path is None:
+                    continue
+                local_os_path, root_name, relative_path = local_path
+                db_path = self._path_to_dbpath(relative_path)
+
+                # same checks as _add_db_mapping
+                entry = (entity["type"], entity["id"], root_name, db_path)
+                if is_primary:
+                    curr_entity = primary_entities.get((root_name, db_path))
+                    if curr_entity is not None:
+                        if curr_entity["type"] != entity["type"] or curr_entity["id"] != entity["id"]:
+                            raise TankError("Database concurrency problems: The path '%s' is "
+                                            "already associated with Shotgun entity %s. Please re-run "
+                                            "folder creation to try again." % (local_os_path, str(curr_entity)))
+                        log.debug("Found existing record for '%s', %s. Skipping." % (local_os_path, entity))
+                        continue
+                    primary_entities[(root_name, db_path)] = entity
+                elif entry in imported_entries:
+                    log.debug("Found existing record for '%s', %s. Skipping." % (local_os_path, entity))
+                    continue
+                imported_entries.add(entry)
 
-        self._connection.commit()
+                rowid += 1
+                path_cache_rows.append(
+                    (rowid, entity["type"], entity["id"], entity["name"], root_name, db_path, is_primary)
+                )
+                # because this record came from shotgun, insert a record in the
+                # shotgun_status table to indicate that this record exists in sg
+                shotgun_status_rows.append((rowid, fsl_entity["id"]))
+                return_data.append({
+                    "entity": entity,
+                    "path": local_os_path,
+                    "metadata": SG_METADATA_FIELD
+                })
+
+            cursor.executemany("""INSERT INTO path_cache(rowid,
+                                                         entity_type,
+                                                         entity_id,
+                                                         entity_name,
+                                                         root,
+                                                         path,
+                                                         primary_entity)
+                                  VALUES(?, ?, ?, ?, ?, ?, ?)""", path_cache_rows)
+            cursor.executemany("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
+                               "VALUES(?, ?)", shotgun_status_rows)
+
+            log.debug("Imported %d folders from Shotgun." % len(return_data))
+            show_global_busy("Hang on, Toolkit is preparing folders...",
+                             ("Toolkit is retrieving folder listings from Shotgun and ensuring that your "
+                              "setup is up to date. %d folders retrieved so far..." % len(return_data)))
+
+        log.debug("Rebuilding path cache indices...")
+        for _, index_sql in indices:
+            cursor.execute(index_sql)
 
         return return_data
 
@@ -869,28 +1750,16 @@ class PathCache(object):
         cursor.execute("DELETE FROM event_log_sync")
         cursor.execute("INSERT INTO event_log_sync(last_id) VALUES(?)", (event_log_id, ))
 
-    def _import_filesystem_location_entry(self, cursor, fsl_entity):
+    def _get_filesystem_location_local_path(self, fsl_entity, entity):
         """
-        Imports a single filesystem location into the path cache.
+        Resolves the path of a filesystem location entity for the current platform.
 
-        :param cursor: Database cursor.
-        :type :class:`sqlite3.Cursor`
-        :param dict fsl_entry: Filesystem location entity dictionary with keys:
-            - id
-            - type
-            - configuration_metadata
-            - is_primary
-            - linked_entity_id
-            - path
-            - linked_entity_type
-            - code
+        :param dict fsl_entity: Filesystem location entity dictionary. See
+                                :meth:`_import_filesystem_location_entry`.
+        :param dict entity: Entity linked to the filesystem location, for logging.
+        :returns: Tuple with the local path, the name of its root and the path relative
+                  to the root, or None if the path can't be resolved.
         """
-        # get entity data from our entry
-        entity = {"id": fsl_entity[SG_ENTITY_ID_FIELD],
-                  "name": fsl_entity[SG_ENTITY_NAME_FIELD],
-                  "type": fsl_entity[SG_ENTITY_TYPE_FIELD]}
-        is_primary = fsl_entity[SG_IS_PRIMARY_FIELD]
-
         # note! If a local storage which is associated with a path is retired,
         # parts of the entity data returned by shotgun will be omitted.
         #
@@ -957,6 +1826,35 @@ class PathCache(object):
             log.debug("Could not resolve storages - skipping: %s" % e)
             return None
 
+        return local_os_path, root_name, relative_path
+
+    def _import_filesystem_location_entry(self, cursor, fsl_entity):
+        """
+        Imports a single filesystem location into the path cache.
+
+        :param cursor: Database cursor.
+        :type :class:`sqlite3.Cursor`
+        :param dict fsl_entry: Filesystem location entity dictionary with keys:
+            - id
+            - type
+            - configuration_metadata
+            - is_primary
+            - linked_entity_id
+            - path
+            - linked_entity_type
+            - code
+        """
+        # get entity data from our entry
+        entity = {"id": fsl_entity[SG_ENTITY_ID_FIELD],
+                  "name": fsl_entity[SG_ENTITY_NAME_FIELD],
+                  "type": fsl_entity[SG_ENTITY_TYPE_FIELD]}
+        is_primary = fsl_entity[SG_IS_PRIMARY_FIELD]
+
+        local_path = self._get_filesystem_location_local_path(fsl_entity, entity)
+        if local_path is None:
+            return None
+        local_os_path = local_path[0]
+
         # all validation checks seem ok - go ahead and make the changes.
         new_rowid = self._add_db_mapping(cursor, local_os_path, entity, is_primary)
         if new_rowid:
@@ -1073,11 +1971,39 @@ class PathCache(object):
                       - primary: a boolean indicating if this is a primary entry
                       - metadata: configuration metadata
         """
-        for d in data:
-            self._validate_mapping(d["path"], d["entity"], d["primary"])
-        
-        
-    def _validate_mapping(self, path, entity, is_primary):
+        if self._path_cache_disabled or not data:
+            return
+
+        # look up the existing data for all the mappings at once rather
+        # than issuing several queries for each of them.
+        c = self._connection.cursor()
+        try:
+            self._stage_mappings(c, data)
+            entities_in_db = self._get_staged_primary_entities(c, data)
+
+            paths_in_db = collections.defaultdict(list)
+            res = c.execute("""
+                SELECT s.idx, pc.root, pc.path
+                FROM   temp.mapping_staging s
+                JOIN   path_cache pc ON pc.entity_type = s.entity_type AND pc.entity_id = s.entity_id
+                WHERE  s.primary_entity = 1
+                ORDER BY s.idx, pc.rowid
+                """)
+            for idx, root_name, db_path in res:
+                root_path = self._roots.get(root_name)
+                if root_path:
+                    paths_in_db[idx].append(self._dbpath_to_path(root_path, db_path))
+        finally:
+            c.close()
+            # discard the staged mappings
+            self._connection.rollback()
+
+        for idx, d in enumerate(data):
+            self._validate_mapping(
+                d["path"], d["entity"], d["primary"], entities_in_db.get(idx), paths_in_db[idx]
+            )
+
+    def _validate_mapping(self, path, entity, is_primary, entity_in_db, paths_in_db):
         """
         Consistency checks happening prior to folder creation. May raise a TankError
         if an inconsistency is detected.
@@ -1087,14 +2013,16 @@ class PathCache(object):
         :param is_primary: indicates that this is a primary mapping - each folder may have
                            both primary and secondary entity associations - the secondary
                            being more loosely tied to the path.
+        :param entity_in_db: Primary entity associated with the path in the path cache,
+                             as returned by :meth:`get_entity`.
+        :param paths_in_db: Paths associated with the entity in the path cache, as
+                            returned by :meth:`get_paths`.
         """
         
         # Make sure that there isn't already a record with the same
         # name in the database and file system, but with a different id.
         # We only do this for primary items - for secondary items, multiple items can exist
         if is_primary:
-            entity_in_db = self.get_entity(path)
-            
             if entity_in_db is not None:
                 if entity_in_db["id"] != entity["id"] or entity_in_db["type"] != entity["type"]:
                     
@@ -1128,7 +2056,7 @@ class PathCache(object):
         # we only check for primary entities, doing the check for secondary
         # would only be to carry out the same check twice.
         if is_primary:
-            for p in self.get_paths(entity["type"], entity["id"], primary_only=False):
+            for p in paths_in_db:
                 # so we got a path that matches our entity
                 if p != path and os.path.dirname(p) == os.path.dirname(path):
                     # this path is identical to our path we are about to create except for the name. 
@@ -1188,18 +2116,8 @@ class PathCache(object):
         
         c = self._connection.cursor()
         try:
-            data_for_sg = []
-            
-            for d in data:
-                new_rowid = self._add_db_mapping(c, d["path"], d["entity"], d["primary"]) 
-                if new_rowid:
-                    # this entry wasn't already in the db. So add it to the list to
-                    # potentially upload to SG later on
-                    data_for_sg.append(d)
-                    # append path cache row id to data
-                    d["path_cache_row_id"] = new_rowid
-                    
-                
+            data_for_sg = self._add_db_mappings(c, data)
+
             # now, if there were any FilesystemLocation records created,
             # create an event log entry that links back to those entries.
             # This is then used by the incremental path cache syncer. 
@@ -1213,10 +2131,8 @@ class PathCache(object):
                 (event_log_id, sg_id_lookup) = self._upload_cache_data_to_shotgun(data_for_sg, desc)
                 self._update_last_event_log_synced(c, event_log_id)
                 # and indicate in the path cache that all these records have been pushed
-                for (pc_row_id, sg_id) in sg_id_lookup.items():
-                    c.execute("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
-                              "VALUES(?, ?)", (pc_row_id, sg_id) )
-                    
+                c.executemany("INSERT INTO shotgun_status(path_cache_id, shotgun_id) "
+                              "VALUES(?, ?)", sg_id_lookup.items())
 
         except:
             # error processing shotgun. Make sure we roll back the sqlite path cache
@@ -1230,9 +2146,163 @@ class PathCache(object):
         
         finally:
             c.close()
+            _g_lookup_cache.invalidate()
+
+    def _add_db_mappings(self, cursor, data):
+        """
+        Adds associations to the database, skipping the ones which already exist.
+
+        This follows the same rules as :meth:`_add_db_mapping` for each association,
+        in order, but the existing associations are looked up for all of them at
+        once and the new ones are inserted in a single statement.
+
+        :param cursor: database cursor to use
+        :param data: list of dictionaries with keys entity, path and primary. The
+                     ``path_cache_row_id`` key is set on the dictionaries added.
+        :returns: List of the dictionaries which were added to the database.
+        :raises: :class:`TankError` if a primary association conflicts with the
+                 database content.
+        """
+        locations = self._stage_mappings(cursor, data)
+        primary_entities = self._get_staged_primary_entities(cursor, data)
+
+        # secondary associations which are already in the db, as primary or secondary
+        res = cursor.execute("""
+            SELECT DISTINCT s.idx
+            FROM   temp.mapping_staging s
+            JOIN   path_cache pc ON pc.entity_type = s.entity_type
+                              AND pc.entity_id = s.entity_id
+                              AND pc.root = s.root
+                              AND pc.path = s.path
+            WHERE  s.primary_entity = 0
+            """)
+        existing_secondaries = set(x[0] for x in res)
+
+        # associations added by earlier entries of the data
+        added_primaries = {}
+        added_associations = set()
+        skipped = []
+        for idx, d in enumerate(data):
+            entity = d["entity"]
+            location = locations[idx]
+            if location is None:
+                # the path doesn't belong to any of the storages, this raises a TankError.
+                self._separate_root(d["path"])
+
+            if d["primary"]:
+                # the primary entity must be unique: path/id/type
+                curr_entity = primary_entities.get(idx) or added_primaries.get(location)
+                if curr_entity is not None:
+                    # see _add_db_mapping for details about this check.
+                    if curr_entity["type"] != entity["type"] or curr_entity["id"] != entity["id"]:
+                        raise TankError("Database concurrency problems: The path '%s' is "
+                                        "already associated with Shotgun entity %s. Please re-run "
+                                        "folder creation to try again." % (d["path"], str(curr_entity)))
+                    skipped.append((idx,))
+                    continue
+                added_primaries[location] = entity
 
+            elif idx in existing_secondaries or (entity["type"], entity["id"]) + location in added_associations:
+                skipped.append((idx,))
+                continue
 
+            added_associations.add((entity["type"], entity["id"]) + location)
+
+        cursor.executemany("DELETE FROM temp.mapping_staging WHERE idx = ?", skipped)
+
+        # insert the remaining associations in one go. The ids of the new rows are
+        # higher than the ids of all the existing rows, which tells them apart from
+        # rows inserted by another process since they were looked up.
+        max_rowid = list(cursor.execute("SELECT max(rowid) FROM path_cache"))[0][0] or 0
+        cursor.execute("""
+            INSERT OR IGNORE INTO path_cache(entity_type, entity_id, entity_name, root, path, primary_entity)
+            SELECT entity_type, entity_id, entity_name, root, path, primary_entity
+            FROM   temp.mapping_staging
+            ORDER BY idx
+            """)
+        res = cursor.execute("""
+            SELECT s.idx, pc.rowid
+            FROM   temp.mapping_staging s
+            JOIN   path_cache pc ON pc.entity_type = s.entity_type
+                              AND pc.entity_id = s.entity_id
+                              AND pc.root = s.root
+                              AND pc.path = s.path
+                              AND pc.primary_entity = s.primary_entity
+            WHERE  pc.rowid > ?
+            ORDER BY s.idx
+            """, (max_rowid,))
+
+        added_data = []
+        for idx, rowid in list(res):
+            data[idx]["path_cache_row_id"] = rowid
+            added_data.append(data[idx])
+
+        cursor.execute("DELETE FROM temp.mapping_staging")
+        return added_data
+
+    def _stage_mappings(self, cursor, data):
+        """
+        Writes associations to a temporary table so that they can be checked against
+        the database content with joins. The table is private to the connection, the
+        staged rows need to be deleted or rolled back once they have been used.
+
+        :param cursor: database cursor to use
+        :param data: list of dictionaries with keys entity, path and primary.
+        :returns: List with the root name and db path of each association, or None
+                  for the associations whose path doesn't belong to any storage.
+        """
+        # the sqlite module commits the current transaction before schema changes,
+        # so this needs to happen before any other change.
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS mapping_staging (idx integer primary key,
+                                                             entity_type text,
+                                                             entity_id integer,
+                                                             entity_name text,
+                                                             root text,
+                                                             path text,
+                                                             primary_entity integer)
+            """)
+
+        locations = []
+        rows = []
+        for idx, d in enumerate(data):
+            try:
+                root_name, relative_path = self._separate_root(d["path"])
+            except TankError:
+                locations.append(None)
+                continue
+            db_path = self._path_to_dbpath(relative_path)
+            locations.append((root_name, db_path))
+            entity = d["entity"]
+            rows.append((idx, entity["type"], entity["id"], entity["name"], root_name, db_path, d["primary"]))
+
+        cursor.executemany("INSERT INTO temp.mapping_staging VALUES(?, ?, ?, ?, ?, ?, ?)", rows)
+        return locations
+
+    def _get_staged_primary_entities(self, cursor, data):
+        """
+        Looks up the primary entities associated in the database with the paths of
+        the staged primary associations.
 
+        :param cursor: database cursor to use
+        :param data: list of dictionaries passed to :meth:`_stage_mappings`.
+        :returns: Dictionary of Shotgun entity dicts, as returned by :meth:`get_entity`,
+                  keyed by index of the association in the data.
+        """
+        entities = {}
+        res = cursor.execute("""
+            SELECT s.idx, pc.entity_type, pc.entity_id, pc.entity_name
+            FROM   temp.mapping_staging s
+            JOIN   path_cache pc ON pc.root = s.root AND pc.path = s.path AND pc.primary_entity = 1
+            WHERE  s.primary_entity = 1
+            """)
+        for idx, entity_type, entity_id, entity_name in res:
+            if idx in entities:
+                # never supposed to happen!
+                raise TankError("More than one entry in path database for %s!" % data[idx]["path"])
+            # convert to string, not unicode!
+            entities[idx] = {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+        return entities
 
     def _add_db_mapping(self, cursor, path, entity, primary):
         """
@@ -1376,12 +2446,16 @@ class PathCache(object):
             # eg. doesn't belong to the project
             return None
 
-        # use built in cursor unless specifically provided - means this
-        # is part of a larger transaction
-        c = self._connection.cursor()        
-
+        db_path = self._path_to_dbpath(relative_path)
+        connection = self._get_read_connection()
+        generation = _g_lookup_cache.validate(connection)
+        cache_key = ("shotgun_id", self._path_cache_file, root_path, db_path)
+        shotgun_id = _g_lookup_cache.get(cache_key)
+        if shotgun_id is not _NOT_CACHED:
+            return shotgun_id
+
+        c = connection.cursor()
         try:
-            db_path = self._path_to_dbpath(relative_path)
             res = c.execute("""
                             select ss.shotgun_id 
                             from shotgun_status ss 
@@ -1397,10 +2471,13 @@ class PathCache(object):
             raise TankError("More than one entry in the path cache database for %s!" % path)
         
         elif len(data) == 1:
-            return data[0][0]
+            shotgun_id = data[0][0]
         
         else:
-            return None
+            shotgun_id = None
+
+        _g_lookup_cache.set(cache_key, shotgun_id, generation)
+        return shotgun_id
 
     def get_folder_tree_from_sg_id(self, shotgun_id):
         """
@@ -1411,7 +2488,7 @@ class PathCache(object):
         :returns: A list of items making up the subtree below the given id
         """
         
-        c = self._connection.cursor()
+        c = self._get_read_connection().cursor()
         # first get the path
         res = c.execute("""SELECT pc.root, pc.path 
                           FROM path_cache pc
@@ -1467,32 +2544,45 @@ class PathCache(object):
             return []
         
         paths = []
-        
-        # use built in cursor unless specifically provided - means this
-        # is part of a larger transaction
-        c = cursor or self._connection.cursor()
-        
-        try:
-            if primary_only:
-                res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ? and primary_entity = 1", (entity_type, entity_id))
-            else:
-                res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id))
-    
-            for row in res:
-                root_name = row[0]
-                relative_path = row[1]
-                
-                root_path = self._roots.get(root_name)
-                if not root_path:
-                    # The root name doesn't match a recognized name, so skip this entry
-                    continue
-                
-                # assemble path
-                path_str = self._dbpath_to_path(root_path, relative_path)
-                paths.append(path_str)
-        finally:        
-            if cursor is None:
-                c.close()
+
+        # lookups which are part of a larger transaction may see uncommitted
+        # data, don't cache them.
+        generation = None
+        rows = _NOT_CACHED
+        cache_key = ("paths", self._path_cache_file, entity_type, entity_id, bool(primary_only))
+        if cursor is None:
+            connection = self._get_read_connection()
+            generation = _g_lookup_cache.validate(connection)
+            rows = _g_lookup_cache.get(cache_key)
+
+        if rows is _NOT_CACHED:
+            # use built in cursor unless specifically provided - means this
+            # is part of a larger transaction
+            c = cursor or connection.cursor()
+
+            try:
+                if primary_only:
+                    res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ? and primary_entity = 1", (entity_type, entity_id))
+                else:
+                    res = c.execute("SELECT root, path FROM path_cache WHERE entity_type = ? AND entity_id = ?", (entity_type, entity_id))
+                rows = tuple(tuple(row) for row in res)
+            finally:
+                if cursor is None:
+                    c.close()
+
+            # cache the database rows rather than the paths, which depend on the
+            # roots of this pipeline configuration.
+            _g_lookup_cache.set(cache_key, rows, generation)
+
+        for root_name, relative_path in rows:
+            root_path = self._roots.get(root_name)
+            if not root_path:
+                # The root name doesn't match a recognized name, so skip this entry
+                continue
+
+            # assemble path
+            path_str = self._dbpath_to_path(root_path, relative_path)
+            paths.append(path_str)
         
         return paths
 
@@ -1526,22 +2616,37 @@ class PathCache(object):
             # eg. doesn't belong to the project
             return None
 
-        # use built in cursor unless specifically provided - means this
-        # is part of a larger transaction
-        c = cursor or self._connection.cursor()        
+        db_path = self._path_to_dbpath(relative_path)
 
-        try:
-            db_path = self._path_to_dbpath(relative_path)
-            res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 1", (db_path, root_path))
-            data = list(res)
-        finally:
-            if cursor is None:
-                c.close()
-        
-        if len(data) > 1:
-            # never supposed to happen!
-            raise TankError("More than one entry in path database for %s!" % path)
-        elif len(data) == 1:
+        # lookups which are part of a larger transaction may see uncommitted
+        # data, don't cache them.
+        generation = None
+        data = _NOT_CACHED
+        cache_key = ("entity", self._path_cache_file, root_path, db_path)
+        if cursor is None:
+            connection = self._get_read_connection()
+            generation = _g_lookup_cache.validate(connection)
+            data = _g_lookup_cache.get(cache_key)
+
+        if data is _NOT_CACHED:
+            # use built in cursor unless specifically provided - means this
+            # is part of a larger transaction
+            c = cursor or connection.cursor()
+
+            try:
+                res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 1", (db_path, root_path))
+                data = tuple(tuple(row) for row in res)
+            finally:
+                if cursor is None:
+                    c.close()
+
+            if len(data) > 1:
+                # never supposed to happen!
+                raise TankError("More than one entry in path database for %s!" % path)
+
+            _g_lookup_cache.set(cache_key, data, generation)
+
+        if len(data) == 1:
             # convert to string, not unicode!
             type_str = str(data[0][0])
             name_str = str(data[0][2])
@@ -1549,6 +2654,75 @@ class PathCache(object):
         else:
             return None
 
+    def get_entities_for_paths(self, paths):
+        """
+        Returns the primary and secondary entities for several paths.
+
+        All the paths are looked up with a single query, which is faster than
+        calling :meth:`get_entity` and :meth:`get_secondary_entities` for each path,
+        for example when looking up all the parent folders of a path.
+
+        :param paths: List of paths on disk.
+        :returns: List with a tuple for each path, made of the primary entity dict or
+                  None and the list of secondary entity dicts. See :meth:`get_entity`
+                  and :meth:`get_secondary_entities`.
+        :raises: :class:`TankError` if a path has more than one primary entity.
+        """
+        results = [(None, []) for _ in paths]
+
+        if self._path_cache_disabled:
+            # no entries because we don't have a path cache
+            return results
+
+        # indices of the paths to look up, keyed by root name and db path
+        indices_by_root = collections.defaultdict(dict)
+        for index, path in enumerate(paths):
+            if path is None:
+                continue
+            try:
+                root_name, relative_path = self._separate_root(path)
+            except TankError:
+                # fail gracefully if path is not a valid path
+                # eg. doesn't belong to the project
+                continue
+            db_path = self._path_to_dbpath(relative_path)
+            indices_by_root[root_name].setdefault(db_path, []).append(index)
+
+        rows = []
+        c = self._get_read_connection().cursor()
+        try:
+            for root_name, indices_by_db_path in indices_by_root.iteritems():
+                db_paths = indices_by_db_path.keys()
+                # split sql into batches - sqlite has a max number of terms for its in statement
+                for i in range(0, len(db_paths), self.SQLITE_MAX_ITEMS_FOR_IN_STATEMENT):
+                    subset_db_paths = db_paths[i:i + self.SQLITE_MAX_ITEMS_FOR_IN_STATEMENT]
+                    res = c.execute(
+                        "SELECT rowid, path, entity_type, entity_id, entity_name, primary_entity FROM path_cache "
+                        "WHERE root = ? AND path IN (%s)" % self._gen_param_string(subset_db_paths),
+                        [root_name] + subset_db_paths
+                    )
+                    rows.extend((row, indices_by_db_path[row[1]]) for row in res)
+        finally:
+            c.close()
+
+        # secondary entities are returned in the order they were registered,
+        # like in get_secondary_entities.
+        rows.sort(key=lambda x: x[0][0])
+
+        for (_, _, entity_type, entity_id, entity_name, primary_entity), indices in rows:
+            for index in indices:
+                # convert to string, not unicode!
+                entity = {"type": str(entity_type), "id": entity_id, "name": str(entity_name)}
+                if primary_entity == 1:
+                    if results[index][0] is not None:
+                        # never supposed to happen!
+                        raise TankError("More than one entry in path database for %s!" % paths[index])
+                    results[index] = (entity, results[index][1])
+                elif primary_entity == 0:
+                    results[index][1].append(entity)
+
+        return results
+
     def get_secondary_entities(self, path):
         """
         Returns all the secondary entities for a path.
@@ -1569,13 +2743,20 @@ class PathCache(object):
             # eg. doesn't belong to the project
             return []
 
-        c = self._connection.cursor()
-        try:
-            db_path = self._path_to_dbpath(relative_path)
-            res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 0", (db_path, root_path))
-            data = list(res)
-        finally:
-            c.close()
+        db_path = self._path_to_dbpath(relative_path)
+        connection = self._get_read_connection()
+        generation = _g_lookup_cache.validate(connection)
+        cache_key = ("secondary_entities", self._path_cache_file, root_path, db_path)
+        data = _g_lookup_cache.get(cache_key)
+
+        if data is _NOT_CACHED:
+            c = connection.cursor()
+            try:
+                res = c.execute("SELECT entity_type, entity_id, entity_name FROM path_cache WHERE path = ? AND root = ? and primary_entity = 0", (db_path, root_path))
+                data = tuple(tuple(row) for row in res)
+            finally:
+                c.close()
+            _g_lookup_cache.set(cache_key, data, generation)
 
         matches = []
         for d in data:        
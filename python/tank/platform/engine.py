@@ -764,6 +764,11 @@ class Engine(TankBundle):
         :param new_context:     The context to change to.
         :type new_context: :class:`~sgtk.Context`
         """
+        # Changing to the context the engine is already running in is a no-op.
+        if new_context._is_same_context(self.context):
+            self.log_debug("Engine %r is already running in context %r." % (self, new_context))
+            return
+
         # Make sure we're allowed to change context at the engine level.
         if not self.context_change_allowed:
             self.log_debug("Engine %r does not allow context changes." % self)
@@ -16,18 +16,52 @@ Management of file and directory templates.
 import os
 import re
 import sys
+import collections
 
 from . import templatekey
 from .errors import TankError
 from . import constants
-from .template_path_parser import TemplatePathParser
+from .template_path_parser import TemplatePathParser, TemplatePathMatcher
+from .util.lru_cache import LRUCache
 
 class Template(object):
     """
     Represents an expression containing several dynamic tokens
     in the form of :class:`TemplateKey` objects.
     """
-       
+
+    # paths resolved by apply_fields, shared by all templates.
+    _apply_fields_cache = LRUCache(constants.TEMPLATE_APPLY_FIELDS_CACHE_SIZE)
+
+    @classmethod
+    def set_apply_fields_cache_size(cls, max_size):
+        """
+        Sets the maximum number of paths resolved by :meth:`apply_fields` which
+        are cached across all templates. A size of 0 disables the cache.
+
+        :param int max_size: Maximum number of cached paths.
+        """
+        cls._apply_fields_cache.max_size = max_size
+
+    @classmethod
+    def get_apply_fields_cache_stats(cls):
+        """
+        Returns statistics about the cache used by :meth:`apply_fields`. Example::
+
+            >>> sgtk.Template.get_apply_fields_cache_stats()
+            {'hits': 1200, 'max_size': 1024, 'misses': 35, 'size': 35}
+
+        :returns: Dictionary with the ``size``, ``max_size``, ``hits`` and ``misses`` keys.
+        """
+        return cls._apply_fields_cache.stats
+
+    @classmethod
+    def clear_apply_fields_cache(cls):
+        """
+        Clears the paths cached by :meth:`apply_fields` and resets the statistics.
+        """
+        cls._apply_fields_cache.clear()
+
     @classmethod
     def _keys_from_definition(cls, definition, template_name, keys):
         """Extracts Template Keys from a definition.
@@ -104,6 +138,13 @@ class Template(object):
         self._prefix = ''
         self._static_tokens = []
 
+        # compiled path matchers for each definition, built on first use.
+        self._path_matchers = None
+
+        # data used to resolve context fields, built on first use.
+        self._ancestors = None
+        self._shotgun_keys = None
+
     def __repr__(self):
         class_name = self.__class__.__name__
         if self.name:
@@ -111,6 +152,37 @@ class Template(object):
         else:
             return "<Sgtk %s %s>" % (class_name, self._repr_def)
 
+    def _get_ancestors(self):
+        """
+        Returns the branch of the template tree ending with this template.
+
+        The parent templates are only created once, so they keep their compiled
+        path matchers between calls.
+
+        :returns: Tuple of :class:`Template` instances ordered from the first template
+                  below the root down to and including this template.
+        """
+        if self._ancestors is None:
+            parent = self.parent
+            if parent is not None and len(parent.keys) > 0:
+                self._ancestors = parent._get_ancestors() + (self,)
+            else:
+                self._ancestors = (self,)
+        return self._ancestors
+
+    def _get_shotgun_keys(self):
+        """
+        Returns the keys of this template whose values are read from Shotgun fields.
+
+        :returns: Tuple of (key, Shotgun entity type, Shotgun field name) tuples.
+        """
+        if self._shotgun_keys is None:
+            self._shotgun_keys = tuple(
+                (key, key.shotgun_entity_type, key.shotgun_field_name)
+                for key in self.keys.values() if key.shotgun_field_name
+            )
+        return self._shotgun_keys
+
     @property
     def definition(self):
         """
@@ -240,7 +312,52 @@ class Template(object):
 
         :returns: Full path, matching the template with the given fields inserted.
         """
-        return self._apply_fields(fields, platform=platform)
+        if not self._apply_fields_cache.max_size:
+            return self._apply_fields(fields, platform=platform)
+
+        cache_key = self._get_apply_fields_cache_key(fields, platform)
+        if cache_key is None:
+            return self._apply_fields(fields, platform=platform)
+
+        path = self._apply_fields_cache.get(cache_key)
+        if path is None:
+            path = self._apply_fields(fields, platform=platform)
+            self._apply_fields_cache.set(cache_key, path)
+        return path
+
+    def _get_apply_fields_cache_key(self, fields, platform):
+        """
+        Builds the key used to cache the result of :meth:`apply_fields`.
+
+        Only the fields used by this template are taken into account. The type of
+        each value is part of the key since values comparing equal, e.g. ``1`` and
+        ``True``, may not be formatted the same way.
+
+        :param fields: Mapping of keys to fields.
+        :param platform: Operating system platform or None.
+
+        :returns: A hashable key or None if the result can't be cached, e.g. if a
+                  value isn't hashable or if a key default depends on the time
+                  the path is resolved.
+        """
+        values = []
+        # the first keys are the most inclusive ones.
+        for key_name, key in self._keys[0].items():
+            value = fields.get(key_name)
+            if value is None:
+                # the key default is used, which may change over time.
+                if isinstance(key._default, collections.Callable):
+                    return None
+                values.append((key_name, None, key._default))
+            else:
+                values.append((key_name, type(value), value))
+
+        cache_key = (self, platform, tuple(values))
+        try:
+            hash(cache_key)
+        except TypeError:
+            return None
+        return cache_key
 
     def _apply_fields(self, fields, ignore_types=None, platform=None):
         """
@@ -347,19 +464,54 @@ class Template(object):
         cleaned_definition = re.sub(regex, "%(\g<1>)s", definition)
         return cleaned_definition
 
-    def _calc_static_tokens(self, definition):
+    def _expand_definition(self, definition):
         """
-        Finds the tokens from a definition which are not involved in defining keys.
+        Expands a definition to include the prefix.
+
+        :param definition: Definition variation to expand.
+        :returns: The definition joined with the prefix.
         """
         # expand the definition to include the prefix unless the definition is empty in which
         # case we just want to parse the prefix.  For example, in the case of a path template, 
         # having an empty definition would result in expanding to the project/storage root
-        expanded_definition = os.path.join(self._prefix, definition) if definition else self._prefix
+        return os.path.join(self._prefix, definition) if definition else self._prefix
+
+    def _calc_static_tokens(self, definition):
+        """
+        Finds the tokens from a definition which are not involved in defining keys.
+        """
         regex = r"{%s}" % constants.TEMPLATE_KEY_NAME_REGEX
-        tokens = re.split(regex, expanded_definition.lower())
+        tokens = re.split(regex, self._expand_definition(definition).lower())
         # Remove empty strings
         return [x for x in tokens if x]
 
+    def _get_path_matchers(self):
+        """
+        Returns the compiled path matchers for each definition variation.
+
+        :returns: List of :class:`TemplatePathMatcher` instances, or None for
+                  definitions which can't be matched with a compiled expression.
+        """
+        if self._path_matchers is None:
+            regex = r"{(%s)}" % constants.TEMPLATE_KEY_NAME_REGEX
+            matchers = []
+            for definition, ordered_keys in zip(self._definitions, self._ordered_keys):
+                # static tokens and key names alternate in the split definition
+                split_definition = re.split(regex, self._expand_definition(definition).lower())
+                key_names = split_definition[1::2]
+                if [key.name.lower() for key in ordered_keys] != key_names:
+                    matchers.append(None)
+                    continue
+                pieces = []
+                for index, piece in enumerate(split_definition):
+                    if index % 2:
+                        pieces.append(ordered_keys[index // 2])
+                    elif piece:
+                        pieces.append(piece)
+                matchers.append(TemplatePathMatcher.compile(pieces))
+            self._path_matchers = matchers
+        return self._path_matchers
+
     @property
     def parent(self):
         """
@@ -397,11 +549,10 @@ class Template(object):
         required_fields = required_fields or {}
         skip_keys = skip_keys or []
         
-        # Path should split into keys as per template
-        path_fields = {}
-        try:
-            path_fields = self.get_fields(path, skip_keys=skip_keys)
-        except TankError:
+        # Path should split into keys as per template. Parse it without raising
+        # so that no error message needs to be generated for invalid paths.
+        path_fields, _ = self._parse_fields(path, skip_keys=skip_keys)
+        if path_fields is None:
             return None
         
         # Check that all required fields were found in the path:
@@ -456,19 +607,37 @@ class Template(object):
         :returns: Values found in the path based on keys in template
         :rtype: Dictionary
         """
+        fields, path_parser = self._parse_fields(input_path, skip_keys=skip_keys)
+
+        if fields is None:
+            raise TankError("Template %s: %s" % (str(self), path_parser.last_error))
+
+        return fields
+
+    def _parse_fields(self, input_path, skip_keys=None):
+        """
+        Extracts key name, value pairs from a string without raising if the
+        string doesn't match the template.
+
+        :param input_path: Source path for values
+        :param skip_keys: Optional keys to skip
+
+        :returns: Tuple with the values found in the path or None if the path
+                  doesn't match and the last :class:`TemplatePathParser` used,
+                  which holds the reason why the path doesn't match.
+        """
         path_parser = None
         fields = None
 
-        for ordered_keys, static_tokens in zip(self._ordered_keys, self._static_tokens):
-            path_parser = TemplatePathParser(ordered_keys, static_tokens)
+        for ordered_keys, static_tokens, matcher in zip(self._ordered_keys,
+                                                        self._static_tokens,
+                                                        self._get_path_matchers()):
+            path_parser = TemplatePathParser(ordered_keys, static_tokens, matcher)
             fields = path_parser.parse_path(input_path, skip_keys)
             if fields != None:
                 break
 
-        if fields is None:
-            raise TankError("Template %s: %s" % (str(self), path_parser.last_error))
-
-        return fields
+        return fields, path_parser
 
 
 class TemplatePath(Template):
@@ -638,9 +807,22 @@ class TemplateString(Template):
         :returns: Values found in the path based on keys in template
         :rtype: Dictionary
         """
+        return super(TemplateString, self).get_fields(input_path, skip_keys=skip_keys)
+
+    def _parse_fields(self, input_path, skip_keys=None):
+        """
+        Extracts key name, value pairs from a string without raising if the
+        string doesn't match the template.
+
+        :param input_path: Source path for values
+        :param skip_keys: Optional keys to skip
+
+        :returns: Tuple with the values found in the path or None if the path
+                  doesn't match and the last :class:`TemplatePathParser` used.
+        """
         # add path prefix as original design was to require project root
         adj_path = os.path.join(self._prefix, input_path)
-        return super(TemplateString, self).get_fields(adj_path, skip_keys=skip_keys)
+        return super(TemplateString, self)._parse_fields(adj_path, skip_keys=skip_keys)
 
 def split_path(input_path):
     """
@@ -0,0 +1,270 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+On disk cache of the templates of a pipeline configuration.
+
+Reading the templates requires parsing the templates file and all the files it
+includes, resolving the template references and building all the keys and
+templates. This module stores the resulting objects, along with the
+:class:`~tank.template_index.TemplateIndex` used to look them up, in the cache
+area of the pipeline configuration so they can be restored in later sessions.
+
+The cache is invalidated when the content of the templates file or of any of
+the files it includes changes, when the storage roots change or when the code
+defining templates changes.
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import hashlib
+import tempfile
+import cPickle as pickle
+
+from . import LogManager
+from . import template
+from . import templatekey
+from . import template_includes
+from . import template_index
+from . import template_path_parser
+from .errors import TankUnreadableFileError
+from .template import TemplatePath, read_templates
+from .template_index import TemplateIndex
+from .util import yaml_cache, filesystem, LocalFileStorageManager
+from .util.shotgun import get_associated_sg_base_url
+
+log = LogManager.get_logger(__name__)
+
+# name of the cache file in the pipeline configuration cache folder
+TEMPLATE_CACHE_FILE = "templates.cache"
+
+# version of the data stored in the cache file, bump it when the format changes
+TEMPLATE_CACHE_FORMAT_VERSION = 1
+
+# modules defining the objects stored in the cache.
+_CACHED_MODULES = [template, templatekey, template_includes, template_index, template_path_parser]
+
+# signature of the code of the modules above, computed once per session.
+_code_signature = None
+
+
+def read_templates_and_index(pipeline_configuration):
+    """
+    Reads the templates of a pipeline configuration, using the template cache if
+    it is up to date and updating it otherwise.
+
+    :param pipeline_configuration: :class:`~tank.pipelineconfig.PipelineConfiguration` object.
+
+    :returns: Tuple with the dictionary of templates keyed by name, as returned by
+              :meth:`~tank.template.read_templates`, and the :class:`TemplateIndex`
+              for these templates.
+    """
+    cache_path = _get_cache_path(pipeline_configuration)
+    roots = pipeline_configuration.get_all_platform_data_roots()
+    templates_file = pipeline_configuration._get_templates_config_location()
+
+    if cache_path:
+        cached_data = _load(cache_path, roots)
+        if cached_data:
+            log.debug("Restored templates from cache %s" % cache_path)
+            return cached_data
+
+    templates = read_templates(pipeline_configuration)
+
+    # compile everything the templates will need to match paths and resolve
+    # context fields before caching them.
+    for cur_template in templates.values():
+        cur_template._get_shotgun_keys()
+        if isinstance(cur_template, TemplatePath):
+            for ancestor in cur_template._get_ancestors():
+                ancestor._get_path_matchers()
+    index = TemplateIndex(templates)
+
+    if cache_path:
+        header = _get_header(templates_file, roots)
+        if header:
+            _save(cache_path, header, (templates, index))
+
+    return templates, index
+
+
+def _get_cache_path(pipeline_configuration):
+    """
+    Returns the path to the template cache file of a pipeline configuration.
+
+    :param pipeline_configuration: :class:`~tank.pipelineconfig.PipelineConfiguration` object.
+    :returns: Path to the cache file or None if the cache location can't be determined.
+    """
+    try:
+        cache_root = LocalFileStorageManager.get_configuration_root(
+            get_associated_sg_base_url(),
+            pipeline_configuration.get_project_id(),
+            pipeline_configuration.get_plugin_id(),
+            pipeline_configuration.get_shotgun_id(),
+            LocalFileStorageManager.CACHE
+        )
+    except Exception as e:
+        log.debug("Template cache disabled, cache location could not be determined: %s" % e)
+        return None
+
+    return os.path.join(cache_root, TEMPLATE_CACHE_FILE)
+
+
+def _get_header(templates_file, roots):
+    """
+    Builds the data identifying the templates stored in a cache file.
+
+    :param templates_file: Path to the templates file.
+    :param roots: Storage roots for all platforms, as returned by
+                  :meth:`~tank.pipelineconfig.PipelineConfiguration.get_all_platform_data_roots`.
+    :returns: Dictionary or None if the templates can't be cached.
+    """
+    code_signature = _get_code_signature()
+    if code_signature is None:
+        return None
+
+    try:
+        data = yaml_cache.g_yaml_cache.get(templates_file, deepcopy_data=False) or {}
+        included_files, expanded_includes = template_includes.get_included_files(templates_file, data)
+        files = [(path, _get_file_digest(path)) for path in [templates_file] + included_files]
+    except (TankUnreadableFileError, IOError, OSError) as e:
+        log.debug("Templates can't be cached: %s" % e)
+        return None
+
+    return {
+        "version": TEMPLATE_CACHE_FORMAT_VERSION,
+        "code": code_signature,
+        "platform": sys.platform,
+        "roots": roots,
+        "files": files,
+        "expanded_includes": expanded_includes,
+    }
+
+
+def _is_header_current(header, roots):
+    """
+    Checks if the templates stored in a cache file are up to date.
+
+    :param dict header: Header read from the cache file.
+    :param roots: Current storage roots for all platforms.
+    :returns: True if the cached templates can be used, False otherwise.
+    """
+    if header.get("version") != TEMPLATE_CACHE_FORMAT_VERSION:
+        return False
+    if header["code"] != _get_code_signature():
+        return False
+    if header["platform"] != sys.platform or header["roots"] != roots:
+        return False
+
+    for include, expanded_include in header["expanded_includes"]:
+        if os.path.expanduser(os.path.expandvars(include)) != expanded_include:
+            return False
+
+    for path, digest in header["files"]:
+        try:
+            if _get_file_digest(path) != digest:
+                return False
+        except (IOError, OSError):
+            return False
+
+    return True
+
+
+def _load(cache_path, roots):
+    """
+    Loads the templates from a cache file if they are up to date.
+
+    :param cache_path: Path to the cache file.
+    :param roots: Current storage roots for all platforms.
+    :returns: Tuple of templates and template index or None.
+    """
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "rb") as fh:
+            # the header is stored first so that the templates are only
+            # unpickled if they are up to date.
+            header = pickle.load(fh)
+            if not _is_header_current(header, roots):
+                log.debug("Template cache %s is out of date." % cache_path)
+                return None
+            return pickle.load(fh)
+    except Exception as e:
+        log.warning("Could not read template cache %s: %s" % (cache_path, e))
+        return None
+
+
+def _save(cache_path, header, data):
+    """
+    Writes templates to a cache file.
+
+    The file is written to a temporary location first and then moved in place
+    so that concurrent sessions never read a partially written file.
+
+    :param cache_path: Path to the cache file.
+    :param dict header: Data identifying the cached templates.
+    :param data: Tuple of templates and template index.
+    """
+    cache_folder = os.path.dirname(cache_path)
+    try:
+        filesystem.ensure_folder_exists(cache_folder)
+        fd, temp_path = tempfile.mkstemp(prefix=TEMPLATE_CACHE_FILE, dir=cache_folder)
+    except Exception as e:
+        log.debug("Could not write template cache %s: %s" % (cache_path, e))
+        return
+
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(header, fh, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(data, fh, pickle.HIGHEST_PROTOCOL)
+        if sys.platform == "win32" and os.path.exists(cache_path):
+            # rename doesn't overwrite existing files on windows.
+            os.remove(cache_path)
+        os.rename(temp_path, cache_path)
+        log.debug("Wrote template cache %s" % cache_path)
+    except Exception as e:
+        log.warning("Could not write template cache %s: %s" % (cache_path, e))
+        filesystem.safe_delete_file(temp_path)
+
+
+def _get_file_digest(path):
+    """
+    Computes the digest of the content of a file.
+
+    :param path: Path to the file.
+    :returns: Hexadecimal digest string.
+    """
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def _get_code_signature():
+    """
+    Computes a signature of the code defining the objects stored in the cache,
+    so that templates cached by a different version of the code are not used.
+
+    :returns: Hexadecimal digest string or None if the code can't be read.
+    """
+    global _code_signature
+    if _code_signature is None:
+        digest = hashlib.sha1()
+        try:
+            for module in _CACHED_MODULES:
+                source_path = "%s.py" % os.path.splitext(module.__file__)[0]
+                with open(source_path, "rb") as fh:
+                    digest.update(fh.read())
+        except (IOError, OSError) as e:
+            log.debug("Template cache disabled, could not read the templates code: %s" % e)
+            return None
+        _code_signature = digest.hexdigest()
+    return _code_signature
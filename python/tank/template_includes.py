@@ -177,6 +177,53 @@ def process_includes(file_name, data):
                 
     return resolved_includes_data
         
+def get_included_files(file_name, data):
+    """
+    Finds all the files included by a templates file, recursively.
+
+    :param str file_name: Name of the templates file.
+    :param dict data: Data read from the templates file.
+
+    :returns: Tuple with the list of paths to the included files and the list of
+              (include, expanded include) tuples for includes which depend on the
+              environment, e.g. includes using ~ or environment variables.
+    """
+    included_files = []
+    expanded_includes = []
+    _get_included_files_r(file_name, data, included_files, expanded_includes)
+    return included_files, expanded_includes
+
+def _get_included_files_r(file_name, data, included_files, expanded_includes):
+    """
+    Recursively collects the files included by a templates file.
+
+    :param str file_name: Name of the file to process.
+    :param dict data: Data read from the file.
+    :param list included_files: List the included file paths are added to.
+    :param list expanded_includes: List the includes depending on the environment
+                                   are added to.
+    """
+    if not data:
+        return
+
+    includes = []
+    if constants.SINGLE_INCLUDE_SECTION in data:
+        includes.append(data[constants.SINGLE_INCLUDE_SECTION])
+    if constants.MULTI_INCLUDE_SECTION in data:
+        includes.extend(data[constants.MULTI_INCLUDE_SECTION])
+
+    for include in includes:
+        expanded_include = os.path.expanduser(os.path.expandvars(include))
+        if expanded_include != include:
+            expanded_includes.append((include, expanded_include))
+
+    for included_path in _get_includes(file_name, data):
+        if included_path in included_files:
+            continue
+        included_files.append(included_path)
+        included_data = yaml_cache.g_yaml_cache.get(included_path, deepcopy_data=False)
+        _get_included_files_r(included_path, included_data, included_files, expanded_includes)
+
 def _find_matching_ref_template(template_paths, template_strings, ref_string):
     """
     Find a template whose name matches a portion of ref_string.  This
@@ -0,0 +1,213 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Index used to quickly find the templates which may match a given path.
+"""
+
+import os
+import re
+
+from . import constants
+from .template import TemplatePath
+
+
+class TemplateIndex(object):
+    """
+    Lookup structure over a dictionary of templates, used to narrow down the
+    templates that could possibly match a path before running a full parse.
+
+    Each variation of a :class:`TemplatePath` is reduced to a set of signatures
+    made of the number of path separators, the static token the path must start
+    with and the static token the path must end with. Since key values can never
+    contain path separators, a path can only match a template variation if its
+    depth and leading/trailing tokens agree with one of these signatures.
+
+    Templates which are not :class:`TemplatePath` instances (e.g. template strings)
+    are not indexed and are always returned as candidates.
+    """
+
+    def __init__(self, templates):
+        """
+        :param templates: Dictionary of templates, keyed by template name, as
+                          returned by :meth:`~tank.template.read_templates`.
+        """
+        # keep a shallow copy so that we can detect changes to the source dictionary.
+        self._source = templates
+        self._snapshot = dict(templates)
+
+        # templates which can't be indexed and need to always be tested, and
+        # indexed signatures keyed by path depth. All entries are stored
+        # alongside the position of the template in the source dictionary so
+        # that candidates are returned in the same order as when iterating over it.
+        self._unindexed = []
+        self._signatures_by_depth = {}
+
+        for position, template in enumerate(templates.values()):
+            signatures = None
+            if isinstance(template, TemplatePath):
+                signatures = _get_path_signatures(template)
+
+            if signatures is None:
+                self._unindexed.append((position, template))
+                continue
+
+            for depth, prefix, suffix in signatures:
+                bucket = self._signatures_by_depth.setdefault(depth, [])
+                bucket.append((position, template, prefix, suffix))
+
+    def is_current(self, templates):
+        """
+        Checks if this index is still valid for a given dictionary of templates.
+
+        The templates dictionary on a :class:`~sgtk.Sgtk` instance is public and
+        can be modified or replaced by client code, in which case the index needs
+        to be rebuilt.
+
+        :param templates: Dictionary of templates, keyed by template name.
+        :returns: True if the index reflects the given templates, False otherwise.
+        """
+        # templates don't implement __eq__ so this is a cheap identity check
+        # for each template in the dictionary.
+        return templates is self._source and templates == self._snapshot
+
+    def get_candidates(self, path):
+        """
+        Returns the templates which may match the given path.
+
+        This is a superset of the templates that would validate the path: a
+        template not returned by this method can't match the path.
+
+        :param path: Path to find candidate templates for.
+        :returns: List of templates, in the order of the source dictionary.
+        """
+        lower_path = os.path.normpath(path).lower()
+        depth = lower_path.count(os.path.sep)
+        return self._filter_signatures(self._signatures_by_depth.get(depth, []), lower_path)
+
+    def get_candidates_for_paths(self, paths):
+        """
+        Returns the templates which may match each of the given paths.
+
+        Paths are grouped by folder, so that the signatures which only depend
+        on the folder are only checked once for all the files it contains.
+
+        :param paths: List of paths to find candidate templates for.
+        :returns: Dictionary of lists of templates, keyed by path.
+        """
+        paths_by_folder = {}
+        for path in paths:
+            lower_path = os.path.normpath(path).lower()
+            folder = os.path.dirname(lower_path)
+            depth = lower_path.count(os.path.sep)
+            paths_by_folder.setdefault((folder, depth), []).append((path, lower_path))
+
+        candidates = {}
+        for (folder, depth), folder_paths in paths_by_folder.items():
+            # discard the signatures with a prefix which doesn't match the folder,
+            # the other prefixes need to be checked against each path.
+            signatures = []
+            for signature in self._signatures_by_depth.get(depth, []):
+                prefix = signature[2]
+                if prefix and len(prefix) <= len(folder):
+                    if not folder.startswith(prefix):
+                        continue
+                    signature = signature[:2] + (None,) + signature[3:]
+                signatures.append(signature)
+
+            for path, lower_path in folder_paths:
+                candidates[path] = self._filter_signatures(signatures, lower_path)
+
+        return candidates
+
+    def _filter_signatures(self, signatures, lower_path):
+        """
+        Returns the templates from a list of signatures which may match a path.
+
+        :param signatures: List of (position, template, prefix, suffix) tuples.
+        :param lower_path: Normalized, lower case path.
+        :returns: List of templates, including the templates which are not
+                  indexed, in the order of the source dictionary.
+        """
+        candidates = dict(self._unindexed)
+        for position, template, prefix, suffix in signatures:
+            if position in candidates:
+                continue
+            if prefix and not lower_path.startswith(prefix):
+                continue
+            if suffix and not lower_path.endswith(suffix):
+                continue
+            candidates[position] = template
+
+        return [candidates[position] for position in sorted(candidates)]
+
+
+def _get_path_signatures(template):
+    """
+    Computes the signatures a path needs to match to be valid for a template.
+
+    The signatures mirror how :class:`~tank.template_path_parser.TemplatePathParser`
+    splits a path: every character of a matching path belongs either to a static
+    token or to a key value and key values can't contain path separators. A path
+    may also stop right after a static token if keys remain to be resolved, in
+    which case the remaining keys are left out of the resulting fields.
+
+    :param template: :class:`TemplatePath` instance.
+    :returns: Set of (depth, prefix, suffix) tuples, where prefix and suffix can be
+              None when the path isn't constrained on its start or end, or None
+              if the template can't be indexed.
+    """
+    signatures = set()
+    key_regex = r"({%s})" % constants.TEMPLATE_KEY_NAME_REGEX
+
+    for definition in template._definitions:
+        # split the lowered definition into its static tokens and keys, keeping
+        # track of whether each token is followed by a key.
+        pieces = [p for p in re.split(key_regex, template._expand_definition(definition).lower()) if p]
+        tokens = []
+        num_keys = 0
+        key_after_token = []
+        for piece in pieces:
+            if re.match(key_regex, piece):
+                num_keys += 1
+                key_after_token = [True] * len(key_after_token)
+            else:
+                tokens.append(piece)
+                key_after_token.append(False)
+
+        if not tokens:
+            # nothing static to match against, this variation can't be indexed
+            # so it will match any depth.
+            return None
+
+        depth = sum(token.count(os.path.sep) for token in tokens)
+
+        if not num_keys:
+            signatures.add((depth, tokens[0], tokens[0]))
+            continue
+
+        # the parser only allows a path to start with a key value when there are
+        # at least as many keys as tokens.
+        prefix = tokens[0] if pieces[0] == tokens[0] and num_keys < len(tokens) else None
+        suffix = tokens[-1] if pieces[-1] == tokens[-1] else None
+        signatures.add((depth, prefix, suffix))
+
+        # a path ending right after a token with keys remaining is considered
+        # resolved by the parser, as long as all the subsequent tokens can still be
+        # found in the tail of that token.
+        for index, token in enumerate(tokens):
+            if not key_after_token[index]:
+                continue
+            if not all(t in token[1:] for t in tokens[index + 1:]):
+                continue
+            truncated_depth = sum(t.count(os.path.sep) for t in tokens[:index + 1])
+            signatures.add((truncated_depth, prefix, token))
+
+    return signatures
@@ -13,6 +13,8 @@ Parsing of template paths into values for specified keys using a list of static
 """
 
 import os
+import re
+
 from .errors import TankError
 
 class TemplatePathParser(object):
@@ -46,19 +48,49 @@ class TemplatePathParser(object):
             self.fully_resolved = fully_resolved
             self.last_error = last_error    
     
-    def __init__(self, ordered_keys, static_tokens):
+    def __init__(self, ordered_keys, static_tokens, matcher=None):
         """
         Construction
                                 
         :param ordered_keys:    Template key objects in order that they appear in the
                                 template definition.
         :param static_tokens:   Pieces of the definition that don't represent Template Keys.
+        :param matcher:         Optional :class:`TemplatePathMatcher` for the same definition,
+                                used to parse paths without the recursive search whenever
+                                it can provide a definitive result.
         """
         self.ordered_keys = ordered_keys
         self.static_tokens = static_tokens
         self.fields = {}
         self.input_path = None
-        self.last_error = "Unable to parse path" 
+        self._matcher = matcher
+        self._last_error = "Unable to parse path"
+        # path and skip keys rejected by the matcher, for which the error
+        # message still needs to be generated.
+        self._unparsed = None
+
+    @property
+    def last_error(self):
+        """
+        The last error found while parsing a path.
+        """
+        if self._unparsed:
+            # the matcher rejected the path without generating an error, so run the
+            # full parse to report exactly the same error as when no matcher is used.
+            input_path, skip_keys = self._unparsed
+            self._unparsed = None
+            self.__parse_path(input_path, input_path.lower(), skip_keys)
+        return self._last_error
+
+    @last_error.setter
+    def last_error(self, value):
+        """
+        Sets the last error found while parsing a path.
+
+        :param value: Error message.
+        """
+        self._unparsed = None
+        self._last_error = value
 
     def parse_path(self, input_path, skip_keys):
         """
@@ -92,7 +124,31 @@ class TemplatePathParser(object):
 
         # all token comparisons are done case insensitively.
         lower_path = input_path.lower()
-        
+
+        # skipped keys are not validated and can contain any character, so they
+        # can't be handled by the compiled matcher.
+        if self._matcher and not any(key.name in skip_keys for key in self.ordered_keys):
+            conclusive, fields = self._matcher.match(input_path, lower_path)
+            if conclusive:
+                if fields is None:
+                    # defer the error message generation to when it is requested.
+                    self._unparsed = (input_path, skip_keys)
+                return fields
+
+        return self.__parse_path(input_path, lower_path, skip_keys)
+
+    def __parse_path(self, input_path, lower_path, skip_keys):
+        """
+        Parses a path using a recursive search over all the possible positions
+        of the static tokens. See :meth:`parse_path` for details.
+
+        :param input_path:  The normalized path to parse.
+        :param lower_path:  The lower case version of the path.
+        :param skip_keys:   List of keys for whom we do not need to find values.
+
+        :returns:           If succesful, a dictionary of fields mapping key names to 
+                            their values. None if the fields can't be resolved. 
+        """
         # if no keys, nothing to discover
         if not self.ordered_keys:
             if lower_path == self.static_tokens[0]:
@@ -358,4 +414,159 @@ class TemplatePathParser(object):
                                                                     fully_resolved, 
                                                                     last_error))
             
-        return possible_values
\ No newline at end of file
+        return possible_values
+
+class TemplatePathMatcher(object):
+    """
+    Compiled regular expression matching the paths for a template definition.
+
+    The matcher is only built for definitions where a match is guaranteed to be
+    the only way to split a path into key values, in which case it gives the same
+    result as the recursive search done by :class:`TemplatePathParser`. This is
+    the case when no keys are adjacent and when no valid value for a key can
+    contain the first character of the static token that follows it, so that
+    each key value ends at the first occurrence of that character. Keys which
+    were already found earlier in the path must have the same value, so they are
+    matched as a back reference to that value and are always eligible.
+
+    Path separators are never allowed in key values, so definitions where keys
+    are separated by folders are always eligible.
+    """
+
+    def __init__(self, pieces):
+        """
+        Use :meth:`compile` to create matchers.
+
+        :param pieces: Lower case static tokens and keys, in the order they appear
+                       in the definition.
+        """
+        self._keys = [piece for piece in pieces if not isinstance(piece, basestring)]
+        tokens = [piece for piece in pieces if isinstance(piece, basestring)]
+        self._first_token = tokens[0]
+
+        # if the path doesn't start with the first token, the parser may still
+        # match it with the first key when there are at least as many keys as tokens.
+        self._must_start_with_token = len(self._keys) < len(tokens)
+
+        # the parser allows a path to stop right after a token when keys remain. This
+        # is handled by the regular expression for the last token, but not for
+        # previous tokens. These can only be where the path stops if all the
+        # following tokens are found in their tail.
+        self._conclusive_failure = True
+        for index, token in enumerate(tokens[:-1]):
+            if all(t in token[1:] for t in tokens[index + 1:]):
+                self._conclusive_failure = False
+
+        # each key occurence is captured in its own group, in order.
+        expression = "^"
+        groups = {}
+        num_groups = 0
+        for index, piece in enumerate(pieces):
+            if isinstance(piece, basestring):
+                expression += re.escape(piece)
+                continue
+
+            num_groups += 1
+            if piece.name in groups:
+                group = r"(\%d)" % groups[piece.name]
+            else:
+                groups[piece.name] = num_groups
+                excluded_chars = os.path.sep
+                if index < len(pieces) - 1:
+                    excluded_chars += pieces[index + 1][0]
+                group = "([^%s]+)" % re.escape(excluded_chars)
+
+            if index == len(pieces) - 1 and len(tokens) > 1:
+                # the last key of the definition is optional when preceded by
+                # another key, as the path may stop right after the last token.
+                group += "?"
+            expression += group
+        expression += "$"
+        self._regex = re.compile(expression)
+
+    @classmethod
+    def compile(cls, pieces):
+        """
+        Creates a matcher for a definition if it is eligible.
+
+        :param pieces: Lower case static tokens and :class:`TemplateKey` instances,
+                       in the order they appear in the expanded definition.
+        :returns: :class:`TemplatePathMatcher` or None if the definition can't
+                  be handled by a matcher.
+        """
+        keys = [piece for piece in pieces if not isinstance(piece, basestring)]
+        tokens = [piece for piece in pieces if isinstance(piece, basestring)]
+        if not keys or not pieces or not isinstance(pieces[0], basestring):
+            return None
+
+        # non ascii tokens may not compare the same way once lower cased.
+        if any(ord(char) >= 128 for token in tokens for char in token):
+            return None
+
+        def can_contain(key, char):
+            return char != os.path.sep and key._can_contain(char)
+
+        found_keys = set()
+        for index, piece in enumerate(pieces[:-1]):
+            if isinstance(piece, basestring):
+                continue
+            next_piece = pieces[index + 1]
+            if not isinstance(next_piece, basestring):
+                # adjacent keys can be split in many ways
+                return None
+            if piece.name not in found_keys and can_contain(piece, next_piece[0]):
+                # the key value could extend past the token
+                return None
+            found_keys.add(piece.name)
+
+        if len(keys) >= len(tokens):
+            # the parser will also try to match the first key with the start of the
+            # path, up to another occurence of the first token. Such a value contains
+            # the whole first token, or at least its first character if the token
+            # can overlap with itself.
+            first_token = tokens[0]
+            overlaps = any(
+                first_token[i:] == first_token[:len(first_token) - i] for i in range(1, len(first_token))
+            )
+            chars = first_token[:1] if overlaps else first_token
+            if all(can_contain(keys[0], char) for char in chars):
+                return None
+
+        return cls(pieces)
+
+    def match(self, input_path, lower_path):
+        """
+        Matches a path.
+
+        :param input_path: The normalized path to match.
+        :param lower_path: The lower case version of the path.
+        :returns: A tuple with a boolean indicating if the result is conclusive and
+                  the fields found, or None if the path doesn't match. If the result
+                  is not conclusive, the path needs to be parsed by the
+                  :class:`TemplatePathParser`.
+        """
+        match = self._regex.match(lower_path)
+        if match is None:
+            conclusive = self._conclusive_failure and (
+                self._must_start_with_token or lower_path.startswith(self._first_token)
+            )
+            return conclusive, None
+
+        fields = {}
+        str_values = {}
+        for index, key in enumerate(self._keys):
+            start, end = match.span(index + 1)
+            if start < 0:
+                # the path stopped before the last key
+                break
+            str_value = input_path[start:end]
+            if str_values.setdefault(key.name, str_value) != str_value:
+                # conflicting values, let the parser report it
+                return False, None
+            try:
+                fields[key.name] = key.value_from_str(str_value)
+            except TankError:
+                # invalid value, let the parser report it
+                return False, None
+
+        return True, fields
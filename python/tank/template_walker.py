@@ -0,0 +1,162 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Walks the file system to find the paths matching a glob built from a template.
+"""
+
+import os
+import glob
+import fnmatch
+import functools
+from multiprocessing.pool import ThreadPool
+
+from .errors import TankError
+
+
+class TemplateGlobWalker(object):
+    """
+    Finds the paths matching glob strings built by applying wildcards to a
+    :class:`~tank.template.TemplatePath`.
+
+    This yields the same paths as :func:`glob.iglob` but descends the file system
+    one level of the template definition at a time. Folders whose name is a
+    single key of the template are discarded before descending into them if
+    their name isn't a valid value for the key, and the folders of each level
+    can be listed in parallel, which helps on high latency file systems.
+    """
+
+    def __init__(self, template, max_workers=1):
+        """
+        :param template: :class:`~tank.template.TemplatePath` the globs are built from.
+        :param int max_workers: Number of threads used to list folders. Folders are
+                                listed in the calling thread if this is 1.
+        """
+        self._template = template
+        self._root_path = os.path.normpath(template.root_path)
+        self._pool = ThreadPool(max_workers) if max_workers > 1 else None
+
+    def close(self):
+        """
+        Releases the threads used to list folders.
+        """
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def iter_paths(self, glob_str, definition, keys):
+        """
+        Yields the paths matching a glob string.
+
+        :param glob_str: Glob string built by applying fields to the template.
+        :param definition: Definition of the template used to build the glob string.
+        :param keys: Dictionary of the template keys used by the definition.
+        """
+        root, levels = self._get_levels(glob_str, definition, keys)
+        if levels is None:
+            # the glob string can't be mapped onto the definition, e.g. because
+            # a field value contains a path separator.
+            for path in glob.iglob(glob_str):
+                yield path
+            return
+
+        if not levels:
+            if os.path.lexists(glob_str):
+                yield glob_str
+            return
+
+        folders = [root]
+        for pattern, key in levels[:-1]:
+            next_folders = []
+            for paths in self._map(pattern, key, folders):
+                next_folders.extend(paths)
+            folders = next_folders
+
+        pattern, key = levels[-1]
+        for paths in self._map(pattern, key, folders):
+            for path in paths:
+                yield path
+
+    def _get_levels(self, glob_str, definition, keys):
+        """
+        Splits a glob string into the patterns to match at each level below the root.
+
+        :returns: Tuple with the root of the glob string and a list of (pattern, key)
+                  tuples, where key is the template key making up the whole level or
+                  None. The list is None if the glob string doesn't map onto the
+                  definition.
+        """
+        if not definition:
+            return glob_str, [] if glob_str == self._template.root_path else None
+
+        definition_parts = definition.split(os.sep)
+        glob_parts = glob_str.split(os.sep)
+        if len(glob_parts) <= len(definition_parts):
+            return None, None
+
+        root = os.sep.join(glob_parts[:-len(definition_parts)]) or os.sep
+        if glob.has_magic(root) or os.path.normpath(root) != self._root_path:
+            return None, None
+
+        levels = []
+        for definition_part, glob_part in zip(definition_parts, glob_parts[-len(definition_parts):]):
+            key = None
+            if definition_part.startswith("{") and definition_part.endswith("}"):
+                key = keys.get(definition_part[1:-1])
+            levels.append((glob_part, key))
+        return root, levels
+
+    def _map(self, pattern, key, folders):
+        """
+        Matches a pattern against the content of several folders.
+
+        :returns: Iterator over a list of matching paths for each folder.
+        """
+        if self._pool and glob.has_magic(pattern) and len(folders) > 1:
+            return self._pool.imap_unordered(
+                functools.partial(_match_folder, pattern=pattern, key=key),
+                folders
+            )
+        return (_match_folder(folder, pattern, key) for folder in folders)
+
+
+def _match_folder(folder, pattern, key):
+    """
+    Finds the items of a folder matching a glob pattern, following the rules
+    of :func:`glob.glob`.
+
+    :param folder: Folder to search.
+    :param pattern: Glob pattern for the item names.
+    :param key: Template key the names need to be valid values of, or None.
+    :returns: List of matching paths.
+    """
+    if not glob.has_magic(pattern):
+        path = os.path.join(folder, pattern)
+        return [path] if os.path.lexists(path) else []
+
+    try:
+        names = os.listdir(folder)
+    except os.error:
+        return []
+
+    # like glob, wildcards don't match hidden items.
+    if pattern[0] != ".":
+        names = [name for name in names if name[0] != "."]
+
+    paths = []
+    for name in fnmatch.filter(names, pattern):
+        if key is not None:
+            try:
+                key.value_from_str(name)
+            except TankError:
+                continue
+        paths.append(os.path.join(folder, name))
+    return paths
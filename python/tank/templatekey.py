@@ -92,6 +92,10 @@ class TemplateKey(object):
         self._length = length
         self._last_error = ""
 
+        # lower case versions of the exclusions and choices, used for validation.
+        self._lower_exclusions = self._get_lower_values(self._exclusions)
+        self._lower_choices = self._get_lower_values(self._choices)
+
         # check that the key name doesn't contain invalid characters
         if not re.match(r"^%s$" % constants.TEMPLATE_KEY_NAME_REGEX, name):
             raise TankError("%s: Name contains invalid characters. "
@@ -110,6 +114,20 @@ class TemplateKey(object):
         if not all(self.validate(choice) for choice in self.choices):
             raise TankError(self._last_error)
 
+    @staticmethod
+    def _get_lower_values(values):
+        """
+        Builds the set of lower case string representations of values.
+
+        :param values: Iterable of values.
+        :returns: Set of strings or None if a value can't be converted to a string,
+                  in which case the conversion is left to validation time.
+        """
+        try:
+            return frozenset(str(x).lower() for x in values)
+        except UnicodeError:
+            return None
+
     def _get_default(self):
         """
         The default value for this key. If the default argument was specified
@@ -254,12 +272,18 @@ class TemplateKey(object):
         str_value = value if isinstance(value, basestring) else str(value)
 
         # We are not case sensitive
-        if str_value.lower() in [str(x).lower() for x in self.exclusions]:
+        lower_exclusions = self._lower_exclusions
+        if lower_exclusions is None:
+            lower_exclusions = [str(x).lower() for x in self.exclusions]
+        if lower_exclusions and str_value.lower() in lower_exclusions:
             self._last_error = "%s Illegal value: %s is forbidden for this key." % (self, value)
             return False
 
-        if value is not None and self.choices:
-            if str_value.lower() not in [str(x).lower() for x in self.choices]:
+        if value is not None and self._choices:
+            lower_choices = self._lower_choices
+            if lower_choices is None:
+                lower_choices = [str(x).lower() for x in self.choices]
+            if str_value.lower() not in lower_choices:
                 self._last_error = "%s Illegal value: '%s' not in choices: %s" % (self, value, str(self.choices))
                 return False
         
@@ -270,6 +294,21 @@ class TemplateKey(object):
                         
         return True
 
+    def _can_contain(self, char):
+        """
+        Checks if a valid value for this key may contain the given character.
+
+        This is used when compiling template path matchers and only needs to be
+        conservative: returning True is always safe, returning False guarantees
+        that no valid value, once lower cased, contains the character.
+
+        :param char: Lower case character to test.
+        :returns: False if no valid value can contain the character, True otherwise.
+        """
+        if self.choices:
+            return any(char in str(choice).lower() for choice in self.choices)
+        return True
+
     def _as_string(self, value):
         raise NotImplementedError
 
@@ -337,7 +376,13 @@ class StringKey(TemplateKey):
         if self._subset_format and sys.version_info < (2, 6):
             raise TankError("Subset formatting in template keys require python 2.6+!")
 
-        self._subset_str = subset
+        # subset formatting is done in unicode space
+        self._subset_format_u = None
+        if self._subset_format:
+            if isinstance(self._subset_format, unicode):
+                self._subset_format_u = self._subset_format
+            else:
+                self._subset_format_u = self._subset_format.decode("utf-8")
 
         if subset:
             try:
@@ -465,6 +510,23 @@ class StringKey(TemplateKey):
             raise TankError(self._last_error)
         return value
 
+    def _can_contain(self, char):
+        """
+        Checks if a valid value for this key may contain the given character.
+
+        :param char: Lower case character to test.
+        :returns: False if no valid value can contain the character, True otherwise.
+        """
+        if not super(StringKey, self)._can_contain(char):
+            return False
+
+        # only the alpha and alphanumeric filters restrict the characters used anywhere
+        # in the value, custom regexes are only matched against the start of it.
+        if self._filter_regex_u and ord(char) < 128:
+            return self._filter_regex_u.search(unicode(char)) is None
+
+        return True
+
     def _as_string(self, value):
         """
         Converts the given value to a string representation.
@@ -497,7 +559,7 @@ class StringKey(TemplateKey):
             elif self._subset_format:
                 # we have an explicit format string we want to apply to the
                 # match. Do the formatting as unicode.
-                resolved_value = self._subset_format.decode("utf-8").format(*match.groups())
+                resolved_value = self._subset_format_u.format(*match.groups())
 
             else:
                 # we have a match object. concatenate the groups
@@ -554,7 +616,7 @@ class StringKey(TemplateKey):
             if self._subset_format:
                 try:
                     # perform the formatting in unicode space to cover all cases
-                    self._subset_format.decode("utf-8").format(*regex_match.groups())
+                    self._subset_format_u.format(*regex_match.groups())
                 except Exception as e:
                     self._last_error = "%s Illegal value '%s' does not fit subset '%s' with format '%s': %s" % (
                         self,
@@ -639,6 +701,32 @@ class TimestampKey(TemplateKey):
         """
         return self._format_spec
 
+    def __getstate__(self):
+        """
+        Returns the state of the key for pickling.
+
+        Bound methods can't be pickled, so ``now`` and ``utc_now`` defaults are
+        stored by name.
+        """
+        state = self.__dict__.copy()
+        if self._default == self.__get_current_time:
+            state["_default"] = "now"
+        elif self._default == self.__get_current_utc_time:
+            state["_default"] = "utc_now"
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restores the state of an unpickled key.
+
+        :param state: State returned by :meth:`__getstate__`.
+        """
+        self.__dict__.update(state)
+        if self._default == "now":
+            self._default = self.__get_current_time
+        elif self._default == "utc_now":
+            self._default = self.__get_current_utc_time
+
     def __get_current_time(self):
         """
         Returns the current time as a datetime.datetime instance.
@@ -754,6 +842,8 @@ class IntegerKey(TemplateKey):
         self._strict_matching = None
         # Validate and set up formatting details
         self._init_format_spec(name, format_spec)
+        # format string used to convert values to strings
+        self._value_format = "%%%sd" % self._format_spec if self._format_spec else "%d"
         # Validate and set up strict matching defailts
         self._init_strict_matching(name, strict_matching)
         super(IntegerKey, self).__init__(name,
@@ -904,17 +994,16 @@ class IntegerKey(TemplateKey):
 
         :returns: True if the value strictly matches the format spec, False otherwise.
         """
-        error_msg = "%s Illegal value '%s', does not match format spec '%s'" % (self, value, self.format_spec)
         # If there are more characters than the minimum size, we should have a non zero positive number
         if len(value) > self._minimum_width:
             if not self._NON_ZERO_POSITIVE_INTEGER_RE.match(value):
-                self._last_error = error_msg
+                self._set_strict_matching_error(value)
                 return False
             return True
 
         # If there are less characters than the minimum size, then then there is no strict matching.
         if len(value) < self._minimum_width:
-            self._last_error = error_msg
+            self._set_strict_matching_error(value)
             return False
 
         # If there are many characters as the format_spec requires, we'll validate that things are
@@ -924,20 +1013,47 @@ class IntegerKey(TemplateKey):
         # - ' 01'
         matches = self._strict_validation_re.match(value)
         if not matches:
-            self._last_error = error_msg
+            self._set_strict_matching_error(value)
             return False
         return True
 
+    def _set_strict_matching_error(self, value):
+        """
+        Sets the error reported when a value doesn't strictly match the format_spec.
+
+        :param value: Value which doesn't match.
+        """
+        self._last_error = "%s Illegal value '%s', does not match format spec '%s'" % (
+            self, value, self.format_spec
+        )
+
+    def _can_contain(self, char):
+        """
+        Checks if a valid value for this key may contain the given character.
+
+        :param char: Lower case character to test.
+        :returns: False if no valid value can contain the character, True otherwise.
+        """
+        if not super(IntegerKey, self)._can_contain(char):
+            return False
+
+        if char.isdigit():
+            return True
+
+        # values can only be padded with spaces when not zero padded.
+        if self._zero_padded:
+            return False
+        if self.strict_matching:
+            return char == " "
+        return char.isspace()
+
     def _as_string(self, value):
         """
         Converts value into a string.
 
         :returns: String representation of the value according to the optional format_spec.
         """
-        if self.format_spec:
-            # insert format spec into string
-            return ("%%%sd" % self.format_spec) % value
-        return "%d" % value
+        return self._value_format % value
 
     def _as_value(self, str_value):
         """
@@ -997,6 +1113,7 @@ class SequenceKey(IntegerKey):
     VALID_FORMAT_STRINGS = ["%d", "#", "@", "$F", "<UDIM>", "$UDIM"]
     # flame sequence pattern regex ('[1234-5434]')
     FLAME_PATTERN_REGEX = "^\[[0-9]+-[0-9]+\]$"
+    _FLAME_PATTERN_RE = re.compile(FLAME_PATTERN_REGEX)
     
     def __init__(self,
                  name,
@@ -1040,23 +1157,16 @@ class SequenceKey(IntegerKey):
 
     def validate(self, value):
 
-        # use a std error message
-        full_format_strings = ["%s %s" % (self.FRAMESPEC_FORMAT_INDICATOR, x) for x in self.VALID_FORMAT_STRINGS]
-        error_msg = "%s Illegal value '%s', expected an Integer, a frame spec or format spec.\n" % (self, value)
-        error_msg += "Valid frame specs: %s\n" % str(self._frame_specs)
-        error_msg += "Valid format strings: %s\n" % full_format_strings
-        
-
         if isinstance(value, basestring) and value.startswith(self.FRAMESPEC_FORMAT_INDICATOR):
             # FORMAT: YXZ string - check that XYZ is in VALID_FORMAT_STRINGS
             pattern = self._extract_format_string(value)        
             if pattern in self.VALID_FORMAT_STRINGS:
                 return True
             else:
-                self._last_error = error_msg
+                self._set_validation_error(value)
                 return False
                 
-        elif isinstance(value, basestring) and re.match(self.FLAME_PATTERN_REGEX, value):
+        elif isinstance(value, basestring) and self._FLAME_PATTERN_RE.match(value):
             # value is matching the flame-style sequence pattern
             # [1234-5678]
             return True
@@ -1067,12 +1177,45 @@ class SequenceKey(IntegerKey):
             if value in self._frame_specs:
                 return True
             else:
-                self._last_error = error_msg
+                self._set_validation_error(value)
                 return False
                 
         else:
             return super(SequenceKey, self).validate(value)
 
+    def _set_validation_error(self, value):
+        """
+        Sets the std error message reported when a value is not valid.
+
+        :param value: Value which is not valid.
+        """
+        full_format_strings = ["%s %s" % (self.FRAMESPEC_FORMAT_INDICATOR, x) for x in self.VALID_FORMAT_STRINGS]
+        error_msg = "%s Illegal value '%s', expected an Integer, a frame spec or format spec.\n" % (self, value)
+        error_msg += "Valid frame specs: %s\n" % str(self._frame_specs)
+        error_msg += "Valid format strings: %s\n" % full_format_strings
+        self._last_error = error_msg
+
+    def _can_contain(self, char):
+        """
+        Checks if a valid value for this key may contain the given character.
+
+        :param char: Lower case character to test.
+        :returns: False if no valid value can contain the character, True otherwise.
+        """
+        # sequence values are not validated like integer values, so skip the
+        # IntegerKey implementation.
+        if not super(IntegerKey, self)._can_contain(char):
+            return False
+
+        if char.isdigit() or char.isspace():
+            return True
+
+        # format strings, frame specs and flame patterns
+        special_chars = "".join(
+            [self.FRAMESPEC_FORMAT_INDICATOR, "[-]"] + self.VALID_FORMAT_STRINGS + self._frame_specs
+        )
+        return char in special_chars.lower()
+
     def _as_string(self, value):
         
         if isinstance(value, basestring) and value.startswith(self.FRAMESPEC_FORMAT_INDICATOR):
@@ -1080,7 +1223,7 @@ class SequenceKey(IntegerKey):
             pattern = self._extract_format_string(value)
             return self._resolve_frame_spec(pattern, self.format_spec)
 
-        if isinstance(value, basestring) and re.match(self.FLAME_PATTERN_REGEX, value):
+        if isinstance(value, basestring) and self._FLAME_PATTERN_RE.match(value):
             # this is a flame style sequence token [1234-56773]
             return value
 
@@ -1096,7 +1239,7 @@ class SequenceKey(IntegerKey):
         if str_value in self._frame_specs:
             return str_value
         
-        if re.match(self.FLAME_PATTERN_REGEX, str_value):
+        if self._FLAME_PATTERN_RE.match(str_value):
             # this is a flame style sequence token [1234-56773]
             return str_value
     
@@ -0,0 +1,125 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Bounded, thread safe cache discarding the least recently used items first.
+"""
+
+from __future__ import with_statement
+
+import collections
+import threading
+
+
+class LRUCache(object):
+    """
+    Dictionary-like cache holding a maximum number of items.
+
+    When the cache is full, adding an item discards the item which was
+    least recently read or written. The number of cache hits and misses
+    is tracked so that the efficiency of the cache can be monitored.
+    """
+
+    def __init__(self, max_size):
+        """
+        :param int max_size: Maximum number of items held by the cache. A size of
+                             0 disables the cache.
+        """
+        self._lock = threading.Lock()
+        self._items = collections.OrderedDict()
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        """
+        :returns: Number of items in the cache.
+        """
+        return len(self._items)
+
+    @property
+    def max_size(self):
+        """
+        Maximum number of items held by the cache. Reducing the size discards
+        the least recently used items.
+        """
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        with self._lock:
+            self._max_size = max_size
+            self._trim()
+
+    @property
+    def stats(self):
+        """
+        Statistics about the cache usage, as a dictionary with the ``size``,
+        ``max_size``, ``hits`` and ``misses`` keys.
+        """
+        with self._lock:
+            return {
+                "size": len(self._items),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+    def get(self, key, default=None):
+        """
+        Retrieves an item from the cache and marks it as the most recently used.
+
+        :param key: Key of the item to retrieve.
+        :param default: Value returned if the key is not in the cache.
+
+        :returns: The cached value or the default value.
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self._misses += 1
+                return default
+            self._items[key] = value
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Adds an item to the cache, discarding the least recently used item
+        if the cache is full.
+
+        :param key: Key of the item to add.
+        :param value: Value to store.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            self._trim()
+
+    def clear(self, reset_stats=True):
+        """
+        Removes all items from the cache.
+
+        :param bool reset_stats: False to keep the hit and miss counts, for
+                                 example when the cached items became invalid.
+        """
+        with self._lock:
+            self._items.clear()
+            if reset_stats:
+                self._hits = 0
+                self._misses = 0
+
+    def _trim(self):
+        """
+        Discards the least recently used items until the cache fits its maximum size.
+        """
+        while len(self._items) > max(self._max_size, 0):
+            self._items.popitem(last=False)
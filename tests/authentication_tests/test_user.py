@@ -133,6 +133,20 @@ class UserTests(ShotgunTestBase):
         }
         user_impl.ScriptUser.from_dict(script_user_with_unknown_data)
 
+    def test_serialize_deserialize_json(self):
+        """
+        Makes sure users serialized to JSON are restored.
+        """
+        su = self._create_test_saml_user()
+        payload = user.serialize_user(su, use_json=True)
+        self.assertTrue(payload.startswith("{"))
+        su_2 = user.deserialize_user(payload)
+        self.assertIsInstance(su_2, user.ShotgunSamlUser)
+        self.assertEquals(su.host, su_2.host)
+        self.assertEquals(su.login, su_2.login)
+        self.assertEquals(su.impl.get_session_token(), su_2.impl.get_session_token())
+        self.assertIsInstance(su_2.impl.get_session_token(), str)
+
     @patch("tank_vendor.shotgun_api3.Shotgun.server_caps")
     @patch("tank_vendor.shotgun_api3.Shotgun._call_rpc")
     @patch("tank.authentication.interactive_authentication.renew_session")
@@ -184,3 +184,41 @@ class TestFunctionality(ShotgunTestBase):
         # Extract the settings back from the restored manager to make sure everything was written
         # back correctly.
         self.assertEqual(restored_mgr.extract_settings(), modified_settings)
+
+    @patch("tank.authentication.ShotgunAuthenticator.get_user", return_value=Mock())
+    def test_lazy_startup_context(self, _):
+        """
+        Tests that the engine startup context is built in lazy mode when the core supports it.
+        """
+        class StopStartup(Exception):
+            pass
+
+        mgr = ToolkitManager()
+        mgr.pre_engine_start_callback = Mock(side_effect=StopStartup)
+        entity = {"type": "Shot", "id": 1}
+        calls = []
+
+        def context_from_entity_dictionary(entity_dictionary, lazy=False):
+            calls.append(lazy)
+            return "context"
+
+        def old_context_from_entity_dictionary(entity_dictionary):
+            calls.append(None)
+            return "context"
+
+        for method in [context_from_entity_dictionary, old_context_from_entity_dictionary]:
+            tk = Mock()
+            tk.context_from_entity_dictionary = method
+            with self.assertRaises(StopStartup):
+                mgr._start_engine(tk, "tk-test", entity)
+            mgr.pre_engine_start_callback.assert_called_with("context")
+        self.assertEqual([True, None], calls)
+
+        # errors raised by the core are not hidden.
+        def failing_context_from_entity_dictionary(entity_dictionary, lazy=False):
+            raise TypeError("Bad entity")
+
+        tk = Mock()
+        tk.context_from_entity_dictionary = failing_context_from_entity_dictionary
+        with self.assertRaisesRegexp(TypeError, "Bad entity"):
+            mgr._start_engine(tk, "tk-test", entity)
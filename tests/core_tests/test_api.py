@@ -15,6 +15,7 @@ from mock import Mock, patch
 
 import tank
 from tank.api import Tank
+from tank.errors import TankMultipleMatchingTemplatesError
 from tank.template import TemplatePath, TemplateString
 from tank.templatekey import StringKey, IntegerKey, SequenceKey
 
@@ -61,6 +62,63 @@ class TestTemplateFromPath(TankTestBase):
         self.assertIsInstance(template, TemplateString)
 
 
+class TestTemplatesAndFieldsFromPaths(TankTestBase):
+    """Cases testing Tank.templates_and_fields_from_paths method"""
+    def setUp(self):
+        super(TestTemplatesAndFieldsFromPaths, self).setUp()
+        self.setup_fixtures()
+
+    def test_same_as_single_path(self):
+        """Makes sure the results match template_from_path and get_fields"""
+        folder = os.path.join(self.project_root, "sequences", "Sequence_1", "shot_010", "Anm")
+        paths = [
+            os.path.join(folder, "publish", "shot_010.jfk.v001.ma"),
+            os.path.join(folder, "publish", "shot_010.jfk.v002.ma"),
+            os.path.join(folder, "publish", "shot_010.jfk.v001.ma"),
+            os.path.join(folder, "publish"),
+            folder,
+            os.path.join(self.project_root, "sequences", "Sequence 1", "shot_010", "Anm", "publish"),
+            "Nuke Script Name, v002",
+        ]
+        results = self.tk.templates_and_fields_from_paths(paths)
+        self.assertEqual(len(paths), len(results))
+        for path, (template, fields, error) in zip(paths, results):
+            self.assertIsNone(error)
+            expected_template = self.tk.template_from_path(path)
+            self.assertEqual(expected_template, template)
+            if expected_template is None:
+                self.assertIsNone(fields)
+            else:
+                self.assertEqual(expected_template.get_fields(path), fields)
+
+        self.assertIsInstance(results[0][0], TemplatePath)
+        self.assertIsInstance(results[-1][0], TemplateString)
+
+    def test_ambiguous_path(self):
+        """Makes sure an ambiguous path doesn't prevent other paths from being resolved"""
+        keys = {"Shot": StringKey("Shot"), "name": StringKey("name")}
+        self.tk.templates["ambiguous_shot"] = TemplatePath("ambiguous/{Shot}", keys, self.project_root)
+        self.tk.templates["ambiguous_name"] = TemplatePath("ambiguous/{name}", keys, self.project_root)
+        self.tk.templates["not_ambiguous"] = TemplatePath("not_ambiguous/{name}", keys, self.project_root)
+
+        paths = [
+            os.path.join(self.project_root, "ambiguous", "shot_010"),
+            os.path.join(self.project_root, "not_ambiguous", "main"),
+        ]
+        self.assertRaises(
+            TankMultipleMatchingTemplatesError,
+            self.tk.template_from_path,
+            paths[0]
+        )
+        results = self.tk.templates_and_fields_from_paths(paths)
+        self.assertEqual((None, None), results[0][:2])
+        self.assertIn("2 templates are matching the path", results[0][2])
+        self.assertEqual(
+            (self.tk.templates["not_ambiguous"], {"name": "main"}, None),
+            results[1]
+        )
+
+
 class TestTemplatesLoaded(TankTestBase):
     """Test case for the loading of templates from project level config."""
     def setUp(self):
@@ -183,6 +241,52 @@ class TestPathsFromTemplate(TankTestBase):
         self.assertNotIn(bad_file_path, result)
 
 
+    def test_streaming_and_parallel(self):
+        """
+        Makes sure the generator variant and the parallel search find the same paths.
+        """
+        other_file = self.template.apply_fields(
+            {"Sequence": "Seq_2", "Shot": "shot_2", "Step": "step_name", "name": "filename", "version": 3}
+        )
+        self.create_file(other_file)
+        # wildcards don't match hidden items
+        hidden_file = os.path.join(os.path.dirname(self.file_1), ".filename.v004.ma")
+        self.create_file(hidden_file)
+        hidden_folder_file = self.template.apply_fields(
+            {"Sequence": ".Seq_3", "Shot": "shot_3", "Step": "step_name", "name": "filename", "version": 5}
+        )
+        self.create_file(hidden_folder_file)
+
+        expected = set([self.file_1, self.file_2, other_file])
+        self.assertEquals(expected, set(self.tk.paths_from_template(self.template, {})))
+        self.assertEquals(expected, set(self.tk.paths_from_template(self.template, {}, max_workers=4)))
+
+        paths = self.tk.iter_paths_from_template(self.template, {}, max_workers=4)
+        self.assertFalse(isinstance(paths, list))
+        paths = list(paths)
+        self.assertEquals(len(expected), len(paths))
+        self.assertEquals(expected, set(paths))
+
+    def test_prune_invalid_folders(self):
+        """
+        Makes sure folders which are not valid values for a key are not searched.
+        """
+        keys = {"Shot": StringKey("Shot"),
+                "version": IntegerKey("version", format_spec="03"),
+                "name": StringKey("name")}
+        definition = "shots/{Shot}/{version}/{name}.nk"
+        template = TemplatePath(definition, keys, self.project_root, "my_template")
+        good_file_path = os.path.join(self.project_root, "shots", "Shot1", "001", "name.nk")
+        bad_file_path = os.path.join(self.project_root, "shots", "Shot1", "abc", "name.nk")
+        self.create_file(good_file_path)
+        self.create_file(bad_file_path)
+
+        with patch("tank.template_walker.os.listdir", wraps=os.listdir) as listdir:
+            result = self.tk.paths_from_template(template, {"Shot": "Shot1"})
+        self.assertEquals([good_file_path], result)
+        self.assertNotIn(os.path.dirname(bad_file_path), [c[0][0] for c in listdir.call_args_list])
+
+
 class TestAbstractPathsFromTemplate(TankTestBase):
     """Tests Tank.abstract_paths_from_template method."""
     def setUp(self):
@@ -302,9 +406,20 @@ class TestAbstractPathsFromTemplate(TankTestBase):
         result = self.tk.abstract_paths_from_template(self.template, {"name": "filename"})
         self.assertEquals(set(expected), set(result))
 
+    def test_generator(self):
+        expected = [os.path.join(self.shot_a_path, "%V", "filename.%04d.exr"),
+                    os.path.join(self.shot_b_path, "%V", "filename.%04d.exr")]
+        result = self.tk.iter_abstract_paths_from_template(
+            self.template, {"name": "filename"}, max_workers=2
+        )
+        # abstract paths are yielded once each, as they are found
+        first = next(result)
+        self.assertIn(first, expected)
+        self.assertEquals(sorted(expected), sorted([first] + list(result)))
+
 
 class TestPathsFromTemplateGlob(TankTestBase):
-    """Tests for Tank.paths_from_template method which check the string sent to glob.glob."""
+    """Tests for Tank.paths_from_template method which check the glob string searched."""
     def setUp(self):
         super(TestPathsFromTemplateGlob, self).setUp()
         keys = {"Shot": StringKey("Shot"),
@@ -313,7 +428,7 @@ class TestPathsFromTemplateGlob(TankTestBase):
 
         self.template = TemplatePath("{Shot}/{version}/filename.{seq_num}", keys, root_path=self.project_root)
 
-    @patch("tank.api.glob.iglob")
+    @patch("tank.template_walker.TemplateGlobWalker.iter_paths")
     def assert_glob(self, fields, expected_glob, skip_keys, mock_glob):
         # want to ensure that value returned from glob is returned
         expected = [os.path.join(self.project_root, "shot_1","001","filename.00001")]
@@ -12,6 +12,9 @@ from __future__ import with_statement
 
 import os
 import copy
+import json
+import time
+import threading
 
 from tank_test.tank_test_base import TankTestBase, setUpModule # noqa
 
@@ -180,6 +183,78 @@ class TestEq(TestContext):
         self.assertTrue(context_1 == context_2)
         self.assertFalse(context_1 != context_2)
 
+    def test_hash(self):
+        """
+        Makes sure equal contexts have the same hash and can be used in sets.
+        """
+        kws1 = copy.deepcopy(self.kws)
+        kws1["entity"]["foo"] = "foo"
+        kws1["user"] = self.current_user
+        context_1 = context.Context(self.tk, **kws1)
+        kws2 = copy.deepcopy(self.kws)
+        kws2["user"] = self.current_user
+        context_2 = context.Context(self.tk, **kws2)
+        kws3 = copy.deepcopy(kws2)
+        kws3["task"] = {"id": 45, "type": "Task"}
+        context_3 = context.Context(self.tk, **kws3)
+
+        self.assertEqual(hash(context_1), hash(context_2))
+        self.assertEqual(hash(context_1), hash(copy.deepcopy(context_1)))
+        self.assertEqual(2, len(set([context_1, context_2, context_3])))
+        self.assertEqual("shot", {context_1: "shot", context_3: "task"}[context_2])
+
+    def test_copy_for_user(self):
+        """
+        Makes sure a context copied for another user doesn't compare equal to the
+        original once the identity of the original is known.
+        """
+        kws = copy.deepcopy(self.kws)
+        kws["user"] = self.current_user
+        context_1 = context.Context(self.tk, **kws)
+        # make sure the identity of the original context is computed.
+        hash(context_1)
+        other_user = {"type": "HumanUser", "id": self.current_user["id"] + 1, "name": "Other User"}
+        context_2 = context_1.create_copy_for_user(other_user)
+        self.assertNotEqual(context_1, context_2)
+        self.assertEqual(2, len(set([context_1, context_2])))
+        self.assertEqual(context_1, context_1.create_copy_for_user(self.current_user))
+
+    def test_lazy_equal(self):
+        """
+        Makes sure contexts created in lazy mode are compared with their resolved fields.
+        """
+        task = {"id": 1, "type": "Task", "content": "task_content", "project": self.project,
+                "entity": self.shot, "step": self.step}
+        self.add_to_sg_mock_db(task)
+        context_1 = self.tk.context_from_entity("Task", task["id"])
+        context_2 = self.tk.context_from_entity("Task", task["id"], lazy=True)
+        self.assertEqual(context_1, context_2)
+        self.assertEqual(hash(context_1), hash(context_2))
+        self.assertNotEqual(context.Context(self.tk, **self.kws), context_2)
+
+    def test_same_context(self):
+        """
+        Makes sure contexts are only the same if their source entities are the same
+        too, and that telling doesn't retrieve the fields of lazy contexts.
+        """
+        task = {"id": 1, "type": "Task", "content": "task_content", "project": self.project,
+                "entity": self.shot, "step": self.step}
+        publish = {"id": 2, "type": "PublishedFile", "code": "publish", "project": self.project,
+                   "entity": self.shot, "task": task}
+        self.add_to_sg_mock_db([task, publish])
+        task_context = self.tk.context_from_entity("Task", task["id"])
+        publish_context = self.tk.context_from_entity("PublishedFile", publish["id"])
+        self.assertEqual(task_context, publish_context)
+        self.assertTrue(task_context._is_same_context(task_context))
+        self.assertTrue(task_context._is_same_context(copy.deepcopy(task_context)))
+        self.assertFalse(task_context._is_same_context(publish_context))
+
+        self.tk.context_cache.clear()
+        lazy_context = self.tk.context_from_entity("Task", task["id"], lazy=True)
+        num_finds_before = self.tk.shotgun.finds
+        self.assertFalse(lazy_context._is_same_context(task_context))
+        self.assertEqual(num_finds_before, self.tk.shotgun.finds)
+
 class TestUser(TestContext):
     def setUp(self):
         super(TestUser, self).setUp()
@@ -658,6 +733,343 @@ class TestFromEntity(TestContext):
             context.from_entity(self.tk, "PublishedFile", -1)
 
 
+class TestContextCache(TestFromEntity):
+    """
+    Tests the cache of the data resolved when building contexts.
+    """
+
+    def test_entity_cached(self):
+        """
+        Makes sure Shotgun is only queried once for an entity.
+        """
+        num_finds_before = self.tk.shotgun.finds
+        result = context.from_entity(self.tk, "Task", self.task["id"])
+        cached_result = context.from_entity(self.tk, "Task", self.task["id"])
+        self.assertEqual(1, self.tk.shotgun.finds - num_finds_before)
+        self.assertEqual(result, cached_result)
+        self.assertEqual(self.task["content"], cached_result.task["name"])
+
+        # contexts don't share their data.
+        result.entity["name"] = "modified"
+        self.assertEqual(self.shot["code"], context.from_entity(self.tk, "Task", self.task["id"]).entity["name"])
+
+        # the cached data is used when an entity dictionary is incomplete.
+        result = context.from_entity_dictionary(self.tk, {"type": "Task", "id": self.task["id"]})
+        self.assertEqual(1, self.tk.shotgun.finds - num_finds_before)
+        self.assertEqual(cached_result, result)
+        self.assertEqual({"type": "Task", "id": self.task["id"]}, result.source_entity)
+
+    def test_source_entity(self):
+        """
+        Makes sure the source entity of a context is not shared with the
+        contexts of the linked entities.
+        """
+        result = context.from_entity(self.tk, "PublishedFile", self.publishedfile["id"])
+        self.assertEqual("PublishedFile", result.source_entity["type"])
+
+        num_finds_before = self.tk.shotgun.finds
+        result = context.from_entity(self.tk, "Task", self.task["id"])
+        self.assertEqual(0, self.tk.shotgun.finds - num_finds_before)
+        self.assertEqual(result.entity, result.source_entity)
+        self.assertEqual(
+            "PublishedFile",
+            context.from_entity(self.tk, "PublishedFile", self.publishedfile["id"]).source_entity["type"]
+        )
+
+    def test_path_cached(self):
+        """
+        Makes sure the path cache is only queried once for a path.
+        """
+        with patch(
+            "tank.path_cache.PathCache.get_entities_for_paths",
+            autospec=True,
+            side_effect=tank.path_cache.PathCache.get_entities_for_paths
+        ) as lookup_mock:
+            result = context.from_path(self.tk, self.shot_path)
+            cached_result = context.from_path(self.tk, self.shot_path + os.path.sep)
+            self.assertEqual(1, lookup_mock.call_count)
+            self.assertEqual(result, cached_result)
+
+            # the previous context is still taken into account.
+            previous_context = context.Context(
+                self.tk, project=result.project, entity=result.entity, step=self.step, task=self.task
+            )
+            result = context.from_path(self.tk, self.shot_path, previous_context)
+            self.assertEqual(1, lookup_mock.call_count)
+            self.assertEqual(self.task["id"], result.task["id"])
+
+            # new folders invalidate the cached data.
+            self.add_production_path(os.path.join(self.shot_path, "task"), dict(self.task, name="task_name"))
+            result = context.from_path(self.tk, os.path.join(self.shot_path, "task"))
+            result = context.from_path(self.tk, self.shot_path)
+            self.assertEqual(3, lookup_mock.call_count)
+
+    def test_invalidation(self):
+        """
+        Makes sure the cached data expires and is cleared when templates are
+        reloaded and folders synchronized.
+        """
+        def get_context():
+            num_finds_before = self.tk.shotgun.finds
+            context.from_entity(self.tk, "Task", self.task["id"])
+            return self.tk.shotgun.finds - num_finds_before
+
+        self.assertEqual(1, get_context())
+        self.tk.reload_templates()
+        self.assertEqual(1, get_context())
+
+        with patch("tank.folder.synchronize_folders", return_value=[]):
+            self.tk.synchronize_filesystem_structure()
+        self.assertEqual(1, get_context())
+        self.assertEqual(0, get_context())
+
+        with patch("tank.context_cache.time.time", return_value=time.time() + self.tk.context_cache.ttl + 1):
+            self.assertEqual(1, get_context())
+
+        self.tk.context_cache.max_size = 0
+        self.assertEqual(1, get_context())
+        self.assertEqual(1, get_context())
+
+
+class TestFromEntities(TestFromEntity):
+    """
+    Tests building contexts for several entities at once.
+    """
+
+    def setUp(self):
+        super(TestFromEntities, self).setUp()
+        self.task_alt = {
+            "id": 3,
+            "type": "Task",
+            "content": "task_content_alt",
+            "project": self.project,
+            "entity": self.shot_alt,
+            "step": self.step
+        }
+        # an asset not in the path cache, resolved from Shotgun.
+        self.asset = {"id": 5, "type": "Asset", "code": "asset_code", "project": self.project}
+        self.publishedfile_alt = {
+            "id": 4,
+            "type": "PublishedFile",
+            "project": self.project,
+            "entity": self.asset,
+            "task": None
+        }
+        self.add_to_sg_mock_db([self.task_alt, self.asset, self.publishedfile_alt])
+
+    def _get_data(self, ctx):
+        """
+        :returns: All the entities of a context.
+        """
+        return (
+            ctx.project, ctx.entity, ctx.step, ctx.task, ctx.additional_entities, ctx.source_entity
+        )
+
+    def _check_from_entities(self, entity_type, entity_ids):
+        """
+        Checks contexts built for several entities are identical to the contexts
+        built for each entity and returns the number of queries saved.
+        """
+        self.tk.context_cache.clear()
+        num_finds_before = self.tk.shotgun.finds
+        expected = [
+            self._get_data(context.from_entity(self.tk, entity_type, entity_id)) for entity_id in entity_ids
+        ]
+        num_single_finds = self.tk.shotgun.finds - num_finds_before
+
+        self.tk.context_cache.clear()
+        num_finds_before = self.tk.shotgun.finds
+        result = context.from_entities(self.tk, entity_type, entity_ids)
+        self.assertEqual(expected, [self._get_data(ctx) for ctx in result])
+        return num_single_finds - (self.tk.shotgun.finds - num_finds_before)
+
+    def test_tasks(self):
+        """
+        Makes sure tasks are retrieved with a single query.
+        """
+        self.assertEqual(1, self._check_from_entities("Task", [self.task["id"], self.task_alt["id"]]))
+        # repeated ids are only retrieved once.
+        self.assertEqual(0, self._check_from_entities("Task", [self.task_alt["id"], self.task_alt["id"]]))
+
+    def test_entities(self):
+        """
+        Makes sure entities missing from the path cache are retrieved with a single query.
+        """
+        self.assertEqual(
+            0, self._check_from_entities("Shot", [self.shot["id"], self.shot_alt["id"]])
+        )
+        self.assertEqual(0, self._check_from_entities("Project", [self.project["id"]]))
+
+        with patch("tank.context._context_data_from_cache") as context_data_from_cache:
+            context_data_from_cache.return_value = {"project": None}
+            self.assertEqual(
+                1, self._check_from_entities("Shot", [self.shot["id"], self.shot_alt["id"]])
+            )
+
+    def test_published_files(self):
+        """
+        Makes sure published files and the entities they are linked to are
+        retrieved with one query for each type.
+        """
+        self.assertEqual(
+            1, self._check_from_entities("PublishedFile", [self.publishedfile["id"], self.publishedfile_alt["id"]])
+        )
+
+    def test_bad_entities(self):
+        """
+        Test exception are raised if bad entities are used.
+        """
+        with self.assertRaisesRegexp(TankError, "Cannot create a context from an entity type 'None'"):
+            context.from_entities(self.tk, None, [7777])
+        with self.assertRaisesRegexp(TankError, "Cannot create a context from an entity id set to 'None'"):
+            context.from_entities(self.tk, "Task", [self.task["id"], None])
+        with self.assertRaisesRegexp(TankError, "Unable to locate Task with id -1 in Shotgun"):
+            context.from_entities(self.tk, "Task", [self.task["id"], -1])
+        with self.assertRaisesRegexp(TankError, "Entity PublishedFile with id -1 not found in Shotgun!"):
+            context.from_entities(self.tk, "PublishedFile", [-1])
+
+    def test_api(self):
+        """
+        Tests Sgtk.contexts_from_entities.
+        """
+        result = self.tk.contexts_from_entities("Task", [self.task_alt["id"], self.task["id"]])
+        self.assertEqual(
+            [self.task_alt["id"], self.task["id"]], [ctx.task["id"] for ctx in result]
+        )
+        self.assertEqual([], self.tk.contexts_from_entities("Task", []))
+
+
+class TestLazyContext(TestFromEntities):
+    """
+    Tests contexts created in lazy mode.
+    """
+
+    def test_lazy_from_entity(self):
+        """
+        Makes sure lazy contexts are resolved together, the first time they are accessed.
+        """
+        expected = [
+            self._get_data(context.from_entity(self.tk, "Task", entity_id))
+            for entity_id in [self.task["id"], self.task_alt["id"]]
+        ]
+        self.tk.context_cache.clear()
+
+        num_finds_before = self.tk.shotgun.finds
+        result = [
+            context.from_entity(self.tk, "Task", entity_id, lazy=True)
+            for entity_id in [self.task["id"], self.task_alt["id"]]
+        ]
+        # printing a context doesn't resolve it.
+        self.assertIn("<not loaded>", repr(result[0]))
+        self.assertEqual(num_finds_before, self.tk.shotgun.finds)
+
+        self.assertEqual(expected[0], self._get_data(result[0]))
+        self.assertEqual(num_finds_before + 1, self.tk.shotgun.finds)
+        self.assertEqual(expected[1], self._get_data(result[1]))
+        self.assertEqual(num_finds_before + 1, self.tk.shotgun.finds)
+
+        # the contexts are now cached and built straight away.
+        self.assertEqual(
+            expected[0], self._get_data(self.tk.context_from_entity("Task", self.task["id"], lazy=True))
+        )
+        self.assertEqual(num_finds_before + 1, self.tk.shotgun.finds)
+
+    def test_lazy_from_entity_dictionary(self):
+        """
+        Makes sure the entities found in the dictionary are used without any query.
+        """
+        shot = {"type": "Shot", "id": self.shot["id"], "code": self.shot["code"]}
+        expected = self._get_data(context.from_entity_dictionary(self.tk, shot))
+        self.tk.context_cache.clear()
+
+        num_finds_before = self.tk.shotgun.finds
+        result = self.tk.context_from_entity_dictionary(shot, lazy=True)
+        self.assertEqual(
+            {"type": "Shot", "id": self.shot["id"], "name": self.shot["code"]}, result.entity
+        )
+        self.assertEqual(None, result.task)
+        self.assertEqual(num_finds_before, self.tk.shotgun.finds)
+        # the project is missing and retrieved.
+        self.assertEqual(expected, self._get_data(result))
+
+        # nothing is missing from a complete task dictionary.
+        task = {
+            "type": "Task",
+            "id": self.task["id"],
+            "content": self.task["content"],
+            "project": {"type": "Project", "id": self.project["id"], "name": self.project["name"]},
+            "entity": shot,
+            "step": None,
+        }
+        num_finds_before = self.tk.shotgun.finds
+        result = self.tk.context_from_entity_dictionary(task, lazy=True)
+        self._get_data(result)
+        self.assertEqual(num_finds_before, self.tk.shotgun.finds)
+        self.assertEqual(None, result.step)
+        self.assertEqual(self.task["content"], result.task["name"])
+
+    def test_lazy_published_file(self):
+        """
+        Makes sure the context of a published file is built from what it is linked to.
+        """
+        expected = self._get_data(context.from_entity(self.tk, "PublishedFile", self.publishedfile["id"]))
+        self.tk.context_cache.clear()
+
+        result = context.from_entity(self.tk, "PublishedFile", self.publishedfile["id"], lazy=True)
+        self.assertEqual(expected, self._get_data(result))
+
+        result = context.from_entity_dictionary(self.tk, self.publishedfile_alt, lazy=True)
+        self.assertEqual(self.publishedfile_alt["id"], result.source_entity["id"])
+        self.check_entity(self.asset, result.entity, check_name=False)
+
+    def test_lazy_bad_entity(self):
+        """
+        Makes sure a context which can't be resolved doesn't prevent the
+        other contexts from being resolved.
+        """
+        bad_result = context.from_entity(self.tk, "Task", -1, lazy=True)
+        result = context.from_entity(self.tk, "Task", self.task["id"], lazy=True)
+        self.check_entity(self.task, result.task, check_name=False)
+        with self.assertRaisesRegexp(TankError, "Unable to locate Task with id -1 in Shotgun"):
+            bad_result.task
+        with self.assertRaisesRegexp(TankError, "Cannot create a context from an entity type 'None'"):
+            context.from_entity(self.tk, None, 1, lazy=True)
+
+    def test_lazy_threads(self):
+        """
+        Makes sure the fields of a lazy context can be read from several threads at once.
+        """
+        data = {
+            "project": self.project, "entity": self.shot, "step": None, "task": None,
+            "additional_entities": [], "source_entity": None,
+        }
+
+        def load_fields():
+            time.sleep(0.05)
+            return data
+
+        load_mock = Mock(side_effect=load_fields)
+        ctx = context.Context(self.tk)
+        ctx._defer_fields(load_mock, ["project", "entity"])
+
+        entities = []
+        threads = [threading.Thread(target=lambda: entities.append(ctx.entity)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([self.shot] * 8, entities)
+        self.assertEqual(1, load_mock.call_count)
+
+    def test_lazy_copy(self):
+        """
+        Makes sure copies of a lazy context are resolved independently.
+        """
+        result = context.from_entity(self.tk, "Task", self.task["id"], lazy=True)
+        result_copy = copy.deepcopy(result)
+        self.assertEqual(self._get_data(result), self._get_data(result_copy))
+
+
 class TestAsTemplateFields(TestContext):
     def setUp(self):
         super(TestAsTemplateFields, self).setUp()
@@ -1147,6 +1559,81 @@ class TestSerialize(TestContext):
         with self.assertRaises(TankContextDeserializationError):
             tank.Context.deserialize("ajkadshadsjkhadsjkasd")
 
+    def test_json(self):
+        """
+        Makes sure contexts serialized to JSON are restored.
+        """
+        kws = dict(self.kws)
+        kws["additional_entities"] = [{"type": "Sequence", "id": 3, "name": u"s\xe9q"}]
+        kws["source_entity"] = {"type": "PublishedFile", "id": 5, "code": "publish", "task": kws["task"]}
+        kws["user"] = self.other_user
+        ctx = context.Context(**kws)
+
+        ctx_str = ctx.serialize(with_user_credentials=False, use_json=True)
+        self.assertTrue(ctx_str.startswith("{"))
+        self.assertTrue(len(ctx_str) < len(ctx.serialize(with_user_credentials=False)))
+
+        ctx_2 = tank.Context.deserialize(ctx_str)
+        self.assertEqual(ctx, ctx_2)
+        self.assertEqual(self.shot["code"], ctx_2.entity["name"])
+        self.assertEqual("user_name", ctx_2.user["name"])
+        self.assertEqual(
+            {"type": "PublishedFile", "id": 5, "name": "publish"}, ctx_2.source_entity
+        )
+        self.assertEqual(u"s\xe9q".encode("utf-8"), ctx_2.additional_entities[0]["name"])
+        self.assertIsInstance(ctx_2.entity["type"], str)
+
+        # the tk instance can be given.
+        with patch("tank.api.Tank") as tank_mock:
+            ctx_2 = tank.Context.deserialize(ctx_str, allow_pickle=False, tk=self.tk)
+        self.assertFalse(tank_mock.called)
+        self.assertEqual(self.tk, ctx_2.tank)
+        self.assertEqual(ctx, ctx_2)
+
+    def test_json_with_user(self):
+        """
+        Make sure the user is serialized to JSON and restored.
+        """
+        tank.set_authenticated_user(self._user)
+        ctx_str = context.Context(**self.kws).serialize(use_json=True)
+        self.assertNotIn("cPickle", ctx_str)
+        tank.set_authenticated_user(None)
+
+        # credentials are not restored from untrusted strings unless requested.
+        tank.Context.deserialize(ctx_str, allow_pickle=False, tk=self.tk)
+        self.assertIsNone(tank.get_authenticated_user())
+
+        tank.Context.deserialize(ctx_str, allow_pickle=False, tk=self.tk, restore_user=True)
+        self._assert_same_user(tank.get_authenticated_user(), self._user)
+
+        tank.set_authenticated_user(None)
+        tank.Context.deserialize(ctx_str, tk=self.tk)
+        self._assert_same_user(tank.get_authenticated_user(), self._user)
+
+    def test_json_invalid_data(self):
+        """
+        Makes sure invalid or untrusted data is rejected.
+        """
+        ctx = context.Context(**self.kws)
+        with self.assertRaisesRegexp(TankContextDeserializationError, "Pickled contexts are not allowed"):
+            tank.Context.deserialize(ctx.serialize(with_user_credentials=False), allow_pickle=False)
+
+        pc_path = self.tk.pipeline_configuration.get_path()
+        invalid_payloads = [
+            "{not json",
+            "[]",
+            json.dumps({"v": 2, "pc": pc_path}),
+            json.dumps({"v": 1, "pc": 5}),
+            json.dumps({"v": 1, "pc": pc_path, "unknown": 1}),
+            json.dumps({"v": 1, "pc": pc_path, "entity": {"type": "Shot", "id": 1}}),
+            json.dumps({"v": 1, "pc": pc_path, "entity": ["Shot", "1", "name"]}),
+            json.dumps({"v": 1, "pc": pc_path, "additional_entities": [["Shot", 1]]}),
+            json.dumps({"v": 1, "pc": pc_path, "current_user": "(dp0\n."}),
+        ]
+        for payload in invalid_payloads:
+            with self.assertRaises(TankContextDeserializationError):
+                tank.Context.deserialize(payload, allow_pickle=False, tk=self.tk)
+
 
 class TestMultiRoot(TestContext):
 
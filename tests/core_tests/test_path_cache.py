@@ -16,8 +16,13 @@ import time
 import Queue
 import StringIO
 import shutil
+import tempfile
+import sqlite3
+import traceback
+import multiprocessing
 import contextlib
 import logging
+import unittest
 
 from mock import Mock, patch, call
 
@@ -86,6 +91,7 @@ class TestInit(TestPathCache):
         
         if os.path.exists(self.path_cache_location):
             self.path_cache.close()
+            path_cache.PathCache.close_pooled_connections()
             os.remove(self.path_cache_location)
         self.assertFalse(os.path.exists(self.path_cache_location))
         pc = path_cache.PathCache(self.tk)
@@ -278,6 +284,150 @@ class TestAddMapping(TestPathCache):
         self.assertEquals(entity_name, entry[0])
 
 
+class TestBulkMappings(TestPathCache):
+    """
+    Tests validating and adding many mappings at once.
+    """
+
+    def setUp(self):
+        super(TestBulkMappings, self).setUp()
+        self._prev_batch_size = path_cache.PathCache.SHOTGUN_ENTITY_CREATE_BATCH_SIZE
+        path_cache.PathCache.SHOTGUN_ENTITY_CREATE_BATCH_SIZE = 2
+
+        self.seq = {"type": "Sequence", "id": 1, "name": "seq"}
+        self.seq_path = os.path.join(self.project_root, "seq")
+        add_item_to_cache(self.path_cache, self.seq, self.seq_path)
+        self.shot_path = os.path.join(self.seq_path, "shot_1")
+        add_item_to_cache(self.path_cache, self.seq, self.shot_path, primary=False)
+
+    def tearDown(self):
+        path_cache.PathCache.SHOTGUN_ENTITY_CREATE_BATCH_SIZE = self._prev_batch_size
+        super(TestBulkMappings, self).tearDown()
+
+    def _get_data(self):
+        """
+        :returns: Mappings including ones already in the path cache and duplicates.
+        """
+        data = []
+        for shot_id in range(1, 4):
+            shot = {"type": "Shot", "id": shot_id, "name": "shot_%d" % shot_id}
+            shot_path = os.path.join(self.seq_path, shot["name"])
+            data.append({"entity": shot, "path": shot_path, "primary": True, "metadata": {}})
+            data.append({"entity": self.seq, "path": shot_path, "primary": False, "metadata": {}})
+            data.append({"entity": shot, "path": shot_path, "primary": True, "metadata": {}})
+        data.append({"entity": self.seq, "path": self.seq_path, "primary": True, "metadata": {}})
+        data.append({"entity": self.seq, "path": self.seq_path, "primary": False, "metadata": {}})
+        return data
+
+    def _get_contents(self):
+        """
+        :returns: The path cache entries along with their FilesystemLocation ids.
+        """
+        return list(self.path_cache._connection.execute(
+            "SELECT pc.rowid, pc.entity_type, pc.entity_id, pc.root, pc.path, pc.primary_entity, ss.shotgun_id "
+            "FROM path_cache pc LEFT JOIN shotgun_status ss ON pc.rowid = ss.path_cache_id ORDER BY pc.rowid"
+        ))
+
+    def test_same_as_one_by_one(self):
+        """
+        Tests that adding mappings in bulk gives the same result as adding them one by one.
+        """
+        cursor = self.path_cache._connection.cursor()
+        expected_ids = []
+        for d in self._get_data():
+            expected_ids.append(self.path_cache._add_db_mapping(cursor, d["path"], d["entity"], d["primary"]))
+        expected_contents = list(cursor.execute("SELECT rowid, * FROM path_cache ORDER BY rowid"))
+        self.path_cache._connection.rollback()
+
+        data = self._get_data()
+        added_data = self.path_cache._add_db_mappings(cursor, data)
+        self.assertEqual(expected_contents, list(cursor.execute("SELECT rowid, * FROM path_cache ORDER BY rowid")))
+        self.assertEqual(
+            [x for x in expected_ids if x],
+            [x["path_cache_row_id"] for x in added_data]
+        )
+        self.assertEqual([], list(cursor.execute("SELECT * FROM temp.mapping_staging")))
+
+    def test_upload_in_batches(self):
+        """
+        Tests that FilesystemLocation entities are created in several batches.
+        """
+        num_entries = len(self._get_contents())
+        with patch.object(self.mockgun, "batch", wraps=self.mockgun.batch) as batch_mock:
+            self.path_cache.add_mappings(self._get_data(), "Shot", [1, 2, 3])
+        # one new entry for shot 1, two new entries for the other shots
+        self.assertEqual(3, batch_mock.call_count)
+
+        contents = self._get_contents()
+        self.assertEqual(num_entries + 5, len(contents))
+        sg_ids = [x[-1] for x in contents]
+        self.assertNotIn(None, sg_ids)
+        self.assertEqual(len(sg_ids), len(set(sg_ids)))
+        for rowid, entity_type, entity_id, _, _, _, sg_id in contents:
+            fsl = self.mockgun.find_one(
+                path_cache.SHOTGUN_ENTITY, [["id", "is", sg_id]], [path_cache.SG_ENTITY_TYPE_FIELD, path_cache.SG_ENTITY_ID_FIELD]
+            )
+            self.assertEqual(entity_type, fsl[path_cache.SG_ENTITY_TYPE_FIELD])
+            self.assertEqual(entity_id, fsl[path_cache.SG_ENTITY_ID_FIELD])
+
+    def test_upload_failure(self):
+        """
+        Tests that a failed upload leaves neither the path cache nor Shotgun modified.
+        """
+        expected_contents = self._get_contents()
+        num_locations = len(self.mockgun.find(path_cache.SHOTGUN_ENTITY, []))
+
+        batch = self.mockgun.batch
+        def failing_batch(requests):
+            if batch_mock.call_count == 2:
+                raise Exception("Upload failed")
+            return batch(requests)
+
+        with patch.object(self.mockgun, "batch", side_effect=failing_batch) as batch_mock:
+            with self.assertRaisesRegexp(tank.TankError, "Upload failed"):
+                self.path_cache.add_mappings(self._get_data(), "Shot", [1, 2, 3])
+
+        self.assertEqual(expected_contents, self._get_contents())
+        self.assertEqual(num_locations, len(self.mockgun.find(path_cache.SHOTGUN_ENTITY, [])))
+
+    def test_conflict(self):
+        """
+        Tests that conflicting mappings are rejected with the error of the first conflict.
+        """
+        expected_contents = self._get_contents()
+        data = self._get_data()
+        shot_4 = {"type": "Shot", "id": 4, "name": "shot_4"}
+        data.append({"entity": shot_4, "path": os.path.join(self.seq_path, "shot_1"), "primary": True})
+        data.append({"entity": shot_4, "path": self.seq_path, "primary": True})
+
+        with self.assertRaisesRegexp(tank.TankError, "Database concurrency problems: The path '%s'" % data[-2]["path"]):
+            self.path_cache.add_mappings(data, "Shot", [1, 2, 3])
+        self.assertEqual(expected_contents, self._get_contents())
+
+    def test_validate(self):
+        """
+        Tests validating mappings against the path cache content.
+        """
+        self.path_cache.validate_mappings(self._get_data())
+
+        renamed_seq = {"type": "Sequence", "id": 1, "name": "renamed"}
+        other_seq = {"type": "Sequence", "id": 2, "name": "other"}
+        data = self._get_data() + [
+            {"entity": renamed_seq, "path": os.path.join(self.project_root, "renamed"), "primary": True},
+            {"entity": other_seq, "path": self.seq_path, "primary": True},
+        ]
+        with self.assertRaisesRegexp(tank.TankError, "another path '%s' is already associated" % self.seq_path):
+            self.path_cache.validate_mappings(data)
+
+        with self.assertRaisesRegexp(tank.TankError, "already associated with Sequence 'seq'"):
+            self.path_cache.validate_mappings(data[-1:])
+
+        # paths outside of the project are ignored
+        self.path_cache.validate_mappings(
+            [{"entity": other_seq, "path": os.path.join(self.tank_temp, "outside"), "primary": True}]
+        )
+
+
 class TestGetEntity(TestPathCache):
     """
     Tests for get_entity. 
@@ -339,6 +489,445 @@ class TestGetEntity(TestPathCache):
         self.assertIsNone(result)
 
 
+class TestGetEntitiesForPaths(TestPathCache):
+    """
+    Tests for get_entities_for_paths.
+    """
+    def test_same_as_single_path(self):
+        """Test that the results match get_entity and get_secondary_entities for each path"""
+        proj = {"type": "Project", "id": self.project["id"], "name": self.project["name"]}
+        add_item_to_cache(self.path_cache, proj, self.project_root)
+        add_item_to_cache(self.path_cache, proj, self.alt_root_1)
+
+        seq_path = os.path.join(self.project_root, "seq")
+        shot_path = os.path.join(seq_path, "shot_name")
+        alt_shot_path = os.path.join(self.alt_root_1, "seq", "shot_name")
+        add_item_to_cache(self.path_cache, {"type": "Sequence", "id": 1, "name": "seq"}, seq_path)
+        add_item_to_cache(self.path_cache, {"type": "Shot", "id": 2, "name": "shot_name"}, shot_path)
+        add_item_to_cache(self.path_cache, {"type": "Shot", "id": 2, "name": "shot_name"}, alt_shot_path)
+        for entity_id in [5, 3, 4]:
+            add_item_to_cache(
+                self.path_cache, {"type": "Asset", "id": entity_id, "name": "asset"}, shot_path, primary=False
+            )
+
+        paths = [
+            shot_path,
+            seq_path,
+            self.project_root,
+            alt_shot_path,
+            os.path.dirname(alt_shot_path),
+            shot_path,
+            os.path.join(shot_path, "work"),
+            os.path.join("path", "not", "in", "project"),
+            None,
+        ]
+        expected = [
+            (self.path_cache.get_entity(path), self.path_cache.get_secondary_entities(path) if path else [])
+            for path in paths
+        ]
+        self.assertEquals(expected, self.path_cache.get_entities_for_paths(paths))
+        self.assertEquals(
+            [5, 3, 4], [entity["id"] for entity in self.path_cache.get_entities_for_paths([shot_path])[0][1]]
+        )
+
+    def test_many_paths(self):
+        """Test looking up more paths than fit in a single query"""
+        paths = []
+        for entity_id in range(path_cache.PathCache.SQLITE_MAX_ITEMS_FOR_IN_STATEMENT + 10):
+            path = os.path.join(self.project_root, "shot_%d" % entity_id)
+            add_item_to_cache(self.path_cache, {"type": "Shot", "id": entity_id, "name": "shot"}, path)
+            paths.append(path)
+        results = self.path_cache.get_entities_for_paths(paths)
+        self.assertEquals(range(len(paths)), [entity["id"] for entity, _ in results])
+
+
+class TestConnectionPool(TestPathCache):
+    """
+    Tests reusing database connections between path cache instances.
+    """
+    def test_reuse_connection(self):
+        """Test that closing a path cache allows the next one to reuse its connection"""
+        connection = self.path_cache._connection
+        self.path_cache.close()
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertTrue(pc._connection is connection)
+            # a second path cache opened at the same time gets its own connection.
+            other_pc = path_cache.PathCache(self.tk)
+            self.assertFalse(other_pc._connection is connection)
+            other_pc.close()
+        finally:
+            pc.close()
+
+    def test_uncommitted_changes(self):
+        """Test that changes which were not committed are discarded when closing a path cache"""
+        cursor = self.path_cache._connection.cursor()
+        cursor.execute("INSERT INTO event_log_sync (last_id) VALUES (1234)")
+        cursor.close()
+        self.path_cache.close()
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            res = pc._connection.execute("SELECT last_id FROM event_log_sync WHERE last_id = 1234").fetchall()
+            self.assertEquals([], res)
+        finally:
+            pc.close()
+
+    @unittest.skipIf(sys.platform == "win32", "Files opened by sqlite can't be removed on Windows.")
+    def test_replaced_database(self):
+        """Test that connections to a database file which was removed are not reused"""
+        connection = self.path_cache._connection
+        self.path_cache.close()
+        os.remove(self.path_cache_location)
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            self.assertFalse(pc._connection is connection)
+            self.assertTrue(os.path.exists(self.path_cache_location))
+            # the schema was created in the new database.
+            self.assertEquals(None, pc.get_entity(self.project_root))
+        finally:
+            pc.close()
+
+
+class TestLookupCache(TestPathCache):
+    """
+    Tests the in-memory cache of lookup results.
+    """
+
+    def setUp(self):
+        super(TestLookupCache, self).setUp()
+        path_cache.PathCache.clear_lookup_cache()
+        self.shot = {"type": "Shot", "id": 1, "name": "shot_1"}
+        self.shot_path = os.path.join(self.project_root, "shot_1")
+        add_item_to_cache(self.path_cache, self.shot, self.shot_path)
+
+    def tearDown(self):
+        path_cache._g_lookup_cache.validation_interval = constants.PATH_CACHE_LOOKUP_VALIDATION_INTERVAL
+        path_cache.PathCache.set_lookup_cache_size(constants.PATH_CACHE_LOOKUP_CACHE_SIZE)
+        path_cache.PathCache.clear_lookup_cache()
+        super(TestLookupCache, self).tearDown()
+
+    def _lookup(self, pc):
+        return (
+            pc.get_entity(self.shot_path),
+            pc.get_secondary_entities(self.shot_path),
+            pc.get_paths("Shot", 1, primary_only=True),
+            pc.get_shotgun_id_from_path(self.shot_path),
+        )
+
+    def test_cached_lookups(self):
+        """Test that repeated lookups are served from memory"""
+        expected = self._lookup(self.path_cache)
+        self.assertEqual((self.shot, [], [self.shot_path]), expected[:3])
+        self.assertIsNotNone(expected[3])
+        self.assertEqual(0, path_cache.PathCache.get_lookup_cache_stats()["hits"])
+
+        # the next path cache reuses the results.
+        self.path_cache.close()
+        self.path_cache = path_cache.PathCache(self.tk)
+        self.assertEqual(expected, self._lookup(self.path_cache))
+        self.assertEqual(
+            {"hits": 4, "misses": 4, "size": 4, "max_size": constants.PATH_CACHE_LOOKUP_CACHE_SIZE},
+            path_cache.PathCache.get_lookup_cache_stats()
+        )
+
+        # cached results can't be modified by the caller.
+        self.path_cache.get_entity(self.shot_path)["name"] = "foo"
+        self.assertEqual(self.shot, self.path_cache.get_entity(self.shot_path))
+
+    def test_invalidated_by_add_mappings(self):
+        """Test that adding mappings discards the cached results"""
+        other_path = os.path.join(self.project_root, "shot_1_alt")
+        self.assertEqual(None, self.path_cache.get_entity(other_path))
+        self.assertEqual([], self.path_cache.get_secondary_entities(self.shot_path))
+
+        add_item_to_cache(self.path_cache, self.shot, other_path)
+        seq = {"type": "Sequence", "id": 2, "name": "seq_2"}
+        add_item_to_cache(self.path_cache, seq, self.shot_path, primary=False)
+
+        self.assertEqual(self.shot, self.path_cache.get_entity(other_path))
+        self.assertEqual([seq], self.path_cache.get_secondary_entities(self.shot_path))
+        self.assertEqual(
+            sorted([self.shot_path, other_path]),
+            sorted(self.path_cache.get_paths("Shot", 1, primary_only=True))
+        )
+
+    def test_invalidated_by_other_connection(self):
+        """Test that changes committed by other connections, e.g. other processes, are detected"""
+        self.assertEqual(self.shot, self.path_cache.get_entity(self.shot_path))
+
+        connection = sqlite3.connect(self.path_cache_location)
+        try:
+            connection.execute("DELETE FROM path_cache")
+            connection.commit()
+        finally:
+            connection.close()
+
+        # changes are only checked for once per validation interval.
+        with patch("tank.path_cache.time.time", return_value=time.time()):
+            self.assertEqual(self.shot, self.path_cache.get_entity(self.shot_path))
+
+        path_cache._g_lookup_cache.validation_interval = 0
+        self.assertEqual(None, self.path_cache.get_entity(self.shot_path))
+        self.assertEqual([], self.path_cache.get_paths("Shot", 1, primary_only=True))
+
+    def test_new_connection(self):
+        """
+        Test that a new connection only discards the results of its own database,
+        since it can't tell what changed before it was opened.
+        """
+        other_db_key = ("entity", "other_path_cache.db", "primary", "/shot")
+        generation = path_cache._g_lookup_cache.validate(self.path_cache._get_read_connection())
+        path_cache._g_lookup_cache.set(other_db_key, "other", generation)
+        self._lookup(self.path_cache)
+
+        # another process changes the database while no connection is open.
+        self.path_cache.close()
+        path_cache.PathCache.close_pooled_connections()
+        connection = sqlite3.connect(self.path_cache_location)
+        try:
+            connection.execute("DELETE FROM path_cache")
+            connection.commit()
+        finally:
+            connection.close()
+
+        self.path_cache = path_cache.PathCache(self.tk)
+        self.assertEqual(None, self.path_cache.get_entity(self.shot_path))
+        self.assertEqual("other", path_cache._g_lookup_cache.get(other_db_key))
+
+    def test_uncommitted_lookups(self):
+        """Test that lookups which are part of a transaction are not cached"""
+        other_path = os.path.join(self.project_root, "shot_1_alt")
+        cursor = self.path_cache._connection.cursor()
+        try:
+            self.path_cache._add_db_mapping(cursor, other_path, self.shot, True)
+            self.assertEqual(self.shot, self.path_cache.get_entity(other_path, cursor))
+            self.assertEqual(2, len(self.path_cache.get_paths("Shot", 1, True, cursor)))
+            self.path_cache._connection.rollback()
+        finally:
+            cursor.close()
+
+        self.assertEqual(None, self.path_cache.get_entity(other_path))
+        self.assertEqual([self.shot_path], self.path_cache.get_paths("Shot", 1, primary_only=True))
+
+    def test_outdated_results(self):
+        """Test that results looked up before the cache was invalidated are not cached"""
+        lookup_cache = path_cache._LookupCache(10, 0)
+        generation = lookup_cache.validate(self.path_cache._get_read_connection())
+        lookup_cache.invalidate()
+        lookup_cache.set(("key", "db"), "value", generation)
+        self.assertIs(path_cache._NOT_CACHED, lookup_cache.get(("key", "db")))
+
+        generation = lookup_cache.validate(self.path_cache._get_read_connection())
+        lookup_cache.set(("key", "db"), "value", generation)
+        self.assertEqual("value", lookup_cache.get(("key", "db")))
+
+    def test_disabled(self):
+        """Test that a size of 0 disables the cache"""
+        path_cache.PathCache.set_lookup_cache_size(0)
+        self._lookup(self.path_cache)
+        self._lookup(self.path_cache)
+        stats = path_cache.PathCache.get_lookup_cache_stats()
+        self.assertEqual(0, stats["hits"])
+        self.assertEqual(0, stats["size"])
+
+
+class TestJournalMode(TankTestBase):
+    """
+    Tests the write-ahead logging mode of the path cache database.
+    """
+
+    def setUp(self):
+        super(TestJournalMode, self).setUp()
+        self._pc = None
+
+    def tearDown(self):
+        if self._pc:
+            self._pc.close()
+        path_cache.PathCache.close_pooled_connections()
+        super(TestJournalMode, self).tearDown()
+
+    def _open_path_cache(self, wal, network=False):
+        """
+        Opens a path cache with a new connection to the database.
+
+        :param bool wal: True to request WAL mode, False to request the default
+                         journal mode and None to leave the journal mode as it is.
+        :param bool network: True if the database is on a network file system.
+        """
+        if self._pc:
+            self._pc.close()
+        path_cache.PathCache.close_pooled_connections()
+        env = {} if wal is None else {constants.ENV_VAR_PATH_CACHE_WAL: "1" if wal else "0"}
+        with temp_env_var(**env):
+            with patch("tank.path_cache._is_on_network_filesystem", return_value=network):
+                self._pc = path_cache.PathCache(self.tk)
+
+    def _get_journal_mode(self):
+        return list(self._pc._connection.execute("PRAGMA journal_mode"))[0][0]
+
+    def test_wal(self):
+        """
+        Tests lookups with a separate connection in WAL mode.
+        """
+        self._open_path_cache(wal=True)
+        self.assertEqual("wal", self._get_journal_mode())
+        read_connection = self._pc._get_read_connection()
+        self.assertIsNot(self._pc._connection, read_connection)
+
+        shot = {"type": "Shot", "id": 1, "name": "shot_1"}
+        shot_path = os.path.join(self.project_root, "shot_1")
+        add_item_to_cache(self._pc, shot, shot_path)
+        self.assertEqual(shot, self._pc.get_entity(shot_path))
+
+        # lookups don't wait for pending writes and don't see them.
+        self._pc._connection.execute("DELETE FROM path_cache")
+        self.assertEqual(shot, self._pc.get_entity(shot_path))
+        self.assertEqual([shot_path], self._pc.get_paths("Shot", 1, primary_only=True))
+        self._pc._connection.rollback()
+
+        with self.assertRaisesRegexp(sqlite3.OperationalError, "readonly"):
+            read_connection.execute("DELETE FROM path_cache")
+
+        # both connections are handed to the next path cache
+        self._pc.close()
+        self._pc = path_cache.PathCache(self.tk)
+        self.assertIs(read_connection, self._pc._get_read_connection())
+        self.assertEqual(shot, self._pc.get_entity(shot_path))
+
+    def test_default_journal_mode(self):
+        """
+        Tests that WAL mode is turned off when not requested or on network file systems.
+        """
+        self._open_path_cache(wal=False)
+        self.assertEqual("delete", self._get_journal_mode())
+        self.assertIs(self._pc._connection, self._pc._get_read_connection())
+
+        self._open_path_cache(wal=True, network=True)
+        self.assertEqual("delete", self._get_journal_mode())
+        self.assertIs(self._pc._connection, self._pc._get_read_connection())
+
+        self._open_path_cache(wal=True)
+        self.assertEqual("wal", self._get_journal_mode())
+        self._open_path_cache(wal=False)
+        self.assertEqual("delete", self._get_journal_mode())
+
+    def test_journal_mode_not_requested(self):
+        """
+        Tests that the journal mode is left as it is when the environment variable isn't set.
+        """
+        self._open_path_cache(wal=None)
+        self.assertEqual("delete", self._get_journal_mode())
+
+        self._open_path_cache(wal=True)
+        self._open_path_cache(wal=None)
+        self.assertEqual("wal", self._get_journal_mode())
+        self.assertIsNot(self._pc._connection, self._pc._get_read_connection())
+
+    @unittest.skipIf(sys.platform == "win32", "Mount points are not used on Windows.")
+    def test_network_filesystem_detection(self):
+        """
+        Tests detecting network file systems from mount points.
+        """
+        mount_points = {
+            "/": "ext4",
+            "/mnt/projects": "nfs4",
+            "/mnt/projects/scratch": "xfs",
+            "/Volumes/share": "remote",
+        }
+        with patch("tank.path_cache._get_mount_points", return_value=mount_points):
+            self.assertFalse(path_cache._is_on_network_filesystem("/home/user/path_cache.db"))
+            self.assertTrue(path_cache._is_on_network_filesystem("/mnt/projects/path_cache.db"))
+            self.assertFalse(path_cache._is_on_network_filesystem("/mnt/projects/scratch/path_cache.db"))
+            self.assertFalse(path_cache._is_on_network_filesystem("/mnt/projects_local/path_cache.db"))
+            self.assertTrue(path_cache._is_on_network_filesystem("/Volumes/share/path_cache.db"))
+
+        with patch("tank.path_cache._get_mount_points", side_effect=IOError("No mounts")):
+            self.assertTrue(path_cache._is_on_network_filesystem("/home/user/path_cache.db"))
+
+
+@unittest.skipIf(sys.platform == "win32", "Processes can't be forked on Windows.")
+class TestConcurrentProcesses(TankTestBase):
+    """
+    Stress tests several processes adding and looking up mappings in the same
+    path cache at the same time.
+    """
+
+    NUM_PROCESSES = 4
+    NUM_ITERATIONS = 20
+
+    def tearDown(self):
+        path_cache.PathCache.close_pooled_connections()
+        super(TestConcurrentProcesses, self).tearDown()
+
+    def _add_and_lookup(self, process_index, errors):
+        """
+        Adds mappings to the path cache and looks them up, reporting any errors
+        to the parent process.
+        """
+        try:
+            for iteration in range(self.NUM_ITERATIONS):
+                pc = path_cache.PathCache(self.tk)
+                try:
+                    entity_id = process_index * 1000 + iteration
+                    shot = {"type": "Shot", "id": entity_id, "name": "shot_%d" % entity_id}
+                    shot_path = os.path.join(self.project_root, shot["name"])
+                    add_item_to_cache(pc, shot, shot_path)
+                    if pc.get_entity(shot_path) != shot:
+                        raise Exception("Could not look up %s" % shot_path)
+                    pc.get_paths("Project", self.project["id"], primary_only=False)
+                finally:
+                    pc.close()
+        except Exception:
+            errors.put(traceback.format_exc())
+
+    def _run_processes(self, wal):
+        """
+        Runs the processes and checks the path cache content.
+        """
+        path_cache.PathCache.close_pooled_connections()
+        errors = multiprocessing.Queue()
+        env = {constants.ENV_VAR_PATH_CACHE_WAL: "1" if wal else "0"}
+        with temp_env_var(**env):
+            with patch("tank.path_cache._is_on_network_filesystem", return_value=False):
+                # set the journal mode up before starting the processes
+                path_cache.PathCache(self.tk).close()
+                processes = [
+                    multiprocessing.Process(target=self._add_and_lookup, args=(index, errors))
+                    for index in range(self.NUM_PROCESSES)
+                ]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+
+        reported_errors = []
+        while not errors.empty():
+            reported_errors.append(errors.get())
+        self.assertEqual([], reported_errors)
+        self.assertEqual([0] * self.NUM_PROCESSES, [process.exitcode for process in processes])
+
+        pc = path_cache.PathCache(self.tk)
+        try:
+            num_shots = list(pc._connection.execute("SELECT count(*) FROM path_cache WHERE entity_type = 'Shot'"))
+        finally:
+            pc.close()
+        self.assertEqual([(self.NUM_PROCESSES * self.NUM_ITERATIONS,)], num_shots)
+
+    def test_wal(self):
+        """
+        Tests concurrent processes with a database in WAL mode.
+        """
+        self._run_processes(wal=True)
+
+    def test_default_journal_mode(self):
+        """
+        Tests concurrent processes with a database in the default journal mode.
+        """
+        self._run_processes(wal=False)
+
+
 class TestGetPaths(TestPathCache):
     def test_add_and_find_shot(self):
         # add two paths to cache for a shot
@@ -1154,6 +1743,286 @@ class TestPathCacheDelete(TankTestBase):
         pc.remove_filesystem_location_entries(self.tk, path_ids)
 
 
+class TestPagedFullSync(TankTestBase):
+    """
+    Tests that a full sync done one page at a time gives the same path cache as
+    importing the FilesystemLocation entities one by one.
+    """
+
+    def setUp(self):
+        super(TestPagedFullSync, self).setUp()
+        self._pc = path_cache.PathCache(self.tk)
+        self._prev_batch_size = path_cache.PathCache.SHOTGUN_ENTITY_QUERY_BATCH_SIZE
+        path_cache.PathCache.SHOTGUN_ENTITY_QUERY_BATCH_SIZE = 3
+
+        # mockgun ignores limit and page
+        find = self.mockgun.find
+
+        def paged_find(*args, **kwargs):
+            limit = kwargs.pop("limit", 0)
+            page = kwargs.pop("page", 0)
+            entities = find(*args, **kwargs)
+            if not limit:
+                return entities
+            first_index = (max(page, 1) - 1) * limit
+            return entities[first_index:first_index + limit]
+
+        patcher = patch.object(self.mockgun, "find", side_effect=paged_find)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # FilesystemLocation ids are sparse since they are shared by all projects.
+        fsl_id = 100
+        self._add_fsl(fsl_id, self.project, self.project_root)
+        for index in range(10):
+            fsl_id += 1 + index % 4
+            shot = {"type": "Shot", "id": index, "name": "shot_%d" % index}
+            self._add_fsl(fsl_id, shot, os.path.join(self.project_root, "shot_%d" % index))
+        shot_path = os.path.join(self.project_root, "shot_0")
+        # same primary entity registered twice for a path
+        self._add_fsl(200, {"type": "Shot", "id": 0, "name": "shot_0"}, shot_path)
+        # secondary entities, registered twice
+        for fsl_id in [201, 202, 203]:
+            self._add_fsl(fsl_id, {"type": "Sequence", "id": 1, "name": "seq"}, shot_path, is_primary=False)
+        self._add_fsl(204, {"type": "Shot", "id": 1, "name": "shot_1"}, shot_path, is_primary=False)
+        # entries which can't be imported
+        self._add_fsl(205, {"type": "Shot", "id": 20, "name": "outside"}, os.path.join(self.tank_temp, "other"))
+        self._add_fsl(206, {"type": "Shot", "id": 21, "name": "retired"}, None)
+
+    def tearDown(self):
+        path_cache.PathCache.SHOTGUN_ENTITY_QUERY_BATCH_SIZE = self._prev_batch_size
+        self._pc.close()
+        super(TestPagedFullSync, self).tearDown()
+
+    def _add_fsl(self, fsl_id, entity, path, is_primary=True):
+        """
+        Adds a FilesystemLocation entity to the mocked Shotgun database.
+        """
+        if path is None:
+            path_field = {"type": "Attachment", "local_storage": None}
+        else:
+            path_field = {
+                "type": "Attachment",
+                "local_storage": {"type": "LocalStorage", "id": self.primary_storage["id"], "name": "primary"},
+                "local_path_linux": path,
+                "local_path_mac": path,
+                "local_path_windows": path,
+            }
+        self.mockgun._db[path_cache.SHOTGUN_ENTITY][fsl_id] = {
+            "type": path_cache.SHOTGUN_ENTITY,
+            "id": fsl_id,
+            "project": self.project,
+            "code": entity["name"],
+            "linked_entity_type": entity["type"],
+            "linked_entity_id": entity["id"],
+            "path": path_field,
+            "is_primary": is_primary,
+            "configuration_metadata": None,
+            "__retired": False,
+        }
+
+    def _get_contents(self):
+        """
+        :returns: The path cache entries along with their FilesystemLocation ids.
+        """
+        return sorted(self._pc._connection.execute(
+            "SELECT pc.entity_type, pc.entity_id, pc.entity_name, pc.root, pc.path, pc.primary_entity, ss.shotgun_id "
+            "FROM path_cache pc LEFT JOIN shotgun_status ss ON pc.rowid = ss.path_cache_id"
+        ))
+
+    def _import_one_by_one(self):
+        """
+        Imports all the FilesystemLocation entities one by one.
+
+        :returns: The imported items.
+        """
+        cursor = self._pc._connection.cursor()
+        cursor.execute("DELETE FROM shotgun_status")
+        cursor.execute("DELETE FROM path_cache")
+        items = []
+        for fsl_entity in self._pc._get_filesystem_location_entities(None):
+            item = self._pc._import_filesystem_location_entry(cursor, fsl_entity)
+            if item:
+                items.append(item)
+        self._pc._connection.commit()
+        return items
+
+    def test_same_as_one_by_one(self):
+        """
+        Tests sequential and concurrent paged syncs.
+        """
+        expected_items = self._import_one_by_one()
+        expected_contents = self._get_contents()
+        self.assertEqual(13, len(expected_contents))
+
+        for max_workers in [1, 3]:
+            with patch.object(
+                self._pc, "_find_filesystem_location_entities", wraps=self._pc._find_filesystem_location_entities
+            ) as find_mock:
+                items = self._pc._replay_folder_entities(self._pc._connection.cursor(), 1234, max_workers)
+            self.assertEqual(expected_items, items)
+            self.assertEqual(expected_contents, self._get_contents())
+            # 6 pages of 3 entities and an empty page, rounded up to a page for each worker
+            self.assertEqual(7 if max_workers == 1 else 9, find_mock.call_count)
+            self.assertEqual(
+                [(1234,)], list(self._pc._connection.execute("SELECT last_id FROM event_log_sync"))
+            )
+            # the indices were rebuilt.
+            self.assertEqual(
+                5, len(list(self._pc._connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")))
+            )
+
+    def test_sparse_ids(self):
+        """
+        Tests that the number of queries doesn't depend on the range of ids.
+        """
+        self._add_fsl(1000000, {"type": "Shot", "id": 30, "name": "shot_30"}, os.path.join(self.project_root, "shot_30"))
+        with patch.object(
+            self._pc, "_find_filesystem_location_entities", wraps=self._pc._find_filesystem_location_entities
+        ) as find_mock:
+            self._pc._replay_folder_entities(self._pc._connection.cursor(), 1234, 3)
+        # 7 pages of 3 entities, rounded up to a page for each worker
+        self.assertEqual(9, find_mock.call_count)
+        self.assertIn(("Shot", 30), [(row[0], row[1]) for row in self._get_contents()])
+
+    def test_conflict(self):
+        """
+        Tests that conflicting entries leave the path cache untouched.
+        """
+        self._import_one_by_one()
+        expected_contents = self._get_contents()
+        self._add_fsl(300, {"type": "Shot", "id": 2, "name": "shot_2"}, os.path.join(self.project_root, "shot_0"))
+
+        with self.assertRaisesRegexp(tank.TankError, "Database concurrency problems"):
+            self._pc._replay_folder_entities(self._pc._connection.cursor(), 1234, 1)
+        self.assertEqual(expected_contents, self._get_contents())
+
+
+class TestPathCacheSnapshot(TankTestBase):
+    """
+    Tests exporting path cache snapshots and seeding new path caches from them.
+    """
+
+    def setUp(self):
+        super(TestPathCacheSnapshot, self).setUp()
+        self._snapshot_folder = os.path.join(tempfile.mkdtemp(dir=self.tank_temp), "snapshots")
+        self._pc = path_cache.PathCache(self.tk)
+
+        self._shot = {"type": "Shot", "id": 1, "name": "shot_1"}
+        self._seq = {"type": "Sequence", "id": 2, "name": "seq_2"}
+        self._shot_path = os.path.join(self.project_root, "shot_1")
+        add_item_to_cache(self._pc, self._shot, self._shot_path)
+        add_item_to_cache(self._pc, self._seq, self._shot_path, primary=False)
+
+    def tearDown(self):
+        self._pc.close()
+        super(TestPathCacheSnapshot, self).tearDown()
+
+    def _get_contents(self, pc):
+        """
+        :returns: All the data stored in a path cache.
+        """
+        return (
+            sorted(pc._connection.execute("SELECT rowid, * FROM path_cache")),
+            sorted(pc._connection.execute("SELECT * FROM shotgun_status")),
+            list(pc._connection.execute("SELECT * FROM event_log_sync")),
+        )
+
+    def _new_path_cache(self):
+        """
+        Deletes the path cache database and opens a new one.
+        """
+        path_cache_file = self._pc._path_cache_file
+        self._pc.close()
+        path_cache.PathCache.close_pooled_connections()
+        os.remove(path_cache_file)
+        self._pc = path_cache.PathCache(self.tk)
+
+    def test_seed_from_snapshot(self):
+        """
+        Tests that a new path cache is seeded from a snapshot and then synchronized incrementally.
+        """
+        # registering folders marks the path cache as synchronized with the
+        # event log entries recording them.
+        expected_contents = self._get_contents(self._pc)
+        self.assertEqual(3, len(expected_contents[1]))
+        self.assertEqual(1, len(expected_contents[2]))
+
+        snapshot_path = self._pc.get_snapshot_path(self._snapshot_folder)
+        self._pc.export_snapshot(snapshot_path)
+        self.assertEqual([os.path.basename(snapshot_path)], os.listdir(self._snapshot_folder))
+
+        with temp_env_var(**{constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER: self._snapshot_folder}):
+            self._new_path_cache()
+        self.assertEqual(expected_contents, self._get_contents(self._pc))
+        self.assertEqual(self._shot, self._pc.get_entity(self._shot_path))
+        self.assertEqual([self._seq], self._pc.get_secondary_entities(self._shot_path))
+
+        with patch.object(self._pc, "_do_full_sync") as full_sync_mock:
+            self._pc.synchronize()
+        self.assertFalse(full_sync_mock.called)
+
+    def test_no_snapshot(self):
+        """
+        Tests that new path caches are empty if there is no usable snapshot.
+        """
+        with temp_env_var(**{constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER: self._snapshot_folder}):
+            self._new_path_cache()
+            self.assertEqual(([], [], []), self._get_contents(self._pc))
+
+            os.makedirs(self._snapshot_folder)
+            with open(self._pc.get_snapshot_path(self._snapshot_folder), "w") as fh:
+                fh.write("not a database")
+            self._new_path_cache()
+            self.assertEqual(([], [], []), self._get_contents(self._pc))
+
+    def test_unsynchronized_path_cache(self):
+        """
+        Tests that a path cache which was never synchronized can't be exported.
+        """
+        self._pc._connection.execute("DELETE FROM event_log_sync")
+        self._pc._connection.commit()
+        snapshot_path = self._pc.get_snapshot_path(self._snapshot_folder)
+        with self.assertRaisesRegexp(tank.TankError, "never synchronized"):
+            self._pc.export_snapshot(snapshot_path)
+        self.assertEqual([], os.listdir(self._snapshot_folder))
+
+    def test_import_replaces_contents(self):
+        """
+        Tests that importing a snapshot replaces the content of an existing path cache.
+        """
+        expected_contents = self._get_contents(self._pc)
+        snapshot_path = self._pc.get_snapshot_path(self._snapshot_folder)
+        self._pc.export_snapshot(snapshot_path)
+
+        add_item_to_cache(self._pc, {"type": "Shot", "id": 3, "name": "shot_3"}, os.path.join(self.project_root, "shot_3"))
+        self.assertNotEqual(expected_contents, self._get_contents(self._pc))
+        self._pc.import_snapshot(snapshot_path)
+        self.assertEqual(expected_contents, self._get_contents(self._pc))
+
+        with self.assertRaisesRegexp(tank.TankError, "does not exist"):
+            self._pc.import_snapshot(os.path.join(self._snapshot_folder, "missing.db"))
+
+    def test_command(self):
+        """
+        Tests exporting and importing snapshots with the path_cache tank command.
+        """
+        expected_contents = self._get_contents(self._pc)
+
+        command = self.tk.get_command("path_cache")
+        command.set_logger(log)
+        snapshot_path = command.execute({"mode": "export", "snapshot_folder": self._snapshot_folder})
+        self.assertTrue(os.path.exists(snapshot_path))
+
+        self._new_path_cache()
+        with temp_env_var(**{constants.ENV_VAR_PATH_CACHE_SNAPSHOT_FOLDER: self._snapshot_folder}):
+            self.assertEqual(snapshot_path, command.execute({"mode": "import"}))
+        self.assertEqual(expected_contents, self._get_contents(self._pc))
+
+        with self.assertRaisesRegexp(tank.TankError, "Invalid mode"):
+            command.execute({"mode": "backup", "snapshot_folder": self._snapshot_folder})
+
+
 class TestPathCacheBatchOperation(TankTestBase):
     """
     Tests the deletion of 2000+ filesystem locations (#44931)
@@ -0,0 +1,150 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import cPickle as pickle
+
+from mock import patch
+
+import tank
+from tank import template_cache
+from tank.template import read_templates
+from tank.templatekey import TimestampKey
+
+from tank_test.tank_test_base import TankTestBase, setUpModule # noqa
+
+
+class TestTemplateCache(TankTestBase):
+    """
+    Tests the on disk cache of compiled templates.
+    """
+
+    def setUp(self):
+        super(TestTemplateCache, self).setUp()
+        # the templates files are edited, so work on a copy of the fixtures.
+        self.setup_fixtures(parameters={"installed_config": True})
+        self._templates_file = self.pipeline_configuration._get_templates_config_location()
+        self._cache_path = template_cache._get_cache_path(self.pipeline_configuration)
+
+    def _read_templates(self):
+        """
+        Reads the templates through the cache.
+
+        :returns: Tuple of templates, index and a boolean which is True if the
+                  templates were restored from the cache.
+        """
+        with patch("tank.template_cache.read_templates", wraps=read_templates) as read_mock:
+            templates, index = template_cache.read_templates_and_index(self.pipeline_configuration)
+        return templates, index, not read_mock.called
+
+    def _append_to_file(self, path, text):
+        """
+        Appends text to a file, making sure the yaml cache sees the change.
+        """
+        with open(path, "a") as fh:
+            fh.write(text)
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+    def test_restored_from_cache(self):
+        """
+        Makes sure the templates are restored from the cache once written.
+        """
+        os.remove(self._cache_path)
+        templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertTrue(os.path.exists(self._cache_path))
+
+        cached_templates, cached_index, from_cache = self._read_templates()
+        self.assertTrue(from_cache)
+        self.assertEqual(sorted(templates), sorted(cached_templates))
+        for name, template in templates.iteritems():
+            self.assertEqual(template.definition, cached_templates[name].definition)
+            self.assertEqual(template.keys.keys(), cached_templates[name].keys.keys())
+        self.assertTrue(cached_index.is_current(cached_templates))
+
+        # the restored templates can be used straight away.
+        path = os.path.join(self.project_root, "sequences", "Seq", "shot_010", "Anm", "publish", "shot_010.jfk.v001.ma")
+        template = cached_templates["maya_shot_publish"]
+        fields = template.get_fields(path)
+        self.assertEqual(path, template.apply_fields(fields))
+
+    def test_sgtk_uses_cache(self):
+        """
+        Makes sure a new Sgtk instance and reload_templates use the cache.
+        """
+        with patch("tank.template_cache.read_templates", wraps=read_templates) as read_mock:
+            tk = tank.Tank(self.pipeline_configuration)
+            tk.reload_templates()
+        self.assertFalse(read_mock.called)
+        self.assertEqual(sorted(self.tk.templates), sorted(tk.templates))
+
+    def test_templates_file_changes(self):
+        """
+        Makes sure editing the templates file invalidates the cache.
+        """
+        self._read_templates()
+        self._append_to_file(self._templates_file, "\nstrings:\n  cache_test: 'cache test'\n")
+        templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertIn("cache_test", templates)
+        self.assertTrue(self._read_templates()[2])
+
+    def test_included_file_changes(self):
+        """
+        Makes sure editing a file included by the templates file invalidates the cache.
+        """
+        include_path = os.path.join(os.path.dirname(self._templates_file), "cache_include.yml")
+        with open(include_path, "w") as fh:
+            fh.write("strings:\n  included: 'included'\n")
+        self._append_to_file(self._templates_file, "\ninclude: ./cache_include.yml\n")
+
+        templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertIn("included", templates)
+        self.assertTrue(self._read_templates()[2])
+
+        self._append_to_file(include_path, "  other_included: 'other included'\n")
+        templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertIn("other_included", templates)
+
+    def test_corrupted_cache(self):
+        """
+        Makes sure an unreadable cache file is ignored and rewritten.
+        """
+        with open(self._cache_path, "wb") as fh:
+            fh.write("not a pickle")
+        templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertEqual(sorted(self.tk.templates), sorted(templates))
+        self.assertTrue(self._read_templates()[2])
+
+    def test_no_cache_location(self):
+        """
+        Makes sure templates are still read if the cache location can't be determined.
+        """
+        with patch("tank.template_cache.get_associated_sg_base_url", side_effect=Exception("No site")):
+            templates, _, from_cache = self._read_templates()
+        self.assertFalse(from_cache)
+        self.assertEqual(sorted(self.tk.templates), sorted(templates))
+
+    def test_timestamp_key_default(self):
+        """
+        Makes sure timestamp keys defaulting to the current time can be cached.
+        """
+        for default in ["now", "utc_now"]:
+            key = TimestampKey("time", default=default)
+            restored_key = pickle.loads(pickle.dumps(key, pickle.HIGHEST_PROTOCOL))
+            self.assertTrue(callable(restored_key._default))
+            self.assertIsNotNone(restored_key.str_from_value(None))
+            self.assertEqual(key.format_spec, restored_key.format_spec)
@@ -0,0 +1,134 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from tank.template import TemplatePath, TemplateString
+from tank.template_index import TemplateIndex
+from tank.templatekey import StringKey, IntegerKey
+
+from tank_test.tank_test_base import TankTestBase, setUpModule # noqa
+
+
+class TestTemplateIndex(TankTestBase):
+    """
+    Tests for the TemplateIndex used by Sgtk.template_from_path
+    """
+
+    def setUp(self):
+        super(TestTemplateIndex, self).setUp()
+        self.setup_fixtures()
+
+        self.keys = {
+            "Shot": StringKey("Shot"),
+            "name": StringKey("name"),
+            "version": IntegerKey("version", format_spec="03"),
+        }
+
+    def _brute_force(self, templates, path):
+        """
+        Returns the templates validating a path, without using the index.
+        """
+        return [t for t in templates.values() if t.validate(path)]
+
+    def test_candidates_superset(self):
+        """
+        Makes sure that all the templates matching a path are returned as candidates.
+        """
+        fields = {
+            "Sequence": "seq_1",
+            "Shot": "shot_010",
+            "Step": "Anm",
+            "Asset": "car",
+            "sg_asset_type": "Vehicle",
+            "name": "main",
+            "version": 3,
+            "SEQ": 12,
+            "eye": "left",
+            "width": 1920,
+            "height": 1080,
+            "output": "beauty",
+            "iteration": 2,
+            "nuke.output": "out",
+            "YYYY": 2017,
+            "MM": 1,
+            "DD": 1,
+        }
+        index = TemplateIndex(self.tk.templates)
+        for template in self.tk.templates.values():
+            if not isinstance(template, TemplatePath):
+                continue
+            try:
+                path = template.apply_fields(fields)
+            except Exception:
+                continue
+            for test_path in [path, os.path.dirname(path), path.upper()]:
+                candidates = index.get_candidates(test_path)
+                for matching_template in self._brute_force(self.tk.templates, test_path):
+                    self.assertIn(matching_template, candidates)
+
+    def test_pruning(self):
+        """
+        Makes sure that templates which can't match are not returned.
+        """
+        shot = TemplatePath("shots/{Shot}/work/{name}.v{version}.ma", self.keys, self.project_root)
+        shot_dir = TemplatePath("shots/{Shot}", self.keys, self.project_root)
+        asset = TemplatePath("assets/{name}/work", self.keys, self.project_root)
+        templates = {"shot": shot, "shot_dir": shot_dir, "asset": asset}
+        index = TemplateIndex(templates)
+
+        path = os.path.join(self.project_root, "shots", "shot_010", "work", "main.v001.ma")
+        self.assertEqual([shot], index.get_candidates(path))
+
+        path = os.path.join(self.project_root, "shots", "shot_010")
+        self.assertEqual([shot_dir], index.get_candidates(path))
+
+        path = os.path.join(self.project_root, "shots", "shot_010", "work", "main.v001.nk")
+        self.assertEqual([], index.get_candidates(path))
+
+    def test_truncated_path(self):
+        """
+        Makes sure paths stopping right after a static token are still candidates.
+        """
+        template = TemplatePath("shots/{name}_{Shot}_{version}", self.keys, self.project_root)
+        index = TemplateIndex({"template": template})
+        path = os.path.join(self.project_root, "shots", "a_b_")
+        self.assertEqual(self._brute_force({"template": template}, path), index.get_candidates(path))
+
+    def test_strings_not_indexed(self):
+        """
+        Makes sure template strings are always returned as candidates.
+        """
+        template = TemplateString("{name}, v{version}", self.keys)
+        index = TemplateIndex({"string": template})
+        self.assertEqual([template], index.get_candidates("foo/bar"))
+
+    def test_is_current(self):
+        """
+        Makes sure changes to the templates dictionary invalidate the index.
+        """
+        templates = {"shot": TemplatePath("shots/{Shot}", self.keys, self.project_root)}
+        index = TemplateIndex(templates)
+        self.assertTrue(index.is_current(templates))
+        self.assertFalse(index.is_current(dict(templates)))
+        templates["asset"] = TemplatePath("assets/{name}", self.keys, self.project_root)
+        self.assertFalse(index.is_current(templates))
+
+    def test_template_from_path_after_change(self):
+        """
+        Makes sure template_from_path picks up templates added after the index was built.
+        """
+        path = os.path.join(self.project_root, "foo_index", "shot_010")
+        self.assertIsNone(self.tk.template_from_path(path))
+        template = TemplatePath("foo_index/{Shot}", self.keys, self.project_root)
+        self.tk.templates["foo_index"] = template
+        self.assertEqual(template, self.tk.template_from_path(path))
+        self.tk.reload_templates()
+        self.assertIsNone(self.tk.template_from_path(path))
@@ -0,0 +1,134 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from tank.template import TemplatePath
+from tank.template_path_parser import TemplatePathParser
+from tank.templatekey import StringKey, IntegerKey, SequenceKey
+
+from tank_test.tank_test_base import ShotgunTestBase, setUpModule # noqa
+
+
+class TestTemplatePathMatcher(ShotgunTestBase):
+    """
+    Tests for the compiled matchers used by the TemplatePathParser.
+    """
+
+    def setUp(self):
+        super(TestTemplatePathMatcher, self).setUp()
+        self.keys = {
+            "Sequence": StringKey("Sequence"),
+            "Shot": StringKey("Shot"),
+            "Step": StringKey("Step", choices=["Anm", "Comp"]),
+            "name": StringKey("name", filter_by="alphanumeric"),
+            "anything": StringKey("anything"),
+            "version": IntegerKey("version", format_spec="03"),
+            "frame": SequenceKey("frame", format_spec="04"),
+        }
+
+    def _make_path(self, *tokens):
+        return os.path.join(self.project_root, *tokens)
+
+    def _parse_without_matcher(self, template, path):
+        """
+        Parses a path with the recursive search only.
+
+        :returns: Tuple of fields and error message
+        """
+        fields = None
+        for ordered_keys, static_tokens in zip(template._ordered_keys, template._static_tokens):
+            parser = TemplatePathParser(ordered_keys, static_tokens)
+            fields = parser.parse_path(path, None)
+            if fields is not None:
+                return fields, None
+        return None, parser.last_error
+
+    def _assert_same_result(self, template, path):
+        """
+        Checks that the result of parsing a path is the same with or without matchers.
+        """
+        expected_fields, expected_error = self._parse_without_matcher(template, path)
+        fields, parser = template._parse_fields(path)
+        self.assertEqual(expected_fields, fields)
+        if expected_fields is None:
+            # error messages include the parser instance, don't compare it.
+            self.assertEqual(
+                str(expected_error).split(": ")[-1],
+                str(parser.last_error).split(": ")[-1]
+            )
+
+    def test_eligible(self):
+        """
+        Checks which definitions can be compiled.
+        """
+        eligible_definitions = [
+            "shots/{Sequence}/{Shot}/{Step}/work",
+            "shots/{Shot}/work/{name}.v{version}.ma",
+            "shots/{Shot}/work/{Shot}_{name}.{frame}.exr",
+            "shots/{Shot}/work/{name}[_{Step}].v{version}.ma",
+        ]
+        for definition in eligible_definitions:
+            template = TemplatePath(definition, self.keys, self.project_root)
+            self.assertTrue(all(template._get_path_matchers()), definition)
+
+        non_eligible_definitions = [
+            # adjacent keys
+            "shots/{Shot}/work/{name}{version}.ma",
+            # the key value could contain the following token
+            "shots/{Shot}/work/{anything}.v{version}.ma",
+            "shots/{Shot}_{name}/work",
+        ]
+        for definition in non_eligible_definitions:
+            template = TemplatePath(definition, self.keys, self.project_root)
+            self.assertFalse(all(template._get_path_matchers()), definition)
+
+    def test_same_results(self):
+        """
+        Makes sure that compiled matchers give the same results as the parser.
+        """
+        template = TemplatePath(
+            "shots/{Shot}/{Step}/work/{Shot}_{name}.v{version}.{frame}.exr",
+            self.keys,
+            self.project_root
+        )
+        paths = [
+            self._make_path("shots", "sh_01", "Anm", "work", "sh_01_main.v001.%04d.exr"),
+            self._make_path("SHOTS", "sh_01", "anm", "WORK", "sh_01_main.v001.1001.EXR"),
+            self._make_path("shots", "sh_01", "Anm", "work", "sh_01_main.v001."),
+            self._make_path("shots", "sh_01", "Anm", "work", "SH_01_main.v001.1001.exr"),
+            self._make_path("shots", "sh_01", "Anm", "work", "sh_02_main.v001.1001.exr"),
+            self._make_path("shots", "sh_01", "Lgt", "work", "sh_01_main.v001.1001.exr"),
+            self._make_path("shots", "sh_01", "Anm", "work", "sh_01_ma_in.v001.1001.exr"),
+            self._make_path("shots", "sh_01", "Anm", "work", "sh_01_main.v1.1001.exr"),
+            self._make_path("shots", "sh_01", "Anm", "publish", "sh_01_main.v001.1001.exr"),
+            self._make_path("shots", "sh_01"),
+            "relative/path",
+        ]
+        for path in paths:
+            self._assert_same_result(template, path)
+
+    def test_truncated_path(self):
+        """
+        Makes sure that a path stopping right after a token gives the same result.
+        """
+        template = TemplatePath("shots/{Shot}/{name}.v{version}", self.keys, self.project_root)
+        path = self._make_path("shots", "sh_01", "main.v")
+        self._assert_same_result(template, path)
+        self.assertEqual({"Shot": "sh_01", "name": "main"}, template.get_fields(path))
+
+    def test_skip_keys(self):
+        """
+        Makes sure that skipped keys are still handled.
+        """
+        template = TemplatePath("shots/{Shot}/{name}.v{version}.ma", self.keys, self.project_root)
+        path = self._make_path("shots", "sh_01", "main.vfoo.ma")
+        self.assertFalse(template.validate(path))
+        self.assertTrue(template.validate(path, skip_keys=["version"]))
@@ -16,9 +16,9 @@ import os
 import tank
 from tank import TankError
 
-from tank.template import TemplatePath
+from tank.template import Template, TemplatePath
 from tank_test.tank_test_base import ShotgunTestBase, setUpModule # noqa
-from tank.templatekey import (StringKey, IntegerKey, SequenceKey)
+from tank.templatekey import (StringKey, IntegerKey, SequenceKey, TimestampKey)
 
 
 class TestTemplatePath(ShotgunTestBase):
@@ -599,6 +599,89 @@ class TestApplyFields(TestTemplatePath):
         self.assertEquals(expected, template.apply_fields(fields))
 
 
+class TestApplyFieldsCache(TestTemplatePath):
+    """Tests for the cache used by TemplatePath.apply_fields"""
+    def setUp(self):
+        super(TestApplyFieldsCache, self).setUp()
+        Template.clear_apply_fields_cache()
+        self.fields = {"Sequence": "seq_1",
+                       "Shot": "s1",
+                       "Step": "Anm",
+                       "branch": "mmm",
+                       "version": 3,
+                       "snapshot": 2}
+
+    def tearDown(self):
+        Template.set_apply_fields_cache_size(tank.constants.TEMPLATE_APPLY_FIELDS_CACHE_SIZE)
+        Template.clear_apply_fields_cache()
+        super(TestApplyFieldsCache, self).tearDown()
+
+    def test_hits(self):
+        expected = self.template_path.apply_fields(self.fields)
+        self.assertEquals(expected, self.template_path.apply_fields(dict(self.fields)))
+        # fields not used by the template don't prevent hits.
+        fields = dict(self.fields, Asset="car")
+        self.assertEquals(expected, self.template_path.apply_fields(fields))
+        stats = Template.get_apply_fields_cache_stats()
+        self.assertEquals(1, stats["size"])
+        self.assertEquals(2, stats["hits"])
+        self.assertEquals(1, stats["misses"])
+
+    def test_relevant_fields(self):
+        expected = self.template_path.apply_fields(self.fields)
+        fields = dict(self.fields, version=4)
+        self.assertNotEquals(expected, self.template_path.apply_fields(fields))
+        # a template with the same definition and keys is cached separately
+        other_template = TemplatePath(self.definition, self.keys, os.path.join(self.tank_temp, "other"))
+        self.assertNotEquals(expected, other_template.apply_fields(self.fields))
+        self.assertEquals(0, Template.get_apply_fields_cache_stats()["hits"])
+
+    def test_platform(self):
+        expected = self.template_path.apply_fields(self.fields, platform="win32")
+        self.assertEquals(expected, self.template_path.apply_fields(self.fields, platform="win32"))
+        self.assertNotEquals(expected, self.template_path.apply_fields(self.fields, platform="linux2"))
+
+    def test_value_types(self):
+        key = IntegerKey("version")
+        template = TemplatePath("{version}", {"version": key}, self.project_root)
+        self.assertNotEquals(
+            template._get_apply_fields_cache_key({"version": 1}, None),
+            template._get_apply_fields_cache_key({"version": True}, None)
+        )
+
+    def test_defaults(self):
+        key = StringKey("name", default="foo")
+        template = TemplatePath("{name}", {"name": key}, self.project_root)
+        self.assertEquals(os.path.join(self.project_root, "foo"), template.apply_fields({}))
+        key.default = "bar"
+        self.assertEquals(os.path.join(self.project_root, "bar"), template.apply_fields({}))
+
+    def test_timestamp_bypass(self):
+        key = TimestampKey("now", default="now")
+        template = TemplatePath("{now}", {"now": key}, self.project_root)
+        template.apply_fields({})
+        template.apply_fields({})
+        stats = Template.get_apply_fields_cache_stats()
+        self.assertEquals(0, stats["size"])
+        self.assertEquals(0, stats["misses"])
+
+    def test_unhashable_bypass(self):
+        key = StringKey("name")
+        template = TemplatePath("{name}", {"name": key}, self.project_root)
+        self.assertIsNone(template._get_apply_fields_cache_key({"name": ["foo"]}, None))
+
+    def test_size(self):
+        Template.set_apply_fields_cache_size(2)
+        for version in range(5):
+            self.template_path.apply_fields(dict(self.fields, version=version))
+        self.assertEquals(2, Template.get_apply_fields_cache_stats()["size"])
+        Template.set_apply_fields_cache_size(0)
+        self.template_path.apply_fields(self.fields)
+        stats = Template.get_apply_fields_cache_stats()
+        self.assertEquals(0, stats["size"])
+        self.assertEquals(5, stats["misses"])
+
+
 class Test_ApplyFields(TestTemplatePath):
     """Tests for private TemplatePath._apply_fields"""
     def test_skip_enum(self):
@@ -1128,5 +1211,24 @@ class TestParent(TestTemplatePath):
         result = template.parent
         self.assertEquals("{new_name}", result.definition)
 
+    def test_ancestors(self):
+        """
+        Test that the branch of the template tree is built once and stops below the root.
+        """
+        ancestors = self.template_path._get_ancestors()
+        expected_definitions = [
+            os.path.join("shots", "{Sequence}"),
+            os.path.join("shots", "{Sequence}", "{Shot}"),
+            os.path.join("shots", "{Sequence}", "{Shot}", "{Step}"),
+            os.path.join("shots", "{Sequence}", "{Shot}", "{Step}", "work"),
+            self.template_path.definition,
+        ]
+        self.assertEquals(expected_definitions, [ancestor.definition for ancestor in ancestors])
+        self.assertTrue(ancestors[-1] is self.template_path)
+        self.assertTrue(ancestors is self.template_path._get_ancestors())
+        # parents share the branch of the template tree
+        self.assertTrue(ancestors[-2]._get_ancestors() == ancestors[:-1])
+        self.assertEquals((self.project_root_template,), self.project_root_template._get_ancestors())
+
 
 
@@ -0,0 +1,151 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+import json
+
+from mock import patch
+
+from tank import folder
+from tank.errors import TankError
+from tank.folder import bulk
+from tank_test.tank_test_base import TankTestBase
+from tank_test.tank_test_base import setUpModule # noqa
+
+
+class TestBulkFolderCreation(TankTestBase):
+    """
+    Tests creating folders for many entities with process_filesystem_structure_bulk.
+    """
+
+    def setUp(self):
+        super(TestBulkFolderCreation, self).setUp()
+        self.setup_fixtures()
+
+        self.seq = {"type": "Sequence", "id": 2, "code": "seq_code", "project": self.project}
+        self.shots = [
+            {
+                "type": "Shot",
+                "id": shot_id,
+                "code": "shot_%d" % shot_id,
+                "sg_sequence": self.seq,
+                "sg_status_list": "ip" if shot_id % 2 else "fin",
+                "project": self.project
+            } for shot_id in range(1, 8)
+        ]
+        self.add_to_sg_mock_db([self.seq] + self.shots)
+        self.checkpoint_path = os.path.join(self.tank_temp, "%s.checkpoint" % self._testMethodName)
+
+    def _get_shot_path(self, shot):
+        return os.path.join(self.project_root, "sequences", self.seq["code"], shot["code"])
+
+    def test_entity_ids(self):
+        """
+        Tests creating folders for a list of entity ids, concurrently.
+        """
+        result = folder.process_filesystem_structure_bulk(
+            self.tk, "Shot", entity_ids=[1, 2, 3, 4, 5], chunk_size=2, max_workers=2
+        )
+        for shot in self.shots:
+            self.assertEqual(shot["id"] <= 5, os.path.exists(self._get_shot_path(shot)))
+        self.assertEqual(5, result["entities"])
+        self.assertEqual(0, result["skipped_entities"])
+        self.assertEqual([], result["failures"])
+        self.assertTrue(result["folders"] > 5)
+        self.assertTrue(result["entities_per_second"] >= 0)
+        self.assertTrue(result["folders_per_second"] >= 0)
+        self.assertEqual(
+            self.shots[0]["code"],
+            self.tk.context_from_path(self._get_shot_path(self.shots[0])).entity["name"]
+        )
+
+    def test_filters(self):
+        """
+        Tests creating folders for the entities matching filters.
+        """
+        result = folder.process_filesystem_structure_bulk(
+            self.tk, "Shot", filters=[["sg_status_list", "is", "ip"]], chunk_size=3
+        )
+        self.assertEqual(4, result["entities"])
+        for shot in self.shots:
+            self.assertEqual(shot["sg_status_list"] == "ip", os.path.exists(self._get_shot_path(shot)))
+
+    def test_resume(self):
+        """
+        Tests resuming an interrupted folder creation from its checkpoint.
+        """
+        process_filesystem_structure = bulk.process_filesystem_structure
+
+        def fail_for_shot_5(tk, entity_type, entity_ids, *args, **kwargs):
+            if 5 in entity_ids:
+                raise TankError("Interrupted")
+            return process_filesystem_structure(tk, entity_type, entity_ids, *args, **kwargs)
+
+        with patch("tank.folder.bulk.process_filesystem_structure", side_effect=fail_for_shot_5):
+            result = folder.process_filesystem_structure_bulk(
+                self.tk, "Shot", entity_ids=range(1, 8), chunk_size=2, checkpoint_path=self.checkpoint_path
+            )
+        self.assertEqual([{"entity_ids": [5, 6], "error": "Interrupted"}], result["failures"])
+        self.assertEqual(5, result["entities"])
+        self.assertFalse(os.path.exists(self._get_shot_path(self.shots[5])))
+
+        with open(self.checkpoint_path, "rb") as fh:
+            self.assertEqual([0, 1, 3], sorted(json.load(fh)["completed_chunks"]))
+
+        # the entities are read from the checkpoint and only the failed chunk is processed.
+        with patch(
+            "tank.folder.bulk.process_filesystem_structure", wraps=process_filesystem_structure
+        ) as process_mock:
+            result = folder.process_filesystem_structure_bulk(
+                self.tk, "Shot", entity_ids=[1], checkpoint_path=self.checkpoint_path
+            )
+        self.assertEqual(1, process_mock.call_count)
+        self.assertEqual([5, 6], process_mock.call_args[0][2])
+        self.assertEqual(2, result["entities"])
+        self.assertEqual(5, result["skipped_entities"])
+        self.assertTrue(os.path.exists(self._get_shot_path(self.shots[5])))
+
+        # the checkpoint is removed once everything was processed.
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_checkpoint_mismatch(self):
+        """
+        Tests that a checkpoint can't be used for another entity type.
+        """
+        with open(self.checkpoint_path, "wb") as fh:
+            json.dump(
+                {
+                    "version": bulk.CHECKPOINT_FORMAT_VERSION,
+                    "entity_type": "Asset",
+                    "entity_ids": [1],
+                    "chunk_size": 1,
+                    "completed_chunks": []
+                },
+                fh
+            )
+        self.assertRaises(
+            TankError,
+            folder.process_filesystem_structure_bulk,
+            self.tk,
+            "Shot",
+            checkpoint_path=self.checkpoint_path
+        )
+
+    def test_command(self):
+        """
+        Tests the bulk_folders tank command.
+        """
+        result = self.tk.get_command("bulk_folders").execute(
+            {"entity_type": "Shot", "entity_ids": [1, 2], "max_workers": 2, "chunk_size": 1}
+        )
+        self.assertEqual(2, result["entities"])
+        self.assertTrue(os.path.exists(self._get_shot_path(self.shots[1])))
@@ -551,7 +551,52 @@ class TestCreateFilesystemStructure(TankTestBase):
                                             engine=None)
         self.assertTrue(os.path.exists(expected))
 
-              
+    def test_create_concurrently(self):
+        """Tests creating independent folders on several threads."""
+        expected = os.path.join(self.project_root, "sequences", self.seq["code"], self.shot["code"])
+        self.tk.create_filesystem_structure(self.project["type"], self.project["id"], max_workers=4)
+        self.tk.create_filesystem_structure(self.shot["type"], self.shot["id"], max_workers=4)
+        self.assertTrue(os.path.exists(expected))
+        self.assertTrue(os.path.exists(os.path.join(self.project_root, "reference", "artwork")))
+        self.assertEqual(
+            self.shot["code"],
+            self.tk.context_from_path(expected).entity["name"]
+        )
+
+    def test_preview_diff(self):
+        """Tests previewing only the changes a folder creation would make."""
+        shot_path = os.path.join(self.project_root, "sequences", self.seq["code"], self.shot["code"])
+        seq_path = os.path.dirname(shot_path)
+
+        diff = self.tk.preview_filesystem_structure(self.shot["type"], self.shot["id"], diff=True)
+        self.assertIn(shot_path, diff["create"])
+        self.assertIn(shot_path, diff["register"])
+        self.assertIn(seq_path, diff["register"])
+        self.assertEqual(len(diff["create"]), diff["counts"]["create"])
+        self.assertEqual(diff["counts"]["total"], diff["counts"]["create"] + diff["counts"]["unchanged"])
+        self.assertEqual(
+            len(set(self.tk.preview_filesystem_structure(self.shot["type"], self.shot["id"]))),
+            diff["counts"]["total"]
+        )
+        # nothing was created by the preview
+        self.assertFalse(os.path.exists(shot_path))
+
+        self.tk.create_filesystem_structure(self.shot["type"], self.shot["id"])
+        diff = self.tk.preview_filesystem_structure(self.shot["type"], self.shot["id"], diff=True, max_workers=4)
+        self.assertEqual([], diff["create"])
+        self.assertEqual([], diff["register"])
+        self.assertEqual(diff["counts"]["total"], diff["counts"]["unchanged"])
+
+        # a folder deleted on disk only needs to be created again.
+        shutil.rmtree(shot_path)
+        diff = self.tk.preview_filesystem_structure(self.shot["type"], self.shot["id"], diff=True, max_workers=4)
+        self.assertIn(shot_path, diff["create"])
+        self.assertNotIn(seq_path, diff["create"])
+        self.assertEqual([], diff["register"])
+
+        diff = self.tk.preview_filesystem_structure(self.shot["type"], [], diff=True)
+        self.assertEqual(0, diff["counts"]["total"])
+
     def test_wrong_type_entity_ids(self):
         """Test passing in type other than list, int or tuple as value for entity_ids parameter.
         """
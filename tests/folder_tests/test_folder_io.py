@@ -0,0 +1,122 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import threading
+
+from tank.errors import TankFolderIOError
+from tank.folder import FolderIOExecutor
+from tank_test.tank_test_base import ShotgunTestBase
+from tank_test.tank_test_base import setUpModule # noqa
+
+
+class TestFolderIOExecutor(ShotgunTestBase):
+    """
+    Tests processing folder creation items with the FolderIOExecutor.
+    """
+
+    def setUp(self):
+        super(TestFolderIOExecutor, self).setUp()
+        self._lock = threading.Lock()
+        self._processed_paths = []
+        self._items = [
+            {"action": "folder", "path": os.path.join("root", "seq")},
+            {"action": "entity_folder", "path": os.path.join("root", "seq", "shot_1")},
+            {"action": "folder", "path": os.path.join("root", "seq", "shot_1", "work")},
+            {"action": "copy", "source_path": "src", "target_path": os.path.join("root", "seq", "shot_1", "a.txt")},
+            {"action": "entity_folder", "path": os.path.join("root", "seq", "shot_2")},
+            {"action": "folder", "path": os.path.join("root", "seq", "shot_2", "work")},
+            {"action": "folder", "path": os.path.join("root", "assets")},
+        ]
+
+    def _process_item(self, item):
+        path = item.get("path") or item.get("target_path")
+        with self._lock:
+            self._processed_paths.append(path)
+        if path.endswith("fail"):
+            raise OSError("Permission denied")
+        return path
+
+    def _assert_parents_first(self, items):
+        """
+        Checks that each item was processed after the items with its parent paths.
+        """
+        order = dict((path, index) for index, path in enumerate(self._processed_paths))
+        for item in items:
+            path = item.get("path") or item.get("target_path")
+            parent = os.path.dirname(path)
+            if parent in order:
+                self.assertLess(order[parent], order[path])
+
+    def test_get_parents(self):
+        self.assertEqual(
+            [None, 0, 1, 1, 0, 4, None],
+            FolderIOExecutor._get_parents(self._items)
+        )
+        # items with the same path are processed in order.
+        self.assertEqual(
+            [None, 0, 1],
+            FolderIOExecutor._get_parents([
+                {"action": "folder", "path": "root"},
+                {"action": "entity_folder", "path": os.path.join("root", "shot")},
+                {"action": "create_file", "path": os.path.join("root", "shot")},
+            ])
+        )
+
+    def test_sequential(self):
+        paths = FolderIOExecutor().execute(self._items, self._process_item)
+        expected = [item.get("path") or item.get("target_path") for item in self._items]
+        self.assertEqual(expected, paths)
+        self.assertEqual(expected, self._processed_paths)
+
+    def test_concurrent(self):
+        items = list(self._items)
+        for index in range(50):
+            items.append({"action": "folder", "path": os.path.join("root", "seq", "shot_2", "work", str(index))})
+        paths = FolderIOExecutor(max_workers=4).execute(items, self._process_item)
+        # results are returned in the order of the items.
+        self.assertEqual([item.get("path") or item.get("target_path") for item in items], paths)
+        self.assertEqual(sorted(paths), sorted(self._processed_paths))
+        self._assert_parents_first(items)
+
+    def test_errors(self):
+        for max_workers in [1, 4]:
+            self._processed_paths = []
+            items = list(self._items)
+            items[4] = {"action": "entity_folder", "path": os.path.join("root", "seq", "fail")}
+            items[5] = {"action": "folder", "path": os.path.join("root", "seq", "fail", "work")}
+            with self.assertRaises(TankFolderIOError) as cm:
+                FolderIOExecutor(max_workers).execute(items, self._process_item)
+
+            # the other items were processed, the items below the failure skipped.
+            self.assertNotIn(items[5]["path"], self._processed_paths)
+            self.assertEqual(6, len(self._processed_paths))
+            self.assertEqual(
+                [items[4], items[5]],
+                [item for item, _ in cm.exception.errors]
+            )
+            self.assertIn("Permission denied", cm.exception.errors[0][1])
+            self.assertIn("Skipped", cm.exception.errors[1][1])
+            self.assertEqual(None, cm.exception.results[4])
+            self.assertEqual(items[6]["path"], cm.exception.results[6])
+
+    def test_system_exit(self):
+        """
+        Makes sure exceptions which are not errors are raised again rather than
+        leaving the concurrent execution waiting for the item forever.
+        """
+        def exit_on_shot(item):
+            if item.get("path", "").endswith("shot_1"):
+                raise SystemExit(1)
+            return self._process_item(item)
+
+        for max_workers in [1, 4]:
+            with self.assertRaises(SystemExit):
+                FolderIOExecutor(max_workers).execute(self._items, exit_on_shot)
@@ -0,0 +1,200 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+
+from mock import patch
+
+from tank import folder
+from tank.folder.query_cache import ShotgunQueryCache
+from tank_test.tank_test_base import TankTestBase
+from tank_test.tank_test_base import setUpModule # noqa
+
+
+class TestShotgunQueryCache(TankTestBase):
+    """
+    Tests caching Shotgun queries with the ShotgunQueryCache.
+    """
+
+    def setUp(self):
+        super(TestShotgunQueryCache, self).setUp()
+        self.seq = {"type": "Sequence", "id": 2, "code": "seq_code", "project": self.project}
+        self.shots = [
+            {"type": "Shot", "id": shot_id, "code": "shot_%d" % shot_id, "sg_sequence": self.seq, "project": self.project}
+            for shot_id in range(1, 5)
+        ]
+        self.add_to_sg_mock_db([self.seq] + self.shots)
+        self.cache = ShotgunQueryCache(self.mockgun)
+
+    def _filters(self, *conditions):
+        return {"logical_operator": "and", "conditions": list(conditions)}
+
+    def test_identical_queries(self):
+        """
+        Tests that identical queries are only sent to Shotgun once.
+        """
+        filters = self._filters({"path": "sg_sequence", "relation": "is", "values": [self.seq]})
+        with patch.object(self.mockgun, "find", wraps=self.mockgun.find) as find_mock:
+            first = self.cache.find("Shot", filters, ["code"])
+            # entity links which only differ by their fields are the same filter.
+            second = self.cache.find(
+                "Shot",
+                self._filters({"path": "sg_sequence", "relation": "is", "values": [{"type": "Sequence", "id": 2}]}),
+                ["code"]
+            )
+            self.assertEqual(1, find_mock.call_count)
+
+        self.assertEqual(first, second)
+        self.assertEqual(4, len(first))
+
+        # modifying a result doesn't affect the cache.
+        first[0]["code"] = "modified"
+        self.assertNotEqual("modified", self.cache.find("Shot", filters, ["code"])[0]["code"])
+
+    def test_prefetch(self):
+        """
+        Tests that prefetched entities are returned without querying Shotgun.
+        """
+        filters = self._filters({"path": "project", "relation": "is", "values": [self.project]})
+        with patch.object(self.mockgun, "find", wraps=self.mockgun.find) as find_mock:
+            self.cache.prefetch("Shot", filters, ["code"], [shot["id"] for shot in self.shots] + [1234])
+            self.assertEqual(1, find_mock.call_count)
+
+        with patch.object(self.mockgun, "find_one") as find_one_mock:
+            for shot in self.shots:
+                self.assertEqual(
+                    shot["code"],
+                    self.cache.find_one(
+                        "Shot",
+                        self._filters(
+                            {"path": "project", "relation": "is", "values": [self.project]},
+                            {"path": "id", "relation": "is", "values": [shot["id"]]}
+                        ),
+                        ["code"]
+                    )["code"]
+                )
+            # entities which don't exist are cached as well.
+            self.assertIsNone(
+                self.cache.find_one(
+                    "Shot",
+                    self._filters(
+                        {"path": "project", "relation": "is", "values": [self.project]},
+                        {"path": "id", "relation": "is", "values": [1234]}
+                    ),
+                    ["code"]
+                )
+            )
+            self.assertEqual(0, find_one_mock.call_count)
+
+        # entities which were already retrieved are not prefetched again.
+        with patch.object(self.mockgun, "find", wraps=self.mockgun.find) as find_mock:
+            self.cache.prefetch("Shot", filters, ["code"], [shot["id"] for shot in self.shots])
+            self.assertEqual(0, find_mock.call_count)
+
+    @patch.object(ShotgunQueryCache, "PREFETCH_BATCH_SIZE", 3)
+    def test_prefetch_batches(self):
+        """
+        Tests that prefetching many entities is split into several queries.
+        """
+        filters = self._filters({"path": "project", "relation": "is", "values": [self.project]})
+        with patch.object(self.mockgun, "find", wraps=self.mockgun.find) as find_mock:
+            self.cache.prefetch("Shot", filters, ["code"], [shot["id"] for shot in self.shots])
+            self.assertEqual(2, find_mock.call_count)
+
+
+class TestBatchedFolderCreation(TankTestBase):
+    """
+    Tests creating folders for several entities with batched Shotgun queries.
+    """
+
+    def setUp(self):
+        super(TestBatchedFolderCreation, self).setUp()
+        self.setup_fixtures()
+
+        self.step = {"type": "Step", "id": 3, "code": "step_code", "short_name": "step_short_name"}
+        self.seqs = [
+            {"type": "Sequence", "id": seq_id, "code": "seq_%d" % seq_id, "project": self.project}
+            for seq_id in (1, 2)
+        ]
+        self.shots = []
+        self.tasks = []
+        for shot_id in range(1, 7):
+            shot = {
+                "type": "Shot",
+                "id": shot_id,
+                "code": "shot_%d" % shot_id,
+                "sg_sequence": self.seqs[shot_id % 2],
+                "project": self.project
+            }
+            self.shots.append(shot)
+            self.tasks.append({
+                "type": "Task",
+                "id": shot_id,
+                "content": "task_%d" % shot_id,
+                "entity": shot,
+                "step": self.step,
+                "project": self.project
+            })
+
+        self.add_to_sg_mock_db(self.seqs + self.shots + self.tasks + [self.step])
+
+    def _preview_folders(self, entity_type, entity_ids, batched):
+        """
+        :returns: Tuple of the folders which would be created and the number
+                  of Shotgun queries made.
+        """
+        with patch.object(self.mockgun, "find", wraps=self.mockgun.find) as find_mock:
+            with patch.object(self.mockgun, "find_one", wraps=self.mockgun.find_one) as find_one_mock:
+                paths = folder.process_filesystem_structure(
+                    self.tk,
+                    entity_type,
+                    entity_ids,
+                    preview=True,
+                    engine=None,
+                    batched=batched
+                )
+                return sorted(paths), find_mock.call_count + find_one_mock.call_count
+
+    def test_shots(self):
+        """
+        Tests that batching reduces the number of queries without changing the folders.
+        """
+        shot_ids = [shot["id"] for shot in self.shots]
+        paths, query_count = self._preview_folders("Shot", shot_ids, False)
+        batched_paths, batched_query_count = self._preview_folders("Shot", shot_ids, True)
+
+        self.assertEqual(paths, batched_paths)
+        self.assertIn(
+            os.path.join(self.project_root, "sequences", "seq_2", "shot_5"),
+            batched_paths
+        )
+        self.assertLess(batched_query_count, query_count)
+
+    def test_tasks(self):
+        """
+        Tests batching the creation of folders for tasks.
+        """
+        task_ids = [task["id"] for task in self.tasks]
+        self.assertEqual(
+            self._preview_folders("Task", task_ids, False)[0],
+            self._preview_folders("Task", task_ids, True)[0]
+        )
+
+    def test_create_folders(self):
+        """
+        Tests creating folders in batched mode.
+        """
+        self.tk.create_filesystem_structure("Shot", [shot["id"] for shot in self.shots], batched=True)
+        for shot_id, shot in enumerate(self.shots, 1):
+            path = os.path.join(
+                self.project_root, "sequences", self.seqs[shot_id % 2]["code"], shot["code"]
+            )
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(shot["code"], self.tk.context_from_path(path).entity["name"])
@@ -0,0 +1,153 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from __future__ import with_statement
+
+import os
+
+from mock import patch
+
+from tank.folder import schema_cache
+from tank.folder.configuration import FolderConfiguration
+
+from tank_test.tank_test_base import TankTestBase, setUpModule # noqa
+
+
+class TestSchemaCache(TankTestBase):
+    """
+    Tests the caches of the compiled folder schema.
+    """
+
+    def setUp(self):
+        super(TestSchemaCache, self).setUp()
+        # the schema is edited, so work on a copy of the fixtures.
+        self.setup_fixtures(parameters={"installed_config": True})
+        self._schema_location = self.pipeline_configuration.get_schema_config_location()
+        self._cache_path = schema_cache._get_cache_path(self.pipeline_configuration)
+        schema_cache.clear_compiled_schemas()
+        self.addCleanup(schema_cache.clear_compiled_schemas)
+
+    def _load_configuration(self):
+        """
+        Loads the folder configuration.
+
+        :returns: Tuple of the configuration and a boolean which is True if the
+                  schema was compiled rather than restored from a cache.
+        """
+        with patch.object(
+            FolderConfiguration, "_compile_schema", autospec=True, side_effect=FolderConfiguration._compile_schema
+        ) as compile_mock:
+            config = FolderConfiguration(self.tk, self._schema_location)
+        return config, compile_mock.called
+
+    def _get_tree(self, config):
+        """
+        :returns: Sorted list describing all the folders of a configuration.
+        """
+        tree = []
+        folders = list(config.get_folder_objs_for_entity_type("Project"))
+        while folders:
+            cur_folder = folders.pop()
+            tree.append((repr(cur_folder), sorted(cur_folder._files), len(cur_folder._symlinks)))
+            folders.extend(cur_folder._children)
+        return sorted(tree)
+
+    def _append_to_file(self, path, text):
+        """
+        Appends text to a file.
+        """
+        with open(path, "a") as fh:
+            fh.write(text)
+
+    def test_restored_from_cache(self):
+        """
+        Makes sure the schema is restored from the caches once compiled.
+        """
+        if os.path.exists(self._cache_path):
+            os.remove(self._cache_path)
+        config, compiled = self._load_configuration()
+        self.assertTrue(compiled)
+        self.assertTrue(os.path.exists(self._cache_path))
+
+        # restored from memory
+        cached_config, compiled = self._load_configuration()
+        self.assertFalse(compiled)
+        self.assertEqual(self._get_tree(config), self._get_tree(cached_config))
+
+        # restored from disk
+        schema_cache.clear_compiled_schemas()
+        cached_config, compiled = self._load_configuration()
+        self.assertFalse(compiled)
+        self.assertEqual(self._get_tree(config), self._get_tree(cached_config))
+        self.assertEqual(
+            [repr(node) for node in config.get_task_step_nodes()],
+            [repr(node) for node in cached_config.get_task_step_nodes()]
+        )
+
+    def test_schema_changes(self):
+        """
+        Makes sure editing the schema invalidates the caches.
+        """
+        self._load_configuration()
+
+        # a new static folder
+        os.mkdir(os.path.join(self._schema_location, "project", "cache_test"))
+        config, compiled = self._load_configuration()
+        self.assertTrue(compiled)
+        self.assertIn(
+            os.path.join(self._schema_location, "project", "cache_test"),
+            [node.get_path() for node in config.get_folder_objs_for_entity_type("Project")[0]._children]
+        )
+        self.assertFalse(self._load_configuration()[1])
+
+        # a metadata file change
+        self._append_to_file(
+            os.path.join(self._schema_location, "project", "sequences", "sequence.yml"), "\n# comment\n"
+        )
+        self.assertTrue(self._load_configuration()[1])
+        self.assertFalse(self._load_configuration()[1])
+
+    def test_copies(self):
+        """
+        Makes sure each caller gets its own copy of the compiled schema.
+        """
+        compile_schema = lambda path: {"metadata": {"type": "static"}}
+        compiled_schema = schema_cache.read_compiled_schema(
+            self.pipeline_configuration, self._schema_location, compile_schema
+        )
+        compiled_schema["metadata"]["defer_creation"] = "tk-maya"
+        self.assertEqual(
+            {"metadata": {"type": "static"}},
+            schema_cache.read_compiled_schema(self.pipeline_configuration, self._schema_location, compile_schema)
+        )
+
+    def test_digest_uses_file_stats(self):
+        """
+        Makes sure the digest is computed without reading the schema files.
+        """
+        digest = schema_cache.get_schema_digest(self._schema_location)
+        with patch("__builtin__.open", side_effect=IOError("No reads")):
+            self.assertEqual(digest, schema_cache.get_schema_digest(self._schema_location))
+
+        # a modification time change is enough to change the digest.
+        metadata_path = os.path.join(self._schema_location, "project", "sequences", "sequence.yml")
+        os.utime(metadata_path, (0, 0))
+        self.assertNotEqual(digest, schema_cache.get_schema_digest(self._schema_location))
+
+    def test_corrupted_cache(self):
+        """
+        Makes sure an unreadable cache file is ignored and rewritten.
+        """
+        with open(self._cache_path, "wb") as fh:
+            fh.write("not a pickle")
+        schema_cache.clear_compiled_schemas()
+        self.assertTrue(self._load_configuration()[1])
+        schema_cache.clear_compiled_schemas()
+        self.assertFalse(self._load_configuration()[1])
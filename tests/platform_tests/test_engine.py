@@ -18,6 +18,7 @@ import os
 import sys
 import threading
 import random
+import copy
 import time
 
 from tank_test.tank_test_base import TankTestBase, skip_if_pyside_missing
@@ -408,6 +409,18 @@ class TestContextChange(TestEngineBase):
             cur_engine._set_settings(previous_settings)
             raise
 
+    def test_on_change_context_to_same_context(self):
+        """
+        Checks that changing to the current context doesn't do anything.
+        """
+        cur_engine = sgtk.platform.start_engine("test_engine", self.tk, self.context)
+
+        with mock.patch("tank.platform.engine._CoreContextChangeHookGuard") as guard_mock:
+            sgtk.platform.change_context(copy.deepcopy(self.context))
+
+        self.assertEqual(0, guard_mock.call_count)
+        self.assertEqual(id(cur_engine), id(sgtk.platform.current_engine()))
+
     def test_on_change_context_without_context_change_supporting_engine(self):
         """
         Checks that the context change event are sent when the context is changed
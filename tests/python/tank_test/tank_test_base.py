@@ -527,6 +527,7 @@ class TankTestBase(unittest.TestCase):
                 pc = path_cache.PathCache(self.tk)
                 path_cache_file = pc._get_path_cache_location()
                 pc.close()
+                path_cache.PathCache.close_pooled_connections()
                 if os.path.exists(path_cache_file):
                     os.remove(path_cache_file)
 
@@ -981,6 +982,8 @@ def _move_data(path):
             tk = sgtk.sgtk_from_path(path)
             pc = path_cache.PathCache(tk)
             db_path = pc._get_path_cache_location()
+            pc.close()
+            path_cache.PathCache.close_pooled_connections()
             if os.path.exists(db_path):
                 print('Removing db %s' % db_path)
                 # Importing pdb allows the deletion of the sqlite db sometimes...
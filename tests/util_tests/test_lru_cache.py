@@ -0,0 +1,63 @@
+# Copyright (c) 2017 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+from sgtk.util.lru_cache import LRUCache
+from tank_test.tank_test_base import ShotgunTestBase
+from tank_test.tank_test_base import setUpModule # noqa
+
+
+class TestLRUCache(ShotgunTestBase):
+    """
+    Tests for the LRUCache.
+    """
+
+    def test_get_set(self):
+        cache = LRUCache(10)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual("default", cache.get("a", "default"))
+        cache.set("a", 1)
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual(
+            {"size": 1, "max_size": 10, "hits": 1, "misses": 2},
+            cache.stats
+        )
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # reading an item makes it the most recently used one.
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+
+    def test_resize_and_clear(self):
+        cache = LRUCache(3)
+        for value in range(3):
+            cache.set(value, value)
+        cache.max_size = 1
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.get(2))
+        cache.clear(reset_stats=False)
+        self.assertEqual(
+            {"size": 0, "max_size": 1, "hits": 1, "misses": 0},
+            cache.stats
+        )
+        cache.clear()
+        self.assertEqual(
+            {"size": 0, "max_size": 1, "hits": 0, "misses": 0},
+            cache.stats
+        )
+        cache.max_size = 0
+        cache.set("a", 1)
+        self.assertEqual(0, len(cache))